@@ -0,0 +1,5 @@
+"""
+Benchmarks das views mais acessadas do ForgeLock
+
+Uso: python manage.py run_benchmarks --companies 20 --products 500 --customers 500
+"""
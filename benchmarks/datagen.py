@@ -0,0 +1,465 @@
+"""
+Gerador de dados sintéticos em grande volume (testes de escala)
+
+Os dados são gerados com NumPy em blocos de empresas. Cada bloco tem sua própria
+semente ([seed, índice do bloco]), então o resultado é o mesmo independente do
+número de processos. No PostgreSQL as tabelas grandes são gravadas com COPY em
+lotes; nos outros bancos, com bulk_create.
+"""
+
+import io
+import json
+import multiprocessing
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice, repeat
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.db import close_old_connections, connection, connections, transaction
+
+DEFAULT_PASSWORD = 'forgelock-data'
+NULL = '\\N'
+
+FIRST_NAMES = np.array([
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+    'Karina', 'Lucas', 'Mariana', 'Nicolas', 'Olívia', 'Pedro', 'Quésia', 'Rafael', 'Sofia', 'Thiago',
+    'Úrsula', 'Vitor', 'William', 'Yasmin', 'Zeca', 'Maria', 'José', 'Paula', 'Rodrigo', 'Camila',
+])
+LAST_NAMES = np.array([
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes', 'Vieira', 'Barbosa',
+])
+CITIES = np.array([
+    'São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Curitiba', 'Porto Alegre', 'Salvador', 'Recife',
+    'Fortaleza', 'Manaus', 'Goiânia', 'Campinas', 'Florianópolis', 'Lisboa', 'Madrid', 'Austin',
+])
+PRODUCT_NOUNS = np.array([
+    'Miniatura', 'Busto', 'Suporte', 'Engrenagem', 'Vaso', 'Chaveiro', 'Diorama', 'Estatueta',
+    'Peça de reposição', 'Case', 'Luminária', 'Organizador', 'Figura', 'Maquete', 'Protótipo',
+])
+PRODUCT_ADJECTIVES = np.array([
+    'Articulado', 'Clássico', 'Modular', 'Compacto', 'Detalhado', 'Gigante', 'Low Poly', 'Paramétrico',
+    'Premium', 'Resistente', 'Colecionável', 'Funcional',
+])
+COMPANY_SUFFIXES = np.array(['3D', 'Maker', 'Print Lab', 'Studio', 'Forge', 'Minis', 'Protótipos', 'Design'])
+
+
+@dataclass
+class GenerationConfig:
+    """Parâmetros da geração (médias por empresa/usuário/produto)"""
+    companies: int = 1000
+    users_per_company: int = 2
+    products_per_company: int = 500
+    images_per_product: float = 1.0
+    customers_per_company: int = 1000
+    subscriptions_per_user: int = 1
+    seed: int = 42
+    chunk_size: int = 50
+    batch_size: int = 50_000
+
+
+@dataclass
+class ReferenceData:
+    """Ids de tabelas de apoio, resolvidos uma vez no processo principal"""
+    country_ids: list
+    plan_ids: list
+    currency_ids: list
+    product_type_ids: list
+    category_ids: list
+    password_hash: str
+    now: float
+
+
+def load_reference_data():
+    """Garante as tabelas de apoio e retorna seus ids"""
+    from core.models import Country, Plan
+    from products.models import Category, Currency, ProductType
+
+    if not Country.objects.exists():
+        Country.objects.create(name='Brasil', name_en='Brazil', name_es='Brasil', code='BR', ddi='55')
+    if not Plan.objects.exists():
+        Plan.objects.create(name='Basic', description='Plano gerado')
+    for code, name, symbol in [('BRL', 'Real Brasileiro', 'R$'), ('USD', 'Dólar Americano', '$'), ('EUR', 'Euro', '€')]:
+        Currency.objects.get_or_create(code=code, defaults={'name': name, 'symbol': symbol})
+    for name in ['STL', 'Modelo Físico', 'Serviço']:
+        ProductType.objects.get_or_create(name=name)
+    if not Category.objects.exists():
+        for name in ['Miniaturas', 'Decoração', 'Peças técnicas', 'Brinquedos', 'Utilidades']:
+            Category.objects.create(name=name)
+
+    return ReferenceData(
+        country_ids=list(Country.objects.filter(is_active=True).values_list('id', flat=True))
+        or list(Country.objects.values_list('id', flat=True)),
+        plan_ids=list(Plan.objects.filter(is_active=True).values_list('id', flat=True)),
+        currency_ids=list(Currency.objects.values_list('id', flat=True)),
+        product_type_ids=list(ProductType.objects.values_list('id', flat=True)),
+        category_ids=list(Category.objects.values_list('id', flat=True)),
+        password_hash=make_password(DEFAULT_PASSWORD),
+        now=datetime.now(dt_timezone.utc).timestamp(),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Formatação vetorizada
+# ---------------------------------------------------------------------------
+
+def _cat(*parts):
+    """Concatena arrays/strings elemento a elemento"""
+    result = np.asarray(parts[0]).astype(str)
+    for part in parts[1:]:
+        result = np.char.add(result, np.asarray(part).astype(str))
+    return result
+
+
+def _zfill(values, width):
+    """np.char.zfill que aceita arrays vazios (blocos sem linhas)"""
+    values = np.asarray(values).astype(str)
+    if not values.size:
+        return values
+    return np.char.zfill(values, width)
+
+
+def _decimal(cents):
+    """Centavos (int) -> '123.45'"""
+    cents = np.asarray(cents)
+    return _cat(cents // 100, '.', _zfill(cents % 100, 2))
+
+
+def _datetime(epoch_seconds):
+    """Segundos desde 1970 -> ISO 8601 em UTC"""
+    values = np.asarray(epoch_seconds, dtype='int64').astype('datetime64[s]')
+    return np.char.add(np.datetime_as_string(values, unit='s'), '+00:00')
+
+
+def _date(epoch_days):
+    return np.datetime_as_string(np.asarray(epoch_days, dtype='int64').astype('datetime64[D]'), unit='D')
+
+
+def _copy_value(value):
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _copy_column(values):
+    if not isinstance(values, np.ndarray):
+        return repeat(_copy_value(values))
+    if values.dtype == bool:
+        return np.where(values, 't', 'f')
+    if values.dtype == object:
+        return [_copy_value(v) for v in values]
+    return values.astype(str)
+
+
+def _python_column(values, count):
+    if not isinstance(values, np.ndarray):
+        return repeat(values, count)
+    return values.tolist()
+
+
+# ---------------------------------------------------------------------------
+# Escrita em lote
+# ---------------------------------------------------------------------------
+
+def _resolve_columns(model, columns, now_iso):
+    """Completa as colunas não informadas com default/NULL/agora"""
+    resolved = {}
+    for field in model._meta.concrete_fields:
+        if field.primary_key:
+            continue
+        if field.attname in columns:
+            resolved[field] = columns[field.attname]
+        elif getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            resolved[field] = now_iso
+        elif field.has_default():
+            resolved[field] = field.get_default()
+        elif field.null:
+            resolved[field] = None
+        elif getattr(field, 'blank', False) and field.get_internal_type() in ('CharField', 'TextField'):
+            resolved[field] = ''
+        else:
+            raise ValueError(f'Coluna obrigatória sem valor: {model.__name__}.{field.attname}')
+    return resolved
+
+
+def write_rows(model, columns, count, batch_size, now_iso):
+    """
+    Grava `count` linhas de `model`. `columns` mapeia attname -> array NumPy
+    (uma posição por linha) ou escalar (mesmo valor em todas as linhas).
+    """
+    if not count:
+        return 0
+    resolved = _resolve_columns(model, columns, now_iso)
+
+    for start in range(0, count, batch_size):
+        stop = min(start + batch_size, count)
+        batch = {
+            field: values[start:stop] if isinstance(values, np.ndarray) else values
+            for field, values in resolved.items()
+        }
+
+        if connection.vendor == 'postgresql':
+            buffer = io.StringIO()
+            rows = islice(zip(*(_copy_column(values) for values in batch.values())), stop - start)
+            buffer.writelines('\t'.join(row) + '\n' for row in rows)
+            buffer.seek(0)
+            column_list = ', '.join(connection.ops.quote_name(field.column) for field in batch)
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f'COPY {connection.ops.quote_name(model._meta.db_table)} ({column_list}) FROM STDIN',
+                    buffer,
+                )
+        else:
+            names = [field.attname for field in batch]
+            model.objects.bulk_create([
+                model(**dict(zip(names, row)))
+                for row in zip(*(_python_column(values, stop - start) for values in batch.values()))
+            ], batch_size=batch_size)
+
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Geração por bloco de empresas
+# ---------------------------------------------------------------------------
+
+def generate_chunk(task):
+    """Gera um bloco de empresas com todos os dados associados"""
+    config, reference, chunk_index, first_company, company_count = task
+    from core.models import Account, Company, Subscription, User, UserCompany
+    from customers.models import Customer
+    from customers.dedupe import name_key
+    from products.models import Product, ProductImage
+
+    close_old_connections()
+    rng = np.random.default_rng([config.seed, chunk_index])
+    now = int(reference.now)
+    now_iso = _datetime([now])[0]
+    three_years = 3 * 365 * 86400
+    counts = {}
+
+    with transaction.atomic():
+        # Empresas
+        company_index = np.arange(first_company, first_company + company_count)
+        company_names = _cat(
+            rng.choice(LAST_NAMES, company_count), ' ', rng.choice(COMPANY_SUFFIXES, company_count), ' #', company_index
+        )
+        company_rows = Company.objects.bulk_create([
+            Company(
+                name=name,
+                email=f'contato{index}@empresa.example.com',
+                phone=f'11{index:09d}',
+                city=city,
+                country_id=country_id,
+            )
+            for name, index, city, country_id in zip(
+                company_names.tolist(),
+                company_index.tolist(),
+                rng.choice(CITIES, company_count).tolist(),
+                rng.choice(reference.country_ids, company_count).tolist(),
+            )
+        ])
+        company_ids = np.array([company.id for company in company_rows])
+        counts['companies'] = company_count
+
+        # Usuários (o primeiro de cada empresa é o dono)
+        user_total = company_count * config.users_per_company
+        user_index = np.arange(user_total) + first_company * config.users_per_company
+        first = rng.choice(FIRST_NAMES, user_total)
+        last = rng.choice(LAST_NAMES, user_total)
+        user_rows = User.objects.bulk_create([
+            User(
+                username=f'gen{config.seed}_{index}',
+                email=f'gen{config.seed}_{index}@example.com',
+                phone_number=f'{config.seed % 100:02d}{index:012d}',
+                first_name=first_name,
+                last_name=last_name,
+                password=reference.password_hash,
+                country_id=country_id,
+                is_verified=True,
+                is_first_access=False,
+            )
+            for index, first_name, last_name, country_id in zip(
+                user_index.tolist(), first.tolist(), last.tolist(),
+                rng.choice(reference.country_ids, user_total).tolist(),
+            )
+        ])
+        user_ids = np.array([user.id for user in user_rows])
+        user_company_ids = np.repeat(company_ids, config.users_per_company)
+        is_owner = (np.arange(user_total) % config.users_per_company) == 0
+        owner_ids = user_ids[is_owner]
+        counts['users'] = user_total
+
+        counts['user_companies'] = write_rows(UserCompany, {
+            'user_id': user_ids,
+            'company_id': user_company_ids,
+            'role': np.where(is_owner, 'owner', rng.choice(['admin', 'manager', 'member'], user_total)),
+        }, user_total, config.batch_size, now_iso)
+
+        plan_ids = rng.choice(reference.plan_ids, user_total)
+        write_rows(Account, {'user_id': user_ids, 'plan_id': plan_ids}, user_total, config.batch_size, now_iso)
+
+        # Assinaturas
+        sub_total = user_total * config.subscriptions_per_user
+        starts = now - rng.integers(0, three_years, sub_total)
+        durations = rng.choice([15, 30, 365], sub_total, p=[0.2, 0.6, 0.2]) * 86400
+        ends = starts + durations
+        statuses = np.where(
+            ends > now,
+            rng.choice(['trial', 'active'], sub_total, p=[0.3, 0.7]),
+            rng.choice(['expired', 'cancelled', 'grace_period'], sub_total, p=[0.7, 0.2, 0.1]),
+        )
+        counts['subscriptions'] = write_rows(Subscription, {
+            'user_id': np.repeat(user_ids, config.subscriptions_per_user),
+            'plan_id': np.repeat(plan_ids, config.subscriptions_per_user),
+            'status': statuses,
+            'billing_cycle': np.where(durations == 365 * 86400, 'yearly', 'monthly'),
+            'start_date': _datetime(starts),
+            'end_date': _datetime(ends),
+            'next_billing_date': _datetime(ends),
+            'created_at': _datetime(starts),
+            'updated_at': _datetime(starts),
+        }, sub_total, config.batch_size, now_iso)
+
+        # Produtos
+        per_company = rng.poisson(config.products_per_company, company_count)
+        product_total = int(per_company.sum())
+        created = now - rng.integers(0, three_years, product_total)
+        cost = rng.integers(100, 20_000, product_total)
+        category_ids = np.array(reference.category_ids + [None], dtype=object)
+        hours = rng.integers(0, 48, product_total)
+        minutes = rng.integers(0, 60, product_total)
+        dimensions = rng.integers(100, 30_000, (3, product_total))
+        dimension_units = rng.choice(['mm', 'cm', 'in'], product_total, p=[0.6, 0.35, 0.05])
+        weights = rng.integers(100, 500_000, product_total)
+        weight_units = rng.choice(['g', 'kg'], product_total, p=[0.9, 0.1])
+        # Valores canônicos (mesmo resultado de Product.update_canonical_fields), em centésimos
+        tenths_of_mm = np.select([dimension_units == 'cm', dimension_units == 'in'], [100, 254], 10)
+        dimensions_mm = (dimensions * tenths_of_mm + 5) // 10
+        weights_grams = weights * np.where(weight_units == 'kg', 1000, 1)
+        counts['products'] = write_rows(Product, {
+            'name': _cat(rng.choice(PRODUCT_NOUNS, product_total), ' ', rng.choice(PRODUCT_ADJECTIVES, product_total),
+                         ' ', rng.integers(1, 10_000, product_total)),
+            'description': 'Produto gerado para testes de escala',
+            'company_id': np.repeat(company_ids, per_company),
+            'product_type_id': rng.choice(reference.product_type_ids, product_total),
+            'category_id': category_ids[rng.integers(0, len(category_ids), product_total)],
+            'cost_price': _decimal(cost),
+            'sale_price': _decimal(cost + rng.integers(0, 30_000, product_total)),
+            'currency_id': rng.choice(reference.currency_ids, product_total),
+            'dimensions_x': _decimal(dimensions[0]),
+            'dimensions_y': _decimal(dimensions[1]),
+            'dimensions_z': _decimal(dimensions[2]),
+            'dimension_unit': dimension_units,
+            'weight': _decimal(weights),
+            'weight_unit': weight_units,
+            'print_time_estimate': _cat(hours, ':', _zfill(minutes, 2)),
+            'print_time_seconds': (hours * 60 + minutes) * 60,
+            'dimensions_x_mm': _decimal(dimensions_mm[0]),
+            'dimensions_y_mm': _decimal(dimensions_mm[1]),
+            'dimensions_z_mm': _decimal(dimensions_mm[2]),
+            'weight_grams': _decimal(weights_grams),
+            'stock_quantity': rng.integers(0, 200, product_total),
+            'is_active': rng.random(product_total) > 0.1,
+            'created_by_id': np.repeat(owner_ids, per_company),
+            'created_at': _datetime(created),
+            'updated_at': _datetime(created + rng.integers(0, 86400 * 30, product_total)),
+        }, product_total, config.batch_size, now_iso)
+
+        # Imagens (ids dos produtos lidos de volta numa única consulta)
+        product_ids = np.array(
+            Product.objects.filter(company_id__in=company_ids.tolist()).order_by('id').values_list('id', flat=True),
+            dtype='int64',
+        )
+        per_product = rng.poisson(config.images_per_product, len(product_ids))
+        image_total = int(per_product.sum())
+        image_products = np.repeat(product_ids, per_product)
+        order_index = np.arange(image_total) - np.repeat(np.cumsum(per_product) - per_product, per_product)
+        counts['product_images'] = write_rows(ProductImage, {
+            'product_id': image_products,
+            'image': _cat('products/images/generated/', image_products, '_', order_index, '.jpg'),
+            'is_primary': order_index == 0,
+            'order_index': order_index,
+            'created_at': now_iso,
+        }, image_total, config.batch_size, now_iso)
+
+        # Clientes (nome único por empresa graças ao sufixo sequencial)
+        per_company = rng.poisson(config.customers_per_company, company_count)
+        customer_total = int(per_company.sum())
+        sequence = np.arange(customer_total) - np.repeat(np.cumsum(per_company) - per_company, per_company)
+        first = rng.choice(FIRST_NAMES, customer_total)
+        last = rng.choice(LAST_NAMES, customer_total)
+        created = now - rng.integers(0, three_years, customer_total)
+        birth_days = rng.integers(-30 * 365, 35 * 365, customer_total)  # 1940..2005
+        email_domain = rng.choice(['gmail.com', 'hotmail.com', 'outlook.com', 'yahoo.com.br'], customer_total)
+        area_code = rng.integers(11, 99, customer_total)
+        subscriber = _zfill(rng.integers(0, 10 ** 8, customer_total), 8)
+        email = np.char.lower(_cat(first, '.', last, sequence, '@', email_domain))
+        name_keys = {name: name_key(name) for name in np.unique(_cat(first, ' ', last))}
+        counts['customers'] = write_rows(Customer, {
+            'company_id': np.repeat(company_ids, per_company),
+            'name': _cat(first, ' ', last, ' ', sequence),
+            'country_id': rng.choice(reference.country_ids, customer_total),
+            'phone': _cat('(', area_code, ') 9', subscriber),
+            'email': email,
+            # Chaves de bloqueio (mesmo resultado de Customer.update_dedupe_keys)
+            'name_key': np.array([name_keys[name] for name in _cat(first, ' ', last)], dtype=object),
+            'email_key': email,
+            'phone_key': _cat(area_code % 10, '9', subscriber),
+            'birth_date': np.where(rng.random(customer_total) < 0.8, _date(birth_days), None).astype(object),
+            'city': rng.choice(CITIES, customer_total),
+            'is_active': rng.random(customer_total) > 0.05,
+            'created_at': _datetime(created),
+            'updated_at': _datetime(created),
+        }, customer_total, config.batch_size, now_iso)
+
+    connection.close()
+    return counts
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'forgelock.settings')
+        django.setup()
+
+
+def generate(config, workers=1, progress=None):
+    """Gera todos os blocos (em paralelo quando workers > 1) e retorna os totais"""
+    reference = load_reference_data()
+    tasks = [
+        (config, reference, index, start, min(config.chunk_size, config.companies - start))
+        for index, start in enumerate(range(0, config.companies, config.chunk_size))
+    ]
+
+    totals = {}
+
+    def collect(counts):
+        for key, value in counts.items():
+            totals[key] = totals.get(key, 0) + value
+        if progress:
+            progress(totals, len(tasks))
+
+    if workers <= 1 or connection.vendor == 'sqlite':
+        for task in tasks:
+            collect(generate_chunk(task))
+        return totals
+
+    # Conexões não podem ser compartilhadas entre processos
+    connections.close_all()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+    with context.Pool(workers, initializer=_init_worker) as pool:
+        for counts in pool.imap_unordered(generate_chunk, tasks):
+            collect(counts)
+    return totals
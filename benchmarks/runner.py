@@ -0,0 +1,114 @@
+"""
+Execução dos cenários de benchmark com o cliente de teste do Django
+"""
+
+import statistics
+import time
+
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _logged_client(tenant):
+    client = Client()
+    client.force_login(tenant.user)
+    return client
+
+
+def scenario_home(tenant):
+    client = Client()
+    return lambda: client.get('/')
+
+
+def scenario_user_login(tenant):
+    def request():
+        # Cliente novo a cada iteração para medir o login completo
+        return Client().post('/login/', {'username': tenant.username, 'password': tenant.password})
+    return request
+
+
+def scenario_dashboard(tenant):
+    client = _logged_client(tenant)
+    return lambda: client.get('/dashboard/')
+
+
+def scenario_product_list(tenant):
+    client = _logged_client(tenant)
+    return lambda: client.get('/products/')
+
+
+def scenario_customer_search(tenant):
+    client = _logged_client(tenant)
+    return lambda: client.get('/customers/search/', {'q': 'Cliente 1'})
+
+
+SCENARIOS = {
+    'home': scenario_home,
+    'user_login': scenario_user_login,
+    'dashboard': scenario_dashboard,
+    'product_list': scenario_product_list,
+    'customer_search': scenario_customer_search,
+}
+
+
+def run_scenario(name, tenants, iterations, warmup=2):
+    """
+    Executa `iterations` requisições do cenário, alternando entre as empresas,
+    e retorna latências (ms), consultas por requisição e vazão.
+    """
+    requests = [SCENARIOS[name](tenant) for tenant in tenants]
+    
+    for i in range(warmup):
+        requests[i % len(requests)]()
+    
+    latencies = []
+    queries = []
+    statuses = {}
+    started = time.perf_counter()
+    for i in range(iterations):
+        request = requests[i % len(requests)]
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = request()
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+    reset_queries()
+    
+    return {
+        'scenario': name,
+        'requests': iterations,
+        'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+        'p50_ms': round(_percentile(latencies, 0.50), 2),
+        'p95_ms': round(_percentile(latencies, 0.95), 2),
+        'p99_ms': round(_percentile(latencies, 0.99), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'max_ms': round(max(latencies), 2),
+        'queries_per_request': round(statistics.fmean(queries), 2),
+        'max_queries': max(queries),
+        'throughput_rps': round(iterations / elapsed, 2) if elapsed else None,
+    }
+
+
+def compare(current, baseline):
+    """Diferença percentual de p95 e consultas entre duas execuções"""
+    previous = {row['scenario']: row for row in baseline.get('results', [])}
+    deltas = []
+    for row in current['results']:
+        old = previous.get(row['scenario'])
+        if not old:
+            continue
+        deltas.append({
+            'scenario': row['scenario'],
+            'p95_change_pct': round((row['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100, 1) if old['p95_ms'] else None,
+            'queries_change': round(row['queries_per_request'] - old['queries_per_request'], 2),
+        })
+    return deltas
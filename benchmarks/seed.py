@@ -0,0 +1,129 @@
+"""
+Massa de dados multiempresa para os benchmarks
+"""
+
+import random
+import secrets
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from core.models import Account, Company, Country, Plan, Subscription, User, UserCompany
+from customers.models import Customer
+from products.models import Category, Currency, Product, ProductType
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+BATCH_SIZE = 1000
+
+
+@dataclass
+class SeededTenant:
+    """Empresa criada para o benchmark e o usuário dono dela"""
+    company: Company
+    user: User
+    username: str
+    password: str = BENCHMARK_PASSWORD
+
+
+def _reference_data():
+    country, _ = Country.objects.get_or_create(
+        code='BR', defaults={'name': 'Brasil', 'name_en': 'Brazil', 'name_es': 'Brasil', 'ddi': '55'}
+    )
+    plan, _ = Plan.objects.get_or_create(
+        name='Basic', defaults={'description': 'Benchmark', 'max_products': 1_000_000, 'max_customers': 1_000_000}
+    )
+    currency, _ = Currency.objects.get_or_create(code='BRL', defaults={'name': 'Real', 'symbol': 'R$'})
+    product_types = [ProductType.objects.get_or_create(name=name)[0] for name in ['STL', 'Modelo Físico', 'Serviço']]
+    categories = [Category.objects.get_or_create(name=f'Categoria {i}')[0] for i in range(1, 6)]
+    return country, plan, currency, product_types, categories
+
+
+def seed(companies=10, products=200, customers=200, subscriptions=1, random_seed=42):
+    """
+    Cria `companies` empresas, cada uma com um usuário dono verificado,
+    `products` produtos, `customers` clientes e `subscriptions` assinaturas.
+    Retorna a lista de SeededTenant.
+    """
+    rng = random.Random(random_seed)
+    country, plan, currency, product_types, categories = _reference_data()
+    password_hash = make_password(BENCHMARK_PASSWORD)  # Hash calculado uma única vez
+    now = timezone.now()
+    # Fora do rng fixo: com --keepdb a base guarda as execuções anteriores
+    run_id = secrets.randbelow(16 ** 6)
+    
+    users = User.objects.bulk_create([
+        User(
+            username=f'bench{run_id:06x}-{i}',
+            email=f'bench{run_id:06x}-{i}@example.com',
+            phone_number=f'9{run_id:07d}{i:06d}'[:20],
+            password=password_hash,
+            country=country,
+            is_verified=True,
+            is_first_access=False,
+            first_name='Bench',
+            last_name=str(i),
+        )
+        for i in range(companies)
+    ], batch_size=BATCH_SIZE)
+    
+    company_rows = Company.objects.bulk_create([
+        Company(name=f'Empresa Benchmark {run_id:06x}-{i}', email=f'empresa{i}@example.com', phone='11999999999', country=country)
+        for i in range(companies)
+    ], batch_size=BATCH_SIZE)
+    
+    UserCompany.objects.bulk_create([
+        UserCompany(user=user, company=company, role='owner') for user, company in zip(users, company_rows)
+    ], batch_size=BATCH_SIZE)
+    Account.objects.bulk_create([Account(user=user, plan=plan) for user in users], batch_size=BATCH_SIZE)
+    
+    # bulk_create não chama Subscription.save(), então as datas são preenchidas aqui
+    Subscription.objects.bulk_create([
+        Subscription(
+            user=user,
+            plan=plan,
+            status='active' if n == 0 else 'expired',
+            start_date=now - timedelta(days=30 * (n + 1)),
+            end_date=now + timedelta(days=30) if n == 0 else now - timedelta(days=30 * n),
+            next_billing_date=now + timedelta(days=30),
+        )
+        for user in users for n in range(subscriptions)
+    ], batch_size=BATCH_SIZE)
+    
+    for user, company in zip(users, company_rows):
+        Product.objects.bulk_create([
+            Product(
+                name=f'Produto {i}',
+                description=f'Produto de benchmark {i}',
+                company=company,
+                product_type=rng.choice(product_types),
+                category=rng.choice(categories),
+                cost_price=Decimal(rng.randint(100, 10_000)) / 100,
+                sale_price=Decimal(rng.randint(10_000, 50_000)) / 100,
+                currency=currency,
+                stock_quantity=rng.randint(0, 100),
+                is_active=rng.random() > 0.1,
+                created_by=user,
+            )
+            for i in range(products)
+        ], batch_size=BATCH_SIZE)
+        
+        company_customers = [
+            Customer(
+                company=company,
+                name=f'Cliente {i}',
+                country=country,
+                phone=f'11{rng.randrange(10 ** 9):09d}',
+                email=f'cliente{i}@example.com',
+                birth_date=date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 55)),
+                is_active=rng.random() > 0.1,
+            )
+            for i in range(customers)
+        ]
+        for customer in company_customers:
+            customer.update_dedupe_keys()  # bulk_create não chama save()
+        Customer.objects.bulk_create(company_customers, batch_size=BATCH_SIZE)
+    
+    return [SeededTenant(company=company, user=user, username=user.username) for user, company in zip(users, company_rows)]
@@ -1,8 +1,35 @@
+import ipaddress
+from datetime import timedelta
+
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.helpers import ActionForm
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import F, Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.utils.safestring import mark_safe
-from .models import User, Country, Plan, Company, Account, LoginAttempt, Subscription, PlanPrice, UserCompany
+from .admin_scaling import ScalableAdminMixin, related_count
+from .models import User, Country, Plan, Company, Account, LoginAttempt, Subscription, PlanPrice, UserCompany, UsageCounter, BulkJob
+from .quotas import QuotaService
+
+
+DEFAULT_TRIAL_EXTENSION_DAYS = 15
+GRACE_PERIOD_DAYS = 15
+
+
+class PlanActionForm(ActionForm):
+    """Campos extras da barra de ações: dias (prorrogar trial) e plano (trocar plano)"""
+    days = forms.IntegerField(label=_('Dias'), required=False, min_value=1, max_value=365)
+    plan = forms.ModelChoiceField(label=_('Plano'), queryset=Plan.objects.filter(is_active=True), required=False)
+
+
+def _action_plan(modeladmin, request):
+    """Plano escolhido na barra de ações, ou None (com aviso)"""
+    plan = Plan.objects.filter(pk=request.POST.get('plan') or None).first()
+    if plan is None:
+        modeladmin.message_user(request, _('Escolha o plano na barra de ações.'), level='warning')
+    return plan
 
 
 @admin.register(Country)
@@ -26,9 +53,10 @@ class PlanPriceAdmin(admin.ModelAdmin):
 
 
 @admin.register(Company)
-class CompanyAdmin(admin.ModelAdmin):
+class CompanyAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'phone', 'country', 'is_active', 'users_count']
     list_filter = ['is_active', 'country']
+    list_select_related = ['country']
     search_fields = ['name', 'email']
     readonly_fields = ['users_list']
     
@@ -43,9 +71,14 @@ class CompanyAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        # Total de usuários em subconsulta: calculado só para as linhas da página
+        return super().get_queryset(request).annotate(users_total=related_count(UserCompany, 'company'))
+    
     def users_count(self, obj):
-        return obj.user_set.count()
+        return obj.users_total
     users_count.short_description = _('Usuários')
+    users_count.admin_order_field = 'users_total'
     
     def users_list(self, obj):
         """Exibe a lista de usuários associados à empresa com seus roles"""
@@ -67,82 +100,109 @@ class CompanyAdmin(admin.ModelAdmin):
 
 
 @admin.register(Account)
-class AccountAdmin(admin.ModelAdmin):
+class AccountAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'plan', 'is_active', 'created_at']
     list_filter = ['is_active', 'plan']
+    list_select_related = ['user', 'plan']
+    search_fields = ['=user__username', '=user__email']
+    raw_id_fields = ['user']
+    action_form = PlanActionForm
+    actions = ['change_plan', 'deactivate_accounts']
+    
+    def change_plan(self, request, queryset):
+        """Troca o plano das contas selecionadas (um UPDATE)"""
+        plan = _action_plan(self, request)
+        if plan is None:
+            return
+        updated = queryset.update(plan=plan, updated_at=timezone.now())
+        QuotaService.invalidate()  # update() não dispara os sinais
+        self.message_user(request, f'{updated} conta(s) movida(s) para o plano {plan}.')
+    change_plan.short_description = _('Trocar plano')
+    
+    def deactivate_accounts(self, request, queryset):
+        """Desativa as contas selecionadas (um UPDATE)"""
+        updated = queryset.update(is_active=False, updated_at=timezone.now())
+        self.message_user(request, f'{updated} conta(s) desativada(s).')
+    deactivate_accounts.short_description = _('Desativar contas')
 
 
 @admin.register(Subscription)
-class SubscriptionAdmin(admin.ModelAdmin):
+class SubscriptionAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'plan', 'status', 'billing_cycle', 'start_date', 'end_date', 'is_active', 'grace_period_until']
     list_filter = ['status', 'billing_cycle', 'plan', 'auto_renew']
-    search_fields = ['user__email', 'user__username']
+    list_select_related = ['user', 'plan']
+    search_fields = ['=user__email', '=user__username']
     readonly_fields = ['created_at', 'updated_at']
-    actions = ['check_subscription_status', 'force_grace_period', 'send_notification', 'check_all_subscriptions']
+    raw_id_fields = ['user']
+    action_form = PlanActionForm
+    actions = [
+        'extend_trial', 'change_plan', 'check_subscription_status', 'force_grace_period',
+        'send_notification', 'check_all_subscriptions',
+    ]
     
     def is_active(self, obj):
         return obj.is_active()
     is_active.boolean = True
     is_active.short_description = _('Ativa')
     
+    def extend_trial(self, request, queryset):
+        """Prorroga o trial das assinaturas selecionadas (um UPDATE; dias na barra de ações)"""
+        days = int(request.POST.get('days') or DEFAULT_TRIAL_EXTENSION_DAYS)
+        updated = queryset.filter(status='trial').update(
+            end_date=F('end_date') + timedelta(days=days), updated_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} trial(s) prorrogado(s) em {days} dia(s).')
+    extend_trial.short_description = _('Prorrogar trial')
+    
+    def change_plan(self, request, queryset):
+        """Troca o plano das assinaturas selecionadas e das contas dos usuários (dois UPDATEs)"""
+        plan = _action_plan(self, request)
+        if plan is None:
+            return
+        now = timezone.now()
+        updated = queryset.update(plan=plan, updated_at=now)
+        Account.objects.filter(user__in=queryset.values('user')).update(plan=plan, updated_at=now)
+        QuotaService.invalidate()  # update() não dispara os sinais
+        self.message_user(request, f'{updated} assinatura(s) movida(s) para o plano {plan}.')
+    change_plan.short_description = _('Trocar plano')
+    
     def check_subscription_status(self, request, queryset):
-        """Verifica o status da assinatura selecionada"""
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        updated = 0
-        for subscription in queryset:
-            # Verificar se expirou
-            if subscription.status in ['active', 'trial'] and subscription.end_date <= timezone.now():
-                subscription.status = 'grace_period'
-                subscription.grace_period_until = timezone.now() + timedelta(days=15)
-                subscription.save()
-                updated += 1
-                self.message_user(request, f'Assinatura de {subscription.user.email} movida para período de carência.')
-            
-            # Verificar se carência acabou
-            elif subscription.status == 'grace_period' and subscription.grace_period_until and subscription.grace_period_until <= timezone.now():
-                subscription.status = 'expired'
-                subscription.save()
-                updated += 1
-                self.message_user(request, f'Assinatura de {subscription.user.email} expirada (carência encerrada).')
+        """Verifica o status das assinaturas selecionadas (um UPDATE por transição)"""
+        now = timezone.now()
+        # Expiradas vão para o período de carência
+        to_grace = queryset.filter(status__in=['active', 'trial'], end_date__lte=now).update(
+            status='grace_period', grace_period_until=now + timedelta(days=GRACE_PERIOD_DAYS), updated_at=now
+        )
+        # Carência encerrada: assinatura expira
+        to_expired = queryset.filter(status='grace_period', grace_period_until__lte=now).update(
+            status='expired', updated_at=now
+        )
         
-        if updated == 0:
+        if to_grace + to_expired == 0:
             self.message_user(request, 'Nenhuma assinatura precisava de atualização.')
         else:
-            self.message_user(request, f'{updated} assinatura(s) atualizada(s).')
+            self.message_user(
+                request,
+                f'{to_grace} assinatura(s) movida(s) para período de carência; {to_expired} expirada(s) (carência encerrada).'
+            )
     
     check_subscription_status.short_description = "Verificar status da assinatura"
     
     def force_grace_period(self, request, queryset):
-        """Força período de carência para assinaturas selecionadas"""
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        updated = 0
-        for subscription in queryset:
-            if subscription.status in ['active', 'trial']:
-                subscription.status = 'grace_period'
-                subscription.grace_period_until = timezone.now() + timedelta(days=15)
-                subscription.save()
-                updated += 1
-        
+        """Força período de carência para assinaturas selecionadas (um UPDATE)"""
+        now = timezone.now()
+        updated = queryset.filter(status__in=['active', 'trial']).update(
+            status='grace_period', grace_period_until=now + timedelta(days=GRACE_PERIOD_DAYS), updated_at=now
+        )
         self.message_user(request, f'{updated} assinatura(s) movida(s) para período de carência.')
     
     force_grace_period.short_description = "Forçar período de carência"
     
     def send_notification(self, request, queryset):
-        """Envia notificação para assinaturas selecionadas"""
-        from django.utils import timezone
-        
-        sent = 0
-        for subscription in queryset:
-            if subscription.status in ['active', 'trial']:
-                subscription.last_notification_sent = timezone.now()
-                subscription.save()
-                sent += 1
-                # TODO: Implementar envio real de email/SMS
-                self.message_user(request, f'Notificação enviada para {subscription.user.email}.')
+        """Marca a notificação das assinaturas selecionadas (um UPDATE)"""
+        now = timezone.now()
+        # TODO: Implementar envio real de email/SMS
+        sent = queryset.filter(status__in=['active', 'trial']).update(last_notification_sent=now, updated_at=now)
         
         if sent == 0:
             self.message_user(request, 'Nenhuma notificação foi enviada.')
@@ -168,18 +228,55 @@ class SubscriptionAdmin(admin.ModelAdmin):
 
 
 @admin.register(LoginAttempt)
-class LoginAttemptAdmin(admin.ModelAdmin):
+class LoginAttemptAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['username', 'ip_address', 'success', 'timestamp']
-    list_filter = ['success', 'timestamp', 'ip_address']
+    list_filter = ['success', 'timestamp']
     search_fields = ['username', 'ip_address']
+    search_help_text = _('Usuário ou IP exatos')
     readonly_fields = ['timestamp']
     
     def has_add_permission(self, request):
         return False  # Não permitir adicionar manualmente
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Igualdade em usuário ou IP (índices login_attempt_user_time/ip)"""
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        try:
+            ipaddress.ip_address(term)
+        except ValueError:
+            return queryset.filter(username=term), False
+        return queryset.filter(Q(ip_address=term) | Q(username=term)), False
+
+
+@admin.register(UsageCounter)
+class UsageCounterAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ['resource', 'company', 'account', 'value', 'reconciled_at']
+    list_filter = ['resource']
+    list_select_related = ['company', 'account__user']
+    search_fields = ['=company__name', '=account__user__email']
+    raw_id_fields = ['company', 'account']
+    readonly_fields = ['value', 'reconciled_at', 'created_at']
+    
+    def has_add_permission(self, request):
+        return False  # Criados pelo QuotaService; corrigidos por reconcile_usage
+
+
+@admin.register(BulkJob)
+class BulkJobAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ['id', 'user', 'company', 'status', 'done', 'total', 'created_at', 'updated_at']
+    list_filter = ['status']
+    list_select_related = ['user', 'company']
+    raw_id_fields = ['user', 'company']
+    readonly_fields = ['status', 'total', 'done', 'error', 'created_at', 'updated_at']
+    
+    def has_add_permission(self, request):
+        return False  # Criados pelas ações em lote (core.bulk)
 
 
 # Configuração personalizada do UserAdmin
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(ScalableAdminMixin, UserAdmin):
     fieldsets = (
         (None, {'fields': ('username', 'password')}),
         (_('Informações pessoais'), {'fields': ('first_name', 'last_name', 'email', 'phone_number', 'country', 'birth_date', 'website')}),
@@ -202,13 +299,26 @@ class CustomUserAdmin(UserAdmin):
     )
     list_display = ['username', 'email', 'first_name', 'last_name', 'is_staff', 'is_verified', 'companies_count']
     list_filter = ['is_staff', 'is_superuser', 'is_active', 'is_verified', 'country']
-    search_fields = ['username', 'first_name', 'last_name', 'email']
-    ordering = ['username']
+    # Igualdade sem diferenciar maiúsculas: usa os índices UPPER(username)/UPPER(email)
+    search_fields = ['=username', '=email']
+    search_help_text = _('Usuário ou e-mail exatos')
     readonly_fields = ['companies_list']
+    actions = ['deactivate_users']
+    
+    def get_queryset(self, request):
+        # Total de empresas em subconsulta: calculado só para as linhas da página
+        return super().get_queryset(request).annotate(companies_total=related_count(UserCompany, 'user'))
     
     def companies_count(self, obj):
-        return obj.companies.count()
+        return obj.companies_total
     companies_count.short_description = _('Empresas')
+    companies_count.admin_order_field = 'companies_total'
+    
+    def deactivate_users(self, request, queryset):
+        """Desativa os usuários selecionados (um UPDATE; nunca o próprio usuário)"""
+        updated = queryset.exclude(pk=request.user.pk).update(is_active=False)
+        self.message_user(request, f'{updated} usuário(s) desativado(s).')
+    deactivate_users.short_description = _('Desativar usuários')
     
     def companies_list(self, obj):
         """Exibe a lista de empresas do usuário com seus roles"""
@@ -230,12 +340,20 @@ class CustomUserAdmin(UserAdmin):
 
 
 @admin.register(UserCompany)
-class UserCompanyAdmin(admin.ModelAdmin):
+class UserCompanyAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'company', 'role', 'is_active', 'created_at']
     list_filter = ['role', 'is_active', 'created_at']
-    search_fields = ['user__username', 'user__email', 'company__name']
+    list_select_related = ['user', 'company']
+    search_fields = ['=user__username', '=user__email', '=company__name']
     readonly_fields = ['created_at', 'updated_at']
-    ordering = ['-created_at']
+    raw_id_fields = ['user', 'company']
+    actions = ['deactivate_links']
+    
+    def deactivate_links(self, request, queryset):
+        """Desativa os vínculos selecionados (um UPDATE)"""
+        updated = queryset.update(is_active=False, updated_at=timezone.now())
+        self.message_user(request, f'{updated} vínculo(s) desativado(s).')
+    deactivate_links.short_description = _('Desativar vínculos')
 
 
 admin.site.register(User, CustomUserAdmin)
@@ -0,0 +1,143 @@
+"""
+Changelists do admin para tabelas grandes
+
+O changelist padrão conta todas as linhas (COUNT(*) com os filtros e outro sem
+eles), pagina com OFFSET (cada página custa ler todas as anteriores) e busca
+com `icontains` (varredura completa). Aqui:
+
+- a contagem vem da estimativa do planejador do PostgreSQL (EXPLAIN, sem
+  executar a consulta); abaixo de EXACT_COUNT_THRESHOLD, ou em outros
+  bancos, conta de verdade;
+- na ordenação padrão (pela chave `keyset_field`), a paginação é por chave:
+  `?after=<chave>` / `?before=<chave>` viram `WHERE chave < x ORDER BY chave
+  LIMIT n`, custo constante em qualquer página. Ordenando por outra coluna,
+  volta a paginação por OFFSET (com a contagem estimada);
+- contagens por linha viram subconsultas anotadas e as FKs exibidas entram
+  no `list_select_related`; as buscas usam igualdade em campos indexados.
+"""
+
+import json
+
+from django.contrib.admin.options import IncorrectLookupParameters, ShowFacets
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+
+
+AFTER_VAR = 'after'
+BEFORE_VAR = 'before'
+CURSOR_VARS = (AFTER_VAR, BEFORE_VAR)
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def estimate_count(queryset):
+    """Linhas estimadas pelo planejador do PostgreSQL, ou None em outros bancos"""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().values('pk').explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def related_count(model, field, **filters):
+    """Subconsulta com o total de `model` ligados à linha (para anotar no changelist)"""
+    rows = model.objects.filter(**{field: OuterRef('pk')}, **filters).order_by()
+    return Coalesce(Subquery(rows.values(field).annotate(total=Count('pk')).values('total')), 0)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator que usa a estimativa do planejador quando a tabela é grande"""
+
+    is_estimate = False
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate >= EXACT_COUNT_THRESHOLD:
+            self.is_estimate = True
+            return estimate
+        return super().count
+
+
+class KeysetChangeList(ChangeList):
+    """ChangeList com paginação por chave na ordenação padrão"""
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        for name in CURSOR_VARS:
+            lookup_params.pop(name, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Links de filtro/ordenação sempre voltam para a primeira página
+        new_params = new_params or {}
+        remove = list(remove or []) + [name for name in CURSOR_VARS if name not in new_params]
+        return super().get_query_string(new_params, remove)
+
+    @property
+    def keyset(self):
+        return ORDER_VAR not in self.params and not self.show_all and not self.list_editable
+
+    def get_results(self, request):
+        self.count_is_estimate = False
+        if not self.keyset:
+            super().get_results(request)
+            self.count_is_estimate = getattr(self.paginator, 'is_estimate', False)
+            return
+
+        field = self.model_admin.keyset_field
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        after = self.params.get(AFTER_VAR)
+        before = self.params.get(BEFORE_VAR)
+
+        rows = self.queryset.order_by(field)
+        try:
+            if after:
+                rows = rows.filter(**{f'{name}__{"lt" if descending else "gt"}': after})
+            elif before:
+                rows = rows.filter(**{f'{name}__{"gt" if descending else "lt"}': before}).reverse()
+            rows = list(rows[:self.list_per_page + 1])
+        except (ValueError, ValidationError) as error:
+            raise IncorrectLookupParameters(error) from error
+        more = len(rows) > self.list_per_page
+        rows = rows[:self.list_per_page]
+        if before:
+            rows.reverse()
+
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.result_count = self.paginator.count
+        self.count_is_estimate = getattr(self.paginator, 'is_estimate', False)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.result_list = rows
+        self.can_show_all = False
+
+        has_next = more if not before else True
+        has_previous = bool(after) or (bool(before) and more)
+        self.multi_page = has_next or has_previous
+        self.next_url = self.get_query_string({AFTER_VAR: getattr(rows[-1], name)}) if has_next and rows else None
+        self.previous_url = self.get_query_string({BEFORE_VAR: getattr(rows[0], name)}) if has_previous and rows else None
+        self.first_url = self.get_query_string() if has_previous else None
+
+
+class ScalableAdminMixin:
+    """
+    ModelAdmin para tabelas grandes: contagem estimada, paginação por chave,
+    sem facetas nem contagem total sem filtros
+    """
+
+    keyset_field = '-pk'
+    ordering = ('-pk',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = ShowFacets.NEVER
+    change_list_template = 'admin/keyset_change_list.html'
+    list_per_page = 100
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -0,0 +1,171 @@
+"""
+Ações em lote sobre seleções da empresa
+
+Aplica UPDATE/DELETE em blocos de chaves primárias: cada bloco é um único
+comando restrito à empresa (`company_id = ... AND id IN (...)`) em sua própria
+transação, o que mantém os locks curtos em catálogos grandes. Seleções acima de
+BACKGROUND_THRESHOLD rodam em uma thread de fundo, com o estado em BulkJob (no
+banco): qualquer worker responde `job_status`. O job atualiza a linha a cada
+bloco; se o worker morrer (deploy, reinício), a linha para de andar e, passado
+ORPHAN_TIMEOUT, o job é marcado como falho em vez de ficar "executando" para
+sempre.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .models import BulkJob
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+BACKGROUND_THRESHOLD = 5000
+ORPHAN_TIMEOUT = timedelta(minutes=10)
+
+
+def run_in_chunks(company, queryset, operation, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Executa `operation` bloco a bloco sobre a seleção
+
+    queryset: seleção (já filtrada) de um modelo com FK `company`
+    operation: recebe a queryset do bloco e retorna quantas linhas afetou
+    progress: callback opcional chamado com o total processado após cada bloco
+    """
+    model = queryset.model
+    selection = queryset.order_by('pk')
+    last_pk = None
+    done = 0
+
+    while True:
+        chunk = selection if last_pk is None else selection.filter(pk__gt=last_pk)
+        pks = list(chunk.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            break
+
+        with transaction.atomic():
+            done += operation(model._base_manager.filter(company=company, pk__in=pks))
+
+        last_pk = pks[-1]
+        if progress:
+            progress(done)
+
+    return done
+
+
+def _save_job(job_id, **values):
+    # update() com updated_at explícito: é o sinal de vida do job
+    BulkJob.objects.filter(pk=job_id).update(updated_at=timezone.now(), **values)
+
+
+def start_job(user, company, queryset, operation, total, chunk_size=CHUNK_SIZE):
+    """Agenda a ação em uma thread de fundo e retorna o id do job"""
+    job = BulkJob.objects.create(user=user, company=company, total=total)
+
+    def run():
+        _save_job(job.pk, status=BulkJob.STATUS_RUNNING)
+        try:
+            done = run_in_chunks(
+                company, queryset, operation, chunk_size,
+                progress=lambda done: _save_job(job.pk, done=done),
+            )
+            _save_job(job.pk, status=BulkJob.STATUS_FINISHED, done=done)
+        except ValidationError as exc:
+            # Recusa prevista (ex.: limite do plano): a mensagem vai para o usuário
+            _save_job(job.pk, status=BulkJob.STATUS_FAILED, error=exc.messages[0])
+        except Exception as exc:
+            logger.exception('Falha no job em lote %s', job.pk)
+            _save_job(job.pk, status=BulkJob.STATUS_FAILED, error=str(exc))
+        finally:
+            connection.close()
+
+    # Só dispara depois do commit da requisição que criou o job
+    transaction.on_commit(lambda: threading.Thread(target=run, name=f'bulk-{job.pk.hex}', daemon=True).start())
+    return job.pk.hex
+
+
+def fail_orphaned_jobs():
+    """Marca como falhos os jobs parados há mais de ORPHAN_TIMEOUT (worker reiniciado)"""
+    return BulkJob.objects.filter(
+        status__in=[BulkJob.STATUS_QUEUED, BulkJob.STATUS_RUNNING],
+        updated_at__lt=timezone.now() - ORPHAN_TIMEOUT,
+    ).update(status=BulkJob.STATUS_FAILED, error=_('common.bulk.orphaned'), updated_at=timezone.now())
+
+
+def job_status(job_id, user):
+    """Estado do job, ou None se não existir ou não pertencer ao usuário"""
+    try:
+        job = BulkJob.objects.filter(pk=job_id, user=user).first()
+    except ValidationError:
+        return None
+    if job is None:
+        return None
+    if job.status in (BulkJob.STATUS_QUEUED, BulkJob.STATUS_RUNNING) and job.updated_at < timezone.now() - ORPHAN_TIMEOUT:
+        fail_orphaned_jobs()
+        job.refresh_from_db()
+    return {
+        'id': job.pk.hex,
+        'user_id': job.user_id,
+        'status': job.status,
+        'total': job.total,
+        'done': job.done,
+        'error': job.error,
+        'percent': 100 if not job.total else min(100, round(job.done * 100 / job.total)),
+    }
+
+
+def dispatch(user, company, queryset, operation, background=None, chunk_size=CHUNK_SIZE):
+    """
+    Executa a ação agora ou em segundo plano
+
+    Retorna {'total', 'count'} quando executada na hora, ou {'total', 'job_id'}
+    quando agendada. `background=None` decide pelo tamanho da seleção.
+    """
+    total = queryset.count()
+    if background is None:
+        background = total > BACKGROUND_THRESHOLD
+
+    if background and total:
+        return {'total': total, 'job_id': start_job(user, company, queryset, operation, total, chunk_size)}
+    return {'total': total, 'count': run_in_chunks(company, queryset, operation, chunk_size)}
+
+
+def selected_ids(request):
+    """Ids marcados na listagem (campo `ids`), ignorando valores inválidos"""
+    return [int(value) for value in request.POST.getlist('ids') if value.isdigit()]
+
+
+def select_all(request):
+    """Indica se a ação vale para todos os resultados dos filtros da listagem"""
+    return request.POST.get('select_all') == '1'
+
+
+def requested_background(request):
+    """`background=1` força o modo em segundo plano; ausente, decide pelo tamanho"""
+    return True if request.POST.get('background') == '1' else None
+
+
+def json_response(result):
+    """Resposta dos endpoints de ação em lote"""
+    if 'job_id' in result:
+        return JsonResponse({
+            'success': True,
+            'total': result['total'],
+            'job_id': result['job_id'],
+            'status_url': reverse('bulk_job_status', args=[result['job_id']]),
+            'message': _('common.bulk.started').format(result['total']),
+        }, status=202)
+    return JsonResponse({
+        'success': True,
+        'total': result['total'],
+        'count': result['count'],
+        'message': _('common.bulk.done').format(result['count']),
+    })
@@ -1,8 +1,13 @@
+import hashlib
 from functools import wraps
+from django.conf import settings
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.decorators import login_required
+from django.utils import timezone, translation
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
 
 def subscription_required(view_func):
@@ -100,4 +105,61 @@ def check_subscription_status(view_func):
         
         return view_func(request, *args, **kwargs)
     
-    return _wrapped_view 
\ No newline at end of file
+    return _wrapped_view
+
+
+def _account_version(user):
+    """
+    Versão do que o base.html mostra da conta: plano atual e dias de trial
+
+    Mudam sem tocar nos dados da página (troca de plano, extensão do trial,
+    passagem do dia), então entram no ETag de toda página condicional.
+    """
+    from .models import Account, Subscription
+
+    account = Account.objects.filter(user=user).values_list(
+        'plan_id', 'plan__name', 'plan__updated_at', 'is_active', 'updated_at',
+    ).first()
+    subscriptions = list(
+        Subscription.objects.filter(user=user).order_by('pk')
+        .values_list('pk', 'status', 'plan_id', 'end_date', 'updated_at')
+    )
+    now = timezone.now()
+    days_remaining = [(end_date - now).days for _pk, status, _plan, end_date, _updated in subscriptions if status == 'trial']
+    return account, subscriptions, days_remaining
+
+
+def conditional_view(validator):
+    """
+    Decorator que responde 304 (Not Modified) quando a página não mudou.
+    `validator(request, *args, **kwargs)` deve retornar um valor barato (ex.: MAX(updated_at)
+    e COUNT da queryset da empresa) que muda sempre que os dados exibidos mudam,
+    ou None para renderizar normalmente.
+    """
+    def etag_func(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return None
+        
+        # Mensagens pendentes precisam ser exibidas: não reaproveitar a página
+        if request.COOKIES.get('messages') or request.session.get('_messages'):
+            return None
+        
+        value = validator(request, *args, **kwargs)
+        if value is None:
+            return None
+        
+        raw = '|'.join(str(part) for part in [
+            value,
+            _account_version(request.user),
+            request.user.pk,
+            translation.get_language(),
+            request.get_full_path(),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        ])
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    
+    def decorator(view_func):
+        # no-cache: o navegador guarda a página, mas sempre revalida pelo ETag
+        return cache_control(private=True, no_cache=True)(condition(etag_func=etag_func)(view_func))
+    
+    return decorator
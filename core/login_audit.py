@@ -0,0 +1,249 @@
+"""
+Armazenamento das tentativas de login (auditoria)
+
+No PostgreSQL, core_loginattempt é particionada por dia (RANGE em
+"timestamp", dias em UTC), com uma partição DEFAULT para o que cair fora das
+partições criadas. A migração 0023 converte a tabela; daí em diante `maintain`
+(comando maintain_login_attempts, agendado diariamente):
+
+- cria as partições dos próximos AHEAD_DAYS dias;
+- exporta as partições anteriores a LOGIN_ATTEMPT_RETENTION_DAYS para CSV
+  compactado (gzip) em LOGIN_ATTEMPT_ARCHIVE_ROOT e as remove com DETACH +
+  DROP: nenhum DELETE linha a linha, nenhuma tabela inchada para o VACUUM.
+
+Consultas que limitam "timestamp" (bloqueio de login, listas recentes) só
+leem as partições do intervalo. Em outros bancos (SQLite em desenvolvimento)
+a tabela é comum e a retenção exporta e apaga dia a dia.
+"""
+
+import csv
+import gzip
+import io
+import re
+import tempfile
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import LoginAttempt
+
+
+TABLE = LoginAttempt._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+LEGACY_PARTITION = f'{TABLE}_legacy'
+AHEAD_DAYS = 7
+ARCHIVE_FIELDS = ['id', 'timestamp', 'username', 'ip_address', 'success', 'user_agent']
+ARCHIVE_CHUNK = 5000
+
+_BOUNDS = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def archive_storage():
+    """Storage local e privado dos arquivos de auditoria"""
+    return FileSystemStorage(location=settings.LOGIN_ATTEMPT_ARCHIVE_ROOT)
+
+
+def day_start(day):
+    """Início do dia em UTC (limite das partições)"""
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+def partition_name(day):
+    return f'{TABLE}_p{day:%Y%m%d}'
+
+
+def create_partition(cursor, name, lower, upper):
+    """
+    Cria a partição [lower, upper) (lower None = MINVALUE)
+
+    Linhas do intervalo que caíram na DEFAULT passam para a nova partição
+    (o PostgreSQL recusa a partição enquanto a DEFAULT tiver linhas dela).
+    """
+    quote = connection.ops.quote_name
+    parent, default = quote(TABLE), quote(DEFAULT_PARTITION)
+    where, params = '"timestamp" < %s', [upper]
+    if lower is not None:
+        where, params = f'"timestamp" >= %s AND {where}', [lower, upper]
+
+    cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {default} WHERE {where})', params)
+    stray = cursor.fetchone()[0]
+    if stray:
+        cursor.execute(f'ALTER TABLE {parent} DETACH PARTITION {default}')
+    cursor.execute(
+        f'CREATE TABLE {quote(name)} PARTITION OF {parent} '
+        f'FOR VALUES FROM ({"MINVALUE" if lower is None else "%s"}) TO (%s)',
+        [upper] if lower is None else [lower, upper],
+    )
+    if stray:
+        cursor.execute(f'INSERT INTO {quote(name)} SELECT * FROM {default} WHERE {where}', params)
+        cursor.execute(f'DELETE FROM {default} WHERE {where}', params)
+        cursor.execute(f'ALTER TABLE {parent} ATTACH PARTITION {default} DEFAULT')
+
+
+class LoginAuditStore:
+    """Partições, retenção e arquivo das tentativas de login"""
+
+    @staticmethod
+    def is_partitioned():
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [TABLE])
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def partitions():
+        """[(nome, início, fim)] das partições por intervalo, da mais antiga à mais nova (início None = MINVALUE)"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+                FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE pg_inherits.inhparent = to_regclass(%s)
+                """,
+                [TABLE],
+            )
+            rows = cursor.fetchall()
+        partitions = []
+        for name, bounds in rows:
+            match = _BOUNDS.search(bounds)
+            if match is None:  # DEFAULT
+                continue
+            lower, upper = (
+                None if value == 'MINVALUE' else parse_datetime(value.strip("'")) for value in match.groups()
+            )
+            partitions.append((name, lower, upper))
+        return sorted(partitions, key=lambda partition: (partition[1] is not None, partition[1] or partition[2]))
+
+    @classmethod
+    def ensure_partitions(cls, ahead=AHEAD_DAYS):
+        """Cria as partições diárias de hoje até `ahead` dias à frente; retorna os nomes criados"""
+        if not cls.is_partitioned():
+            return []
+        today = timezone.now().astimezone(dt_timezone.utc).date()
+        existing = cls.partitions()
+        created = []
+        for offset in range(ahead + 1):
+            day = today + timedelta(days=offset)
+            lower, upper = day_start(day), day_start(day + timedelta(days=1))
+            if any((start is None or start < upper) and end > lower for _name, start, end in existing):
+                continue
+            with transaction.atomic(), connection.cursor() as cursor:
+                create_partition(cursor, partition_name(day), lower, upper)
+            created.append(partition_name(day))
+        return created
+
+    @staticmethod
+    def archive(name, lower, upper):
+        """
+        Exporta as tentativas de [lower, upper) para CSV gzip
+
+        Lê pelo modelo com o intervalo no filtro (só a partição do intervalo é
+        lida) em um cursor do lado do servidor. Retorna (arquivo, linhas);
+        arquivo é None se não havia linhas.
+        """
+        attempts = LoginAttempt.objects.filter(timestamp__lt=upper)
+        if lower is not None:
+            attempts = attempts.filter(timestamp__gte=lower)
+        rows = attempts.order_by('timestamp', 'id').values_list(*ARCHIVE_FIELDS).iterator(chunk_size=ARCHIVE_CHUNK)
+
+        total = 0
+        with tempfile.TemporaryFile() as buffer:
+            with io.TextIOWrapper(gzip.GzipFile(fileobj=buffer, mode='wb'), encoding='utf-8', newline='') as text:
+                writer = csv.writer(text)
+                writer.writerow(ARCHIVE_FIELDS)
+                for row in rows:
+                    writer.writerow(row)
+                    total += 1
+            if not total:
+                return None, 0
+            buffer.seek(0)
+            path = archive_storage().save(f'login_attempts/{upper:%Y}/{name}.csv.gz', File(buffer))
+        return path, total
+
+    @classmethod
+    def prune(cls, retention_days=None, archive=True, dry_run=False):
+        """
+        Remove (e arquiva) as tentativas anteriores à retenção
+
+        Particionada: cada partição inteira antes do corte é arquivada e sai
+        com DETACH + DROP; linhas antigas que caíram na DEFAULT saem com um
+        DELETE por intervalo. Sem partições: arquiva e apaga dia a dia.
+        Retorna [(nome, linhas, arquivo)] do que saiu (ou sairia, em dry_run).
+        """
+        if retention_days is None:
+            retention_days = settings.LOGIN_ATTEMPT_RETENTION_DAYS
+        today = timezone.now().astimezone(dt_timezone.utc).date()
+        cutoff = day_start(today - timedelta(days=retention_days))
+        quote = connection.ops.quote_name
+
+        if not cls.is_partitioned():
+            return cls._prune_days(cutoff, archive, dry_run)
+
+        results = []
+        for name, lower, upper in cls.partitions():
+            if upper > cutoff:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT count(*) FROM {quote(name)}')
+                rows = cursor.fetchone()[0]
+            path = None
+            if not dry_run:
+                if archive and rows:
+                    path, rows = cls.archive(name, lower, upper)
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(f'ALTER TABLE {quote(TABLE)} DETACH PARTITION {quote(name)}')
+                    cursor.execute(f'DROP TABLE {quote(name)}')
+            results.append((name, rows, path))
+
+        # Com as partições antigas removidas, o que resta antes do corte está na DEFAULT
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {quote(DEFAULT_PARTITION)} WHERE "timestamp" < %s', [cutoff])
+            rows = cursor.fetchone()[0]
+        if rows:
+            path = None
+            if not dry_run:
+                if archive:
+                    path, rows = cls.archive(f'{DEFAULT_PARTITION}_{cutoff:%Y%m%d}', None, cutoff)
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DELETE FROM {quote(DEFAULT_PARTITION)} WHERE "timestamp" < %s', [cutoff])
+            results.append((DEFAULT_PARTITION, rows, path))
+        return results
+
+    @classmethod
+    def maintain(cls, retention_days=None, archive=True, dry_run=False):
+        """Rotina diária: partições dos próximos dias e retenção; retorna (criadas, removidas)"""
+        created = [] if dry_run else cls.ensure_partitions()
+        return created, cls.prune(retention_days, archive, dry_run)
+
+    @classmethod
+    def _prune_days(cls, cutoff, archive, dry_run):
+        """Retenção sem partições: um arquivo e um DELETE por dia antes do corte"""
+        older = LoginAttempt.objects.filter(timestamp__lt=cutoff)
+        results = []
+        start = None
+        while True:
+            # Pula direto para o próximo dia com linhas
+            remaining = older if start is None else older.filter(timestamp__gte=start)
+            oldest = remaining.order_by('timestamp').values_list('timestamp', flat=True).first()
+            if oldest is None:
+                return results
+            day = oldest.astimezone(dt_timezone.utc).date()
+            lower, upper = day_start(day), min(day_start(day + timedelta(days=1)), cutoff)
+            attempts = LoginAttempt.objects.filter(timestamp__gte=lower, timestamp__lt=upper)
+            name = partition_name(day)
+            if dry_run:
+                rows, path = attempts.count(), None
+            elif archive:
+                path, rows = cls.archive(name, lower, upper)
+                attempts.delete()
+            else:
+                path, rows = None, attempts.delete()[0]
+            results.append((name, rows, path))
+            start = upper
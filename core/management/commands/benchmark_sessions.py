@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Management command para comparar consultas ao banco por requisição entre engines de sessão
+Cria um usuário temporário dentro de uma transação que é desfeita no final
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+ENGINES = [
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.cache',
+]
+
+
+class _Rollback(Exception):
+    """Força o rollback da transação do benchmark"""
+
+
+class Command(BaseCommand):
+    help = 'Mede consultas ao banco por requisição para cada engine de sessão'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20,
+            help='Número de requisições por engine (padrão: 20)',
+        )
+        parser.add_argument(
+            '--path',
+            default='/profile/',
+            help='URL autenticada usada no benchmark (padrão: /profile/)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('📊 Benchmark de sessões...'))
+        
+        try:
+            with transaction.atomic():
+                user = self._create_user()
+                for engine in ENGINES:
+                    self._run(engine, user, options['path'], options['requests'])
+                raise _Rollback()
+        except _Rollback:
+            pass
+        
+        self.stdout.write('\n💡 A engine configurada em SESSION_ENGINE é a usada em produção.')
+
+    def _create_user(self):
+        from core.models import Country, User
+        
+        country = Country.objects.first() or Country.objects.create(name='Benchmark', code='ZZB', ddi='0')
+        return User.objects.create_user(
+            username='session-benchmark',
+            email='session-benchmark@example.com',
+            password='session-benchmark',
+            phone_number='000000000000',
+            country=country,
+            is_verified=True,
+        )
+
+    def _run(self, engine, user, path, total_requests):
+        with override_settings(SESSION_ENGINE=engine):
+            client = Client()
+            client.force_login(user)
+            client.get(path)  # Aquecimento (popula o cache da sessão)
+            
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(total_requests):
+                    client.get(path)
+            
+            client.logout()
+        
+        session_queries = [q for q in queries.captured_queries if 'django_session' in q['sql']]
+        self.stdout.write(
+            f'\n   • {engine.rsplit(".", 1)[-1]}: '
+            f'{len(queries) / total_requests:.2f} consultas/req '
+            f'({len(session_queries) / total_requests:.2f} em django_session)'
+        )
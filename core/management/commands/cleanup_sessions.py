@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Management command para remover sessões expiradas em lotes
+Evita um único DELETE gigante bloqueando a tabela django_session
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Remove sessões expiradas da tabela django_session em lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Quantidade de sessões removidas por DELETE (padrão: 5000)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Pausa em segundos entre os lotes para aliviar o banco',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas conta as sessões expiradas, sem remover',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        pause = options['sleep']
+        now = timezone.now()
+        
+        expired = Session.objects.filter(expire_date__lt=now)
+        
+        if options['dry_run']:
+            self.stdout.write(f'⚠️  [DRY-RUN] Sessões expiradas: {expired.count()}')
+            return
+        
+        self.stdout.write(self.style.SUCCESS('🧹 Removendo sessões expiradas...'))
+        
+        total = 0
+        while True:
+            # Seleciona um lote de chaves e remove apenas esse lote
+            keys = list(expired.values_list('session_key', flat=True)[:chunk_size])
+            if not keys:
+                break
+            
+            deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+            total += deleted
+            self.stdout.write(f'   • Lote removido: {deleted} (total: {total})')
+            
+            if pause:
+                time.sleep(pause)
+        
+        self.stdout.write(self.style.SUCCESS(f'\n✅ {total} sessões expiradas removidas'))
+        self.stdout.write('\n💡 Dica: agende diariamente: python manage.py cleanup_sessions')
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Management command para gerar dados sintéticos em grande volume
+Empresas, usuários, assinaturas, produtos, imagens e clientes para testes de escala
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.datagen import DEFAULT_PASSWORD, GenerationConfig, generate
+
+
+class Command(BaseCommand):
+    help = 'Gera milhões de registros realistas e determinísticos para testes de escala'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=1000, help='Empresas (padrão: 1000)')
+        parser.add_argument('--users-per-company', type=int, default=2, help='Usuários por empresa (padrão: 2)')
+        parser.add_argument('--products-per-company', type=int, default=500, help='Média de produtos por empresa (padrão: 500)')
+        parser.add_argument('--images-per-product', type=float, default=1.0, help='Média de imagens por produto (padrão: 1)')
+        parser.add_argument('--customers-per-company', type=int, default=1000, help='Média de clientes por empresa (padrão: 1000)')
+        parser.add_argument('--subscriptions-per-user', type=int, default=1, help='Assinaturas por usuário (padrão: 1)')
+        parser.add_argument('--seed', type=int, default=42, help='Semente (mesma semente = mesmos dados; use outra para acrescentar mais)')
+        parser.add_argument('--workers', type=int, default=4, help='Processos paralelos (padrão: 4; SQLite usa 1)')
+        parser.add_argument('--chunk-size', type=int, default=50, help='Empresas por bloco/transação (padrão: 50)')
+        parser.add_argument('--batch-size', type=int, default=50_000, help='Linhas por COPY/bulk_create (padrão: 50000)')
+        parser.add_argument('--yes', action='store_true', help='Não pedir confirmação')
+
+    def handle(self, *args, **options):
+        if options['users_per_company'] < 1:
+            raise CommandError('--users-per-company deve ser pelo menos 1')
+        
+        config = GenerationConfig(
+            companies=options['companies'],
+            users_per_company=options['users_per_company'],
+            products_per_company=options['products_per_company'],
+            images_per_product=options['images_per_product'],
+            customers_per_company=options['customers_per_company'],
+            subscriptions_per_user=options['subscriptions_per_user'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+        )
+        
+        estimated = config.companies * (
+            config.users_per_company * (3 + config.subscriptions_per_user)
+            + config.products_per_company * (1 + config.images_per_product)
+            + config.customers_per_company
+        )
+        self.stdout.write(
+            f'📦 Banco: {connection.vendor} ({connection.settings_dict["NAME"]}) — '
+            f'~{int(estimated):,} registros serão criados'
+        )
+        if not options['yes'] and input('Continuar? [s/N] ').strip().lower() not in ('s', 'sim', 'y', 'yes'):
+            self.stdout.write(self.style.WARNING('Cancelado.'))
+            return
+        
+        started = time.perf_counter()
+        
+        def progress(totals, chunks):
+            elapsed = time.perf_counter() - started
+            rows = sum(totals.values())
+            self.stdout.write(
+                f'   • {totals.get("companies", 0):,}/{config.companies:,} empresas | '
+                f'{rows:,} registros | {rows / elapsed:,.0f} reg/s'
+            )
+        
+        totals = generate(config, workers=options['workers'], progress=progress)
+        elapsed = time.perf_counter() - started
+        
+        self.stdout.write('\n📊 Resumo:')
+        for key, value in totals.items():
+            self.stdout.write(f'   • {key}: {value:,}')
+        self.stdout.write(self.style.SUCCESS(f'\n✅ {sum(totals.values()):,} registros em {elapsed:.1f}s'))
+        self.stdout.write(f'💡 Senha de todos os usuários gerados: {DEFAULT_PASSWORD}')
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""
+Management command para a manutenção das tentativas de login (auditoria)
+Cria as partições diárias dos próximos dias e remove, arquivando em CSV gzip,
+as partições anteriores à retenção; agende diariamente
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.login_audit import LoginAuditStore
+
+
+class Command(BaseCommand):
+    help = 'Cria as partições das tentativas de login e arquiva/remove as anteriores à retenção'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=settings.LOGIN_ATTEMPT_RETENTION_DAYS,
+            help=f'Dias mantidos no banco (padrão: {settings.LOGIN_ATTEMPT_RETENTION_DAYS})',
+        )
+        parser.add_argument(
+            '--no-archive',
+            action='store_true',
+            help='Remove sem exportar para o arquivo compactado',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas mostra o que seria removido',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        self.stdout.write(self.style.SUCCESS('🗄️ Manutenção das tentativas de login...'))
+        if not LoginAuditStore.is_partitioned():
+            self.stdout.write('ℹ️ Tabela sem partições: retenção dia a dia com DELETE')
+
+        created, removed = LoginAuditStore.maintain(
+            options['retention_days'], archive=not options['no_archive'], dry_run=dry_run,
+        )
+        for name in created:
+            self.stdout.write(f'➕ Partição criada: {name}')
+        for name, rows, path in removed:
+            destination = f' → {path}' if path else ''
+            self.stdout.write(f'{"🔍" if dry_run else "🗑️"} {name}: {rows} tentativa(s){destination}')
+
+        total = sum(rows for _name, rows, _path in removed)
+        verb = 'seriam removidas' if dry_run else 'removidas'
+        self.stdout.write(self.style.SUCCESS(f'🎉 Concluído: {total} tentativa(s) {verb}'))
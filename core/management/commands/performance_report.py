@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Management command para exibir o histograma de desempenho por view
+Lê os dados agregados pelo PerformanceMiddleware no cache
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import performance
+
+
+class Command(BaseCommand):
+    help = 'Exibe latência, consultas e tempos agregados por view (requisições amostradas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sort',
+            choices=['count', 'avg_ms', 'p95_ms', 'avg_queries', 'avg_db_ms'],
+            default='p95_ms',
+            help='Coluna usada para ordenar (padrão: p95_ms)',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Saída em JSON',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Zera o histograma após exibir',
+        )
+
+    def handle(self, *args, **options):
+        stats = sorted(performance.get_view_stats(), key=lambda row: row[options['sort']], reverse=True)
+        
+        if options['json']:
+            for row in stats:
+                row['p50_ms'], row['p95_ms'], row['p99_ms'] = (
+                    None if value == float('inf') else value
+                    for value in (row['p50_ms'], row['p95_ms'], row['p99_ms'])
+                )
+            self.stdout.write(json.dumps(stats, indent=2))
+        elif not stats:
+            self.stdout.write(self.style.WARNING('⚠️  Nenhuma requisição amostrada ainda.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('📊 Desempenho por view (requisições amostradas)\n'))
+            header = f"{'view':<40} {'reqs':>7} {'avg':>8} {'p50':>6} {'p95':>6} {'p99':>6} {'queries':>8} {'db':>8} {'tpl':>8} {'ext':>8} {'cache h/m':>11}"
+            self.stdout.write(header)
+            self.stdout.write('-' * len(header))
+            for row in stats:
+                self.stdout.write(
+                    f"{row['view'][:40]:<40} {row['count']:>7} {row['avg_ms']:>7.1f}ms "
+                    f"{self._limit(row['p50_ms']):>6} {self._limit(row['p95_ms']):>6} {self._limit(row['p99_ms']):>6} "
+                    f"{row['avg_queries']:>8.1f} {row['avg_db_ms']:>6.1f}ms {row['avg_template_ms']:>6.1f}ms "
+                    f"{row['avg_external_ms']:>6.1f}ms {row['cache_hits']:>5}/{row['cache_misses']:<5}"
+                )
+            self.stdout.write('\n💡 Percentis são o limite superior do balde do histograma (ms).')
+        
+        if options['reset']:
+            performance.reset_view_stats()
+            self.stdout.write(self.style.SUCCESS('\n✅ Histograma zerado'))
+
+    def _limit(self, value):
+        return '>5000' if value == float('inf') else str(value)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+"""
+Management command para conferir os contadores de uso dos planos
+Recalcula cada contador com a contagem real (um UPDATE por recurso); agende
+periodicamente para corrigir caminhos que não disparam sinais (bulk_create)
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.quotas import PLAN_FIELDS, QuotaService
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os contadores de uso (empresas, usuários, clientes, produtos) com a contagem real'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resource',
+            choices=list(PLAN_FIELDS),
+            action='append',
+            help='Recurso a conferir (pode repetir; padrão: todos)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('🔢 Conferindo contadores de uso...'))
+        
+        corrected = QuotaService.reconcile(options['resource'])
+        for resource, total in corrected.items():
+            icon = '⚠️ ' if total else '✅'
+            self.stdout.write(f'{icon} {resource}: {total} contador(es) corrigido(s)')
+        
+        self.stdout.write(self.style.SUCCESS(f'🎉 Concluído: {sum(corrected.values())} contador(es) corrigido(s)'))
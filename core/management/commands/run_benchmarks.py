@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Management command para rodar o benchmark das views principais
+Cria um banco de teste, popula empresas/produtos/clientes e mede cada cenário
+"""
+
+import json
+import os
+import subprocess
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks import runner, seed
+
+
+class Command(BaseCommand):
+    help = 'Mede latência (p50/p95/p99), consultas por requisição e vazão das views principais'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=10, help='Empresas criadas (padrão: 10)')
+        parser.add_argument('--products', type=int, default=200, help='Produtos por empresa (padrão: 200)')
+        parser.add_argument('--customers', type=int, default=200, help='Clientes por empresa (padrão: 200)')
+        parser.add_argument('--subscriptions', type=int, default=1, help='Assinaturas por usuário (padrão: 1)')
+        parser.add_argument('--iterations', type=int, default=50, help='Requisições por cenário (padrão: 50)')
+        parser.add_argument('--seed', type=int, default=42, help='Semente aleatória (padrão: 42)')
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=sorted(runner.SCENARIOS),
+            help='Cenário a executar (pode repetir; padrão: todos)',
+        )
+        parser.add_argument(
+            '--output',
+            help='Arquivo JSON de saída (padrão: benchmarks/results/<data>.json)',
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON de uma execução anterior para comparar',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Reaproveita o banco de teste entre execuções',
+        )
+
+    def handle(self, *args, **options):
+        scenarios = options['scenario'] or list(runner.SCENARIOS)
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Não foi possível ler {options["compare"]}: {e}')
+        
+        self.stdout.write(self.style.SUCCESS('🏁 Iniciando benchmark...'))
+        
+        # Banco de teste isolado: nunca escreve no banco configurado
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            self.stdout.write(
+                f'\n🌱 Populando {options["companies"]} empresas '
+                f'({options["products"]} produtos, {options["customers"]} clientes cada)...'
+            )
+            tenants = seed.seed(
+                companies=options['companies'],
+                products=options['products'],
+                customers=options['customers'],
+                subscriptions=options['subscriptions'],
+                random_seed=options['seed'],
+            )
+            
+            results = []
+            for name in scenarios:
+                self.stdout.write(f'\n⏱️  {name}...')
+                row = runner.run_scenario(name, tenants, options['iterations'])
+                results.append(row)
+                self.stdout.write(
+                    f'   p50 {row["p50_ms"]}ms | p95 {row["p95_ms"]}ms | p99 {row["p99_ms"]}ms | '
+                    f'{row["queries_per_request"]} consultas/req | {row["throughput_rps"]} req/s | '
+                    f'status {row["status_codes"]}'
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+        
+        report = {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': self._git_revision(),
+            'database': connection.vendor,
+            'config': {key: options[key] for key in ['companies', 'products', 'customers', 'subscriptions', 'iterations', 'seed']},
+            'results': results,
+        }
+        if baseline:
+            report['comparison'] = runner.compare(report, baseline)
+            self.stdout.write('\n📈 Comparação com a execução anterior:')
+            for delta in report['comparison']:
+                change = delta['p95_change_pct']
+                p95 = 'sem base' if change is None else f'{change:+}%'
+                self.stdout.write(
+                    f'   • {delta["scenario"]}: p95 {p95} | '
+                    f'consultas {delta["queries_change"]:+}'
+                )
+        
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks', 'results', f'{datetime.now():%Y%m%d_%H%M%S}.json'
+        )
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Resultados salvos em {output}'))
+
+    def _git_revision(self):
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL
+            ).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.utils import translation
 from django.utils.deprecation import MiddlewareMixin
 
@@ -15,4 +16,36 @@ class LanguageMiddleware(MiddlewareMixin):
             translation.activate('pt')
         
         # Adicionar o idioma atual ao request
-        request.LANGUAGE_CODE = translation.get_language() 
\ No newline at end of file
+        request.LANGUAGE_CODE = translation.get_language() 
+
+class PerformanceMiddleware:
+    """Middleware que mede banco, cache, templates e chamadas externas por requisição"""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        from django.db import connection
+        from . import performance
+        
+        if not performance.is_enabled() or not performance.should_sample():
+            return self.get_response(request)
+        
+        metrics, token = performance.activate()
+        try:
+            with connection.execute_wrapper(performance.db_wrapper):
+                response = self.get_response(request)
+        finally:
+            performance.deactivate(token)
+        
+        total_ms = metrics.total_ms
+        # Consultas e tempos internos só para desenvolvimento e equipe
+        user = getattr(request, 'user', None)
+        if settings.DEBUG or (user is not None and user.is_staff):
+            response['Server-Timing'] = metrics.server_timing(total_ms)
+        
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            performance.record_view(match.view_name or match._func_path, metrics, total_ms)
+        
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_country_continent_country_region'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('companies', 'Empresas'), ('users', 'Usuários'), ('customers', 'Clientes'), ('products', 'Produtos')], max_length=20, verbose_name='Recurso')),
+                ('value', models.IntegerField(default=0, verbose_name='Uso')),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True, verbose_name='Conferido em')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='usage_counters', to='core.account', verbose_name='Conta')),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='usage_counters', to='core.company', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Contador de uso',
+                'verbose_name_plural': 'Contadores de uso',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('account__isnull', False)), fields=('account', 'resource'), name='usage_counter_account_resource'), models.UniqueConstraint(condition=models.Q(('company__isnull', False)), fields=('company', 'resource'), name='usage_counter_company_resource'), models.CheckConstraint(condition=models.Q(('account__isnull', True), ('company__isnull', True), _connector='XOR'), name='usage_counter_single_owner')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:54
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0021_usage_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loginattempt',
+            index=models.Index(fields=['username'], name='login_attempt_username'),
+        ),
+        migrations.AddIndex(
+            model_name='loginattempt',
+            index=models.Index(fields=['ip_address'], name='login_attempt_ip'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Upper('username'), name='user_username_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='user_email_upper'),
+        ),
+    ]
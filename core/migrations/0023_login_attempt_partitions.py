@@ -0,0 +1,159 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:59
+
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Cópia fixa dos nomes e da DDL de core/login_audit.py: a migração não
+# depende do módulo nem do modelo atuais
+TABLE = 'core_loginattempt'
+DEFAULT_PARTITION = f'{TABLE}_default'
+LEGACY_PARTITION = f'{TABLE}_legacy'
+OLD_TABLE = f'{TABLE}_unpartitioned'
+AHEAD_DAYS = 7
+
+
+def day_start(day):
+    """Início do dia em UTC (limite das partições)"""
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+def partition_name(day):
+    return f'{TABLE}_p{day:%Y%m%d}'
+
+
+def create_partition(cursor, name, lower, upper):
+    """
+    Cria a partição [lower, upper) (lower None = MINVALUE)
+
+    Linhas do intervalo que caíram na DEFAULT passam para a nova partição.
+    """
+    quote = cursor.db.ops.quote_name
+    parent, default = quote(TABLE), quote(DEFAULT_PARTITION)
+    where, params = '"timestamp" < %s', [upper]
+    if lower is not None:
+        where, params = f'"timestamp" >= %s AND {where}', [lower, upper]
+
+    cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {default} WHERE {where})', params)
+    stray = cursor.fetchone()[0]
+    if stray:
+        cursor.execute(f'ALTER TABLE {parent} DETACH PARTITION {default}')
+    cursor.execute(
+        f'CREATE TABLE {quote(name)} PARTITION OF {parent} '
+        f'FOR VALUES FROM ({"MINVALUE" if lower is None else "%s"}) TO (%s)',
+        [upper] if lower is None else [lower, upper],
+    )
+    if stray:
+        cursor.execute(f'INSERT INTO {quote(name)} SELECT * FROM {default} WHERE {where}', params)
+        cursor.execute(f'DELETE FROM {default} WHERE {where}', params)
+        cursor.execute(f'ALTER TABLE {parent} ATTACH PARTITION {default} DEFAULT')
+
+
+def create_day_partitions(cursor, source):
+    """
+    Partições para as linhas de `source`: uma única (legacy) para o que é
+    anterior à retenção, que o maintain_login_attempts arquiva e remove na
+    primeira execução, e uma por dia até AHEAD_DAYS dias à frente
+    """
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    cutoff = today - timedelta(days=settings.LOGIN_ATTEMPT_RETENTION_DAYS)
+    cursor.execute(f'SELECT min("timestamp") FROM {source}')
+    oldest = cursor.fetchone()[0]
+    day = today
+    if oldest is not None:
+        day = max(oldest.astimezone(dt_timezone.utc).date(), cutoff)
+        if day == cutoff:
+            create_partition(cursor, LEGACY_PARTITION, None, day_start(cutoff))
+    while day <= today + timedelta(days=AHEAD_DAYS):
+        create_partition(cursor, partition_name(day), day_start(day), day_start(day + timedelta(days=1)))
+        day += timedelta(days=1)
+
+
+def rebuild_table(schema_editor, model, partitioned):
+    """
+    Recria core_loginattempt (particionada ou comum) com as mesmas linhas
+
+    A tabela atual sai do caminho (renomeada, sem os índices do modelo), a
+    nova é criada com as mesmas colunas e recebe as linhas. Particionada, a
+    chave primária passa a ser (id, timestamp): o PostgreSQL exige a coluna
+    de particionamento nas restrições únicas. O id continua de onde parou,
+    em uma sequência própria da nova tabela.
+    """
+    quote = schema_editor.quote_name
+    table, old = quote(TABLE), quote(OLD_TABLE)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {table} RENAME TO {old}')
+        cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'", [OLD_TABLE])
+        cursor.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {quote(cursor.fetchone()[0])} TO {quote(OLD_TABLE + "_pkey")}')
+        for index in model._meta.indexes:
+            cursor.execute(f'DROP INDEX IF EXISTS {quote(index.name)}')
+
+        if partitioned:
+            cursor.execute(f'CREATE TABLE {table} (LIKE {old}) PARTITION BY RANGE ("timestamp")')
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {quote(TABLE + "_pkey")} PRIMARY KEY (id, "timestamp")')
+            cursor.execute(f'CREATE TABLE {quote(DEFAULT_PARTITION)} PARTITION OF {table} DEFAULT')
+            create_day_partitions(cursor, old)
+        else:
+            cursor.execute(f'CREATE TABLE {table} (LIKE {old})')
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {quote(TABLE + "_pkey")} PRIMARY KEY (id)')
+
+        cursor.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+        cursor.execute(f'SELECT coalesce(max(id), 0) + 1 FROM {table}')
+        start = cursor.fetchone()[0]
+        # Leva junto a sequência antiga (e as partições, na volta)
+        cursor.execute(f'DROP TABLE {old}')
+        sequence = quote(f'{TABLE}_id_seq')
+        cursor.execute(f'CREATE SEQUENCE {sequence} START {int(start)} OWNED BY {table}.id')
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+def is_partitioned(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [TABLE])
+        return cursor.fetchone() is not None
+
+
+def partition_login_attempts(apps, schema_editor):
+    """Particiona core_loginattempt por dia (só PostgreSQL; os outros bancos ficam com a tabela comum)"""
+    if schema_editor.connection.vendor != 'postgresql' or is_partitioned(schema_editor):
+        return
+    rebuild_table(schema_editor, apps.get_model('core', 'LoginAttempt'), partitioned=True)
+
+
+def unpartition_login_attempts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql' or not is_partitioned(schema_editor):
+        return
+    rebuild_table(schema_editor, apps.get_model('core', 'LoginAttempt'), partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='loginattempt',
+            options={'verbose_name': 'Tentativa de Login', 'verbose_name_plural': 'Tentativas de Login'},
+        ),
+        migrations.RemoveIndex(
+            model_name='loginattempt',
+            name='login_attempt_username',
+        ),
+        migrations.AddIndex(
+            model_name='loginattempt',
+            index=models.Index(fields=['username', 'timestamp'], name='login_attempt_user_time'),
+        ),
+        migrations.AddIndex(
+            model_name='loginattempt',
+            index=models.Index(fields=['timestamp'], name='login_attempt_timestamp'),
+        ),
+        migrations.RunPython(partition_login_attempts, unpartition_login_attempts),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:13
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_login_attempt_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'Na fila'), ('running', 'Executando'), ('finished', 'Concluído'), ('failed', 'Falhou')], default='queued', max_length=20, verbose_name='Status')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('done', models.PositiveIntegerField(default=0, verbose_name='Processados')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bulk_jobs', to='core.company', verbose_name='Empresa')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bulk_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Ação em lote',
+                'verbose_name_plural': 'Ações em lote',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_bulk_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginAttemptReset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reset_at', models.DateTimeField(db_index=True, verbose_name='Zerado em')),
+            ],
+            options={
+                'verbose_name': 'Desbloqueio de login',
+                'verbose_name_plural': 'Desbloqueios de login',
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -196,6 +197,11 @@ class User(AbstractUser):
     class Meta:
         verbose_name = _("Usuário")
         verbose_name_plural = _("Usuários")
+        indexes = [
+            # Busca exata sem diferenciar maiúsculas no admin (=username, =email)
+            models.Index(Upper('username'), name='user_username_upper'),
+            models.Index(Upper('email'), name='user_email_upper'),
+        ]
 
     def __str__(self):
         return self.email
@@ -299,14 +305,14 @@ class Account(models.Model):
         return 0
     
     def can_add_company(self):
-        """Verifica se o usuário pode adicionar mais empresas baseado no plano"""
-        current_companies = self.user.companies.count()
-        return current_companies < self.plan.max_companies
+        """Verifica se o usuário pode adicionar mais empresas baseado no plano (contador de uso, sem COUNT)"""
+        from .quotas import QuotaService, COMPANIES
+        return QuotaService.allows(COMPANIES, account=self)
     
     def can_add_user_to_company(self, company):
-        """Verifica se o usuário pode adicionar mais usuários a uma empresa"""
-        current_users = company.user_set.count()
-        return current_users < self.plan.max_users
+        """Verifica se o usuário pode adicionar mais usuários a uma empresa (contador de uso, sem COUNT)"""
+        from .quotas import QuotaService, USERS
+        return QuotaService.allows(USERS, company=company, plan=self.plan)
 
 
 class Subscription(models.Model):
@@ -437,7 +443,13 @@ class PlanPrice(models.Model):
 
 
 class LoginAttempt(models.Model):
-    """Modelo para rastrear tentativas de login"""
+    """
+    Modelo para rastrear tentativas de login
+
+    No PostgreSQL a tabela é particionada por dia em `timestamp` (ver
+    core/login_audit.py): consultas devem limitar `timestamp` para ler só as
+    partições recentes.
+    """
     username = models.CharField(_("Nome de usuário"), max_length=150)
     ip_address = models.GenericIPAddressField(_("Endereço IP"))
     success = models.BooleanField(_("Sucesso"), default=False)
@@ -447,7 +459,103 @@ class LoginAttempt(models.Model):
     class Meta:
         verbose_name = _("Tentativa de Login")
         verbose_name_plural = _("Tentativas de Login")
-        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['username', 'timestamp'], name='login_attempt_user_time'),
+            models.Index(fields=['ip_address'], name='login_attempt_ip'),
+            models.Index(fields=['timestamp'], name='login_attempt_timestamp'),
+        ]
 
     def __str__(self):
         return f"{self.username} - {'Sucesso' if self.success else 'Falha'} - {self.timestamp}"
+
+
+class LoginAttemptReset(models.Model):
+    """Desbloqueio manual: falhas anteriores a `reset_at` não contam para o bloqueio"""
+    reset_at = models.DateTimeField(_("Zerado em"), db_index=True)
+
+    class Meta:
+        verbose_name = _("Desbloqueio de login")
+        verbose_name_plural = _("Desbloqueios de login")
+
+    def __str__(self):
+        return f"{self.reset_at}"
+
+
+class UsageCounter(models.Model):
+    """Uso de um recurso limitado pelo plano (por conta ou por empresa)"""
+    RESOURCE_COMPANIES = 'companies'
+    RESOURCE_USERS = 'users'
+    RESOURCE_CUSTOMERS = 'customers'
+    RESOURCE_PRODUCTS = 'products'
+    RESOURCE_CHOICES = [
+        (RESOURCE_COMPANIES, _('Empresas')),
+        (RESOURCE_USERS, _('Usuários')),
+        (RESOURCE_CUSTOMERS, _('Clientes')),
+        (RESOURCE_PRODUCTS, _('Produtos')),
+    ]
+
+    account = models.ForeignKey(
+        Account, on_delete=models.CASCADE, null=True, blank=True,
+        related_name='usage_counters', verbose_name=_("Conta")
+    )
+    company = models.ForeignKey(
+        Company, on_delete=models.CASCADE, null=True, blank=True,
+        related_name='usage_counters', verbose_name=_("Empresa")
+    )
+    resource = models.CharField(_("Recurso"), max_length=20, choices=RESOURCE_CHOICES)
+    value = models.IntegerField(_("Uso"), default=0)
+    reconciled_at = models.DateTimeField(_("Conferido em"), null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Contador de uso")
+        verbose_name_plural = _("Contadores de uso")
+        constraints = [
+            models.UniqueConstraint(
+                fields=['account', 'resource'], condition=models.Q(account__isnull=False),
+                name='usage_counter_account_resource',
+            ),
+            models.UniqueConstraint(
+                fields=['company', 'resource'], condition=models.Q(company__isnull=False),
+                name='usage_counter_company_resource',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(account__isnull=True) ^ models.Q(company__isnull=True),
+                name='usage_counter_single_owner',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.account or self.company} - {self.get_resource_display()}: {self.value}"
+
+
+class BulkJob(models.Model):
+    """Ação em lote executada em segundo plano (estado no banco, visível para todos os workers)"""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_FINISHED = 'finished'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, _('Na fila')),
+        (STATUS_RUNNING, _('Executando')),
+        (STATUS_FINISHED, _('Concluído')),
+        (STATUS_FAILED, _('Falhou')),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bulk_jobs', verbose_name=_("Usuário"))
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='bulk_jobs', verbose_name=_("Empresa"))
+    status = models.CharField(_("Status"), max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    total = models.PositiveIntegerField(_("Total"), default=0)
+    done = models.PositiveIntegerField(_("Processados"), default=0)
+    error = models.TextField(_("Erro"), blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Atualizado a cada bloco: job parado há muito tempo perdeu o worker
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Ação em lote")
+        verbose_name_plural = _("Ações em lote")
+
+    def __str__(self):
+        return f"{self.id.hex} - {self.get_status_display()} ({self.done}/{self.total})"
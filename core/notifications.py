@@ -9,6 +9,7 @@ from django.template.loader import render_to_string
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from .services import VerificationService
+from .performance import track
 
 
 class NotificationService:
@@ -149,13 +150,14 @@ class NotificationService:
                 return True
             
             # Em produção, enviar email real
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[to_email],
-                fail_silently=False,
-            )
+            with track('smtp'):
+                send_mail(
+                    subject=subject,
+                    message=message,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    recipient_list=[to_email],
+                    fail_silently=False,
+                )
             return True
             
         except Exception as e:
@@ -0,0 +1,325 @@
+"""
+Instrumentação de desempenho por requisição
+
+Coleta, para as requisições amostradas, consultas ao banco (quantidade e tempo),
+acertos/falhas de cache, tempo de renderização de templates e tempo gasto em
+serviços externos (Twilio, geolocalização, SMTP). Os valores saem no cabeçalho
+Server-Timing (só em DEBUG ou para a equipe) e alimentam um histograma por view,
+lido pelo comando `performance_report`.
+
+Cada worker soma o histograma em memória e grava, a cada
+PERFORMANCE_FLUSH_SECONDS, os seus totais em uma única chave do cache
+(`perf:worker:<id>`, escrita só por ele): nenhuma ida ao cache por requisição e
+nenhuma leitura-modificação-escrita disputada entre workers. O relatório lê o
+registro de workers (uma chave por worker, numerada com incr) e soma os totais.
+Sem Redis, o histograma fica no cache em arquivo `performance`, visível para o
+comando em outro processo.
+"""
+
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+# Limites superiores (ms) dos baldes do histograma; o último é "acima de 5s"
+HISTOGRAM_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf')]
+CACHE_PREFIX = 'perf'
+GENERATION_KEY = f'{CACHE_PREFIX}:generation'
+WORKERS_KEY = f'{CACHE_PREFIX}:workers'
+STATS_TIMEOUT = 60 * 60 * 24 * 7
+STAT_FIELDS = ['count', 'total_us', 'db_us', 'db_queries', 'tpl_us', 'ext_us', 'cache_hits', 'cache_misses']
+
+_current = ContextVar('forgelock_request_metrics', default=None)
+_MISSING = object()
+
+
+class RequestMetrics:
+    """Métricas acumuladas durante uma requisição"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0.0
+        self.external = {}
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    @property
+    def external_ms(self):
+        return sum(self.external.values()) * 1000
+
+    def server_timing(self, total_ms):
+        """Valor do cabeçalho Server-Timing"""
+        parts = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"',
+            f'cache;desc="hits={self.cache_hits} misses={self.cache_misses}"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+        ]
+        for name, seconds in sorted(self.external.items()):
+            parts.append(f'{name};dur={seconds * 1000:.1f}')
+        parts.append(f'total;dur={total_ms:.1f}')
+        return ', '.join(parts)
+
+
+def current_metrics():
+    """Métricas da requisição atual (None se a requisição não foi amostrada)"""
+    return _current.get()
+
+
+def is_enabled():
+    return getattr(settings, 'PERFORMANCE_METRICS_ENABLED', True)
+
+
+def should_sample():
+    rate = getattr(settings, 'PERFORMANCE_SAMPLE_RATE', 1.0)
+    return rate >= 1 or random.random() < rate
+
+
+@contextmanager
+def track(name):
+    """Mede o tempo de uma chamada externa (ex.: 'twilio', 'geo', 'smtp')"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.external[name] = metrics.external.get(name, 0.0) + time.perf_counter() - start
+
+
+def record_cache(hit):
+    metrics = _current.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def db_wrapper(execute, sql, params, many, context):
+    """Wrapper para connection.execute_wrapper: conta e cronometra consultas"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+def _instrument_template_render():
+    from django.template.backends.django import Template
+
+    original = Template.render
+    if getattr(original, '_forgelock_instrumented', False):
+        return
+
+    @wraps(original)
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return original(self, context, request)
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+    render._forgelock_instrumented = True
+    Template.render = render
+
+
+def _instrument_cache_backend(backend_class):
+    original = backend_class.get
+    if getattr(original, '_forgelock_instrumented', False):
+        return
+
+    @wraps(original)
+    def get(self, key, default=None, version=None):
+        value = original(self, key, _MISSING, version=version)
+        record_cache(value is not _MISSING)
+        return default if value is _MISSING else value
+
+    get._forgelock_instrumented = True
+    backend_class.get = get
+
+
+def install():
+    """Instala os ganchos de template e cache (chamado em CoreConfig.ready)"""
+    if not is_enabled():
+        return
+    _instrument_template_render()
+    for config in settings.CACHES.values():
+        _instrument_cache_backend(import_string(config['BACKEND']))
+
+
+def activate():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def _store():
+    return caches[getattr(settings, 'PERFORMANCE_CACHE_ALIAS', 'default')]
+
+
+class _WorkerStats:
+    """Histograma deste processo, gravado no cache de tempos em tempos"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.key = f'{CACHE_PREFIX}:worker:{uuid.uuid4().hex}'
+        self.views = {}
+        self.slot = None
+        self.generation = None
+        self.flushed_at = 0.0
+
+    def add(self, view_name, values, bucket):
+        with self.lock:
+            stats = self.views.get(view_name)
+            if stats is None:
+                stats = self.views[view_name] = dict.fromkeys(STAT_FIELDS, 0)
+                stats['buckets'] = [0] * len(HISTOGRAM_BUCKETS)
+            for field, value in values.items():
+                stats[field] += value
+            stats['buckets'][bucket] += 1
+            due = time.monotonic() - self.flushed_at >= getattr(settings, 'PERFORMANCE_FLUSH_SECONDS', 10)
+            if due:
+                self.flushed_at = time.monotonic()
+        if due:
+            self.flush()
+
+    def _register(self, store):
+        # Cada worker ganha um número próprio (incr é atômico): nada se perde
+        # com workers registrando ao mesmo tempo
+        store.add(f'{WORKERS_KEY}:count', 0, None)
+        try:
+            number = store.incr(f'{WORKERS_KEY}:count')
+        except ValueError:
+            store.set(f'{WORKERS_KEY}:count', 1, None)
+            number = 1
+        self.slot = f'{WORKERS_KEY}:{number}'
+
+    def flush(self):
+        store = _store()
+        generation = store.get(GENERATION_KEY)
+        if generation is None:
+            store.add(GENERATION_KEY, uuid.uuid4().hex, None)
+            generation = store.get(GENERATION_KEY)
+        if generation != self.generation:
+            # Primeira gravação ou histograma zerado pelo relatório
+            if self.generation is not None:
+                with self.lock:
+                    self.views = {}
+            self.generation = generation
+            self._register(store)
+        with self.lock:
+            snapshot = {
+                view_name: {**stats, 'buckets': list(stats['buckets'])} for view_name, stats in self.views.items()
+            }
+        store.set_many({self.key: snapshot, self.slot: self.key}, STATS_TIMEOUT)
+
+
+_worker_stats = _WorkerStats()
+
+
+def record_view(view_name, metrics, total_ms):
+    """Soma a requisição no histograma da view (em memória; gravado periodicamente)"""
+    bucket = next(i for i, limit in enumerate(HISTOGRAM_BUCKETS) if total_ms <= limit)
+    # Totais em microssegundos, inteiros
+    _worker_stats.add(view_name, {
+        'count': 1,
+        'total_us': int(total_ms * 1000),
+        'db_us': int(metrics.db_time * 1_000_000),
+        'db_queries': metrics.db_queries,
+        'tpl_us': int(metrics.template_time * 1_000_000),
+        'ext_us': int(metrics.external_ms * 1000),
+        'cache_hits': metrics.cache_hits,
+        'cache_misses': metrics.cache_misses,
+    }, bucket)
+
+
+def _worker_keys(store):
+    count = store.get(f'{WORKERS_KEY}:count') or 0
+    slots = store.get_many([f'{WORKERS_KEY}:{number}' for number in range(1, count + 1)])
+    return count, list(slots.values())
+
+
+def _percentile(buckets, count, fraction):
+    """Limite superior do balde que contém o percentil (estimativa do histograma)"""
+    target = count * fraction
+    seen = 0
+    for limit, value in zip(HISTOGRAM_BUCKETS, buckets):
+        seen += value
+        if seen >= target:
+            return limit
+    return HISTOGRAM_BUCKETS[-1]
+
+
+def get_view_stats():
+    """Lê o histograma de todas as views, somando os workers"""
+    store = _store()
+    _count, keys = _worker_keys(store)
+    merged = {}
+    for views in store.get_many(keys).values():
+        for view_name, stats in views.items():
+            total = merged.get(view_name)
+            if total is None:
+                total = merged[view_name] = dict.fromkeys(STAT_FIELDS, 0)
+                total['buckets'] = [0] * len(HISTOGRAM_BUCKETS)
+            for field in STAT_FIELDS:
+                total[field] += stats[field]
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], stats['buckets'])]
+
+    stats = []
+    for view_name, totals in merged.items():
+        count = totals['count']
+        if not count:
+            continue
+        buckets = totals['buckets']
+        stats.append({
+            'view': view_name,
+            'count': count,
+            'avg_ms': totals['total_us'] / count / 1000,
+            'p50_ms': _percentile(buckets, count, 0.50),
+            'p95_ms': _percentile(buckets, count, 0.95),
+            'p99_ms': _percentile(buckets, count, 0.99),
+            'avg_queries': totals['db_queries'] / count,
+            'avg_db_ms': totals['db_us'] / count / 1000,
+            'avg_template_ms': totals['tpl_us'] / count / 1000,
+            'avg_external_ms': totals['ext_us'] / count / 1000,
+            'cache_hits': totals['cache_hits'],
+            'cache_misses': totals['cache_misses'],
+            'buckets': buckets,
+        })
+    return stats
+
+
+def reset_view_stats():
+    """Apaga o histograma de todas as views (os workers zeram o seu na próxima gravação)"""
+    store = _store()
+    count, keys = _worker_keys(store)
+    store.delete_many(keys + [f'{WORKERS_KEY}:{number}' for number in range(1, count + 1)] + [f'{WORKERS_KEY}:count'])
+    store.set(GENERATION_KEY, uuid.uuid4().hex, None)
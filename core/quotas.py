@@ -0,0 +1,243 @@
+"""
+Limites dos planos com contadores de uso
+
+Cada recurso limitado pelo plano tem um contador (UsageCounter): empresas por
+conta; usuários, clientes e produtos por empresa. Os contadores mudam com
+UPDATE ... SET value = value ± 1 (F()) nos sinais de criação/remoção, dentro
+da mesma transação do registro. A verificação antes de criar lê uma linha do
+contador e os limites do plano (em cache): nenhum COUNT por requisição.
+
+Produtos excluídos (exclusão lógica, is_active=False) não contam: o contador
+acompanha as mudanças de is_active, no sinal ou na ação em lote.
+
+O contador nasce na primeira leitura, já com a contagem real. Caminhos que
+não disparam sinais (bulk_create, SQL direto) são corrigidos por
+`reconcile` (comando reconcile_usage, agendado), que recalcula todos os
+contadores com um UPDATE por recurso.
+
+Os limites vêm do plano da conta do proprietário da empresa. Limite 0 (ou
+negativo) é ilimitado, como nos planos sem limite de clientes/produtos.
+"""
+
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .models import Account, UsageCounter
+
+
+COMPANIES = UsageCounter.RESOURCE_COMPANIES
+USERS = UsageCounter.RESOURCE_USERS
+CUSTOMERS = UsageCounter.RESOURCE_CUSTOMERS
+PRODUCTS = UsageCounter.RESOURCE_PRODUCTS
+
+# Recurso -> campo do limite no plano
+PLAN_FIELDS = {
+    COMPANIES: 'max_companies',
+    USERS: 'max_users',
+    CUSTOMERS: 'max_customers',
+    PRODUCTS: 'max_products',
+}
+
+# Recursos por empresa -> modelo contado (todos com FK `company`)
+COMPANY_SOURCES = {
+    USERS: 'core.UserCompany',
+    CUSTOMERS: 'customers.Customer',
+    PRODUCTS: 'products.Product',
+}
+
+# Filtro do que conta no limite (recursos ausentes: todas as linhas)
+SOURCE_FILTERS = {
+    PRODUCTS: {'is_active': True},
+}
+
+
+def counted(resource):
+    """Linhas do modelo do recurso (por empresa) que contam no limite"""
+    return apps.get_model(COMPANY_SOURCES[resource]).objects.filter(**SOURCE_FILTERS.get(resource, {}))
+
+
+def is_counted(resource, instance):
+    """Indica se o registro conta no limite do recurso"""
+    return all(getattr(instance, field) == value for field, value in SOURCE_FILTERS.get(resource, {}).items())
+
+
+class QuotaService:
+    """Uso e limites do plano por conta/empresa"""
+
+    CACHE_PREFIX = 'quota'
+    LIMITS_TIMEOUT = 300
+
+    # Limites do plano
+
+    @classmethod
+    def _version(cls):
+        version = cache.get(f'{cls.CACHE_PREFIX}:version')
+        if version is None:
+            version = 1
+            cache.add(f'{cls.CACHE_PREFIX}:version', version, None)
+        return version
+
+    @classmethod
+    def invalidate(cls):
+        """Descarta os limites em cache (plano, conta ou proprietário mudou)"""
+        try:
+            cache.incr(f'{cls.CACHE_PREFIX}:version')
+        except ValueError:
+            cache.set(f'{cls.CACHE_PREFIX}:version', 1, None)
+
+    @staticmethod
+    def _plan_limits(plan):
+        return {resource: getattr(plan, field) for resource, field in PLAN_FIELDS.items()}
+
+    @classmethod
+    def company_limits(cls, company_id):
+        """{recurso: limite} do plano do proprietário da empresa, ou {} sem proprietário"""
+        key = f'{cls.CACHE_PREFIX}:{cls._version()}:company:{company_id}'
+        limits = cache.get(key)
+        if limits is None:
+            account = (
+                Account.objects.filter(user__usercompany__company_id=company_id, user__usercompany__role='owner')
+                .select_related('plan').order_by('pk').first()
+            )
+            limits = cls._plan_limits(account.plan) if account else {}
+            cache.set(key, limits, cls.LIMITS_TIMEOUT)
+        return limits
+
+    # Contadores
+
+    @staticmethod
+    def _live_count(resource, account=None, company_id=None):
+        if resource == COMPANIES:
+            return apps.get_model('core.UserCompany').objects.filter(user_id=account.user_id).count()
+        return counted(resource).filter(company_id=company_id).count()
+
+    @classmethod
+    def _counter(cls, resource, account=None, company_id=None, lock=False):
+        """Contador do recurso (criado com a contagem real na primeira vez)"""
+        owner = {'account': account} if resource == COMPANIES else {'company_id': company_id}
+        counters = UsageCounter.objects.filter(resource=resource, **owner)
+        if lock:
+            counters = counters.select_for_update()
+        counter = counters.first()
+        if counter is None:
+            try:
+                with transaction.atomic():
+                    counter = UsageCounter.objects.create(
+                        resource=resource, value=cls._live_count(resource, account, company_id),
+                        reconciled_at=timezone.now(), **owner,
+                    )
+            except IntegrityError:
+                counter = counters.get()
+        return counter
+
+    @classmethod
+    def usage(cls, resource, company=None, account=None):
+        """Uso atual do recurso"""
+        return cls._counter(resource, account, company.pk if company else None).value
+
+    @classmethod
+    def adjust(cls, resource, delta, company_id=None, user_id=None):
+        """
+        Soma `delta` ao contador (sinais de criação/remoção)
+
+        Sem contador ainda, não faz nada: ele nasce com a contagem real.
+        """
+        counters = UsageCounter.objects.filter(resource=resource)
+        if resource == COMPANIES:
+            counters = counters.filter(account__user_id=user_id)
+        else:
+            counters = counters.filter(company_id=company_id)
+        counters.update(value=F('value') + delta)
+
+    # Verificação
+
+    @classmethod
+    def _limit(cls, resource, company=None, account=None, plan=None):
+        if plan is not None:
+            return getattr(plan, PLAN_FIELDS[resource])
+        if resource == COMPANIES:
+            return getattr(account.plan, PLAN_FIELDS[resource])
+        return cls.company_limits(company.pk).get(resource, 0)
+
+    @classmethod
+    def _exceeded(cls, counter, limit, count):
+        return limit > 0 and counter.value + count > limit
+
+    @classmethod
+    def allows(cls, resource, company=None, account=None, count=1, plan=None):
+        """Indica se ainda cabem `count` itens do recurso no plano"""
+        limit = cls._limit(resource, company, account, plan)
+        if limit <= 0:
+            return True
+        counter = cls._counter(resource, account, company.pk if company else None)
+        return not cls._exceeded(counter, limit, count)
+
+    @classmethod
+    def _error(cls, resource, limit):
+        return ValidationError(
+            _('common.quota.exceeded').format(limit=limit, resource=_(f'common.quota.{resource}')),
+            code='quota_exceeded',
+        )
+
+    @classmethod
+    def check(cls, resource, company=None, account=None, count=1):
+        """Levanta ValidationError se o recurso já está no limite do plano"""
+        if not cls.allows(resource, company, account, count):
+            raise cls._error(resource, cls._limit(resource, company, account))
+
+    @classmethod
+    @contextmanager
+    def reserve(cls, resource, company=None, account=None, count=1):
+        """
+        Verifica o limite e segura o contador até o fim da criação
+
+        A linha do contador fica bloqueada (SELECT ... FOR UPDATE) na
+        transação: criações simultâneas na mesma empresa esperam umas pelas
+        outras e o incremento do sinal entra no mesmo commit.
+        """
+        with transaction.atomic():
+            limit = cls._limit(resource, company, account)
+            if limit > 0:
+                counter = cls._counter(resource, account, company.pk if company else None, lock=True)
+                if cls._exceeded(counter, limit, count):
+                    raise cls._error(resource, limit)
+            yield
+
+    # Conferência periódica
+
+    @staticmethod
+    def _count_expression(resource):
+        if resource == COMPANIES:
+            rows = apps.get_model('core.UserCompany').objects.filter(user__account=OuterRef('account_id'))
+            group = 'user_id'
+        else:
+            rows = counted(resource).filter(company_id=OuterRef('company_id'))
+            group = 'company_id'
+        total = rows.order_by().values(group).annotate(total=Count('pk')).values('total')
+        return Coalesce(Subquery(total), Value(0))
+
+    @classmethod
+    def reconcile(cls, resources=None):
+        """
+        Recalcula os contadores com a contagem real
+
+        Um UPDATE por recurso (contagem em subconsulta): consistente mesmo
+        com criações acontecendo. Retorna {recurso: contadores corrigidos}.
+        """
+        now = timezone.now()
+        corrected = {}
+        for resource in resources or PLAN_FIELDS:
+            counters = UsageCounter.objects.filter(resource=resource)
+            expression = cls._count_expression(resource)
+            with transaction.atomic():
+                corrected[resource] = counters.exclude(value=expression).update(value=expression, reconciled_at=now)
+                counters.update(reconciled_at=now)
+        return corrected
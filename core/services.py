@@ -7,7 +7,10 @@ from django.core.mail import send_mail
 from datetime import timedelta
 import logging
 from django.core.cache import cache
-from .models import LoginAttempt
+from django.db.models import DateTimeField, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from .models import LoginAttempt, LoginAttemptReset
+from .performance import track
 import requests
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioException
@@ -33,11 +36,12 @@ class TwilioService:
             from twilio.rest import Client
             
             client = Client(self.account_sid, self.auth_token)
-            message_obj = client.messages.create(
-                body=message,
-                from_=self.phone_number,
-                to=to_number
-            )
+            with track('twilio'):
+                message_obj = client.messages.create(
+                    body=message,
+                    from_=self.phone_number,
+                    to=to_number
+                )
             logger.info(f"SMS enviado com sucesso: {message_obj.sid}")
             return True
             
@@ -56,13 +60,14 @@ class TwilioService:
             Se você não solicitou este código, ignore este email.
             """
             
-            send_mail(
-                subject,
-                email_message,
-                settings.DEFAULT_FROM_EMAIL,
-                [f"{to_number}@example.com"],  # Email fictício
-                fail_silently=False,
-            )
+            with track('smtp'):
+                send_mail(
+                    subject,
+                    email_message,
+                    settings.DEFAULT_FROM_EMAIL,
+                    [f"{to_number}@example.com"],  # Email fictício
+                    fail_silently=False,
+                )
             logger.info(f"Email de fallback enviado para {to_number}")
             return True
             
@@ -96,11 +101,12 @@ class TwilioVerifyService:
             client = Client(self.account_sid, self.auth_token)
             
             print(f"DEBUG TWILIO: Enviando verificação para {phone_number}")
-            verification = client.verify \
-                .v2 \
-                .services(self.verify_service_sid) \
-                .verifications \
-                .create(to=phone_number, channel='sms')
+            with track('twilio'):
+                verification = client.verify \
+                    .v2 \
+                    .services(self.verify_service_sid) \
+                    .verifications \
+                    .create(to=phone_number, channel='sms')
             
             print(f"DEBUG TWILIO: Verificação criada com SID: {verification.sid}")
             print(f"DEBUG TWILIO: Status: {verification.status}")
@@ -143,11 +149,12 @@ class TwilioVerifyService:
             client = Client(self.account_sid, self.auth_token)
             
             print(f"DEBUG TWILIO CHECK: Enviando verificação para Twilio")
-            verification_check = client.verify \
-                .v2 \
-                .services(self.verify_service_sid) \
-                .verification_checks \
-                .create(to=phone_number, code=code)
+            with track('twilio'):
+                verification_check = client.verify \
+                    .v2 \
+                    .services(self.verify_service_sid) \
+                    .verification_checks \
+                    .create(to=phone_number, code=code)
             
             is_valid = verification_check.status == 'approved'
             print(f"DEBUG TWILIO CHECK: Status: {verification_check.status}")
@@ -328,10 +335,10 @@ class VerificationService:
 
 
 class SecurityService:
-    """Serviço para segurança do login - COM LIMPEZA AUTOMÁTICA"""
+    """Serviço para segurança do login - contagem por janela de tempo"""
     
     MAX_ATTEMPTS = 5  # Máximo de tentativas
-    CLEANUP_MINUTES = 3  # Limpa tentativas após 3 minutos
+    CLEANUP_MINUTES = 3  # Janela de contagem das tentativas (minutos)
     
     def record_login_attempt(self, username, ip_address, success, user_agent=''):
         """Registra uma tentativa de login"""
@@ -342,26 +349,41 @@ class SecurityService:
             user_agent=user_agent
         )
     
-    def cleanup_old_attempts(self):
-        """Limpa tentativas antigas automaticamente"""
-        cutoff_time = timezone.now() - timedelta(minutes=self.CLEANUP_MINUTES)
-        deleted_count = LoginAttempt.objects.filter(timestamp__lt=cutoff_time).delete()[0]
-        if deleted_count > 0:
-            print(f"DEBUG: Limpou {deleted_count} tentativas antigas")
-    
     def get_failed_attempts_count(self, username, ip_address):
-        """Conta tentativas falhadas - COM LIMPEZA AUTOMÁTICA"""
-        # Limpar tentativas antigas primeiro
-        self.cleanup_old_attempts()
-        
+        """
+        Conta tentativas falhadas na janela de CLEANUP_MINUTES
+
+        Só contam as falhas depois do último login bem-sucedido do usuário e
+        do último desbloqueio manual (LoginAttemptReset, no banco: vale para
+        todos os workers). Nada é apagado (o histórico é auditoria, com
+        retenção no LoginAuditStore) e o limite em timestamp faz o
+        PostgreSQL ler só a partição do dia.
+        """
+        since = Value(timezone.now() - timedelta(minutes=self.CLEANUP_MINUTES), output_field=DateTimeField())
+        last_success = (
+            LoginAttempt.objects.filter(username=username, success=True, timestamp__gte=since)
+            .order_by('-timestamp').values('timestamp')[:1]
+        )
+        last_reset = LoginAttemptReset.objects.order_by('-reset_at').values('reset_at')[:1]
         return LoginAttempt.objects.filter(
             username=username,
             ip_address=ip_address,
-            success=False
+            success=False,
+            timestamp__gt=Greatest(
+                Coalesce(Subquery(last_success), since),
+                Coalesce(Subquery(last_reset), since),
+            ),
         ).count()
     
+    def reset_attempts(self):
+        """Zera a contagem de bloqueio de todos os usuários sem apagar o histórico"""
+        now = timezone.now()
+        LoginAttemptReset.objects.create(reset_at=now)
+        # Só o último desbloqueio importa; os anteriores à janela não mudam mais nada
+        LoginAttemptReset.objects.filter(reset_at__lt=now - timedelta(minutes=self.CLEANUP_MINUTES)).delete()
+    
     def should_block_login(self, username, ip_address):
-        """Determina se o login deve ser bloqueado - COM LIMPEZA AUTOMÁTICA"""
+        """Determina se o login deve ser bloqueado"""
         try:
             from .models import User
             if '@' in username:
@@ -374,7 +396,7 @@ class SecurityService:
                 print(f"DEBUG: Usuário {username} não existe, não bloqueando")
                 return False, None
             
-            # Se usuário existe, verificar tentativas (com limpeza automática)
+            # Se usuário existe, verificar tentativas recentes
             failed_attempts = self.get_failed_attempts_count(username, ip_address)
             print(f"DEBUG: Usuário {username} - Tentativas falhadas: {failed_attempts}")
             
@@ -415,7 +437,8 @@ class GeolocationService:
         
         try:
             # Usar API gratuita do ipapi.co
-            response = requests.get(f'http://ip-api.com/json/{ip}', timeout=3)
+            with track('geo'):
+                response = requests.get(f'http://ip-api.com/json/{ip}', timeout=3)
             if response.status_code == 200:
                 data = response.json()
                 if data.get('status') == 'success':
@@ -457,4 +480,80 @@ class GeolocationService:
         # Sempre detectar por IP, independente se usuário está logado ou não
         ip = GeolocationService.get_client_ip(request)
         country_code = GeolocationService.get_country_by_ip(ip, simulate_country)
-        return GeolocationService.get_currency_by_country(country_code)
\ No newline at end of file
+        return GeolocationService.get_currency_by_country(country_code)
+
+class CountryMetadataService:
+    """Serviço para a tabela de países consumida pelos formulários (DDI, nomes, bandeiras)"""
+    
+    CACHE_PREFIX = 'country_metadata'
+    VERSION_TIMEOUT = 300  # Revalida a versão no banco a cada 5 minutos
+    SUPPORTED_LANGUAGES = ['pt', 'en', 'es']
+    
+    @classmethod
+    def _version_key(cls):
+        return f'{cls.CACHE_PREFIX}:version'
+    
+    @classmethod
+    def _payload_key(cls, version, language_code):
+        return f'{cls.CACHE_PREFIX}:{version}:{language_code}'
+    
+    @classmethod
+    def normalize_language(cls, language_code):
+        """Garante um idioma suportado (fallback para português)"""
+        language_code = (language_code or '').split('-')[0].lower()
+        return language_code if language_code in cls.SUPPORTED_LANGUAGES else 'pt'
+    
+    @classmethod
+    def get_version(cls):
+        """Retorna a versão atual da tabela de países (muda quando algum país muda)"""
+        version = cache.get(cls._version_key())
+        if version is None:
+            import hashlib
+            from django.db.models import Count, Max
+            from .models import Country
+            
+            stats = Country.objects.aggregate(total=Count('id'), last_update=Max('updated_at'))
+            raw = f"{stats['total']}:{stats['last_update'].isoformat() if stats['last_update'] else ''}"
+            version = hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+            cache.set(cls._version_key(), version, cls.VERSION_TIMEOUT)
+        return version
+    
+    @classmethod
+    def get_countries(cls, language_code=None):
+        """Retorna (versão, lista de países ativos) no idioma informado"""
+        language_code = cls.normalize_language(language_code)
+        version = cls.get_version()
+        key = cls._payload_key(version, language_code)
+        
+        countries = cache.get(key)
+        if countries is None:
+            from .models import Country
+            
+            countries = [
+                {
+                    'id': country.id,
+                    'code': country.code,
+                    'ddi': country.ddi,
+                    'name': country.get_localized_name(language_code),
+                    'flag': country.flag or country.code.lower(),
+                }
+                for country in Country.objects.filter(is_active=True).only(
+                    'id', 'code', 'ddi', 'name', 'name_en', 'name_es', 'flag'
+                )
+            ]
+            cache.set(key, countries, None)
+        return version, countries
+    
+    @classmethod
+    def get_ddi(cls, country_id, language_code=None):
+        """Busca o DDI de um país na tabela em cache (sem consulta por país)"""
+        _version, countries = cls.get_countries(language_code)
+        for country in countries:
+            if country['id'] == country_id:
+                return country['ddi']
+        return None
+    
+    @classmethod
+    def invalidate(cls):
+        """Descarta a versão atual; a próxima leitura gera uma nova tabela"""
+        cache.delete(cls._version_key())
@@ -0,0 +1,75 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from . import quotas
+from .models import Account, Country, Plan, UserCompany
+from .services import CountryMetadataService
+
+
+@receiver([post_save, post_delete], sender=Country)
+def invalidate_country_metadata(sender, **kwargs):
+    """Regenera a tabela de países em cache quando um país muda"""
+    CountryMetadataService.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Plan)
+@receiver([post_save, post_delete], sender=Account)
+def invalidate_quota_limits(sender, **kwargs):
+    """Limites em cache dependem do plano da conta do proprietário"""
+    quotas.QuotaService.invalidate()
+
+
+@receiver(post_save, sender=UserCompany)
+def count_user_company(sender, instance, created, **kwargs):
+    """Vínculo novo: mais um usuário na empresa e mais uma empresa na conta"""
+    if created:
+        quotas.QuotaService.adjust(quotas.USERS, 1, company_id=instance.company_id)
+        quotas.QuotaService.adjust(quotas.COMPANIES, 1, user_id=instance.user_id)
+    if instance.role == 'owner':
+        quotas.QuotaService.invalidate()
+
+
+@receiver(post_delete, sender=UserCompany)
+def uncount_user_company(sender, instance, **kwargs):
+    quotas.QuotaService.adjust(quotas.USERS, -1, company_id=instance.company_id)
+    quotas.QuotaService.adjust(quotas.COMPANIES, -1, user_id=instance.user_id)
+    if instance.role == 'owner':
+        quotas.QuotaService.invalidate()
+
+
+@receiver(pre_save, sender='products.Product')
+def remember_company_record_counted(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Guarda se o registro já contava no limite (exclusão lógica muda is_active)"""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    resource = _company_resource(sender)
+    if update_fields is not None and not set(quotas.SOURCE_FILTERS[resource]) & set(update_fields):
+        return
+    instance._quota_counted = quotas.counted(resource).filter(pk=instance.pk).exists()
+
+
+@receiver(post_save, sender='customers.Customer')
+@receiver(post_save, sender='products.Product')
+def count_company_record(sender, instance, created, **kwargs):
+    """Cliente/produto novo (ou reativado) conta no limite da empresa (mesma transação do UPDATE/INSERT)"""
+    resource = _company_resource(sender)
+    counted = quotas.is_counted(resource, instance)
+    if created:
+        if counted:
+            quotas.QuotaService.adjust(resource, 1, company_id=instance.company_id)
+        return
+    was_counted = instance.__dict__.pop('_quota_counted', counted)
+    if counted != was_counted:
+        quotas.QuotaService.adjust(resource, 1 if counted else -1, company_id=instance.company_id)
+
+
+@receiver(post_delete, sender='customers.Customer')
+@receiver(post_delete, sender='products.Product')
+def uncount_company_record(sender, instance, **kwargs):
+    resource = _company_resource(sender)
+    if quotas.is_counted(resource, instance):
+        quotas.QuotaService.adjust(resource, -1, company_id=instance.company_id)
+
+
+def _company_resource(sender):
+    return {label: resource for resource, label in quotas.COMPANY_SOURCES.items()}[sender._meta.label]
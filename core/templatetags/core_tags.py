@@ -0,0 +1,15 @@
+from django import template
+from django.urls import reverse
+from django.utils import translation
+
+from core.services import CountryMetadataService
+
+register = template.Library()
+
+
+@register.simple_tag
+def country_metadata_url():
+    """URL versionada da tabela de países no idioma atual"""
+    language = CountryMetadataService.normalize_language(translation.get_language())
+    version = CountryMetadataService.get_version()
+    return f"{reverse('country_metadata', args=[language])}?v={version}"
@@ -15,6 +15,8 @@ urlpatterns = [
     path('company-setup/', views.company_setup, name='company_setup'),
     path('change-language/', views.change_language, name='change_language'),
     path('api/country/<int:country_id>/ddi/', views.get_country_ddi, name='get_country_ddi'),
+    path('api/countries/<str:language>/', views.country_metadata, name='country_metadata'),
+    path('api/bulk-jobs/<str:job_id>/', views.bulk_job_status, name='bulk_job_status'),
     path('password-reset/', views.password_reset_request, name='password_reset_request'),
     path('password-reset/<str:token>/', views.password_reset_confirm, name='password_reset_confirm'),
     path('subscription/', views.subscription, name='subscription'),
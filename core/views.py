@@ -4,13 +4,18 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext as _
 from django.http import JsonResponse, HttpResponse
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_GET
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils import timezone
 from datetime import timedelta
 from .forms import UserRegistrationForm, UserLoginForm, SMSVerificationForm, CompanyForm, UserProfileForm
-from .services import VerificationService, SecurityService
+from .services import VerificationService, SecurityService, CountryMetadataService
 from .models import User, Country, Plan, Account, PlanPrice
 from django.utils import translation
+from . import bulk, quotas
+from .quotas import QuotaService
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from .decorators import subscription_required, full_access_required, read_only_access, check_subscription_status
 
 verification_service = VerificationService()
@@ -259,12 +264,9 @@ def user_login(request):
                 # Login bem-sucedido
                 if user.is_verified:
                     login(request, user)
+                    # O sucesso zera a contagem de falhas deste usuário (o histórico fica para auditoria)
                     security_service.record_login_attempt(username_or_email, ip_address, True, user_agent)
                     
-                    # Limpar tentativas antigas deste usuário após login bem-sucedido
-                    from .models import LoginAttempt
-                    LoginAttempt.objects.filter(username=username_or_email).delete()
-                    
                     messages.success(request, _('Login realizado com sucesso!'))
                     return redirect('dashboard')
                 else:
@@ -533,16 +535,24 @@ def company_setup(request):
         
         # Se chegou aqui, é para salvar os dados
         if form.is_valid():
-            company = form.save()
-            # Só associar a empresa ao usuário se ela não existia antes
-            if not existing_company:
+            if existing_company:
+                company = form.save()
+            else:
+                # Empresa nova conta no limite de empresas do plano da conta
                 from .models import UserCompany
-                UserCompany.objects.create(
-                    user=user,
-                    company=company,
-                    role='owner',
-                    is_active=True
-                )
+                account = getattr(user, 'account', None)
+                try:
+                    with QuotaService.reserve(quotas.COMPANIES, account=account) if account else transaction.atomic():
+                        company = form.save()
+                        UserCompany.objects.create(
+                            user=user,
+                            company=company,
+                            role='owner',
+                            is_active=True
+                        )
+                except ValidationError as error:
+                    messages.error(request, error.messages[0])
+                    return redirect('company_setup')
             
             messages.success(request, _('Empresa configurada com sucesso!'))
             
@@ -574,8 +584,9 @@ def change_language(request):
         if language and language in ['pt', 'en', 'es']:
             # Ativar o idioma imediatamente
             translation.activate(language)
-            request.session['django_language'] = language
-            request.session.modified = True
+            # Só gravar a sessão quando o idioma realmente mudar
+            if request.session.get('django_language') != language:
+                request.session['django_language'] = language
         else:
             pass # No debug print for invalid language
     
@@ -585,6 +596,11 @@ def change_language(request):
 
 def get_country_ddi(request, country_id):
     """Retorna o DDI de um país"""
+    # Países ativos vêm da tabela em cache; inativos ainda são consultados no banco
+    ddi = CountryMetadataService.get_ddi(country_id)
+    if ddi is not None:
+        return JsonResponse({'ddi': ddi})
+    
     try:
         country = Country.objects.get(id=country_id)
         return JsonResponse({'ddi': country.ddi})
@@ -592,6 +608,38 @@ def get_country_ddi(request, country_id):
         return JsonResponse({'error': 'País não encontrado'}, status=404)
 
 
+@require_GET
+def country_metadata(request, language):
+    """Tabela de países ativos (código, DDI, nome localizado, bandeira) para os formulários"""
+    language = CountryMetadataService.normalize_language(language)
+    version, countries = CountryMetadataService.get_countries(language)
+    
+    response = JsonResponse({
+        'version': version,
+        'language': language,
+        'countries': countries,
+    })
+    response['ETag'] = f'"{version}-{language}"'
+    
+    # URL versionada nunca muda de conteúdo; sem versão, revalidar pelo ETag
+    if request.GET.get('v') == version:
+        patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    
+    return get_conditional_response(request, etag=response['ETag'], response=response)
+
+
+@login_required
+@require_GET
+def bulk_job_status(request, job_id):
+    """Progresso de uma ação em lote executada em segundo plano"""
+    job = bulk.job_status(job_id, request.user)
+    if job is None:
+        return JsonResponse({'success': False}, status=404)
+    return JsonResponse({'success': True, **job})
+
+
 def password_reset_request(request):
     """Solicitação de recuperação de senha"""
     # Forçar ativação do idioma baseado na sessão
@@ -657,16 +705,15 @@ def clear_all_blocks(request):
 def clear_all_login_attempts(request):
     """View temporária para limpar todas as tentativas de login (apenas para desenvolvimento)"""
     if request.method == 'POST':
-        from .models import LoginAttempt
         from django.core.cache import cache
         
-        # Limpar todas as tentativas de login
-        LoginAttempt.objects.all().delete()
-        
         # Limpar cache
         cache.clear()
         
-        messages.success(request, 'Todas as tentativas de login foram removidas!')
+        # Zerar a contagem de tentativas (o histórico fica para auditoria)
+        security_service.reset_attempts()
+        
+        messages.success(request, 'Contagem de tentativas de login zerada!')
     return redirect('login')
 
 
@@ -674,24 +721,21 @@ def force_unblock(request):
     """View para forçar desbloqueio imediato (apenas para desenvolvimento)"""
     if request.method == 'POST':
         from django.core.cache import cache
-        from .models import LoginAttempt
         
         # Limpar cache
         cache.clear()
         
-        # Limpar tentativas antigas
-        cutoff_time = timezone.now() - timedelta(minutes=15)
-        LoginAttempt.objects.filter(timestamp__lt=cutoff_time).delete()
+        # Zerar a contagem de tentativas (retenção do histórico: maintain_login_attempts)
+        security_service.reset_attempts()
         
         messages.success(request, 'Sistema desbloqueado!')
     return redirect('login')
 
 
 def clear_attempts(request):
-    """Limpa todas as tentativas de login"""
-    from .models import LoginAttempt
-    LoginAttempt.objects.all().delete()
-    messages.success(request, 'Tentativas limpas!')
+    """Zera a contagem de tentativas de login (o histórico fica para auditoria)"""
+    security_service.reset_attempts()
+    messages.success(request, 'Tentativas zeradas!')
     return redirect('login')
 
 
@@ -1,11 +1,15 @@
 from django.contrib import admin
+from django.db.models import Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
+from core.admin_scaling import ScalableAdminMixin
+from .dedupe import name_key, normalize_email, phone_key
 from .models import Customer
 
 
 @admin.register(Customer)
-class CustomerAdmin(admin.ModelAdmin):
+class CustomerAdmin(ScalableAdminMixin, admin.ModelAdmin):
     """Admin customizado para clientes"""
     
     list_display = [
@@ -18,10 +22,11 @@ class CustomerAdmin(admin.ModelAdmin):
         ('birth_date', admin.DateFieldListFilter),
     ]
     
-    search_fields = [
-        'name', 'email', 'phone', 'document_number', 
-        'social_network', 'address', 'city', 'state'
-    ]
+    list_select_related = ['company', 'country']
+    
+    # Busca pelas chaves normalizadas (índices customer_*_key): e-mail, telefone ou nome
+    search_fields = ['email_key', 'phone_key', 'name_key']
+    search_help_text = _('E-mail, telefone ou nome (busca exata pelas chaves normalizadas)')
     
     readonly_fields = ['created_at', 'updated_at']
     
@@ -71,9 +76,23 @@ class CustomerAdmin(admin.ModelAdmin):
         user_companies = request.user.companies.all()
         return qs.filter(company__in=user_companies)
     
+    def get_search_results(self, request, queryset, search_term):
+        """Igualdade nas chaves de bloqueio (as mesmas de customers/dedupe.py)"""
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if '@' in term:
+            return queryset.filter(email_key=normalize_email(term)), False
+        condition = Q()
+        if name_key(term):
+            condition |= Q(name_key=name_key(term))
+        if phone_key(term):
+            condition |= Q(phone_key=phone_key(term))
+        return (queryset.filter(condition) if condition else queryset.none()), False
+    
     def activate_customers(self, request, queryset):
         """Ativar clientes selecionados"""
-        updated = queryset.update(is_active=True)
+        updated = queryset.update(is_active=True, updated_at=timezone.now())
         self.message_user(
             request, 
             _('{} cliente(s) ativado(s) com sucesso.').format(updated)
@@ -82,7 +101,7 @@ class CustomerAdmin(admin.ModelAdmin):
     
     def deactivate_customers(self, request, queryset):
         """Desativar clientes selecionados"""
-        updated = queryset.update(is_active=False)
+        updated = queryset.update(is_active=False, updated_at=timezone.now())
         self.message_user(
             request, 
             _('{} cliente(s) desativado(s) com sucesso.').format(updated)
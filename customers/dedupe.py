@@ -0,0 +1,310 @@
+"""
+Detecção de clientes duplicados
+
+Cada cliente recebe três chaves de bloqueio por empresa: dígitos finais do
+telefone, e-mail normalizado e uma chave fonética do nome (primeiro e último
+nome). Só clientes que compartilham alguma chave viram pares candidatos, que
+recebem uma pontuação de similaridade (Jaro-Winkler no nome e no e-mail,
+igualdade do telefone). A varredura completa agrupa por chave e, em blocos
+muito grandes (nomes comuns), compara apenas vizinhos na ordem alfabética, o
+que mantém o custo linear no número de clientes.
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+
+from django.db.models import Q
+
+
+PHONE_KEY_DIGITS = 10
+DUPLICATE_THRESHOLD = 0.85
+MAX_BLOCK_SIZE = 50
+NEIGHBOR_WINDOW = 5
+NAME_WEIGHT = 0.55
+EMAIL_WEIGHT = 0.3
+PHONE_WEIGHT = 0.15
+NAME_PARTICLES = {'da', 'de', 'do', 'das', 'dos', 'e', 'del', 'la', 'y'}
+
+_NON_DIGITS = re.compile(r'\D')
+
+# Regras fonéticas aplicadas em ordem (nomes em português/espanhol)
+_PHONETIC_RULES = [
+    (re.compile(r'PH'), 'F'),
+    (re.compile(r'[CS]H'), 'X'),
+    (re.compile(r'LH'), 'L'),
+    (re.compile(r'NH'), 'N'),
+    (re.compile(r'G(?=[EI])'), 'J'),
+    (re.compile(r'GU(?=[EI])'), 'G'),
+    (re.compile(r'QU?'), 'K'),
+    (re.compile(r'C(?=[EI])'), 'S'),
+    (re.compile(r'C'), 'K'),
+    (re.compile(r'Z'), 'S'),
+    (re.compile(r'Y'), 'I'),
+    (re.compile(r'W'), 'V'),
+    (re.compile(r'H'), ''),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+
+def strip_accents(value):
+    normalized = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in normalized if not unicodedata.combining(char))
+
+
+def normalize_name(name):
+    """Nome sem acentos, minúsculo, sem partículas ('da', 'de'...) e sem números"""
+    words = re.findall(r'[a-z]+', strip_accents(name).lower())
+    return ' '.join(word for word in words if word not in NAME_PARTICLES)
+
+
+def normalize_email(email):
+    """E-mail minúsculo e sem sufixo '+tag' na parte local"""
+    email = (email or '').strip().lower()
+    local, at, domain = email.partition('@')
+    if not at:
+        return email
+    return f"{local.split('+', 1)[0]}@{domain}"
+
+
+def phone_key(phone):
+    """Últimos dígitos do telefone (ignora DDI, máscara e espaços)"""
+    digits = _NON_DIGITS.sub('', phone or '')
+    return digits[-PHONE_KEY_DIGITS:]
+
+
+@lru_cache(maxsize=50_000)
+def phonetic(word):
+    """Código fonético de uma palavra: consoantes após as regras, mantendo a inicial"""
+    word = strip_accents(word).upper()
+    if not word:
+        return ''
+    for pattern, replacement in _PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    if not word:
+        return ''
+    return word[0] + re.sub(r'[AEIOU]', '', word[1:])
+
+
+def _name_key(normalized):
+    words = normalized.split()
+    if not words:
+        return ''
+    if len(words) == 1:
+        return phonetic(words[0])
+    return f'{phonetic(words[0])} {phonetic(words[-1])}'
+
+
+def name_key(name):
+    """Chave fonética do primeiro e do último nome"""
+    return _name_key(normalize_name(name))
+
+
+def blocking_keys(name, email, phone):
+    """Chaves (name_key, email_key, phone_key) guardadas no Customer"""
+    return name_key(name), normalize_email(email), phone_key(phone)
+
+
+def jaro_winkler(a, b, prefix_scale=0.1):
+    """Similaridade Jaro-Winkler entre duas strings (0 a 1)"""
+    if a == b:
+        return 1.0
+    len_a, len_b = len(a), len(b)
+    if not len_a or not len_b:
+        return 0.0
+
+    window = max(len_a, len_b) // 2 - 1
+    matched_b = [False] * len_b
+    matches_a = []
+    for i, char in enumerate(a):
+        start = max(0, i - window)
+        end = min(i + window + 1, len_b)
+        for j in range(start, end):
+            if not matched_b[j] and b[j] == char:
+                matched_b[j] = True
+                matches_a.append(char)
+                break
+
+    matches = len(matches_a)
+    if not matches:
+        return 0.0
+
+    matches_b = [b[j] for j in range(len_b) if matched_b[j]]
+    transpositions = sum(x != y for x, y in zip(matches_a, matches_b)) / 2
+    jaro = (matches / len_a + matches / len_b + (matches - transpositions) / matches) / 3
+
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * prefix_scale * (1 - jaro)
+
+
+class Record:
+    """Dados mínimos de um cliente para comparação"""
+
+    __slots__ = (
+        'pk', 'company_id', 'name', 'email', 'phone', 'name_norm',
+        'name_key', 'email_key', 'phone_key', 'email_local', 'email_domain', 'email_digits',
+    )
+
+    def __init__(self, pk, company_id, name, email, phone):
+        self.pk = pk
+        self.company_id = company_id
+        self.name = name
+        self.email = email
+        self.phone = phone
+        self.name_norm = normalize_name(name)
+        self.name_key = _name_key(self.name_norm)
+        self.email_key = normalize_email(email)
+        self.phone_key = phone_key(phone)
+        self.email_local, _, self.email_domain = self.email_key.partition('@')
+        self.email_digits = _NON_DIGITS.sub('', self.email_local)
+
+
+def _email_similarity(a, b):
+    if a.email_key and a.email_key == b.email_key:
+        return 1.0
+    # Números diferentes no e-mail (joao85 x joao86) costumam ser pessoas diferentes
+    if a.email_digits != b.email_digits:
+        return 0.0
+    return jaro_winkler(a.email_local, b.email_local) * (1.0 if a.email_domain == b.email_domain else 0.5)
+
+
+def score(a, b, threshold=0.0):
+    """
+    Pontuação (0 a 1) de que dois registros são o mesmo cliente
+
+    Com `threshold`, devolve 0 sem calcular a similaridade do nome quando
+    o par não tem como alcançar o limiar.
+    """
+    email_sim = _email_similarity(a, b)
+    phone_sim = 1.0 if a.phone_key and a.phone_key == b.phone_key else 0.0
+    same_contact = email_sim == 1.0 or phone_sim == 1.0
+
+    partial = NAME_WEIGHT + EMAIL_WEIGHT * email_sim + PHONE_WEIGHT * phone_sim
+    if not same_contact and partial < threshold:
+        return 0.0
+
+    name_sim = jaro_winkler(a.name_norm, b.name_norm)
+    result = NAME_WEIGHT * name_sim + EMAIL_WEIGHT * email_sim + PHONE_WEIGHT * phone_sim
+    # Mesmo contato e nome parecido: praticamente certo
+    if same_contact and name_sim >= 0.75:
+        result = max(result, 0.9)
+    return round(result, 4)
+
+
+def _candidate_pairs(records):
+    """Pares que compartilham alguma chave de bloqueio, sem repetição"""
+    blocks = defaultdict(list)
+    for record in records:
+        for kind in ('name_key', 'email_key', 'phone_key'):
+            key = getattr(record, kind)
+            if key:
+                blocks[(record.company_id, kind, key)].append(record)
+
+    seen = set()
+    for block in blocks.values():
+        if len(block) < 2:
+            continue
+        if len(block) <= MAX_BLOCK_SIZE:
+            pairs = ((block[i], block[j]) for i in range(len(block)) for j in range(i + 1, len(block)))
+        else:
+            # Vizinhança ordenada: cada registro só é comparado aos próximos da lista
+            block = sorted(block, key=lambda record: record.name_norm)
+            pairs = (
+                (block[i], block[j])
+                for i in range(len(block))
+                for j in range(i + 1, min(i + 1 + NEIGHBOR_WINDOW, len(block)))
+            )
+        for a, b in pairs:
+            pair = (a.pk, b.pk) if a.pk < b.pk else (b.pk, a.pk)
+            if pair not in seen:
+                seen.add(pair)
+                yield a, b
+
+
+def find_duplicate_pairs(records, threshold=DUPLICATE_THRESHOLD):
+    """Pares (a, b, pontuação) acima do limiar"""
+    pairs = []
+    for a, b in _candidate_pairs(records):
+        value = score(a, b, threshold)
+        if value >= threshold:
+            pairs.append((a, b, value))
+    return pairs
+
+
+def cluster_pairs(pairs):
+    """Agrupa os pares em conjuntos de duplicados (union-find)"""
+    parent = {}
+
+    def find(pk):
+        parent.setdefault(pk, pk)
+        while parent[pk] != pk:
+            parent[pk] = parent[parent[pk]]
+            pk = parent[pk]
+        return pk
+
+    records = {}
+    best = defaultdict(float)
+    for a, b, value in pairs:
+        records[a.pk], records[b.pk] = a, b
+        root_a, root_b = find(a.pk), find(b.pk)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    groups = defaultdict(list)
+    for pk in records:
+        groups[find(pk)].append(records[pk])
+    for a, b, value in pairs:
+        root = find(a.pk)
+        best[root] = max(best[root], value)
+
+    return [
+        {'score': best[root], 'customers': sorted(members, key=lambda record: record.pk)}
+        for root, members in sorted(groups.items(), key=lambda item: -best[item[0]])
+    ]
+
+
+def scan(queryset, threshold=DUPLICATE_THRESHOLD, chunk_size=5000):
+    """Varre a queryset de clientes e retorna os grupos de prováveis duplicados"""
+    rows = queryset.values_list('pk', 'company_id', 'name', 'email', 'phone').iterator(chunk_size=chunk_size)
+    records = [Record(*row) for row in rows]
+    return cluster_pairs(find_duplicate_pairs(records, threshold))
+
+
+def find_similar(company, name, email, phone, exclude_pk=None, threshold=DUPLICATE_THRESHOLD, limit=5):
+    """
+    Clientes da empresa que provavelmente são a mesma pessoa
+
+    Consulta só os candidatos que compartilham alguma chave de bloqueio
+    (índices por empresa) e devolve [(customer, pontuação)] do mais parecido
+    para o menos parecido.
+    """
+    from .models import Customer
+
+    probe = Record(exclude_pk, company.pk, name, email, phone)
+    customers = Customer.objects.filter(company=company)
+    if exclude_pk:
+        customers = customers.exclude(pk=exclude_pk)
+
+    # E-mail/telefone iguais vêm sempre; só o bloco do nome (chaves comuns) é limitado
+    contact = Q()
+    for field in ('email_key', 'phone_key'):
+        value = getattr(probe, field)
+        if value:
+            contact |= Q(**{field: value})
+    candidates = list(customers.filter(contact)) if contact else []
+    if probe.name_key:
+        same_name = customers.filter(name_key=probe.name_key).exclude(pk__in=[customer.pk for customer in candidates])
+        candidates += same_name.order_by('pk')[:MAX_BLOCK_SIZE]
+
+    matches = []
+    for customer in candidates:
+        value = score(probe, Record(customer.pk, company.pk, customer.name, customer.email, customer.phone), threshold)
+        if value >= threshold:
+            matches.append((customer, value))
+    matches.sort(key=lambda match: -match[1])
+    return matches[:limit]
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Management command para localizar clientes duplicados
+Varre a tabela de clientes com chaves de bloqueio (ver customers/dedupe.py)
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from customers import dedupe
+from customers.models import Customer
+
+
+class Command(BaseCommand):
+    help = 'Lista grupos de clientes provavelmente duplicados (por empresa)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='Varre apenas a empresa com este id',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=dedupe.DUPLICATE_THRESHOLD,
+            help=f'Pontuação mínima para considerar duplicado (padrão: {dedupe.DUPLICATE_THRESHOLD})',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=50,
+            help='Quantidade máxima de grupos exibidos (padrão: 50)',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Saída em JSON com todos os grupos',
+        )
+
+    def handle(self, *args, **options):
+        customers = Customer.objects.all()
+        if options['company']:
+            customers = customers.filter(company_id=options['company'])
+
+        started = time.perf_counter()
+        groups = dedupe.scan(customers, threshold=options['threshold'])
+        elapsed = time.perf_counter() - started
+
+        if options['json']:
+            self.stdout.write(json.dumps([
+                {
+                    'score': group['score'],
+                    'company_id': group['customers'][0].company_id,
+                    'customers': [
+                        {'id': record.pk, 'name': record.name, 'email': record.email, 'phone': record.phone}
+                        for record in group['customers']
+                    ],
+                }
+                for group in groups
+            ], ensure_ascii=False, indent=2))
+            return
+
+        for group in groups[:options['limit']]:
+            first = group['customers'][0]
+            self.stdout.write(f"\n🔎 Empresa {first.company_id} — pontuação {group['score']:.2f}")
+            for record in group['customers']:
+                self.stdout.write(f'   #{record.pk} {record.name} <{record.email}> {record.phone}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {len(groups)} grupo(s) de duplicados encontrados em {elapsed:.2f}s'
+        ))
@@ -0,0 +1,135 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:28
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+# Cópia das chaves de customers/dedupe.py na data desta migração: o
+# preenchimento não muda se as regras do app mudarem depois
+PHONE_KEY_DIGITS = 10
+NAME_PARTICLES = {'da', 'de', 'do', 'das', 'dos', 'e', 'del', 'la', 'y'}
+
+_NON_DIGITS = re.compile(r'\D')
+
+_PHONETIC_RULES = [
+    (re.compile(r'PH'), 'F'),
+    (re.compile(r'[CS]H'), 'X'),
+    (re.compile(r'LH'), 'L'),
+    (re.compile(r'NH'), 'N'),
+    (re.compile(r'G(?=[EI])'), 'J'),
+    (re.compile(r'GU(?=[EI])'), 'G'),
+    (re.compile(r'QU?'), 'K'),
+    (re.compile(r'C(?=[EI])'), 'S'),
+    (re.compile(r'C'), 'K'),
+    (re.compile(r'Z'), 'S'),
+    (re.compile(r'Y'), 'I'),
+    (re.compile(r'W'), 'V'),
+    (re.compile(r'H'), ''),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+
+def strip_accents(value):
+    normalized = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in normalized if not unicodedata.combining(char))
+
+
+def normalize_email(email):
+    email = (email or '').strip().lower()
+    local, at, domain = email.partition('@')
+    if not at:
+        return email
+    return f"{local.split('+', 1)[0]}@{domain}"
+
+
+def phone_key(phone):
+    digits = _NON_DIGITS.sub('', phone or '')
+    return digits[-PHONE_KEY_DIGITS:]
+
+
+def phonetic(word):
+    word = strip_accents(word).upper()
+    if not word:
+        return ''
+    for pattern, replacement in _PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    if not word:
+        return ''
+    return word[0] + re.sub(r'[AEIOU]', '', word[1:])
+
+
+def name_key(name):
+    words = [
+        word for word in re.findall(r'[a-z]+', strip_accents(name).lower())
+        if word not in NAME_PARTICLES
+    ]
+    if not words:
+        return ''
+    if len(words) == 1:
+        return phonetic(words[0])
+    return f'{phonetic(words[0])} {phonetic(words[-1])}'
+
+
+def blocking_keys(name, email, phone):
+    return name_key(name), normalize_email(email), phone_key(phone)
+
+
+def fill_dedupe_keys(apps, schema_editor):
+    """Calcula as chaves de bloqueio dos clientes existentes em lotes"""
+    Customer = apps.get_model('customers', 'Customer')
+    batch_size = 2000
+    last_pk = 0
+    while True:
+        batch = list(
+            Customer.objects.filter(pk__gt=last_pk).order_by('pk')
+            .only('pk', 'name', 'email', 'phone')[:batch_size]
+        )
+        if not batch:
+            break
+        for customer in batch:
+            customer.name_key, customer.email_key, customer.phone_key = blocking_keys(
+                customer.name, customer.email, customer.phone
+            )
+        Customer.objects.bulk_update(batch, ['name_key', 'email_key', 'phone_key'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_country_continent_country_region'),
+        ('customers', '0003_alter_customer_options_alter_customer_address_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='email_key',
+            field=models.CharField(blank=True, editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='name_key',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='phone_key',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(fill_dedupe_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['company', 'email_key'], name='customer_company_email_key'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['company', 'phone_key'], name='customer_company_phone_key'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['company', 'name_key'], name='customer_company_name_key'),
+        ),
+    ]
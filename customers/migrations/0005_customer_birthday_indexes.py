@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:32
+
+import django.db.models.expressions
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_country_continent_country_region'),
+        ('customers', '0004_customer_dedupe_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['company', 'birth_date'], name='customer_company_birth_date'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(models.F('company'), django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.functions.datetime.ExtractMonth('birth_date'), '*', models.Value(100)), '+', django.db.models.functions.datetime.ExtractDay('birth_date')), name='customer_company_birthday'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_admin_search_indexes'),
+        ('customers', '0005_customer_birthday_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['email_key'], name='customer_email_key'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['phone_key'], name='customer_phone_key'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['name_key'], name='customer_name_key'),
+        ),
+    ]
@@ -1,6 +1,101 @@
+import calendar
+from datetime import date, timedelta
+
 from django.db import models
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import ExtractDay, ExtractMonth, ExtractYear
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from core.models import Company, Country
+from .dedupe import blocking_keys
+
+
+def birthday_key():
+    """MMDD do aniversário (ex.: 1225); mesma expressão do índice customer_company_birthday"""
+    return ExtractMonth('birth_date') * 100 + ExtractDay('birth_date')
+
+
+def _years_ago(today, years):
+    """Mesma data `years` anos atrás (29/02 vira 28/02 em ano não bissexto; antes do ano 1, date.min)"""
+    if today.year - years < date.min.year:
+        return date.min
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        return today.replace(year=today.year - years, day=28)
+
+
+def _day_of_year(year):
+    """Dia do ano do aniversário em `year`, calculado no banco"""
+    cumulative = 0
+    whens = []
+    for month in range(1, 13):
+        whens.append(When(birth_month=month, then=Value(cumulative)))
+        cumulative += calendar.monthrange(year, month)[1]
+    return Case(*whens, output_field=IntegerField()) + F('birth_day')
+
+
+class CustomerQuerySet(models.QuerySet):
+    """Consultas de idade e aniversário resolvidas no SQL"""
+
+    def with_birthday(self):
+        return self.annotate(
+            birth_month=ExtractMonth('birth_date'),
+            birth_day=ExtractDay('birth_date'),
+            birthday_key=birthday_key(),
+        )
+
+    def with_age(self, today=None):
+        """Anota `age` (anos completos na data de hoje)"""
+        today = today or timezone.localdate()
+        today_key = today.month * 100 + today.day
+        queryset = self if 'birthday_key' in self.query.annotations else self.with_birthday()
+        return queryset.annotate(
+            age=Value(today.year) - ExtractYear('birth_date') - Case(
+                When(birthday_key__gt=today_key, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+
+    def with_days_to_birthday(self, today=None):
+        """Anota `days_to_birthday` (0 = aniversário hoje)"""
+        today = today or timezone.localdate()
+        today_key = today.month * 100 + today.day
+        today_doy = today.timetuple().tm_yday
+        year_length = 366 if calendar.isleap(today.year) else 365
+        queryset = self if 'birthday_key' in self.query.annotations else self.with_birthday()
+        return queryset.annotate(
+            days_to_birthday=Case(
+                When(birthday_key__gte=today_key, then=_day_of_year(today.year) - today_doy),
+                default=_day_of_year(today.year + 1) + (year_length - today_doy),
+                output_field=IntegerField(),
+            )
+        )
+
+    def age_between(self, min_age=None, max_age=None, today=None):
+        """Filtra por idade convertendo para faixa de birth_date (usa o índice)"""
+        today = today or timezone.localdate()
+        queryset = self
+        if min_age is not None:
+            queryset = queryset.filter(birth_date__lte=_years_ago(today, min_age))
+        if max_age is not None:
+            queryset = queryset.filter(birth_date__gt=_years_ago(today, max_age + 1))
+        return queryset
+
+    def birthday_within(self, days, today=None):
+        """Aniversariantes dos próximos `days` dias (faixas de MMDD, usa o índice)"""
+        today = today or timezone.localdate()
+        if days >= 365:
+            return self.filter(birth_date__isnull=False)
+        start = today.month * 100 + today.day
+        last = today + timedelta(days=days)
+        end = last.month * 100 + last.day
+        queryset = self if 'birthday_key' in self.query.annotations else self.with_birthday()
+        if start <= end:
+            return queryset.filter(birthday_key__gte=start, birthday_key__lte=end)
+        return queryset.filter(Q(birthday_key__gte=start) | Q(birthday_key__lte=end))
+
 
 class Customer(models.Model):
     """Modelo para clientes das empresas"""
@@ -28,23 +123,54 @@ class Customer(models.Model):
     notes = models.TextField(_("customers.model.notes"), blank=True)
     is_active = models.BooleanField(_("customers.model.is_active"), default=True)
     
+    # Chaves de bloqueio para detecção de duplicados (ver customers/dedupe.py)
+    name_key = models.CharField(max_length=100, blank=True, editable=False)
+    email_key = models.CharField(max_length=254, blank=True, editable=False)
+    phone_key = models.CharField(max_length=20, blank=True, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CustomerQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _("customers.model.customer")
         verbose_name_plural = _("customers.model.customers")
         ordering = ['name']
         unique_together = ['company', 'name']  # Nome único por empresa
+        indexes = [
+            models.Index(fields=['company', 'email_key'], name='customer_company_email_key'),
+            models.Index(fields=['company', 'phone_key'], name='customer_company_phone_key'),
+            models.Index(fields=['company', 'name_key'], name='customer_company_name_key'),
+            models.Index(fields=['company', 'birth_date'], name='customer_company_birth_date'),
+            models.Index(F('company'), birthday_key(), name='customer_company_birthday'),
+            # Busca do admin entre todas as empresas
+            models.Index(fields=['email_key'], name='customer_email_key'),
+            models.Index(fields=['phone_key'], name='customer_phone_key'),
+            models.Index(fields=['name_key'], name='customer_name_key'),
+        ]
     
     def __str__(self):
         return self.name
     
+    def update_dedupe_keys(self):
+        """Recalcula as chaves de bloqueio a partir de nome, e-mail e telefone"""
+        self.name_key, self.email_key, self.phone_key = blocking_keys(self.name, self.email, self.phone)
+    
+    def save(self, *args, **kwargs):
+        self.update_dedupe_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'name_key', 'email_key', 'phone_key'}
+        super().save(*args, **kwargs)
+    
     def get_age(self):
         """Retorna a idade do cliente baseada na data de nascimento"""
+        # Querysets com with_age() já trazem a idade calculada no banco
+        if hasattr(self, 'age'):
+            return self.age
         if self.birth_date:
-            from datetime import date
             today = date.today()
             return today.year - self.birth_date.year - ((today.month, today.day) < (self.birth_date.month, self.birth_date.day))
         return None
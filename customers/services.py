@@ -0,0 +1,52 @@
+"""
+Serviços do app de clientes
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from core import quotas
+from .models import Customer
+
+
+class CustomerBulkService:
+    """Ações em lote da listagem de clientes (executadas por core.bulk)"""
+
+    ACTIONS = ('activate', 'deactivate', 'delete')
+
+    @classmethod
+    def operation(cls, action, company=None):
+        """Retorna a função que aplica a ação a um bloco de clientes"""
+        if action == 'activate':
+            return lambda queryset: queryset.update(is_active=True, updated_at=timezone.now())
+        if action == 'deactivate':
+            return lambda queryset: queryset.update(is_active=False, updated_at=timezone.now())
+        if action == 'delete':
+            return lambda queryset: cls._delete(queryset, company)
+        raise ValidationError(_('common.bulk.invalid_action'))
+
+    @staticmethod
+    def _delete(queryset, company):
+        """
+        Exclui o bloco com um DELETE, sem carregar os clientes
+
+        O sinal post_delete (contador do plano) obrigaria o Django a carregar
+        cada cliente e ajustar o contador linha a linha. Com só FKs SET_NULL
+        apontando para o cliente, elas são anuladas com um UPDATE por relação,
+        os clientes saem em um DELETE e o contador é ajustado uma vez.
+        """
+        relations = Customer._meta.related_objects
+        if any(relation.on_delete is not models.SET_NULL for relation in relations):
+            # delete() retorna (total, {modelo: total}); conta só os clientes
+            return queryset.delete()[1].get(Customer._meta.label, 0)
+
+        pks = list(queryset.values_list('pk', flat=True))
+        for relation in relations:
+            relation.related_model._base_manager.filter(
+                **{f'{relation.field.name}__in': pks}
+            ).update(**{relation.field.name: None})
+        deleted = queryset._raw_delete(queryset.db)
+        quotas.QuotaService.adjust(quotas.CUSTOMERS, -deleted, company_id=company.pk)
+        return deleted
@@ -7,6 +7,8 @@ urlpatterns = [
     # Listagem e busca
     path('', views.customer_list, name='customer_list'),
     path('search/', views.customer_search, name='customer_search'),
+    path('segments/', views.customer_segment, name='customer_segment'),
+    path('bulk-action/', views.customer_bulk_action, name='customer_bulk_action'),
     
     # CRUD básico
     path('create/', views.customer_create, name='customer_create'),
@@ -2,11 +2,21 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
-from django.http import JsonResponse
-from django.db.models import Q
+import csv
+
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.paginator import Paginator
+from django.core.exceptions import ValidationError
+from django.views.decorators.http import require_POST
+from django.db.models import Q, Max, Count
 from .models import Customer
 from .forms import CustomerForm
+from .services import CustomerBulkService
+from .dedupe import find_similar, normalize_email
+from core import bulk, quotas
+from core.quotas import QuotaService
 from core.models import Company
+from core.decorators import conditional_view
 
 
 def get_user_company(request):
@@ -21,13 +31,8 @@ def get_user_company(request):
     return company
 
 
-@login_required
-def customer_list(request):
-    """Lista de clientes da empresa do usuário"""
-    company = get_user_company(request)
-    if not company:
-        return redirect('company_setup')
-    
+def _filter_customers(request, company):
+    """Aplica busca, filtro de status e ordenação da listagem"""
     # Busca
     search = request.GET.get('search', '')
     customers = Customer.objects.filter(company=company)
@@ -54,8 +59,40 @@ def customer_list(request):
     else:
         customers = customers.order_by('name')
     
+    return customers, search, status_filter, order_by
+
+
+def _customer_list_version(request):
+    """Validador da listagem: MAX(updated_at) e COUNT dos clientes filtrados"""
+    company = request.user.get_primary_company()
+    if not company:
+        return None
+    customers, *_filters = _filter_customers(request, company)
+    stats = customers.aggregate(last_update=Max('updated_at'), total=Count('id'))
+    return f"{company.pk}:{stats['total']}:{stats['last_update']}"
+
+
+def _customer_detail_version(request, pk):
+    """Validador do detalhe: updated_at do cliente da empresa"""
+    company = request.user.get_primary_company()
+    if not company:
+        return None
+    updated_at = Customer.objects.filter(pk=pk, company=company).values_list('updated_at', flat=True).first()
+    return f"{company.pk}:{pk}:{updated_at}" if updated_at else None
+
+
+@login_required
+@conditional_view(_customer_list_version)
+def customer_list(request):
+    """Lista de clientes da empresa do usuário"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+    
+    customers, search, status_filter, order_by = _filter_customers(request, company)
+    
     context = {
-        'customers': customers,
+        'customers': customers.with_age(),  # idade calculada no SQL (Customer.get_age usa a anotação)
         'search': search,
         'status_filter': status_filter,
         'order_by': order_by,
@@ -73,25 +110,47 @@ def customer_create(request):
     if not company:
         return redirect('company_setup')
     
+    duplicates = []
     if request.method == 'POST':
         form = CustomerForm(request.POST, user=request.user)
         if form.is_valid():
-            # Verificar se já existe cliente com este e-mail na empresa
-            email = form.cleaned_data.get('email')
-            if email and Customer.objects.filter(company=company, email=email).exists():
+            data = form.cleaned_data
+            email = data.get('email')
+            # Mesmo e-mail normalizado, pelo índice (company, email_key)
+            same_email = (
+                Customer.objects.filter(company=company, email_key=normalize_email(email))
+                if email else Customer.objects.none()
+            )
+            # Só o e-mail idêntico bloqueia
+            if email and same_email.filter(email=email).exists():
                 form.add_error('email', _('customers.form.validation.email_exists'))
             else:
-                customer = form.save(commit=False)
-                customer.company = company
-                customer.save()
-                
-                messages.success(request, _('customers.messages.created_success'))
-                return redirect('customers:customer_detail', pk=customer.pk)
+                # Nome/telefone/e-mail parecidos: pede confirmação antes de criar
+                if not request.POST.get('ignore_duplicates'):
+                    duplicates = find_similar(company, data.get('name'), email, data.get('phone'))
+                    # Variantes do e-mail (maiúsculas, '+tag') são possíveis duplicados
+                    flagged = {customer.pk for customer, _score in duplicates}
+                    duplicates += [(customer, 1.0) for customer in same_email[:5] if customer.pk not in flagged]
+                if duplicates:
+                    form.add_error(None, _('customers.form.validation.possible_duplicate'))
+                else:
+                    customer = form.save(commit=False)
+                    customer.company = company
+                    try:
+                        # Limite de clientes do plano (contador de uso, sem COUNT)
+                        with QuotaService.reserve(quotas.CUSTOMERS, company=company):
+                            customer.save()
+                    except ValidationError as error:
+                        form.add_error(None, error.messages[0])
+                    else:
+                        messages.success(request, _('customers.messages.created_success'))
+                        return redirect('customers:customer_detail', pk=customer.pk)
     else:
         form = CustomerForm(user=request.user)
     
     context = {
         'form': form,
+        'duplicates': duplicates,
         'title': _('customers.form.new_customer'),
         'submit_text': _('customers.form.create_customer'),
     }
@@ -100,6 +159,7 @@ def customer_create(request):
 
 
 @login_required
+@conditional_view(_customer_detail_version)
 def customer_detail(request, pk):
     """Detalhes do cliente"""
     company = get_user_company(request)
@@ -188,6 +248,111 @@ def customer_toggle_status(request, pk):
     return JsonResponse({'success': False, 'message': _('customers.messages.method_not_allowed')})
 
 
+@login_required
+@require_POST
+def customer_bulk_action(request):
+    """Ação em lote sobre os clientes marcados (ou todos os resultados dos filtros)"""
+    company = get_user_company(request)
+    if not company:
+        return JsonResponse({'success': False, 'message': _('customers.messages.company_not_configured')}, status=400)
+    
+    if bulk.select_all(request):
+        customers, *_filters = _filter_customers(request, company)  # Filtros vêm na query string
+    else:
+        customers = Customer.objects.filter(company=company, pk__in=bulk.selected_ids(request))
+    
+    try:
+        operation = CustomerBulkService.operation(request.POST.get('action'), company=company)
+    except ValidationError as error:
+        return JsonResponse({'success': False, 'message': error.messages[0]}, status=400)
+    
+    result = bulk.dispatch(request.user, company, customers, operation, background=bulk.requested_background(request))
+    return bulk.json_response(result)
+
+
+# Idade máxima aceita nos filtros de segmento
+MAX_AGE = 150
+
+
+def _int_param(request, name, maximum=None):
+    """Parâmetro inteiro não negativo da query string (None se ausente ou inválido), limitado a `maximum`"""
+    value = request.GET.get(name, '')
+    if not value.isdigit():
+        return None
+    return int(value) if maximum is None else min(int(value), maximum)
+
+
+def _segment_customers(request, company):
+    """Clientes do segmento (faixa de idade, aniversariantes e status) com idade calculada no banco"""
+    filters = {
+        'min_age': _int_param(request, 'min_age', MAX_AGE),
+        'max_age': _int_param(request, 'max_age', MAX_AGE),
+        'birthday_days': _int_param(request, 'birthday_days'),
+        'status': request.GET.get('status', ''),
+    }
+    
+    customers = Customer.objects.filter(company=company)
+    if filters['status'] == 'active':
+        customers = customers.filter(is_active=True)
+    elif filters['status'] == 'inactive':
+        customers = customers.filter(is_active=False)
+    
+    if filters['min_age'] is not None or filters['max_age'] is not None:
+        customers = customers.age_between(filters['min_age'], filters['max_age'])
+    
+    if filters['birthday_days'] is not None:
+        customers = customers.birthday_within(filters['birthday_days'])
+    
+    customers = customers.with_age().with_days_to_birthday()
+    if filters['birthday_days'] is not None:
+        customers = customers.order_by('days_to_birthday', 'name')
+    else:
+        customers = customers.order_by('name')
+    
+    return customers, filters
+
+
+class _Echo:
+    """Buffer mínimo para o csv.writer escrever direto na resposta em streaming"""
+    
+    def write(self, value):
+        return value
+
+
+@login_required
+def customer_segment(request):
+    """Segmento de clientes por idade e próximos aniversários (paginado ou CSV)"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+    
+    customers, filters = _segment_customers(request, company)
+    
+    if request.GET.get('export') == 'csv':
+        # Lista de marketing sai direto do banco, sem instanciar Customer
+        rows = customers.values_list('name', 'email', 'phone', 'birth_date', 'age', 'days_to_birthday')
+        writer = csv.writer(_Echo())
+        header = ['name', 'email', 'phone', 'birth_date', 'age', 'days_to_birthday']
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for chunk in ([header], rows.iterator(chunk_size=2000)) for row in chunk),
+            content_type='text/csv',
+        )
+        response['Content-Disposition'] = 'attachment; filename="customer_segment.csv"'
+        return response
+    
+    paginator = Paginator(
+        customers.only('pk', 'name', 'email', 'phone', 'birth_date', 'is_active', 'company_id'), 25
+    )
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    context = {
+        'page_obj': page_obj,
+        **filters,
+    }
+    
+    return render(request, 'customers/customer_segment.html', context)
+
+
 @login_required
 def customer_search(request):
     """Busca AJAX de clientes"""
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -54,6 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -122,6 +124,53 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Cache compartilhado entre os workers (Redis) ou local de cada processo
+SHARED_CACHE = bool(os.getenv('REDIS_URL')) and 'test' not in sys.argv
+
+if SHARED_CACHE:
+    # Redis compartilhado entre os workers (produção)
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+            'KEY_PREFIX': 'forgelock',
+        }
+    }
+else:
+    # Cache em memória local (desenvolvimento e testes)
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'forgelock-default',
+        },
+        # Histograma de desempenho em arquivo: o performance_report roda em outro processo
+        'performance': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('PERFORMANCE_CACHE_DIR', str(BASE_DIR / 'private' / 'performance')),
+        },
+    }
+
+# Sessões lidas do cache e gravadas no banco (write-through) só com cache
+# compartilhado: com LocMemCache, cada worker do gunicorn teria a sua cópia e um
+# logout em um worker não valeria nos outros até a entrada expirar
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if SHARED_CACHE else 'django.contrib.sessions.backends.db',
+)
+SESSION_CACHE_ALIAS = 'default'
+
+
+# Instrumentação de desempenho (Server-Timing + histograma por view)
+PERFORMANCE_METRICS_ENABLED = os.getenv('PERFORMANCE_METRICS_ENABLED', 'True').lower() == 'true'
+PERFORMANCE_SAMPLE_RATE = float(os.getenv('PERFORMANCE_SAMPLE_RATE', '1.0' if DEBUG else '0.05'))
+# Intervalo (s) entre as gravações do histograma de cada worker no cache
+PERFORMANCE_FLUSH_SECONDS = float(os.getenv('PERFORMANCE_FLUSH_SECONDS', '0' if DEBUG else '10'))
+PERFORMANCE_CACHE_ALIAS = 'default' if SHARED_CACHE else 'performance'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -189,6 +238,33 @@ STATICFILES_FINDERS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Arquivos STL: fora de MEDIA_ROOT (não são servidos publicamente)
+STL_ROOT = Path(os.getenv('STL_ROOT', BASE_DIR / 'private' / 'stl'))
+STL_MAX_UPLOAD_SIZE = int(os.getenv('STL_MAX_UPLOAD_SIZE', str(1024 * 1024 * 1024)))  # 1GB
+STL_UPLOAD_CHUNK_SIZE = int(os.getenv('STL_UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))  # 8MB por parte
+# Armazenamento compacto: passo da grade das coordenadas (na unidade do arquivo, normalmente mm)
+STL_STORAGE_STEP_MM = float(os.getenv('STL_STORAGE_STEP_MM', '0.001'))
+# Distância máxima entre assinaturas de forma para marcar um STL como provável duplicado
+STL_DUPLICATE_DISTANCE = float(os.getenv('STL_DUPLICATE_DISTANCE', '0.12'))
+# Processos para marca d'água, prévias e análise de G-code (0 = no próprio processo)
+STL_WORKERS = int(os.getenv('STL_WORKERS', '2'))
+# Marca d'água dos downloads (plano com Segurança STL)
+STL_WATERMARK_AMPLITUDE_MM = float(os.getenv('STL_WATERMARK_AMPLITUDE_MM', '0.005'))
+# Prévias renderizadas (imagem principal dos produtos STL)
+STL_PREVIEW_SIZE = int(os.getenv('STL_PREVIEW_SIZE', '512'))
+STL_PREVIEW_FORMAT = os.getenv('STL_PREVIEW_FORMAT', 'WEBP')
+# Malhas de prévia para o navegador: orçamentos de triângulos (a primeira é a padrão)
+STL_PREVIEW_MESH_BUDGETS = [
+    int(budget) for budget in os.getenv('STL_PREVIEW_MESH_BUDGETS', '5000,30000').split(',') if budget.strip()
+]
+# G-code fatiado (products/gcode): guardado no STL_ROOT, em gcode/
+GCODE_MAX_UPLOAD_SIZE = int(os.getenv('GCODE_MAX_UPLOAD_SIZE', str(1024 * 1024 * 1024)))  # 1GB
+
+# Tentativas de login (auditoria, core/login_audit.py): dias mantidos no banco e
+# destino dos arquivos compactados das partições removidas (fora de MEDIA_ROOT)
+LOGIN_ATTEMPT_RETENTION_DAYS = int(os.getenv('LOGIN_ATTEMPT_RETENTION_DAYS', '90'))
+LOGIN_ATTEMPT_ARCHIVE_ROOT = Path(os.getenv('LOGIN_ATTEMPT_ARCHIVE_ROOT', BASE_DIR / 'private' / 'audit'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from .models import Currency, ProductType, Category, Product, ProductImage
+from .models import Currency, ExchangeRate, ProductType, Category, Product, ProductImage, StlAsset, StlDownload, StlUpload, GcodeFile
 
 
 @admin.register(Currency)
@@ -10,6 +10,14 @@ class CurrencyAdmin(admin.ModelAdmin):
     ordering = ['code']
 
 
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ['date', 'from_currency', 'to_currency', 'rate', 'source']
+    list_filter = ['from_currency', 'to_currency', 'source']
+    date_hierarchy = 'date'
+    ordering = ['-date']
+
+
 @admin.register(ProductType)
 class ProductTypeAdmin(admin.ModelAdmin):
     list_display = ['name', 'description']
@@ -78,3 +86,36 @@ class ProductImageAdmin(admin.ModelAdmin):
     list_filter = ['is_primary', 'created_at']
     search_fields = ['product__name']
     ordering = ['product', 'order_index']
+
+
+@admin.register(StlAsset)
+class StlAssetAdmin(admin.ModelAdmin):
+    list_display = ['original_name', 'product', 'format', 'triangle_count', 'size_bytes', 'similar_to', 'similarity_distance', 'created_at']
+    list_filter = ['format', 'created_at']
+    search_fields = ['original_name', 'product__name', 'content_hash']
+    raw_id_fields = ['product', 'company', 'created_by', 'similar_to']
+    readonly_fields = ['content_hash', 'similarity_distance', 'created_at']
+
+
+@admin.register(StlUpload)
+class StlUploadAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'product', 'status', 'received', 'total_size', 'updated_at']
+    list_filter = ['status']
+    search_fields = ['filename', 'product__name']
+    raw_id_fields = ['product', 'company', 'created_by', 'asset']
+
+
+@admin.register(StlDownload)
+class StlDownloadAdmin(admin.ModelAdmin):
+    list_display = ['asset', 'customer', 'downloaded_by', 'created_at']
+    search_fields = ['asset__original_name', 'customer__name', 'fingerprint']
+    raw_id_fields = ['asset', 'company', 'customer', 'downloaded_by']
+    readonly_fields = ['fingerprint', 'created_at']
+
+
+@admin.register(GcodeFile)
+class GcodeFileAdmin(admin.ModelAdmin):
+    list_display = ['original_name', 'product', 'print_time_seconds', 'filament_grams', 'size_bytes', 'created_at']
+    search_fields = ['original_name', 'product__name', 'content_hash']
+    raw_id_fields = ['product', 'company', 'created_by']
+    readonly_fields = ['content_hash', 'materials', 'line_count', 'move_count', 'analyzed_at', 'created_at']
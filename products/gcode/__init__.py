@@ -0,0 +1,7 @@
+"""
+Arquivos G-code dos produtos
+
+O G-code fatiado é guardado no mesmo storage privado dos STL
+(settings.STL_ROOT, pasta gcode/) e analisado em blocos (products/gcode/parser.py)
+para preencher o tempo de impressão e o peso do produto.
+"""
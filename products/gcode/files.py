@@ -0,0 +1,147 @@
+"""
+G-code dos produtos: envio, análise e preenchimento do produto
+
+O arquivo enviado é copiado em blocos para o storage privado, endereçado
+pelo SHA-256 do conteúdo; a requisição termina aí. A análise roda depois do
+commit, em uma thread que aguarda o pool de processos (products/stl/pool.py),
+como as prévias de STL: arquivos de centenas de MB não seguram o worker web.
+O tempo de impressão e o peso do filamento do G-code
+mais recente de cada produto vão para print_time_estimate e weight.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from . import parser
+from ..models import GcodeFile, gcode_upload_path
+from ..stl import pool, stl_storage
+from ..units import format_print_time
+
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = ('.gcode', '.gco', '.g')
+
+
+def _decimal(value):
+    return Decimal(str(round(value, 2)))
+
+
+class GcodeFileService:
+    """Envio e análise de G-code"""
+
+    @staticmethod
+    def _store(uploaded):
+        """Copia o arquivo enviado para o storage; retorna (nome, hash)"""
+        storage = stl_storage()
+        directory = storage.path('gcode')
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                for chunk in uploaded.chunks():
+                    digest.update(chunk)
+                    output.write(chunk)
+            name = gcode_upload_path(GcodeFile(content_hash=digest.hexdigest()), uploaded.name)
+            os.makedirs(os.path.dirname(storage.path(name)), exist_ok=True)
+            os.replace(temporary, storage.path(name))
+        except BaseException:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+        return name, digest.hexdigest()
+
+    @classmethod
+    def attach(cls, product, uploaded, user):
+        """Guarda o G-code enviado para o produto e agenda a análise; retorna o GcodeFile (ainda sem análise)"""
+        filename = os.path.basename(uploaded.name or '').strip()
+        if not filename.lower().endswith(EXTENSIONS):
+            raise ValidationError(_('products.gcode.invalid_extension'))
+        if uploaded.size <= 0 or uploaded.size > settings.GCODE_MAX_UPLOAD_SIZE:
+            raise ValidationError(_('products.stl.invalid_size'))
+
+        name, digest = cls._store(uploaded)
+        gcode = GcodeFile.objects.create(
+            company=product.company,
+            product=product,
+            file=name,
+            original_name=filename[:255],
+            content_hash=digest,
+            size_bytes=uploaded.size,
+            created_by=user,
+        )
+        cls.schedule(gcode)
+        return gcode
+
+    @classmethod
+    def schedule(cls, gcode):
+        """Analisa o G-code em segundo plano, depois do commit que o criou"""
+        gcode_id = gcode.pk
+
+        def run():
+            try:
+                gcode = GcodeFile.objects.select_related('product').get(pk=gcode_id)
+                cls.analyze(gcode)
+            except GcodeFile.DoesNotExist:
+                pass
+            except Exception:
+                logger.exception('Falha ao analisar o G-code %s', gcode_id)
+            finally:
+                connection.close()
+
+        transaction.on_commit(
+            lambda: threading.Thread(target=run, name=f'gcode-{gcode_id}', daemon=True).start()
+        )
+
+    @classmethod
+    def analyze(cls, gcode):
+        """Analisa o arquivo no pool e grava o resultado; arquivo inválido fica marcado com o erro"""
+        try:
+            result = pool.run(f'gcode:{gcode.content_hash}', parser.analyze, gcode.file.path)
+        except parser.GcodeError:
+            gcode.error = 'invalid_file'
+            gcode.analyzed_at = timezone.now()
+            gcode.save(update_fields=['error', 'analyzed_at'])
+            return gcode
+        return cls.apply(gcode, result)
+
+    @staticmethod
+    def apply(gcode, result):
+        """
+        Grava o resultado da análise (parser.analyze) no GcodeFile
+
+        Se for o G-code mais recente do produto, o tempo de impressão (HH:MM)
+        e o peso (g) do produto são atualizados.
+        """
+        gcode.print_time_seconds = round(result['print_time'])
+        gcode.filament_length_mm = _decimal(result['filament_mm'])
+        gcode.filament_grams = _decimal(result['filament_grams'])
+        gcode.materials = result['materials']
+        gcode.line_count = result['lines']
+        gcode.move_count = result['moves']
+        gcode.error = ''
+        gcode.analyzed_at = timezone.now()
+
+        with transaction.atomic():
+            gcode.save()
+            latest = gcode.product.gcode_files.order_by('-created_at', '-pk').values_list('pk', flat=True).first()
+            if latest != gcode.pk:
+                return gcode
+
+            product = gcode.product
+            product.print_time_estimate = format_print_time(gcode.print_time_seconds)
+            product.weight = gcode.filament_grams
+            product.weight_unit = 'g'
+            product.save(update_fields=['print_time_estimate', 'weight', 'weight_unit', 'updated_at'])
+        return gcode
@@ -0,0 +1,504 @@
+"""
+Análise de G-code: tempo de impressão e consumo de filamento
+
+O arquivo é lido em blocos de BLOCK_SIZE bytes (cortados no fim de linha) e
+cada bloco é processado inteiro com NumPy, sem laço por linha:
+
+- tokenização: comentários removidos com uma regex; depois, sobre os bytes,
+  cada letra abre uma palavra e o número que a segue é montado somando os
+  dígitos com a potência de 10 da sua posição em relação ao ponto;
+- estado modal (G90/G91, M82/M83, F, ferramenta, limites M201/M203/M204/M205)
+  é propagado linha a linha com maximum.accumulate; posições absolutas,
+  relativas e G92/G28 saem de uma soma acumulada com reinícios;
+- planejador: como no firmware (Marlin), cada movimento tem velocidade
+  nominal (F limitado por eixo), aceleração (impressão, deslocamento ou
+  retração, limitada por eixo) e um limite de velocidade na junção com o
+  anterior (junction deviation). As passadas para frente e para trás do
+  planejador são recorrências de mínimo: viram somas acumuladas e
+  minimum.accumulate. O tempo de cada movimento é o do perfil trapezoidal.
+
+Entre blocos fica só o estado modal e a cauda de movimentos cuja velocidade
+ainda depende do que vem depois (a distância de frenagem, poucos movimentos),
+então a memória não depende do tamanho do arquivo. Esperas de aquecimento
+(M109/M190) e homing não entram no tempo; G4 entra.
+
+O filamento é a soma do avanço do extrusor (descontadas as retrações) por
+ferramenta; tipo, diâmetro e densidade vêm dos comentários de configuração
+que os fatiadores gravam (filament_type, filament_diameter, filament_density).
+"""
+
+import math
+import re
+
+import numpy as np
+
+
+BLOCK_SIZE = 4 << 20
+
+# Padrões do Marlin, valendo até o arquivo definir os seus (M201/M203/M204/M205)
+DEFAULT_FEEDRATE = 3000.0  # mm/min
+MAX_FEEDRATE = (300.0, 300.0, 5.0, 25.0)  # mm/s, X Y Z E
+MAX_ACCELERATION = (3000.0, 3000.0, 100.0, 10000.0)  # mm/s², X Y Z E
+ACCELERATION = 3000.0  # impressão, deslocamento e retração
+JUNCTION_DEVIATION = 0.013  # mm
+
+DEFAULT_DIAMETER = 1.75  # mm
+DEFAULT_MATERIAL = 'PLA'
+# g/cm³
+DENSITIES = {
+    'PLA': 1.24, 'PETG': 1.27, 'PET': 1.27, 'ABS': 1.04, 'ASA': 1.07, 'TPU': 1.21, 'FLEX': 1.21,
+    'PA': 1.14, 'NYLON': 1.14, 'PC': 1.20, 'HIPS': 1.04, 'PVA': 1.23, 'PP': 0.90,
+}
+
+AXES = 'XYZE'
+PARAMETERS = 'XYZEFIJRPST'
+# Códigos dos comandos: G n, M 1000 + n, T 2000 + n
+M = 1000
+T = 2000
+MOVES = (0, 1, 2, 3)
+SYNC = (4, 28, M + 400, M + 109, M + 190)  # o planejador esvazia: a máquina para
+
+# Parâmetros modais: nome -> ((comando, letra), ...); o último da linha vale
+MODAL = {
+    'accel_print': ((M + 204, 'S'), (M + 204, 'P')),
+    'accel_travel': ((M + 204, 'S'), (M + 204, 'T')),
+    'accel_retract': ((M + 204, 'R'),),
+    'junction_deviation': ((M + 205, 'J'),),
+    **{f'feed_{axis}': ((M + 203, axis),) for axis in AXES},
+    **{f'accel_{axis}': ((M + 201, axis),) for axis in AXES},
+}
+
+_COMMENT = re.compile(rb';[^\n]*|\([^\n)]*\)')
+_LINE_COMMENT = re.compile(rb';[^\n]*')
+_SETTING = re.compile(rb'^;\s*(filament_type|filament_diameter|filament_density)\s*=[ \t]*([^\r\n]*)', re.MULTILINE)
+_SEPARATOR = re.compile(r'[;,]')
+_ORPHAN = re.compile(rb'(?<![A-Z0-9.+-])[0-9.+-]+')
+
+# Classe de cada byte (via bytes.translate): número, letra, fim de linha ou separador
+_DIGIT, _LETTER, _NEWLINE = 1, 2, 4
+_NUMERIC = b'0123456789.+-'
+_CLASSES = bytes(
+    _DIGIT if byte in _NUMERIC else _LETTER if 65 <= byte <= 90 else _NEWLINE if byte == 10 else 0
+    for byte in range(256)
+)
+_NUMBERS = bytes(byte if byte in _NUMERIC else 32 for byte in range(256))
+_PARAMETER_INDEX = np.full(256, -1, dtype=np.int64)
+_PARAMETER_INDEX[np.frombuffer(PARAMETERS.encode(), dtype=np.uint8)] = np.arange(len(PARAMETERS))
+
+
+class GcodeError(ValueError):
+    """Arquivo que não é G-code"""
+
+
+def _number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def tokenize(body):
+    """
+    Palavras de um bloco já sem comentários e em maiúsculas
+
+    Retorna (letras uint8, valores float64, linha de cada palavra, linhas no
+    bloco); letra sem número vale NaN. As posições de letras e fins de linha
+    saem de uma tradução dos bytes; os números, de um split do bloco com todo
+    o resto trocado por espaço, convertidos pelo float do Python.
+    """
+    classes = np.frombuffer(body.translate(_CLASSES), dtype=np.uint8)
+    marks = np.flatnonzero(classes >= _LETTER)
+    kinds = np.frombuffer(body, dtype=np.uint8)[marks]
+    newline = kinds == 10
+    lines = np.cumsum(newline)
+    letters = ~newline
+    starts = marks[letters]
+    has_number = classes[np.minimum(starts + 1, len(classes) - 1)] == _DIGIT
+
+    parts = body.translate(_NUMBERS).split()
+    if len(parts) != np.count_nonzero(has_number):
+        # Números soltos (mensagens de M117, checksums): só valem os que seguem uma letra
+        parts = _ORPHAN.sub(b' ', body).translate(_NUMBERS).split()
+    try:
+        numbers = np.fromiter(map(float, parts), dtype=np.float64, count=len(parts))
+    except ValueError:
+        numbers = np.array([_number(part) for part in parts], dtype=np.float64)
+    values = np.full(len(starts), np.nan)
+    values[has_number] = numbers
+    return kinds[letters], values, lines[letters], int(np.count_nonzero(newline)) + 1
+
+
+def _modal(values, initial):
+    """Valor em vigor em cada linha: o último definido (não NaN) até ela, ou `initial`"""
+    index = np.where(np.isnan(values), -1, np.arange(len(values)))
+    np.maximum.accumulate(index, out=index)
+    return np.where(index >= 0, values[index], initial)
+
+
+def _last(values):
+    """Valor no fim do bloco de um estado modal (array por linha ou escalar)"""
+    return float(values[-1]) if np.ndim(values) else values
+
+
+def _columns(values):
+    """Valores por eixo lado a lado: (n, eixos), ou (eixos,) se todos forem escalares"""
+    return np.stack(np.broadcast_arrays(*values), axis=-1)
+
+
+def _positions(increments, resets, start):
+    """Posição após cada linha: `start` + soma dos incrementos, reiniciada onde `resets` não é NaN"""
+    total = np.cumsum(increments)
+    return _modal(resets - total, start) + total
+
+
+def _arc_lengths(dx, dy, i, j, r, clockwise):
+    """Comprimento no plano XY dos arcos G2/G3 (centro por I/J ou raio R)"""
+    chord = np.hypot(dx, dy)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Forma R: ângulo pela corda; R negativo = arco maior que 180°
+        by_radius = np.abs(r) * 2 * np.arcsin(np.clip(chord / (2 * np.abs(r)), 0, 1))
+        by_radius = np.where(r < 0, 2 * np.pi * np.abs(r) - by_radius, by_radius)
+        # Forma I/J: ângulo entre os vetores centro -> início e centro -> fim
+        start_x, start_y = -np.nan_to_num(i), -np.nan_to_num(j)
+        end_x, end_y = start_x + dx, start_y + dy
+        angle = np.arctan2(start_x * end_y - start_y * end_x, start_x * end_x + start_y * end_y)
+        angle = np.where(clockwise, -angle, angle)
+        angle = np.where(angle <= 1e-9, angle + 2 * np.pi, angle)
+        by_center = np.hypot(start_x, start_y) * angle
+    return np.where(np.isnan(r), by_center, by_radius)
+
+
+def plan(limits, work):
+    """
+    Velocidades² nos pontos de junção (n movimentos, n + 1 pontos)
+
+    limits: limite de velocidade² em cada ponto; work: 2·a·d de cada
+    movimento (quanto a velocidade² pode mudar nele). Para frente, v²[k] =
+    min(limite[k], v²[k-1] + work[k-1]); com S = soma acumulada de work isso
+    é S + mínimo acumulado de (limite - S). Para trás, o mesmo ao contrário.
+    """
+    total = np.concatenate([[0.0], np.cumsum(work)])
+    forward = total + np.minimum.accumulate(limits - total)
+    return np.minimum.accumulate((forward + total)[::-1])[::-1] - total
+
+
+def durations(distance, acceleration, nominal, entry, exit):
+    """Tempo de cada movimento no perfil trapezoidal (velocidades ao quadrado)"""
+    entry = np.minimum(entry, nominal)
+    exit = np.minimum(exit, nominal)
+    cruise = distance - (2 * nominal - entry - exit) / (2 * acceleration)
+    peak = np.sqrt(np.where(cruise >= 0, nominal, (2 * acceleration * distance + entry + exit) / 2))
+    return (2 * peak - np.sqrt(entry) - np.sqrt(exit)) / acceleration + np.maximum(cruise, 0) / peak
+
+
+def _junctions(previous, directions, acceleration, deviation):
+    """Limite de velocidade² na junção entre cada par de direções (junction deviation, como no Marlin)"""
+    cosine = np.clip(-(previous * directions).sum(axis=1), -1, 1)
+    half = np.sqrt(np.maximum(0.5 * (1 - cosine), 0))
+    with np.errstate(divide='ignore'):
+        limit = acceleration * deviation * half / (1 - half)
+    return np.where(cosine > 0.999999, 0.0, np.where(cosine < -0.999999, np.inf, limit))
+
+
+class GcodeAnalyzer:
+    """Estado da análise entre os blocos do arquivo"""
+
+    def __init__(self):
+        self.position = np.zeros(4)
+        self.absolute = 1.0
+        self.absolute_e = 1.0
+        self.feedrate = DEFAULT_FEEDRATE
+        self.tool = 0.0
+        self.modal = {
+            'accel_print': ACCELERATION,
+            'accel_travel': ACCELERATION,
+            'accel_retract': ACCELERATION,
+            'junction_deviation': JUNCTION_DEVIATION,
+            **{f'feed_{axis}': value for axis, value in zip(AXES, MAX_FEEDRATE)},
+            **{f'accel_{axis}': value for axis, value in zip(AXES, MAX_ACCELERATION)},
+        }
+        self.stopped = True  # a máquina parte do repouso
+        self.direction = np.zeros(4)
+        self.nominal = 0.0
+        # Movimentos ainda não fechados: distância, nominal², aceleração, limite² na entrada
+        self.pending = np.zeros((0, 4))
+        self.time = 0.0
+        self.extruded = {}
+        self.settings = {}
+        self.lines = 0
+        self.moves = 0
+
+    def feed(self, block):
+        """Processa um bloco de linhas completas"""
+        if b'filament_' in block:
+            for key, value in _SETTING.findall(block):
+                self.settings[key.decode()] = value.decode('utf-8', 'replace').strip()
+
+        if b'(' in block:
+            block = _COMMENT.sub(b'', block)
+        elif b';' in block:
+            block = _LINE_COMMENT.sub(b'', block)
+        letters, values, token_lines, line_count = tokenize(block.upper())
+        self.lines += line_count - 1
+        keep = letters != ord('N')  # números de linha
+        letters, values, token_lines = letters[keep], values[keep], token_lines[keep]
+
+        # Comando = primeira palavra da linha (G, M ou T); as outras são parâmetros
+        first = np.empty(len(token_lines), dtype=bool)
+        first[:1] = True
+        np.not_equal(token_lines[1:], token_lines[:-1], out=first[1:])
+        command = np.full(line_count, -1, dtype=np.int64)
+        heads = first & ((letters == ord('G')) | (letters == ord('M')) | (letters == ord('T'))) & ~np.isnan(values)
+        offsets = np.select([letters[heads] == ord('M'), letters[heads] == ord('T')], [M, T], 0)
+        command[token_lines[heads]] = values[heads].astype(np.int64) + offsets
+
+        parameter = _PARAMETER_INDEX[letters]
+        selected = ~first & (parameter >= 0)
+        table = np.full((len(PARAMETERS), line_count), np.nan)
+        table[parameter[selected], token_lines[selected]] = values[selected]
+        given = np.zeros((len(AXES), line_count), dtype=bool)
+        axes = selected & (parameter < len(AXES))
+        given[parameter[axes], token_lines[axes]] = True
+        columns = dict(zip(PARAMETERS, table))
+        present = dict(zip(AXES, given))
+
+        codes = set(np.unique(command).tolist())
+        moves = np.isin(command, MOVES)
+        self._modes(command, columns, codes)
+        deltas = self._deltas(command, columns, present, moves)
+        self._dwell(command, columns)
+
+        move_lines = np.flatnonzero(moves)
+        tools = self._tools(command, codes)
+        extrusion = deltas[3][move_lines]
+        if np.ndim(tools):
+            tools = tools[move_lines]
+            for tool in np.unique(tools):
+                self.extruded[int(tool)] = self.extruded.get(int(tool), 0.0) + float(extrusion[tools == tool].sum())
+        else:
+            self.extruded[tools] = self.extruded.get(tools, 0.0) + float(extrusion.sum())
+
+        self._plan_moves(command, columns, deltas, move_lines)
+
+    def _modes(self, command, columns, codes):
+        """
+        Estado modal em cada linha
+
+        Sem eventos no bloco (o caso comum: M201/M203/M204/M205, G90/G91 e
+        M82/M83 costumam estar só no início), fica o valor escalar.
+        """
+        def modal(current, sources):
+            if not any(code in codes for code, _value in sources):
+                return current
+            column = np.full(len(command), np.nan)
+            for code, value in sources:
+                if isinstance(value, str):
+                    selected = (command == code) & ~np.isnan(columns[value])
+                    column[selected] = columns[value][selected]
+                else:
+                    column[command == code] = value
+            return _modal(column, current)
+
+        absolute = modal(self.absolute, ((90, 1.0), (91, 0.0)))
+        absolute_e = modal(self.absolute_e, ((90, 1.0), (91, 0.0), (M + 82, 1.0), (M + 83, 0.0)))
+        self.absolute, self.absolute_e = _last(absolute), _last(absolute_e)
+        xyz = np.asarray(absolute) > 0
+        self._absolute = (xyz, xyz, xyz, np.asarray(absolute_e) > 0)
+
+        feedrate = np.where(np.isin(command, MOVES), columns['F'], np.nan)
+        self._feedrate = _modal(feedrate, self.feedrate)
+        self.feedrate = _last(self._feedrate)
+
+        self._limits = {}
+        for name, sources in MODAL.items():
+            self._limits[name] = modal(self.modal[name], sources)
+            self.modal[name] = _last(self._limits[name])
+
+    def _deltas(self, command, columns, present, moves):
+        """Deslocamento de X, Y, Z e E em cada linha"""
+        set_position = command == 92
+        home = command == 28
+        nothing = {
+            code: ~np.any([present[axis] for axis in AXES], axis=0) for code in (92, 28)
+        }
+        deltas = []
+        for index, axis in enumerate(AXES):
+            value = columns[axis]
+            given = ~np.isnan(value)
+            absolute = self._absolute[index]
+            increments = np.where(moves & given & ~absolute, value, 0.0)
+            resets = np.full(len(command), np.nan)
+            resets[moves & given & absolute] = value[moves & given & absolute]
+            resets[set_position & given] = value[set_position & given]
+            resets[set_position & nothing[92]] = 0.0
+            if axis != 'E':
+                resets[home & (present[axis] | nothing[28])] = 0.0
+            positions = _positions(increments, resets, self.position[index])
+            previous = np.concatenate([[self.position[index]], positions[:-1]])
+            deltas.append(np.where(moves, positions - previous, 0.0))
+            self.position[index] = positions[-1]
+        return deltas
+
+    def _dwell(self, command, columns):
+        dwell = command == 4
+        milliseconds = np.nan_to_num(columns['P'][dwell])
+        seconds = np.nan_to_num(columns['S'][dwell])
+        self.time += float((milliseconds / 1000).sum() + seconds.sum())
+
+    def _tools(self, command, codes):
+        """Ferramenta em cada linha (escalar se não houve troca no bloco)"""
+        if not any(code >= T for code in codes):
+            return int(self.tool)
+        tools = _modal(np.where(command >= T, command - T, np.nan).astype(np.float64), self.tool)
+        self.tool = float(tools[-1])
+        return tools.astype(np.int64)
+
+    def _plan_moves(self, command, columns, deltas, move_lines):
+        dx, dy, dz, de = (delta[move_lines] for delta in deltas)
+        distance = np.sqrt(dx * dx + dy * dy + dz * dz)
+        arcs = np.isin(command[move_lines], (2, 3))
+        if arcs.any():
+            planar = _arc_lengths(
+                dx[arcs], dy[arcs], columns['I'][move_lines][arcs], columns['J'][move_lines][arcs],
+                columns['R'][move_lines][arcs], command[move_lines][arcs] == 2,
+            )
+            distance[arcs] = np.hypot(planar, dz[arcs])
+
+        # Movimento só do extrusor (retração): a distância é a do E
+        extruder_only = (distance <= 1e-9) & (np.abs(de) > 1e-9)
+        distance = np.where(extruder_only, np.abs(de), distance)
+        real = distance > 1e-9
+
+        # Depois de G4/G28/M400/M109/M190 o próximo movimento parte do repouso
+        sync = np.cumsum(np.isin(command, SYNC))
+        syncs = sync[move_lines[real]]
+        stop_before = np.diff(np.concatenate([[0], syncs])) > 0
+        if len(syncs):
+            stop_before[0] |= self.stopped
+            self.stopped = bool(sync[-1] > syncs[-1])
+        else:
+            self.stopped = self.stopped or bool(sync[-1:].sum())
+
+        lines = move_lines[real]
+        dx, dy, dz, de = dx[real], dy[real], dz[real], de[real]
+        distance, extruder_only = distance[real], extruder_only[real]
+        self.moves += len(lines)
+        if not len(lines):
+            return
+
+        directions = np.stack([dx, dy, dz, np.zeros_like(dx)], axis=1) / distance[:, None]
+        directions[extruder_only] = 0.0
+        directions[extruder_only, 3] = np.sign(de[extruder_only])
+        components = np.abs(np.stack([dx, dy, dz, de], axis=1)) / distance[:, None]
+        components[extruder_only, :3] = 0.0
+
+        limits = {name: values[lines] if np.ndim(values) else values for name, values in self._limits.items()}
+        with np.errstate(divide='ignore'):
+            axis_feed = np.min(_columns([limits[f'feed_{axis}'] for axis in AXES]) / components, axis=1)
+            axis_accel = np.min(_columns([limits[f'accel_{axis}'] for axis in AXES]) / components, axis=1)
+        nominal = np.minimum(self._feedrate[lines] / 60, axis_feed)
+        acceleration = np.where(
+            extruder_only, limits['accel_retract'], np.where(de > 0, limits['accel_print'], limits['accel_travel']),
+        )
+        acceleration = np.maximum(np.minimum(acceleration, axis_accel), 1e-3)
+        nominal = np.maximum(nominal, 1e-3) ** 2
+
+        previous_directions = np.concatenate([self.direction[None, :], directions[:-1]])
+        previous_nominal = np.concatenate([[self.nominal], nominal[:-1]])
+        entry = np.minimum(
+            _junctions(previous_directions, directions, acceleration, limits['junction_deviation']),
+            np.minimum(previous_nominal, nominal),
+        )
+        entry[stop_before] = 0.0
+        self.direction, self.nominal = directions[-1], float(nominal[-1])
+
+        self.pending = np.concatenate([self.pending, np.stack([distance, nominal, acceleration, entry], axis=1)])
+        self._commit(final=False)
+
+    def _commit(self, final):
+        """Fecha os movimentos cuja velocidade nas duas pontas já não depende do resto do arquivo"""
+        if not len(self.pending):
+            return
+        distance, nominal, acceleration, entry = self.pending.T
+        work = 2 * acceleration * distance
+        stopped = plan(np.concatenate([entry, [0.0]]), work)
+        if final or self.stopped:
+            done = len(distance)
+            speeds = stopped
+        else:
+            # Pontos que mudariam se o próximo bloco exigisse parar no fim deste
+            speeds = plan(np.concatenate([entry, [nominal[-1]]]), work)
+            changed = np.flatnonzero(speeds > stopped * (1 + 1e-12) + 1e-12)
+            done = max(int(changed[0]) - 1, 0) if len(changed) else len(distance)
+        self.time += float(durations(
+            distance[:done], acceleration[:done], nominal[:done], speeds[:done], speeds[1:done + 1],
+        ).sum())
+        self.pending = self.pending[done:].copy()
+        if len(self.pending):
+            self.pending[0, 3] = speeds[done]
+
+    def result(self):
+        """Tempo (s), movimentos e filamento por ferramenta"""
+        self._commit(final=True)
+
+        def listed(key, cast, default):
+            values = [item.strip() for item in _SEPARATOR.split(self.settings.get(key, ''))]
+            parsed = []
+            for item in values:
+                try:
+                    parsed.append(cast(item))
+                except ValueError:
+                    parsed.append(default)
+            return parsed
+
+        types = listed('filament_type', str, DEFAULT_MATERIAL)
+        diameters = listed('filament_diameter', float, DEFAULT_DIAMETER)
+        densities = listed('filament_density', float, 0.0)
+
+        materials = []
+        for tool in sorted(self.extruded):
+            length = max(self.extruded[tool], 0.0)
+            material = (types[tool] if tool < len(types) and types[tool] else DEFAULT_MATERIAL).upper()
+            diameter = diameters[tool] if tool < len(diameters) and diameters[tool] > 0 else DEFAULT_DIAMETER
+            density = densities[tool] if tool < len(densities) and densities[tool] > 0 else None
+            density = density or DENSITIES.get(material, DENSITIES[DEFAULT_MATERIAL])
+            volume_cm3 = length * math.pi * (diameter / 2) ** 2 / 1000
+            materials.append({
+                'tool': tool,
+                'material': material,
+                'diameter_mm': diameter,
+                'density': density,
+                'length_mm': round(length, 2),
+                'grams': round(volume_cm3 * density, 2),
+            })
+        return {
+            'print_time': self.time,
+            'lines': self.lines,
+            'moves': self.moves,
+            'materials': materials,
+            'filament_mm': round(sum(item['length_mm'] for item in materials), 2),
+            'filament_grams': round(sum(item['grams'] for item in materials), 2),
+        }
+
+
+def analyze(path, block_size=BLOCK_SIZE):
+    """Analisa o arquivo em blocos; retorna o resultado de GcodeAnalyzer.result"""
+    analyzer = GcodeAnalyzer()
+    rest = b''
+    with open(path, 'rb') as handle:
+        while True:
+            chunk = handle.read(block_size)
+            if not chunk:
+                break
+            data = rest + chunk
+            cut = data.rfind(b'\n') + 1
+            if not cut:
+                rest = data
+                continue
+            analyzer.feed(data[:cut])
+            rest = data[cut:]
+    if rest:
+        analyzer.feed(rest + b'\n')
+    if not analyzer.moves:
+        raise GcodeError('Arquivo sem movimentos de G-code')
+    return analyzer.result()
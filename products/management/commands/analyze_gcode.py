@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Management command para reanalisar a biblioteca de G-code
+Cada arquivo é analisado em um processo separado (products/gcode/parser.py,
+só NumPy, sem Django); o resultado é gravado no processo principal e o
+G-code mais recente de cada produto atualiza o tempo de impressão e o peso.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from products.gcode import parser
+from products.gcode.files import GcodeFileService
+from products.models import GcodeFile
+
+
+class Command(BaseCommand):
+    help = 'Reanalisa os arquivos G-code (tempo de impressão e filamento) em processos paralelos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='Analisa apenas os arquivos da empresa com este id',
+        )
+        parser.add_argument(
+            '--pending',
+            action='store_true',
+            help='Analisa apenas os arquivos ainda sem análise',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processos em paralelo (padrão: número de CPUs)',
+        )
+
+    def handle(self, *args, **options):
+        files = GcodeFile.objects.select_related('product').order_by('created_at', 'pk')
+        if options['company']:
+            files = files.filter(company_id=options['company'])
+        if options['pending']:
+            files = files.filter(analyzed_at__isnull=True)
+        files = list(files)
+
+        started = time.perf_counter()
+        total_bytes = analyzed = failed = 0
+        results = {}
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max(options['workers'], 1), mp_context=context) as executor:
+            futures = {executor.submit(parser.analyze, gcode.file.path): gcode for gcode in files}
+            for future in as_completed(futures):
+                gcode = futures[future]
+                try:
+                    results[gcode.pk] = future.result()
+                except (parser.GcodeError, OSError) as error:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'⚠️  {gcode.original_name} (#{gcode.pk}): {error}'))
+
+        # Na ordem de envio: o mais recente de cada produto é o último a gravar
+        for gcode in files:
+            if gcode.pk not in results:
+                continue
+            GcodeFileService.apply(gcode, results[gcode.pk])
+            analyzed += 1
+            total_bytes += gcode.size_bytes
+            self.stdout.write(
+                f'  🖨️  {gcode.original_name}: {gcode.print_time_display}, {gcode.filament_grams} g'
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {analyzed} arquivo(s) analisado(s) em {elapsed:.2f}s '
+            f'({total_bytes / 1e6 / elapsed if elapsed else 0:.1f} MB/s), {failed} falha(s)'
+        ))
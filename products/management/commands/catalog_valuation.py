@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Management command para valorizar o catálogo de uma empresa
+Soma estoque x custo, receita esperada e margem por categoria em uma única moeda
+"""
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Company
+from products.models import Currency
+from products.services import CatalogValuationService
+
+
+class Command(BaseCommand):
+    help = 'Valoriza o estoque de uma empresa por categoria em uma única moeda'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, required=True, help='Id da empresa')
+        parser.add_argument('--currency', default='BRL', help='Código da moeda alvo (padrão: BRL)')
+        parser.add_argument(
+            '--date',
+            type=date.fromisoformat,
+            help='Data das cotações (padrão: hoje)',
+        )
+
+    def handle(self, *args, **options):
+        company = Company.objects.filter(pk=options['company']).first()
+        if company is None:
+            raise CommandError(f"Empresa {options['company']} não encontrada")
+        currency = Currency.objects.filter(code=options['currency'].upper()).first()
+        if currency is None:
+            raise CommandError(f"Moeda {options['currency']} não cadastrada")
+
+        started = time.perf_counter()
+        valuation = CatalogValuationService.value(company, currency, options['date'])
+        elapsed = time.perf_counter() - started
+
+        for row in valuation['categories']:
+            name = row['category'].name if row['category'] else '—'
+            self.stdout.write(
+                f"{name:<30} {row['products']:>7} {row['units']:>9} "
+                f"{row['stock_value']:>15} {row['expected_revenue']:>15} {row['margin']:>15}"
+            )
+
+        totals = valuation['totals']
+        self.stdout.write(
+            f"\n💰 Estoque: {currency.symbol} {totals['stock_value']} | "
+            f"Receita esperada: {currency.symbol} {totals['expected_revenue']} | "
+            f"Margem: {currency.symbol} {totals['margin']} ({totals['margin_percent'] or 0}%)"
+        )
+        if valuation['missing_rates']:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ Sem cotação para {currency.code}: {', '.join(valuation['missing_rates'])}"
+            ))
+        self.stdout.write(self.style.SUCCESS(f'✅ Valorização concluída em {elapsed:.2f}s'))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+Management command para limpar uploads de STL abandonados
+Remove os arquivos parciais e os registros de uploads parados e, opcionalmente,
+as cópias com marca d'água e os STL remontados antigos do cache (são
+regerados sob demanda)
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from products.stl.protection import StlProtectionService
+from products.stl.storage import StlStorageService
+from products.stl.uploads import StlUploadService
+
+
+class Command(BaseCommand):
+    help = 'Remove uploads de STL não concluídos e parados há mais de N horas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Idade mínima (em horas) do upload parado (padrão: 24)',
+        )
+        parser.add_argument(
+            '--variant-days',
+            type=int,
+            help="Remove também as cópias com marca d'água e os STL remontados sem uso há mais de N dias",
+        )
+
+    def handle(self, *args, **options):
+        removed = StlUploadService.purge_stale(timedelta(hours=options['hours']))
+        self.stdout.write(self.style.SUCCESS(f'✅ {removed} upload(s) de STL removidos'))
+
+        if options['variant_days'] is not None:
+            purged = StlProtectionService.purge_variants(timedelta(days=options['variant_days']))
+            self.stdout.write(self.style.SUCCESS(f"✅ {purged} cópia(s) com marca d'água removidas do cache"))
+            restored = StlStorageService.purge_restored(timedelta(days=options['variant_days']))
+            self.stdout.write(self.style.SUCCESS(f'✅ {restored} STL remontado(s) removidos do cache'))
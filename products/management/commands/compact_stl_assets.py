@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Management command para converter os STL guardados no formato antigo
+Grava cada arquivo cru no formato compacto (ver products/stl/codec.py) e
+aponta os assets para ele. Arquivos que já tiveram downloads com marca d'água
+ficam como estão (a marca é calculada sobre as coordenadas originais), a
+menos que --force seja usado.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.models import StlAsset, StlDownload
+from products.stl import codec
+from products.stl.mesh import MeshError
+from products.stl.storage import StlStorageService
+
+
+class Command(BaseCommand):
+    help = 'Converte os arquivos STL antigos para o formato compacto'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='Converte apenas os arquivos da empresa com este id',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help="Converte também arquivos com downloads marcados (as marcas já entregues deixam de ser detectáveis)",
+        )
+
+    def handle(self, *args, **options):
+        assets = StlAsset.objects.exclude(file__endswith=codec.EXTENSION)
+        if options['company']:
+            assets = assets.filter(company_id=options['company'])
+        names = set(assets.values_list('file', flat=True))
+
+        if not options['force']:
+            marked = set(
+                StlDownload.objects.exclude(fingerprint='')
+                .filter(asset__file__in=names).values_list('asset__file', flat=True)
+            )
+            if marked:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️  {len(marked)} arquivo(s) com downloads marcados mantidos no formato antigo (use --force)"
+                ))
+            names -= marked
+
+        started = time.perf_counter()
+        total_before = total_after = failed = 0
+        for name in sorted(names):
+            try:
+                before, after = StlStorageService.compact(name)
+            except (MeshError, OSError) as error:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'⚠️  {name}: {error}'))
+                continue
+            total_before += before
+            total_after += after
+
+        elapsed = time.perf_counter() - started
+        ratio = total_before / total_after if total_after else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {len(names) - failed} arquivo(s) convertidos em {elapsed:.2f}s: '
+            f'{total_before / 1e6:.1f} MB → {total_after / 1e6:.1f} MB ({ratio:.1f}x), {failed} falha(s)'
+        ))
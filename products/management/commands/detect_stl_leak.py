@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Management command para identificar a origem de um STL vazado
+Procura no arquivo suspeito as marcas d'água dos downloads do arquivo original
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.models import StlAsset
+from products.stl.mesh import MeshError
+from products.stl.protection import StlProtectionService
+
+
+class Command(BaseCommand):
+    help = "Identifica, pela marca d'água, a qual download pertence um STL suspeito"
+
+    def add_arguments(self, parser):
+        parser.add_argument('asset', type=int, help='Id do arquivo STL original (StlAsset)')
+        parser.add_argument('path', help='Caminho do arquivo STL suspeito')
+
+    def handle(self, *args, **options):
+        try:
+            asset = StlAsset.objects.get(pk=options['asset'])
+        except StlAsset.DoesNotExist:
+            raise CommandError(f"Arquivo STL {options['asset']} não encontrado")
+
+        started = time.perf_counter()
+        try:
+            matches = StlProtectionService.identify(asset, options['path'])
+        except (MeshError, OSError) as error:
+            raise CommandError(str(error))
+        elapsed = time.perf_counter() - started
+
+        if not matches:
+            self.stdout.write(self.style.WARNING(f'⚠️ Nenhuma marca conhecida encontrada ({elapsed:.2f}s)'))
+            return
+
+        for download, score in matches:
+            recipient = download.customer or download.downloaded_by
+            self.stdout.write(
+                f'🔎 {recipient} — pontuação {score:.3f} '
+                f'(download #{download.pk} em {download.created_at:%d/%m/%Y %H:%M})'
+            )
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(matches)} marca(s) encontrada(s) em {elapsed:.2f}s'))
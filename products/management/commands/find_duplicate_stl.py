@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Management command para encontrar STLs parecidos na biblioteca de cada empresa
+Calcula a assinatura de forma dos arquivos que ainda não a têm (enviados
+antes da detecção de duplicados), marca o provável duplicado de cada um e
+lista os pares encontrados.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.models import StlAsset
+from products.stl.duplicates import StlDuplicateService
+from products.stl.mesh import MeshError
+
+
+class Command(BaseCommand):
+    help = 'Encontra STLs parecidos (prováveis duplicados) na biblioteca de cada empresa'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='Analisa apenas os arquivos da empresa com este id',
+        )
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            help='Remarca também os arquivos que já tinham assinatura',
+        )
+
+    def handle(self, *args, **options):
+        assets = StlAsset.objects.all()
+        if options['company']:
+            assets = assets.filter(company_id=options['company'])
+
+        started = time.perf_counter()
+        computed = failed = 0
+        for asset in assets.filter(shape_signature__isnull=True).order_by('pk').iterator(chunk_size=100):
+            try:
+                asset.shape_signature = StlDuplicateService.compute(asset.file.path)
+            except (MeshError, ValueError, OSError) as error:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'⚠️  {asset.original_name} (#{asset.pk}): {error}'))
+                continue
+            asset.save(update_fields=['shape_signature'])
+            computed += 1
+        self.stdout.write(f'🔎 {computed} assinatura(s) calculadas em {time.perf_counter() - started:.2f}s, {failed} falha(s)')
+
+        # Com as assinaturas em dia, cada arquivo é comparado com o índice da empresa
+        started = time.perf_counter()
+        pending = assets.filter(shape_signature__isnull=False)
+        if not options['refresh']:
+            pending = pending.filter(similar_to__isnull=True)
+        for asset in pending.order_by('pk').iterator(chunk_size=500):
+            StlDuplicateService.flag(asset)
+
+        pairs = (
+            assets.filter(similar_to__isnull=False)
+            .select_related('product', 'similar_to__product')
+            .order_by('company_id', 'similarity_distance')
+        )
+        count = 0
+        for asset in pairs:
+            count += 1
+            self.stdout.write(
+                f'  🧩 {asset.original_name} ({asset.product.name}) ≈ '
+                f'{asset.similar_to.original_name} ({asset.similar_to.product.name}) — {asset.similarity_distance:.3f}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {count} provável(is) duplicado(s) encontrado(s) em {time.perf_counter() - started:.2f}s'
+        ))
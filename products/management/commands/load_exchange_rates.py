@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+Management command para carregar cotações de câmbio
+Lê um arquivo local (JSON ou CSV) ou o provedor de teste e grava em ExchangeRate
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.services import ExchangeRateService, FileRateProvider, StubRateProvider
+
+
+class Command(BaseCommand):
+    help = 'Carrega cotações de câmbio de um arquivo local ou do provedor de teste'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            help='Arquivo JSON ({"date", "base", "rates"}) ou CSV (date,from,to,rate)',
+        )
+        parser.add_argument(
+            '--stub',
+            action='store_true',
+            help='Usa cotações fixas de teste em relação ao USD',
+        )
+        parser.add_argument(
+            '--date',
+            type=date.fromisoformat,
+            help='Data das cotações quando o arquivo não informa (padrão: hoje)',
+        )
+
+    def handle(self, *args, **options):
+        if options['file']:
+            provider = FileRateProvider(options['file'])
+        elif options['stub']:
+            provider = StubRateProvider()
+        else:
+            raise CommandError('Informe --file ou --stub')
+
+        try:
+            saved, unknown = ExchangeRateService.load(provider, options['date'])
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'Não foi possível ler as cotações: {exc}')
+
+        if unknown:
+            self.stdout.write(self.style.WARNING(f'⚠️ Moedas não cadastradas ignoradas: {", ".join(unknown)}'))
+        self.stdout.write(self.style.SUCCESS(f'✅ {saved} cotação(ões) gravadas ({provider.name})'))
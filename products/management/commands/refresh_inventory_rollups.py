@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+Management command para atualizar os totais dos relatórios de estoque
+Reagrega apenas os grupos tocados desde a última vez; a página de relatórios
+não reagrega, então agende a cada poucos minutos
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import Company
+from products.reports import InventoryReportService
+
+
+class Command(BaseCommand):
+    help = 'Atualiza os totais pré-agregados dos relatórios de estoque'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='Atualiza apenas a empresa com este id',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Reagrega o catálogo inteiro de cada empresa',
+        )
+
+    def handle(self, *args, **options):
+        companies = Company.objects.filter(is_active=True).only('id')
+        if options['company']:
+            companies = companies.filter(pk=options['company'])
+
+        started = time.perf_counter()
+        refreshed = InventoryReportService.refresh_all(companies.iterator(), force=options['force'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {refreshed} empresa(s) reagregadas em {elapsed:.2f}s'
+        ))
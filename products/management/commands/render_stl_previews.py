@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Management command para gerar as prévias dos arquivos STL
+Renderiza (ou reaproveita do cache) a miniatura de cada STL, a anexa às
+imagens do produto e gera as malhas de prévia que faltarem; útil para STLs
+enviados antes das prévias existirem
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.models import StlAsset
+from products.stl.previews import StlPreviewService
+
+
+class Command(BaseCommand):
+    help = 'Gera as prévias dos arquivos STL e as anexa aos produtos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='Processa apenas os STLs da empresa com este id',
+        )
+
+    def handle(self, *args, **options):
+        assets = StlAsset.objects.order_by('pk')
+        if options['company']:
+            assets = assets.filter(company_id=options['company'])
+
+        started = time.perf_counter()
+        attached = failed = 0
+        for asset in assets.iterator():
+            try:
+                if StlPreviewService.generate(asset) is not None:
+                    attached += 1
+                StlPreviewService.meshes(asset)
+            except Exception as exc:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'⚠️  STL #{asset.pk}: {exc}'))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {attached} prévia(s) anexadas em {elapsed:.2f}s ({failed} falha(s))'
+        ))
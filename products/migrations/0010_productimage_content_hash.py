@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_scale_alter_category_options_alter_currency_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='products.content_hash'),
+        ),
+    ]
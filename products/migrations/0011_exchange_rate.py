@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_productimage_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18, verbose_name='products.exchange_rate.rate')),
+                ('date', models.DateField(verbose_name='products.exchange_rate.date')),
+                ('source', models.CharField(blank=True, max_length=30, verbose_name='products.exchange_rate.source')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='products.updated_at')),
+                ('from_currency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rates_from', to='products.currency', verbose_name='products.exchange_rate.from_currency')),
+                ('to_currency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rates_to', to='products.currency', verbose_name='products.exchange_rate.to_currency')),
+            ],
+            options={
+                'verbose_name': 'products.exchange_rate_verbose',
+                'verbose_name_plural': 'products.exchange_rate_verbose_plural',
+                'ordering': ['-date', 'from_currency', 'to_currency'],
+                'indexes': [models.Index(fields=['date'], name='exchange_rate_date')],
+                'constraints': [models.UniqueConstraint(fields=('from_currency', 'to_currency', 'date'), name='exchange_rate_pair_date_unique')],
+            },
+        ),
+    ]
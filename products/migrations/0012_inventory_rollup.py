@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_country_continent_country_region'),
+        ('products', '0011_exchange_rate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('products', models.PositiveIntegerField(default=0, verbose_name='products.reports.products')),
+                ('units', models.PositiveBigIntegerField(default=0, verbose_name='products.stock_quantity')),
+                ('stock_value', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='products.reports.stock_value')),
+                ('expected_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='products.reports.expected_revenue')),
+                ('margin', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='products.reports.margin')),
+            ],
+            options={
+                'verbose_name': 'products.reports.rollup_verbose',
+                'verbose_name_plural': 'products.reports.rollup_verbose_plural',
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_product_update', models.DateTimeField(blank=True, null=True)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(verbose_name='products.reports.refreshed_at')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['company', 'updated_at'], name='product_company_updated'),
+        ),
+        migrations.AddField(
+            model_name='inventoryrollup',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.category', verbose_name='products.category'),
+        ),
+        migrations.AddField(
+            model_name='inventoryrollup',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_rollups', to='core.company', verbose_name='products.company'),
+        ),
+        migrations.AddField(
+            model_name='inventoryrollup',
+            name='currency',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.currency', verbose_name='products.currency'),
+        ),
+        migrations.AddField(
+            model_name='inventoryrollup',
+            name='product_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.producttype', verbose_name='products.product_type'),
+        ),
+        migrations.AddField(
+            model_name='inventoryrollup',
+            name='scale',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.scale', verbose_name='products.scale'),
+        ),
+        migrations.AddField(
+            model_name='inventoryrollupstate',
+            name='company',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_rollup_state', to='core.company', verbose_name='products.company'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryrollup',
+            index=models.Index(fields=['company', 'category'], name='inventory_rollup_company'),
+        ),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:45
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Cópia das conversões de products/units.py na data desta migração: a
+# migração não pode mudar se o módulo mudar depois.
+MM_PER_UNIT = {'mm': Decimal('1'), 'cm': Decimal('10'), 'in': Decimal('25.4')}
+GRAMS_PER_UNIT = {'g': Decimal('1'), 'kg': Decimal('1000')}
+CANONICAL_FIELDS = (
+    'print_time_seconds', 'dimensions_x_mm', 'dimensions_y_mm', 'dimensions_z_mm', 'weight_grams',
+)
+
+
+def _print_time_seconds(value):
+    try:
+        hours, minutes = (value or '').strip().split(':')
+        hours, minutes = int(hours), int(minutes)
+    except ValueError:
+        return None
+    if hours < 0 or not 0 <= minutes < 60:
+        return None
+    return (hours * 60 + minutes) * 60
+
+
+def _scaled(value, factor):
+    if value is None or factor is None:
+        return None
+    return (Decimal(value) * factor).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def fill_canonical_units(apps, schema_editor):
+    """Calcula duração, dimensões e peso canônicos dos produtos existentes em lotes"""
+    Product = apps.get_model('products', 'Product')
+    batch_size = 2000
+    last_pk = 0
+    while True:
+        batch = list(
+            Product.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                'pk', 'print_time_estimate', 'dimensions_x', 'dimensions_y', 'dimensions_z',
+                'dimension_unit', 'weight', 'weight_unit',
+            )[:batch_size]
+        )
+        if not batch:
+            break
+        for product in batch:
+            mm = MM_PER_UNIT.get(product.dimension_unit)
+            product.print_time_seconds = _print_time_seconds(product.print_time_estimate)
+            product.dimensions_x_mm = _scaled(product.dimensions_x, mm)
+            product.dimensions_y_mm = _scaled(product.dimensions_y, mm)
+            product.dimensions_z_mm = _scaled(product.dimensions_z, mm)
+            product.weight_grams = _scaled(product.weight, GRAMS_PER_UNIT.get(product.weight_unit))
+        Product.objects.bulk_update(batch, CANONICAL_FIELDS)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_country_continent_country_region'),
+        ('products', '0012_inventory_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='dimensions_x_mm',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=12, null=True, verbose_name='products.dimensions_x_mm'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='dimensions_y_mm',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=12, null=True, verbose_name='products.dimensions_y_mm'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='dimensions_z_mm',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=12, null=True, verbose_name='products.dimensions_z_mm'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='print_time_seconds',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='products.print_time_seconds'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='weight_grams',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True, verbose_name='products.weight_grams'),
+        ),
+        migrations.RunPython(fill_canonical_units, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['company', 'print_time_seconds'], name='product_company_print_time'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['company', 'dimensions_x_mm'], name='product_company_x_mm'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['company', 'dimensions_y_mm'], name='product_company_y_mm'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['company', 'dimensions_z_mm'], name='product_company_z_mm'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['company', 'weight_grams'], name='product_company_weight'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:51
+
+import django.db.models.deletion
+import products.models
+import products.stl
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_country_continent_country_region'),
+        ('products', '0013_product_canonical_units'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StlAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(max_length=255, storage=products.stl.stl_storage, upload_to=products.models.stl_upload_path, verbose_name='products.stl.file')),
+                ('original_name', models.CharField(max_length=255, verbose_name='products.stl.original_name')),
+                ('content_hash', models.CharField(db_index=True, max_length=64, verbose_name='products.content_hash')),
+                ('size_bytes', models.PositiveBigIntegerField(verbose_name='products.stl.size_bytes')),
+                ('format', models.CharField(choices=[('binary', 'products.stl.format_binary'), ('ascii', 'products.stl.format_ascii')], max_length=10, verbose_name='products.stl.format')),
+                ('triangle_count', models.PositiveIntegerField(verbose_name='products.stl.triangle_count')),
+                ('size_x_mm', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='products.dimensions_x_mm')),
+                ('size_y_mm', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='products.dimensions_y_mm')),
+                ('size_z_mm', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='products.dimensions_z_mm')),
+                ('volume_mm3', models.DecimalField(decimal_places=2, max_digits=18, verbose_name='products.stl.volume_mm3')),
+                ('surface_area_mm2', models.DecimalField(decimal_places=2, max_digits=18, verbose_name='products.stl.surface_area_mm2')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='products.created_at')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stl_assets', to='core.company', verbose_name='products.company')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='products.created_by')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stl_assets', to='products.product', verbose_name='products.product_verbose')),
+            ],
+            options={
+                'verbose_name': 'products.stl.asset_verbose',
+                'verbose_name_plural': 'products.stl.asset_verbose_plural',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StlUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='products.stl.original_name')),
+                ('total_size', models.PositiveBigIntegerField(verbose_name='products.stl.size_bytes')),
+                ('received', models.PositiveBigIntegerField(default=0, verbose_name='products.stl.received')),
+                ('status', models.CharField(choices=[('receiving', 'products.stl.status_receiving'), ('complete', 'products.stl.status_complete'), ('failed', 'products.stl.status_failed')], default='receiving', max_length=10, verbose_name='products.stl.status')),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='products.created_at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='products.updated_at')),
+                ('asset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.stlasset', verbose_name='products.stl.asset_verbose')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stl_uploads', to='core.company', verbose_name='products.company')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='products.created_by')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stl_uploads', to='products.product', verbose_name='products.product_verbose')),
+            ],
+            options={
+                'verbose_name': 'products.stl.upload_verbose',
+                'verbose_name_plural': 'products.stl.upload_verbose_plural',
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='stl_upload_status_updated')],
+            },
+        ),
+    ]
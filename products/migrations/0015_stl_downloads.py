@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_country_continent_country_region'),
+        ('customers', '0005_customer_birthday_indexes'),
+        ('products', '0014_stl_assets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StlDownload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(blank=True, db_index=True, max_length=64, verbose_name='products.stl.fingerprint')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='products.created_at')),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='downloads', to='products.stlasset', verbose_name='products.stl.asset_verbose')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stl_downloads', to='core.company', verbose_name='products.company')),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stl_downloads', to='customers.customer', verbose_name='products.stl.customer')),
+                ('downloaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='products.stl.downloaded_by')),
+            ],
+            options={
+                'verbose_name': 'products.stl.download_verbose',
+                'verbose_name_plural': 'products.stl.download_verbose_plural',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['asset', 'fingerprint'], name='stl_download_asset_print')],
+            },
+        ),
+    ]
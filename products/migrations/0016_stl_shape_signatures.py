@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_stl_downloads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stlasset',
+            name='shape_signature',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stlasset',
+            name='similar_to',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='similar_assets', to='products.stlasset', verbose_name='products.stl.similar_to'),
+        ),
+        migrations.AddField(
+            model_name='stlasset',
+            name='similarity_distance',
+            field=models.FloatField(blank=True, null=True, verbose_name='products.stl.similarity_distance'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:41
+
+import django.db.models.deletion
+import products.models
+import products.stl
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_country_continent_country_region'),
+        ('products', '0016_stl_shape_signatures'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GcodeFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(max_length=255, storage=products.stl.stl_storage, upload_to=products.models.gcode_upload_path, verbose_name='products.gcode.file')),
+                ('original_name', models.CharField(max_length=255, verbose_name='products.stl.original_name')),
+                ('content_hash', models.CharField(db_index=True, max_length=64, verbose_name='products.content_hash')),
+                ('size_bytes', models.PositiveBigIntegerField(verbose_name='products.stl.size_bytes')),
+                ('print_time_seconds', models.PositiveIntegerField(blank=True, null=True, verbose_name='products.print_time_seconds')),
+                ('filament_length_mm', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='products.gcode.filament_length_mm')),
+                ('filament_grams', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='products.gcode.filament_grams')),
+                ('materials', models.JSONField(blank=True, default=list, verbose_name='products.gcode.materials')),
+                ('line_count', models.PositiveBigIntegerField(default=0, verbose_name='products.gcode.line_count')),
+                ('move_count', models.PositiveBigIntegerField(default=0, verbose_name='products.gcode.move_count')),
+                ('analyzed_at', models.DateTimeField(blank=True, null=True, verbose_name='products.gcode.analyzed_at')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='products.created_at')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gcode_files', to='core.company', verbose_name='products.company')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='products.created_by')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gcode_files', to='products.product', verbose_name='products.product_verbose')),
+            ],
+            options={
+                'verbose_name': 'products.gcode.file_verbose',
+                'verbose_name_plural': 'products.gcode.file_verbose_plural',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
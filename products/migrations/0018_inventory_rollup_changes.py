@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_bulk_jobs'),
+        ('products', '0017_gcode_files'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='inventoryrollupstate',
+            name='product_count',
+        ),
+        migrations.CreateModel(
+            name='InventoryRollupChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_id', models.BigIntegerField(blank=True, null=True)),
+                ('product_type_id', models.BigIntegerField()),
+                ('scale_id', models.BigIntegerField(blank=True, null=True)),
+                ('currency_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.company', verbose_name='products.company')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0018_inventory_rollup_changes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stlupload',
+            name='status',
+            field=models.CharField(choices=[('receiving', 'products.stl.status_receiving'), ('finalizing', 'products.stl.status_finalizing'), ('complete', 'products.stl.status_complete'), ('failed', 'products.stl.status_failed')], default='receiving', max_length=10, verbose_name='products.stl.status'),
+        ),
+    ]
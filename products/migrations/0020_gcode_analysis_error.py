@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0019_stl_upload_finalizing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gcodefile',
+            name='error',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
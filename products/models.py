@@ -1,7 +1,12 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
+from .stl import stl_storage
+from .units import CANONICAL_FIELDS, canonical_values, format_print_time
+
 User = get_user_model()
 
 
@@ -20,6 +25,51 @@ class Currency(models.Model):
         return f"{self.code} - {self.name}"
 
 
+class ExchangeRate(models.Model):
+    """Cotação diária entre duas moedas (1 unidade de from_currency = rate to_currency)"""
+    from_currency = models.ForeignKey(
+        Currency,
+        on_delete=models.CASCADE,
+        related_name='rates_from',
+        verbose_name=_('products.exchange_rate.from_currency')
+    )
+    to_currency = models.ForeignKey(
+        Currency,
+        on_delete=models.CASCADE,
+        related_name='rates_to',
+        verbose_name=_('products.exchange_rate.to_currency')
+    )
+    rate = models.DecimalField(
+        max_digits=18,
+        decimal_places=8,
+        verbose_name=_('products.exchange_rate.rate')
+    )
+    date = models.DateField(verbose_name=_('products.exchange_rate.date'))
+    source = models.CharField(
+        max_length=30,
+        blank=True,
+        verbose_name=_('products.exchange_rate.source')
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('products.updated_at'))
+
+    class Meta:
+        verbose_name = _('products.exchange_rate_verbose')
+        verbose_name_plural = _('products.exchange_rate_verbose_plural')
+        ordering = ['-date', 'from_currency', 'to_currency']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['from_currency', 'to_currency', 'date'],
+                name='exchange_rate_pair_date_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='exchange_rate_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.from_currency.code}/{self.to_currency.code} {self.rate} ({self.date})"
+
+
 class ProductType(models.Model):
     """Modelo para tipos de produto"""
     name = models.CharField(max_length=100, verbose_name=_('common.name'))
@@ -184,6 +234,46 @@ class Product(models.Model):
         verbose_name=_('products.print_time_estimate')
     )
     
+    # Valores canônicos (ver products/units.py), calculados no save para filtros no banco
+    print_time_seconds = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('products.print_time_seconds')
+    )
+    dimensions_x_mm = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('products.dimensions_x_mm')
+    )
+    dimensions_y_mm = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('products.dimensions_y_mm')
+    )
+    dimensions_z_mm = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('products.dimensions_z_mm')
+    )
+    weight_grams = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('products.weight_grams')
+    )
+    
     # Estoque
     stock_quantity = models.PositiveIntegerField(
         default=1, 
@@ -204,10 +294,37 @@ class Product(models.Model):
         verbose_name = _('products.product_verbose')
         verbose_name_plural = _('products.product_verbose_plural')
         ordering = ['-created_at']
+        indexes = [
+            # Validador da listagem (ETag) e atualização dos relatórios
+            models.Index(fields=['company', 'updated_at'], name='product_company_updated'),
+            # Filtros de faixa e ordenação da listagem
+            models.Index(fields=['company', 'print_time_seconds'], name='product_company_print_time'),
+            models.Index(fields=['company', 'dimensions_x_mm'], name='product_company_x_mm'),
+            models.Index(fields=['company', 'dimensions_y_mm'], name='product_company_y_mm'),
+            models.Index(fields=['company', 'dimensions_z_mm'], name='product_company_z_mm'),
+            models.Index(fields=['company', 'weight_grams'], name='product_company_weight'),
+        ]
     
     def __str__(self):
         return self.name
     
+    def update_canonical_fields(self):
+        """Recalcula duração em segundos, dimensões em mm e peso em gramas"""
+        values = canonical_values(
+            self.print_time_estimate,
+            self.dimensions_x, self.dimensions_y, self.dimensions_z, self.dimension_unit,
+            self.weight, self.weight_unit,
+        )
+        for field, value in values.items():
+            setattr(self, field, value)
+    
+    def save(self, *args, **kwargs):
+        self.update_canonical_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(CANONICAL_FIELDS)
+        super().save(*args, **kwargs)
+    
     def get_dimensions_display(self):
         """Retorna as dimensões formatadas"""
         if self.dimensions_x and self.dimensions_y and self.dimensions_z:
@@ -241,6 +358,12 @@ class ProductImage(models.Model):
         default=0, 
         verbose_name=_('products.order')
     )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        verbose_name=_('products.content_hash')
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('products.created_at'))
     
     class Meta:
@@ -252,10 +375,374 @@ class ProductImage(models.Model):
         return f"Imagem de {self.product.name}"
     
     def save(self, *args, **kwargs):
-        # Se esta imagem for marcada como principal, desmarcar as outras
-        if self.is_primary:
+        # Se esta imagem for marcada como principal, desmarcar as outras.
+        # Alterações em lote passam pelo ProductImageService, que usa bulk_update.
+        update_fields = kwargs.get('update_fields')
+        if self.is_primary and (update_fields is None or 'is_primary' in update_fields):
             ProductImage.objects.filter(
                 product=self.product, 
                 is_primary=True
             ).exclude(pk=self.pk).update(is_primary=False)
-        super().save(*args, **kwargs) 
\ No newline at end of file
+        super().save(*args, **kwargs) 
+
+class InventoryRollup(models.Model):
+    """Totais do estoque ativo de uma empresa por (categoria, tipo, escala, moeda)"""
+    company = models.ForeignKey(
+        'core.Company',
+        on_delete=models.CASCADE,
+        related_name='inventory_rollups',
+        verbose_name=_('products.company')
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_('products.category')
+    )
+    product_type = models.ForeignKey(
+        ProductType,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('products.product_type')
+    )
+    scale = models.ForeignKey(
+        Scale,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_('products.scale')
+    )
+    currency = models.ForeignKey(
+        Currency,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('products.currency')
+    )
+    products = models.PositiveIntegerField(default=0, verbose_name=_('products.reports.products'))
+    units = models.PositiveBigIntegerField(default=0, verbose_name=_('products.stock_quantity'))
+    stock_value = models.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+        default=0,
+        verbose_name=_('products.reports.stock_value')
+    )
+    expected_revenue = models.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+        default=0,
+        verbose_name=_('products.reports.expected_revenue')
+    )
+    margin = models.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+        default=0,
+        verbose_name=_('products.reports.margin')
+    )
+
+    class Meta:
+        verbose_name = _('products.reports.rollup_verbose')
+        verbose_name_plural = _('products.reports.rollup_verbose_plural')
+        indexes = [
+            models.Index(fields=['company', 'category'], name='inventory_rollup_company'),
+        ]
+
+    def __str__(self):
+        return f"{self.company_id}: {self.category_id}/{self.product_type_id}/{self.scale_id}/{self.currency_id}"
+
+
+class InventoryRollupState(models.Model):
+    """Marca d'água dos totais de uma empresa (maior updated_at já agregado)"""
+    company = models.OneToOneField(
+        'core.Company',
+        on_delete=models.CASCADE,
+        related_name='inventory_rollup_state',
+        verbose_name=_('products.company')
+    )
+    last_product_update = models.DateTimeField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(verbose_name=_('products.reports.refreshed_at'))
+
+    def __str__(self):
+        return f"{self.company_id} @ {self.refreshed_at}"
+
+
+class InventoryRollupChange(models.Model):
+    """
+    Grupo (categoria, tipo, escala, moeda) que perdeu produtos sem que o
+    updated_at de um produto o aponte: produto movido de grupo ou excluído
+    """
+    company = models.ForeignKey(
+        'core.Company',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('products.company')
+    )
+    category_id = models.BigIntegerField(null=True, blank=True)
+    product_type_id = models.BigIntegerField()
+    scale_id = models.BigIntegerField(null=True, blank=True)
+    currency_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.company_id}: {self.category_id}/{self.product_type_id}/{self.scale_id}/{self.currency_id}"
+
+
+def stl_upload_path(instance, filename):
+    """Caminho endereçado pelo conteúdo: <2 primeiros dígitos do hash>/<hash>.stlz (formato compacto)"""
+    return f"{instance.content_hash[:2]}/{instance.content_hash}.stlz"
+
+
+class StlAsset(models.Model):
+    """Arquivo STL de um produto, com as métricas extraídas da malha"""
+    FORMAT_CHOICES = [
+        ('binary', _('products.stl.format_binary')),
+        ('ascii', _('products.stl.format_ascii')),
+    ]
+
+    company = models.ForeignKey(
+        'core.Company',
+        on_delete=models.CASCADE,
+        related_name='stl_assets',
+        verbose_name=_('products.company')
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stl_assets',
+        verbose_name=_('products.product_verbose')
+    )
+    file = models.FileField(
+        upload_to=stl_upload_path,
+        storage=stl_storage,
+        max_length=255,
+        verbose_name=_('products.stl.file')
+    )
+    original_name = models.CharField(max_length=255, verbose_name=_('products.stl.original_name'))
+    content_hash = models.CharField(max_length=64, db_index=True, verbose_name=_('products.content_hash'))
+    size_bytes = models.PositiveBigIntegerField(verbose_name=_('products.stl.size_bytes'))
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, verbose_name=_('products.stl.format'))
+
+    # Métricas da malha (em mm, unidade padrão do STL)
+    triangle_count = models.PositiveIntegerField(verbose_name=_('products.stl.triangle_count'))
+    size_x_mm = models.DecimalField(max_digits=12, decimal_places=2, verbose_name=_('products.dimensions_x_mm'))
+    size_y_mm = models.DecimalField(max_digits=12, decimal_places=2, verbose_name=_('products.dimensions_y_mm'))
+    size_z_mm = models.DecimalField(max_digits=12, decimal_places=2, verbose_name=_('products.dimensions_z_mm'))
+    volume_mm3 = models.DecimalField(max_digits=18, decimal_places=2, verbose_name=_('products.stl.volume_mm3'))
+    surface_area_mm2 = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        verbose_name=_('products.stl.surface_area_mm2')
+    )
+
+    # Assinatura de forma e provável duplicado na biblioteca da empresa (products/stl/duplicates.py)
+    shape_signature = models.BinaryField(null=True, blank=True, editable=False)
+    similar_to = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='similar_assets',
+        verbose_name=_('products.stl.similar_to')
+    )
+    similarity_distance = models.FloatField(null=True, blank=True, verbose_name=_('products.stl.similarity_distance'))
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name=_('products.created_by')
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('products.created_at'))
+
+    class Meta:
+        verbose_name = _('products.stl.asset_verbose')
+        verbose_name_plural = _('products.stl.asset_verbose_plural')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.original_name
+
+
+class StlUpload(models.Model):
+    """Upload de STL em partes (retomável); o arquivo parcial fica em STL_ROOT/uploads"""
+    STATUS_RECEIVING = 'receiving'
+    STATUS_FINALIZING = 'finalizing'
+    STATUS_COMPLETE = 'complete'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RECEIVING, _('products.stl.status_receiving')),
+        (STATUS_FINALIZING, _('products.stl.status_finalizing')),
+        (STATUS_COMPLETE, _('products.stl.status_complete')),
+        (STATUS_FAILED, _('products.stl.status_failed')),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company = models.ForeignKey(
+        'core.Company',
+        on_delete=models.CASCADE,
+        related_name='stl_uploads',
+        verbose_name=_('products.company')
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stl_uploads',
+        verbose_name=_('products.product_verbose')
+    )
+    filename = models.CharField(max_length=255, verbose_name=_('products.stl.original_name'))
+    total_size = models.PositiveBigIntegerField(verbose_name=_('products.stl.size_bytes'))
+    received = models.PositiveBigIntegerField(default=0, verbose_name=_('products.stl.received'))
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_RECEIVING,
+        verbose_name=_('products.stl.status')
+    )
+    error = models.CharField(max_length=255, blank=True)
+    asset = models.ForeignKey(
+        StlAsset,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_('products.stl.asset_verbose')
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name=_('products.created_by')
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('products.created_at'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('products.updated_at'))
+
+    class Meta:
+        verbose_name = _('products.stl.upload_verbose')
+        verbose_name_plural = _('products.stl.upload_verbose_plural')
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='stl_upload_status_updated'),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.total_size})"
+
+
+class StlDownload(models.Model):
+    """Download de um STL; com Segurança STL, a cópia leva a marca do destinatário"""
+    company = models.ForeignKey(
+        'core.Company',
+        on_delete=models.CASCADE,
+        related_name='stl_downloads',
+        verbose_name=_('products.company')
+    )
+    asset = models.ForeignKey(
+        StlAsset,
+        on_delete=models.CASCADE,
+        related_name='downloads',
+        verbose_name=_('products.stl.asset_verbose')
+    )
+    customer = models.ForeignKey(
+        'customers.Customer',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stl_downloads',
+        verbose_name=_('products.stl.customer')
+    )
+    # Chave da marca (hex) ou vazio para cópia sem marca
+    fingerprint = models.CharField(max_length=64, blank=True, db_index=True, verbose_name=_('products.stl.fingerprint'))
+    downloaded_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name=_('products.stl.downloaded_by')
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('products.created_at'))
+
+    class Meta:
+        verbose_name = _('products.stl.download_verbose')
+        verbose_name_plural = _('products.stl.download_verbose_plural')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['asset', 'fingerprint'], name='stl_download_asset_print'),
+        ]
+
+    def __str__(self):
+        return f"{self.asset} → {self.customer or self.downloaded_by}"
+
+
+def gcode_upload_path(instance, filename):
+    """Caminho endereçado pelo conteúdo: gcode/<2 primeiros dígitos do hash>/<hash>.gcode"""
+    return f"gcode/{instance.content_hash[:2]}/{instance.content_hash}.gcode"
+
+
+class GcodeFile(models.Model):
+    """G-code fatiado de um produto, com tempo de impressão e filamento calculados (products/gcode/parser.py)"""
+    company = models.ForeignKey(
+        'core.Company',
+        on_delete=models.CASCADE,
+        related_name='gcode_files',
+        verbose_name=_('products.company')
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='gcode_files',
+        verbose_name=_('products.product_verbose')
+    )
+    file = models.FileField(
+        upload_to=gcode_upload_path,
+        storage=stl_storage,
+        max_length=255,
+        verbose_name=_('products.gcode.file')
+    )
+    original_name = models.CharField(max_length=255, verbose_name=_('products.stl.original_name'))
+    content_hash = models.CharField(max_length=64, db_index=True, verbose_name=_('products.content_hash'))
+    size_bytes = models.PositiveBigIntegerField(verbose_name=_('products.stl.size_bytes'))
+
+    # Resultado da análise
+    print_time_seconds = models.PositiveIntegerField(null=True, blank=True, verbose_name=_('products.print_time_seconds'))
+    filament_length_mm = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name=_('products.gcode.filament_length_mm')
+    )
+    filament_grams = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name=_('products.gcode.filament_grams')
+    )
+    # [{tool, material, diameter_mm, density, length_mm, grams}] por extrusor
+    materials = models.JSONField(default=list, blank=True, verbose_name=_('products.gcode.materials'))
+    line_count = models.PositiveBigIntegerField(default=0, verbose_name=_('products.gcode.line_count'))
+    move_count = models.PositiveBigIntegerField(default=0, verbose_name=_('products.gcode.move_count'))
+    analyzed_at = models.DateTimeField(null=True, blank=True, verbose_name=_('products.gcode.analyzed_at'))
+    # Código da falha da análise (vazio se analisado ou ainda na fila)
+    error = models.CharField(max_length=32, blank=True)
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name=_('products.created_by')
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('products.created_at'))
+
+    class Meta:
+        verbose_name = _('products.gcode.file_verbose')
+        verbose_name_plural = _('products.gcode.file_verbose_plural')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.original_name
+
+    @property
+    def print_time_display(self):
+        """Tempo de impressão como HH:MM"""
+        return format_print_time(self.print_time_seconds) if self.print_time_seconds is not None else ''
+
+    @property
+    def filament_meters(self):
+        return self.filament_length_mm / 1000 if self.filament_length_mm is not None else None
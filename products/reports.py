@@ -0,0 +1,197 @@
+"""
+Relatórios de estoque e margem
+
+Os totais de cada empresa ficam pré-agregados em InventoryRollup, uma linha
+por (categoria, tipo, escala, moeda). A página de relatórios só soma essas
+poucas linhas pela dimensão escolhida e converte para uma moeda, sem tocar
+no catálogo. O comando refresh_inventory_rollups (agendado a cada poucos
+minutos) reagrega apenas os grupos tocados desde a marca d'água da empresa:
+os dos produtos com updated_at mais novo e os anotados em
+InventoryRollupChange (produtos que saíram de um grupo).
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+from core.services import GeolocationService
+
+from .models import (
+    Category, Currency, InventoryRollup, InventoryRollupChange, InventoryRollupState, Product,
+    ProductType, Scale,
+)
+from .services import CatalogValuationService
+
+
+# Dimensão -> (modelo, campo no InventoryRollup)
+DIMENSIONS = {
+    'category': (Category, 'category_id'),
+    'product_type': (ProductType, 'product_type_id'),
+    'scale': (Scale, 'scale_id'),
+    'currency': (Currency, 'currency_id'),
+}
+DEFAULT_DIMENSION = 'category'
+
+
+class InventoryReportService:
+    """Totais pré-agregados de estoque, receita esperada e margem por empresa"""
+
+    GROUP_FIELDS = ('category_id', 'product_type_id', 'scale_id', 'currency_id')
+    # Produtos salvos em transações longas podem confirmar com updated_at
+    # anterior à marca d'água; a janela relê esses grupos na atualização seguinte
+    OVERLAP = timedelta(minutes=5)
+    # Acima deste número de grupos tocados, reagregar tudo é mais barato
+    MAX_GROUPS = 500
+
+    @classmethod
+    def group_filter(cls, groups):
+        """Q que seleciona os grupos (categoria, tipo, escala, moeda) informados"""
+        condition = Q(pk__in=[])
+        for group in groups:
+            # category_id=None vira IS NULL no ORM
+            condition |= Q(**dict(zip(cls.GROUP_FIELDS, group)))
+        return condition
+
+    @classmethod
+    def record_changes(cls, products):
+        """
+        Anota os grupos atuais dos produtos antes de saírem deles
+
+        Usado quando produtos mudam de grupo: o updated_at só leva a
+        atualização aos grupos novos.
+        """
+        InventoryRollupChange.objects.bulk_create([
+            InventoryRollupChange(company_id=company_id, **dict(zip(cls.GROUP_FIELDS, group)))
+            for company_id, *group in products.order_by().values_list('company_id', *cls.GROUP_FIELDS).distinct()
+        ])
+
+    @classmethod
+    def _write_groups(cls, company, products):
+        rows = CatalogValuationService.totals_by(products.filter(is_active=True), *cls.GROUP_FIELDS)
+        InventoryRollup.objects.bulk_create(
+            [
+                InventoryRollup(
+                    company=company,
+                    **{field: row[field] for field in cls.GROUP_FIELDS},
+                    **{column: row[column] or 0 for column in CatalogValuationService.COLUMNS},
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+    @classmethod
+    def refresh(cls, company, force=False):
+        """
+        Reagrega os grupos da empresa tocados desde a última atualização
+
+        Os grupos tocados são os dos produtos com updated_at após a marca
+        d'água (menos OVERLAP) e os anotados em InventoryRollupChange; só eles
+        são apagados e reagregados. Sem estado (primeira vez, categoria ou
+        escala excluída) ou com force, a empresa inteira é reagregada.
+        Retorna (estado, reagregou). O estado é travado durante a troca das
+        linhas, então atualizações concorrentes não duplicam totais.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            state, created = InventoryRollupState.objects.select_for_update().get_or_create(
+                company=company, defaults={'refreshed_at': now}
+            )
+            products = Product.objects.filter(company=company)
+            changes = InventoryRollupChange.objects.filter(company=company)
+            change_ids, groups = [], set()
+            if not (force or created or state.last_product_update is None):
+                for pk, *group in changes.values_list('pk', *cls.GROUP_FIELDS):
+                    change_ids.append(pk)
+                    groups.add(tuple(group))
+
+            since = None if force or created else state.last_product_update
+            touched = products if since is None else products.filter(updated_at__gt=since - cls.OVERLAP)
+            last_update = since
+            for *group, group_update in (
+                touched.order_by().values_list(*cls.GROUP_FIELDS).annotate(last=Max('updated_at'))
+            ):
+                groups.add(tuple(group))
+                if last_update is None or group_update > last_update:
+                    last_update = group_update
+
+            if since is None or len(groups) > cls.MAX_GROUPS:
+                InventoryRollup.objects.filter(company=company).delete()
+                cls._write_groups(company, products)
+                changes.filter(created_at__lte=now).delete()
+            elif groups:
+                condition = cls.group_filter(groups)
+                InventoryRollup.objects.filter(condition, company=company).delete()
+                cls._write_groups(company, products.filter(condition))
+                InventoryRollupChange.objects.filter(pk__in=change_ids).delete()
+            else:
+                return state, False
+
+            state.last_product_update = last_update
+            state.refreshed_at = now
+            state.save()
+        return state, True
+
+    @classmethod
+    def refresh_all(cls, companies, force=False):
+        """Reagrega as empresas cujo catálogo mudou; retorna quantas foram reagregadas"""
+        return sum(cls.refresh(company, force)[1] for company in companies)
+
+    @staticmethod
+    def invalidate(company_ids):
+        """Descarta o estado das empresas: a próxima atualização reagrega tudo"""
+        InventoryRollupState.objects.filter(company_id__in=company_ids).delete()
+
+    @staticmethod
+    def default_currency(company):
+        """Moeda do país da empresa (ou a primeira cadastrada)"""
+        code = GeolocationService.get_currency_by_country(company.country.code)
+        return Currency.objects.filter(code=code).first() or Currency.objects.first()
+
+    @classmethod
+    def report(cls, company, dimension, target_currency, on_date=None):
+        """
+        Estoque, receita esperada e margem da empresa agrupados pela dimensão
+
+        Retorna {'dimension', 'currency', 'rows': [...], 'totals', 'missing_rates',
+        'refreshed_at'}; cada linha traz 'object' (None para "sem valor").
+        """
+        model, field = DIMENSIONS[dimension]
+        state = InventoryRollupState.objects.filter(company=company).first()
+
+        rows = list(
+            InventoryRollup.objects.filter(company=company)
+            .values(field, 'currency_id')
+            .annotate(**{column: Sum(column) for column in CatalogValuationService.COLUMNS})
+            .order_by()
+            .values_list(field, 'currency_id', *CatalogValuationService.COLUMNS)
+        )
+        result = {
+            'dimension': dimension,
+            'currency': target_currency,
+            'rows': [],
+            'totals': CatalogValuationService.summarize(0, 0, (CatalogValuationService.ZERO,) * 3),
+            'missing_rates': [],
+            'refreshed_at': state.refreshed_at if state else None,
+        }
+        if not rows:
+            return result
+
+        keys, counts, values, missing = CatalogValuationService.convert_groups(rows, target_currency, on_date)
+        objects = model.objects.in_bulk([int(pk) for pk in keys if pk])
+        totals = CatalogValuationService.summarize(*counts.sum(axis=0), values.sum(axis=0))
+        for index, pk in enumerate(keys):
+            row = CatalogValuationService.summarize(*counts[index], values[index])
+            row['object'] = objects.get(int(pk))
+            row['share'] = (
+                (row['stock_value'] * 100 / totals['stock_value']).quantize(CatalogValuationService.CENT)
+                if totals['stock_value'] else None
+            )
+            result['rows'].append(row)
+
+        result['rows'].sort(key=lambda row: -row['stock_value'])
+        result['totals'] = totals
+        result['missing_rates'] = missing
+        return result
@@ -0,0 +1,666 @@
+"""
+Serviços do app de produtos
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+from datetime import date as date_cls
+from decimal import Decimal
+
+import numpy as np
+from django import forms
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_image_file_extension
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Sum
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from core import quotas
+from .models import Product, ProductImage, Category, Currency, ExchangeRate
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProductImageService:
+    """
+    Edição incremental das imagens de um produto
+
+    Cada operação (adicionar, remover, reordenar, definir principal) é aplicada
+    sobre as linhas existentes: arquivos novos são gravados uma única vez e a
+    nova disposição sai em um único bulk_update de order_index/is_primary.
+    Os arquivos são endereçados pelo SHA-256 do conteúdo, então a mesma imagem
+    nunca é armazenada duas vezes. O caminho sai do hash antes de gravar: as
+    linhas são criadas na transação e os arquivos só são gravados depois do
+    commit (um rollback não deixa arquivos órfãos no storage).
+    """
+
+    MAX_IMAGES = 5
+    MAX_SIZE = 10 * 1024 * 1024  # 10MB
+    UPLOAD_DIR = 'products/images'
+    NEW_PREFIX = 'new:'
+
+    @staticmethod
+    def _storage():
+        return ProductImage._meta.get_field('image').storage
+
+    @staticmethod
+    def content_hash(uploaded_file):
+        """SHA-256 do conteúdo do arquivo, lido em blocos"""
+        digest = hashlib.sha256()
+        for chunk in uploaded_file.chunks():
+            digest.update(chunk)
+        uploaded_file.seek(0)
+        return digest.hexdigest()
+
+    @classmethod
+    def _file_name(cls, uploaded_file, digest):
+        """Caminho do arquivo no storage, derivado do hash do conteúdo"""
+        extension = os.path.splitext(uploaded_file.name)[1].lower()
+        return f'{cls.UPLOAD_DIR}/{digest[:2]}/{digest}{extension}'
+
+    @classmethod
+    def _store_files(cls, pending):
+        """
+        Grava os arquivos novos (chamado no on_commit)
+
+        pending: [(imagem, arquivo enviado)]. Se a gravação falhar, as linhas
+        sem arquivo são removidas em vez de apontarem para o nada.
+        """
+        storage = cls._storage()
+        failed = []
+        for image, uploaded_file in pending:
+            name = image.image.name
+            try:
+                if storage.exists(name):
+                    continue
+                uploaded_file.seek(0)
+                saved = storage.save(name, uploaded_file)
+                if saved != name:
+                    # Outra requisição gravou o mesmo conteúdo ao mesmo tempo
+                    storage.delete(saved)
+            except OSError:
+                logger.exception('Falha ao gravar a imagem %s do produto %s', name, image.product_id)
+                failed.append(image.pk)
+        if failed:
+            ProductImage.objects.filter(pk__in=failed).delete()
+
+    @classmethod
+    def _delete_orphan_files(cls, names):
+        """Remove do storage os arquivos que nenhuma imagem referencia mais"""
+        names = {name for name in names if name}
+        if not names:
+            return
+        in_use = set(ProductImage.objects.filter(image__in=names).values_list('image', flat=True))
+        storage = cls._storage()
+        for name in names - in_use:
+            storage.delete(name)
+
+    @classmethod
+    def _resolve(cls, token, existing, uploaded):
+        """Converte um token ('<pk>' ou 'new:<índice>') na imagem correspondente"""
+        token = str(token or '').strip()
+        if token.startswith(cls.NEW_PREFIX):
+            index = _parse_pk(token[len(cls.NEW_PREFIX):])
+            if index is not None and 0 <= index < len(uploaded):
+                return uploaded[index]
+            return None
+        return existing.get(_parse_pk(token))
+
+    @classmethod
+    def validate(cls, new_files, remaining):
+        """Valida tamanho, formato (imagem legível pelo Pillow) e quantidade antes de gravar qualquer arquivo"""
+        for uploaded_file in new_files:
+            if uploaded_file.size > cls.MAX_SIZE:
+                raise ValidationError(_('products.form.max_size_info'))
+            try:
+                validate_image_file_extension(uploaded_file)
+                forms.ImageField().to_python(uploaded_file)
+            except ValidationError:
+                raise ValidationError(_('products.form.invalid_image'))
+            uploaded_file.seek(0)
+        if remaining + len(new_files) > cls.MAX_IMAGES:
+            raise ValidationError(_('products.form.max_images_info'))
+
+    @classmethod
+    def apply_changes(cls, product, new_files=(), remove_ids=(), order=None, primary=None):
+        """
+        Aplica as alterações de imagens de um produto
+
+        new_files: arquivos enviados (referenciados em order/primary como 'new:<índice>')
+        remove_ids: pks das imagens a remover
+        order: lista de tokens na ordem desejada; imagens omitidas vão para o fim
+        primary: token da imagem principal
+        """
+        new_files = list(new_files)
+        remove_ids = {pk for pk in map(_parse_pk, remove_ids) if pk is not None}
+
+        with transaction.atomic():
+            images = list(product.images.select_for_update().order_by('order_index', 'created_at', 'pk'))
+            kept = [image for image in images if image.pk not in remove_ids]
+            removed = [image for image in images if image.pk in remove_ids]
+
+            # Uploads repetidos (no próprio envio ou já presentes no produto) não viram linhas novas
+            by_hash = {image.content_hash: image for image in kept if image.content_hash}
+            digests = [cls.content_hash(uploaded_file) for uploaded_file in new_files]
+            fresh = {}
+            for uploaded_file, digest in zip(new_files, digests):
+                if digest not in by_hash:
+                    fresh.setdefault(digest, uploaded_file)
+            cls.validate(list(fresh.values()), len(kept))
+
+            uploaded = []
+            created = []
+            pending = []
+            for uploaded_file, digest in zip(new_files, digests):
+                image = by_hash.get(digest)
+                if image is None:
+                    # Formato e tamanho já validados; o arquivo é gravado no commit
+                    image = ProductImage(product=product, content_hash=digest)
+                    image.image.name = cls._file_name(uploaded_file, digest)
+                    by_hash[digest] = image
+                    created.append(image)
+                    pending.append((image, uploaded_file))
+                uploaded.append(image)
+
+            final = kept + created
+            if order:
+                existing = {image.pk: image for image in kept}
+                requested = []
+                for token in order:
+                    image = cls._resolve(token, existing, uploaded)
+                    if image is not None and image not in requested:
+                        requested.append(image)
+                final = requested + [image for image in final if image not in requested]
+
+            primary_image = cls._resolve(primary, {image.pk: image for image in kept}, uploaded)
+            if primary_image is None:
+                primary_image = next((image for image in final if image.is_primary), None)
+            if primary_image is None and final:
+                primary_image = final[0]
+
+            changed = []
+            for index, image in enumerate(final):
+                is_primary = image is primary_image
+                if image.pk is None:
+                    image.order_index = index
+                    image.is_primary = is_primary
+                elif image.order_index != index or image.is_primary != is_primary:
+                    image.order_index = index
+                    image.is_primary = is_primary
+                    changed.append(image)
+
+            if removed:
+                ProductImage.objects.filter(pk__in=[image.pk for image in removed]).delete()
+            if created:
+                ProductImage.objects.bulk_create(created)
+                transaction.on_commit(lambda: cls._store_files(pending))
+            if changed:
+                ProductImage.objects.bulk_update(changed, ['order_index', 'is_primary'])
+
+            if removed or created or changed:
+                # updated_at alimenta o ETag das páginas do produto
+                Product.objects.filter(pk=product.pk).update(updated_at=timezone.now())
+                removed_names = [image.image.name for image in removed]
+                transaction.on_commit(lambda: cls._delete_orphan_files(removed_names))
+
+        return final
+
+    @classmethod
+    def add_images(cls, product, new_files):
+        return cls.apply_changes(product, new_files=new_files)
+
+    @classmethod
+    def remove_images(cls, product, image_ids):
+        return cls.apply_changes(product, remove_ids=image_ids)
+
+    @classmethod
+    def reorder(cls, product, image_ids):
+        return cls.apply_changes(product, order=image_ids)
+
+    @classmethod
+    def set_primary(cls, product, image_id):
+        return cls.apply_changes(product, primary=image_id)
+
+    @staticmethod
+    def serialize(images):
+        return [
+            {
+                'id': image.pk,
+                'url': image.image.url,
+                'is_primary': image.is_primary,
+                'order_index': image.order_index,
+            }
+            for image in images
+        ]
+
+
+class ProductBulkService:
+    """Ações em lote da listagem de produtos (executadas por core.bulk)"""
+
+    ACTIONS = ('activate', 'deactivate', 'delete', 'change_category', 'change_currency')
+
+    @classmethod
+    def operation(cls, action, company=None, category_id=None, currency_id=None):
+        """
+        Retorna a função que aplica a ação a um bloco de produtos
+
+        Reativar produtos respeita o limite do plano da empresa: o bloco que
+        não cabe levanta ValidationError (quota_exceeded).
+        """
+        if action == 'activate':
+            values = {'is_active': True}
+        elif action in ('deactivate', 'delete'):
+            # A exclusão de produtos é lógica, como em product_delete
+            values = {'is_active': False}
+        elif action == 'change_category':
+            category = Category.objects.filter(pk=_parse_pk(category_id), is_active=True).first()
+            if category is None:
+                raise ValidationError(_('common.bulk.invalid_target'))
+            values = {'category': category}
+        elif action == 'change_currency':
+            currency = Currency.objects.filter(pk=_parse_pk(currency_id)).first()
+            if currency is None:
+                raise ValidationError(_('common.bulk.invalid_target'))
+            values = {'currency': currency}
+        else:
+            raise ValidationError(_('common.bulk.invalid_action'))
+
+        moves_group = action in ('change_category', 'change_currency')
+
+        def apply(queryset):
+            if moves_group:
+                from .reports import InventoryReportService
+                InventoryReportService.record_changes(queryset)
+            if 'is_active' not in values:
+                return cls._update(queryset, values)
+            # Produtos inativos não contam no limite do plano; update() não dispara sinais
+            flipping = queryset.exclude(is_active=values['is_active']).count()
+            if not values['is_active']:
+                quotas.QuotaService.adjust(quotas.PRODUCTS, -flipping, company_id=company.pk)
+                return cls._update(queryset, values)
+            with quotas.QuotaService.reserve(quotas.PRODUCTS, company=company, count=flipping):
+                quotas.QuotaService.adjust(quotas.PRODUCTS, flipping, company_id=company.pk)
+                return cls._update(queryset, values)
+
+        return apply
+
+    @staticmethod
+    def _update(queryset, values):
+        # update() não dispara auto_now; updated_at alimenta o ETag da listagem
+        return queryset.update(updated_at=timezone.now(), **values)
+
+
+class StubRateProvider:
+    """Cotações fixas em relação ao dólar, para desenvolvimento e testes"""
+
+    name = 'stub'
+    BASE = 'USD'
+    RATES = {
+        'BRL': '5.40',
+        'EUR': '0.92',
+        'GBP': '0.79',
+        'ARS': '980.00',
+        'MXN': '18.30',
+        'CAD': '1.37',
+        'JPY': '150.00',
+    }
+
+    def fetch(self, on_date):
+        return [(on_date, self.BASE, code, Decimal(rate)) for code, rate in self.RATES.items()]
+
+
+class FileRateProvider:
+    """
+    Cotações lidas de um arquivo local
+
+    JSON: {"date": "2026-10-19", "base": "USD", "rates": {"BRL": "5.40", ...}}
+    (ou uma lista desses objetos). CSV: colunas date,from,to,rate.
+    """
+
+    name = 'file'
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self, on_date):
+        if self.path.lower().endswith('.csv'):
+            with open(self.path, newline='', encoding='utf-8') as handle:
+                return [
+                    (
+                        date_cls.fromisoformat(row['date']) if row.get('date') else on_date,
+                        row['from'].strip().upper(),
+                        row['to'].strip().upper(),
+                        Decimal(row['rate']),
+                    )
+                    for row in csv.DictReader(handle)
+                ]
+
+        with open(self.path, encoding='utf-8') as handle:
+            data = json.load(handle)
+        rows = []
+        for entry in data if isinstance(data, list) else [data]:
+            entry_date = date_cls.fromisoformat(entry['date']) if entry.get('date') else on_date
+            base = entry['base'].upper()
+            rows.extend(
+                (entry_date, base, code.upper(), Decimal(str(rate)))
+                for code, rate in entry['rates'].items()
+            )
+        return rows
+
+
+class RateMatrix:
+    """
+    Matriz de conversão entre todas as moedas em uma data
+
+    rates[i, j] é quanto vale 1 unidade da moeda ids[i] na moeda ids[j]
+    (Decimal, ou None quando não há cotação que ligue as duas).
+    """
+
+    def __init__(self, ids, rates):
+        self.ids = ids
+        self.rates = rates
+
+    def positions(self, currency_ids):
+        """Posições na matriz dos ids de moeda informados (vetorizado)"""
+        return np.searchsorted(self.ids, np.asarray(currency_ids, dtype=np.int64))
+
+    def rate(self, from_currency_id, to_currency_id):
+        from_pos, to_pos = self.positions([from_currency_id, to_currency_id])
+        return self.rates[from_pos, to_pos]
+
+    def column(self, currency_ids, target_currency_id):
+        """Cotações de cada moeda de `currency_ids` para a moeda alvo"""
+        target = self.positions([target_currency_id])[0]
+        return self.rates[self.positions(currency_ids), target]
+
+
+class ExchangeRateService:
+    """
+    Cotações de câmbio e conversão entre moedas
+
+    As cotações diárias ficam em ExchangeRate. Para converter, monta-se uma
+    única matriz moeda x moeda (cotações diretas e cruzadas via PIVOT) que é
+    guardada em memória no processo, por versão da tabela e data, e aplicada
+    a arrays inteiros de valores de uma vez.
+    """
+
+    PIVOT = 'USD'
+    CACHE_PREFIX = 'exchange_rates'
+    VERSION_TIMEOUT = 300  # Revalida a versão no banco a cada 5 minutos
+    MAX_MATRICES = 32
+    PROVIDERS = {
+        StubRateProvider.name: StubRateProvider,
+        FileRateProvider.name: FileRateProvider,
+    }
+
+    # Cache em processo: (versão, data) -> RateMatrix
+    _matrices = {}
+
+    @classmethod
+    def _version_key(cls):
+        return f'{cls.CACHE_PREFIX}:version'
+
+    @classmethod
+    def get_version(cls):
+        """Versão atual da tabela de cotações (muda quando alguma cotação muda)"""
+        version = cache.get(cls._version_key())
+        if version is None:
+            stats = ExchangeRate.objects.aggregate(total=Count('id'), last_update=Max('updated_at'))
+            raw = f"{stats['total']}:{stats['last_update'].isoformat() if stats['last_update'] else ''}"
+            version = hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+            cache.set(cls._version_key(), version, cls.VERSION_TIMEOUT)
+        return version
+
+    @classmethod
+    def invalidate(cls):
+        """Descarta a versão atual; as matrizes são remontadas na próxima leitura"""
+        cache.delete(cls._version_key())
+        cls._matrices.clear()
+
+    @classmethod
+    def save_rates(cls, rows, source=''):
+        """
+        Grava cotações (data, moeda origem, moeda destino, taxa) por código
+
+        Atualiza a taxa quando o par já tem cotação na data. Retorna
+        (gravadas, códigos de moeda desconhecidos).
+        """
+        currencies = dict(Currency.objects.values_list('code', 'id'))
+        rates = {}
+        unknown = set()
+        for on_date, from_code, to_code, rate in rows:
+            if from_code not in currencies or to_code not in currencies:
+                unknown.update(code for code in (from_code, to_code) if code not in currencies)
+                continue
+            if from_code == to_code or rate <= 0:
+                continue
+            rates[(currencies[from_code], currencies[to_code], on_date)] = rate
+
+        objects = [
+            ExchangeRate(from_currency_id=from_id, to_currency_id=to_id, date=on_date, rate=rate, source=source)
+            for (from_id, to_id, on_date), rate in rates.items()
+        ]
+        ExchangeRate.objects.bulk_create(
+            objects,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['from_currency', 'to_currency', 'date'],
+            update_fields=['rate', 'source', 'updated_at'],
+        )
+        # bulk_create não dispara post_save
+        cls.invalidate()
+        return len(objects), sorted(unknown)
+
+    @classmethod
+    def load(cls, provider, on_date=None):
+        """Busca as cotações no provedor e grava"""
+        return cls.save_rates(provider.fetch(on_date or timezone.localdate()), source=provider.name)
+
+    @classmethod
+    def _build_matrix(cls, on_date):
+        ids = np.array(Currency.objects.order_by('id').values_list('id', flat=True), dtype=np.int64)
+        size = len(ids)
+        position = {int(pk): index for index, pk in enumerate(ids)}
+
+        # Cotação mais recente de cada par até a data
+        latest = {}
+        rows = (
+            ExchangeRate.objects.filter(date__lte=on_date)
+            .order_by('date')
+            .values_list('from_currency_id', 'to_currency_id', 'rate')
+        )
+        for from_id, to_id, rate in rows.iterator(chunk_size=2000):
+            latest[(position[from_id], position[to_id])] = rate
+
+        # Valor de 1 unidade de cada moeda na moeda pivô
+        to_pivot = np.full(size, None, dtype=object)
+        pivot = Currency.objects.filter(code=cls.PIVOT).values_list('id', flat=True).first()
+        if pivot is not None:
+            pivot = position[pivot]
+            to_pivot[pivot] = Decimal(1)
+            for (from_pos, to_pos), rate in latest.items():
+                if to_pos == pivot:
+                    to_pivot[from_pos] = rate
+            for (from_pos, to_pos), rate in latest.items():
+                if from_pos == pivot and to_pivot[to_pos] is None:
+                    to_pivot[to_pos] = 1 / rate
+
+        rates = np.full((size, size), None, dtype=object)
+        known = np.flatnonzero(np.not_equal(to_pivot, None))
+        rates[np.ix_(known, known)] = np.divide.outer(to_pivot[known], to_pivot[known])
+
+        # Cotações diretas prevalecem sobre as cruzadas
+        for (from_pos, to_pos), rate in latest.items():
+            rates[from_pos, to_pos] = rate
+            if (to_pos, from_pos) not in latest:
+                rates[to_pos, from_pos] = 1 / rate
+        rates[np.arange(size), np.arange(size)] = Decimal(1)
+        return RateMatrix(ids, rates)
+
+    @classmethod
+    def rate_matrix(cls, on_date=None):
+        """Matriz de conversão na data (hoje por padrão), em cache no processo"""
+        on_date = on_date or timezone.localdate()
+        key = (cls.get_version(), on_date)
+        matrix = cls._matrices.get(key)
+        if matrix is None:
+            if len(cls._matrices) >= cls.MAX_MATRICES or any(k[0] != key[0] for k in cls._matrices):
+                cls._matrices.clear()
+            matrix = cls._matrices[key] = cls._build_matrix(on_date)
+        return matrix
+
+    @classmethod
+    def convert_many(cls, amounts, currency_ids, target_currency, on_date=None):
+        """
+        Converte um array de valores (cada um em sua moeda) para a moeda alvo
+
+        Retorna um array de Decimal com None onde não há cotação.
+        """
+        amounts = np.asarray(amounts, dtype=object)
+        rates = cls.rate_matrix(on_date).column(currency_ids, target_currency.pk)
+        result = np.full(len(amounts), None, dtype=object)
+        known = np.not_equal(rates, None) & np.not_equal(amounts, None)
+        result[known] = amounts[known] * rates[known]
+        return result
+
+    @classmethod
+    def convert(cls, amount, from_currency, to_currency, on_date=None):
+        """Converte um único valor; None quando não há cotação"""
+        if amount is None:
+            return None
+        if from_currency.pk == to_currency.pk:
+            return amount
+        rate = cls.rate_matrix(on_date).rate(from_currency.pk, to_currency.pk)
+        return None if rate is None else (amount * rate).quantize(CatalogValuationService.CENT)
+
+
+class CatalogValuationService:
+    """
+    Valor do estoque de um catálogo em uma única moeda
+
+    O banco agrega estoque x custo e estoque x venda por (categoria, moeda) em
+    uma consulta; os grupos resultantes são convertidos e somados por
+    categoria com operações vetorizadas, sem laço por produto.
+    """
+
+    CENT = Decimal('0.01')
+    ZERO = Decimal('0.00')
+    COLUMNS = ('products', 'units', 'stock_value', 'expected_revenue', 'margin')
+
+    @staticmethod
+    def totals_by(products, *fields):
+        """Totais de estoque dos produtos agrupados pelos campos (GROUP BY no banco)"""
+        money = DecimalField(max_digits=20, decimal_places=2)
+        stock = F('stock_quantity')
+        return (
+            products.order_by()
+            .values(*fields)
+            .annotate(
+                products=Count('id'),
+                units=Sum('stock_quantity'),
+                stock_value=Sum(ExpressionWrapper(stock * F('cost_price'), output_field=money)),
+                expected_revenue=Sum(ExpressionWrapper(stock * F('sale_price'), output_field=money)),
+                margin=Sum(ExpressionWrapper(stock * (F('sale_price') - F('cost_price')), output_field=money)),
+            )
+        )
+
+    @classmethod
+    def summarize(cls, products, units, values):
+        """Linha do relatório: contagens, valores em centavos e margem percentual"""
+        stock_value, revenue, margin = (value.quantize(cls.CENT) for value in values)
+        return {
+            'products': int(products),
+            'units': int(units),
+            'stock_value': stock_value,
+            'expected_revenue': revenue,
+            'margin': margin,
+            'margin_percent': (margin * 100 / revenue).quantize(cls.CENT) if revenue else None,
+        }
+
+    @classmethod
+    def convert_groups(cls, rows, target_currency, on_date=None):
+        """
+        Converte grupos (chave, moeda, *COLUMNS) para a moeda alvo e soma por chave
+
+        Retorna (chaves, contagens, valores, códigos sem cotação): chaves é um
+        array int64 (0 para chave nula), contagens as colunas products/units
+        somadas e valores as colunas monetárias convertidas (Decimal). Grupos
+        em moedas sem cotação para a moeda alvo contam produtos, mas não valor.
+        """
+        table = np.array(rows, dtype=object)
+        keys = np.where(np.equal(table[:, 0], None), 0, table[:, 0]).astype(np.int64)
+        currency_ids = table[:, 1].astype(np.int64)
+        counts = table[:, 2:4].astype(np.int64)
+        values = table[:, 4:7]
+        values[np.equal(values, None)] = cls.ZERO
+
+        rates = ExchangeRateService.rate_matrix(on_date).column(currency_ids, target_currency.pk)
+        known = np.not_equal(rates, None)
+        converted = np.full(values.shape, cls.ZERO, dtype=object)
+        converted[known] = values[known] * rates[known][:, None]
+
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        key_counts = np.zeros((len(unique_keys), 2), dtype=np.int64)
+        np.add.at(key_counts, inverse, counts)
+        key_values = np.full((len(unique_keys), 3), cls.ZERO, dtype=object)
+        np.add.at(key_values, inverse, converted)
+
+        missing = []
+        if not known.all():
+            missing = list(
+                Currency.objects.filter(pk__in=np.unique(currency_ids[~known]).tolist())
+                .values_list('code', flat=True)
+            )
+        return unique_keys, key_counts, key_values, missing
+
+    @classmethod
+    def value(cls, company, target_currency, on_date=None, products=None):
+        """
+        Valoriza o catálogo (produtos ativos da empresa) na moeda alvo
+
+        Retorna {'currency', 'date', 'categories': [...], 'totals': {...},
+        'missing_rates': [códigos]} — grupos em moedas sem cotação para a
+        moeda alvo ficam fora dos totais e são listados em missing_rates.
+        """
+        on_date = on_date or timezone.localdate()
+        if products is None:
+            products = Product.objects.filter(company=company, is_active=True)
+
+        result = {
+            'currency': target_currency,
+            'date': on_date,
+            'categories': [],
+            'totals': cls.summarize(0, 0, (cls.ZERO,) * 3),
+            'missing_rates': [],
+        }
+        rows = list(
+            cls.totals_by(products, 'category_id', 'currency_id')
+            .values_list('category_id', 'currency_id', *cls.COLUMNS)
+        )
+        if not rows:
+            return result
+
+        categories, counts, values, missing = cls.convert_groups(rows, target_currency, on_date)
+        names = Category.objects.in_bulk([int(pk) for pk in categories if pk])
+        result['categories'] = sorted(
+            (
+                {'category': names.get(int(pk)), **cls.summarize(*counts[index], values[index])}
+                for index, pk in enumerate(categories)
+            ),
+            key=lambda row: -row['stock_value'],
+        )
+        result['totals'] = cls.summarize(*counts.sum(axis=0), values.sum(axis=0))
+        result['missing_rates'] = missing
+        return result
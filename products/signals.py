@@ -0,0 +1,53 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Category, Currency, ExchangeRate, Product, Scale
+from .reports import InventoryReportService
+from .services import ExchangeRateService
+
+
+@receiver([post_save, post_delete], sender=ExchangeRate)
+@receiver([post_save, post_delete], sender=Currency)
+def invalidate_exchange_rates(sender, **kwargs):
+    """Remonta a matriz de câmbio quando uma cotação ou moeda muda"""
+    ExchangeRateService.invalidate()
+
+
+@receiver(pre_save, sender=Product)
+def record_inventory_group_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Produto que muda de categoria, tipo, escala ou moeda deixa o grupo antigo desatualizado"""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    fields = InventoryReportService.GROUP_FIELDS
+    # update_fields aceita o nome do campo ou o attname (category ou category_id)
+    if update_fields is not None and not {name for field in fields for name in (field, field[:-3])} & set(update_fields):
+        return
+    previous = Product.objects.filter(pk=instance.pk).values_list(*fields).first()
+    if previous is not None and previous != tuple(getattr(instance, field) for field in fields):
+        InventoryReportService.record_changes(Product.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_deleted_product_rollups(sender, instance, **kwargs):
+    """Exclusão física (a da interface é lógica) não deixa updated_at: reagrega a empresa"""
+    InventoryReportService.invalidate([instance.company_id])
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Scale)
+def collect_inventory_rollup_companies(sender, instance, **kwargs):
+    """Empresas com produtos na categoria/escala, antes do SET_NULL"""
+    field = 'category' if sender is Category else 'scale'
+    instance._rollup_company_ids = list(
+        Product.objects.filter(**{field: instance}).order_by().values_list('company_id', flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Scale)
+def invalidate_inventory_rollups(sender, instance, **kwargs):
+    """
+    Produtos perdem a categoria/escala (SET_NULL) sem mudar updated_at;
+    descarta as marcas d'água só das empresas afetadas, que são reagregadas
+    """
+    InventoryReportService.invalidate(getattr(instance, '_rollup_company_ids', []))
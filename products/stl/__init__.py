@@ -0,0 +1,14 @@
+"""
+Arquivos STL dos produtos
+
+Os arquivos ficam em um storage privado (settings.STL_ROOT), endereçados pelo
+SHA-256 do conteúdo, e são lidos com NumPy sobre arquivos mapeados em memória.
+"""
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+
+def stl_storage():
+    """Storage local e privado dos STL (o processamento usa np.memmap sobre o arquivo)"""
+    return FileSystemStorage(location=settings.STL_ROOT)
@@ -0,0 +1,264 @@
+"""
+Formato compacto de armazenamento das malhas STL (.stlz)
+
+O STL repete cada vértice em todos os triângulos que o usam (6 vezes, em
+média, numa malha fechada) e guarda float32 com precisão que nenhuma
+impressora usa. No formato compacto:
+
+- as coordenadas são quantizadas em uma grade de `step` (1 µm por padrão)
+  e os vértices iguais viram um só, na ordem do primeiro uso;
+- os vértices são gravados como diferenças em relação ao anterior (zigzag);
+- cada índice de triângulo vira a distância para o maior índice já visto
+  (0 = vértice novo), números pequenos numa malha com alguma localidade;
+- os dois buffers uint32 são separados em planos de bytes e compactados com
+  zlib.
+
+A ordem dos triângulos é mantida (a detecção de marca d'água depende dela).
+A decodificação é vetorizada: o arquivo é mapeado em memória, as seções
+compactadas vão para o zlib como memoryview (sem cópia) e os buffers
+descompactados são lidos com np.frombuffer; índices e vértices saem de somas
+acumuladas, sem laço por triângulo. O STL é remontado no formato original
+(binário, com o cabeçalho de 80 bytes e os atributos, ou ASCII com o nome do
+sólido); as normais são recalculadas.
+"""
+
+import mmap
+import os
+import re
+import struct
+import tempfile
+import zlib
+
+import numpy as np
+
+from . import mesh
+
+
+MAGIC = mesh.COMPACT_MAGIC
+VERSION = 1
+EXTENSION = '.stlz'
+DEFAULT_STEP = 0.001  # mm
+AXIS_BITS = 21  # coordenadas quantizadas empacotadas em um int64 para deduplicar
+COMPRESSION_LEVEL = 6
+ASCII_BLOCK_TRIANGLES = 1 << 16
+
+FORMAT_CODES = {mesh.FORMAT_BINARY: 0, mesh.FORMAT_ASCII: 1}
+FLAG_ATTRIBUTES = 1
+
+# magic, versão, formato original, flags, reservado, vértices, triângulos,
+# passo, origem xyz, cabeçalho/nome do STL, tamanho das seções (vértices, índices, atributos)
+HEADER = struct.Struct('<4sBBBBIId3d80s3Q')
+
+_SOLID_NAME = re.compile(rb'\s*solid[ \t]*([^\r\n]*)', re.IGNORECASE)
+_FACET = (
+    'facet normal %e %e %e\n outer loop\n'
+    '  vertex %e %e %e\n  vertex %e %e %e\n  vertex %e %e %e\n'
+    ' endloop\nendfacet\n'
+)
+
+
+class CompactMesh:
+    """Malha decodificada: vértices (V, 3) float32 e triângulos (N, 3) uint32"""
+
+    __slots__ = ('source_format', 'header', 'vertices', 'faces', 'attributes')
+
+    def __init__(self, source_format, header, vertices, faces, attributes=None):
+        self.source_format = source_format
+        self.header = header
+        self.vertices = vertices
+        self.faces = faces
+        self.attributes = attributes
+
+    def triangles(self):
+        """Triângulos (N, 3, 3) float32, como mesh.load_triangles"""
+        return self.vertices[self.faces]
+
+
+def _shuffle(values):
+    """uint32 em planos de bytes (todos os bytes 0, depois os 1...): o zlib compacta bem melhor"""
+    return np.ascontiguousarray(values.astype('<u4').view(np.uint8).reshape(-1, 4).T).tobytes()
+
+
+def _unshuffle(raw, count):
+    planes = np.frombuffer(raw, dtype=np.uint8, count=count * 4).reshape(4, count)
+    values = np.empty(count, dtype='<u4')
+    values.view(np.uint8).reshape(count, 4)[:] = planes.T
+    return values
+
+
+def _zigzag(values):
+    return ((values << 1) ^ (values >> 63)).astype(np.uint32)
+
+
+def _unzigzag(values):
+    values = values.astype(np.int64)
+    return (values >> 1) ^ -(values & 1)
+
+
+def quantize(triangles, step=DEFAULT_STEP):
+    """
+    Vértices quantizados e deduplicados
+
+    Retorna (origem, passo, vértices (V, 3) int64 na ordem do primeiro uso,
+    índices (N, 3) int64). O passo aumenta se a peça não couber em
+    2^AXIS_BITS passos por eixo.
+    """
+    if not len(triangles):
+        raise mesh.MeshError('STL sem triângulos')
+    lower = np.full(3, np.inf)
+    upper = np.full(3, -np.inf)
+    for rows in mesh._coordinate_rows(triangles):
+        lower = np.minimum(lower, [rows[0::3].min(), rows[1::3].min(), rows[2::3].min()])
+        upper = np.maximum(upper, [rows[0::3].max(), rows[1::3].max(), rows[2::3].max()])
+    if not np.isfinite(lower).all() or not np.isfinite(upper).all():
+        raise mesh.MeshError('STL com coordenadas inválidas')
+    step = max(step, float((upper - lower).max()) / ((1 << AXIS_BITS) - 1))
+
+    keys = np.empty(len(triangles) * 3, dtype=np.int64)
+    position = 0
+    for rows in mesh._coordinate_rows(triangles):
+        count = rows.shape[1]
+        quantized = [np.rint((rows[axis::3] - lower[axis]) / step).astype(np.int64).T for axis in range(3)]
+        x, y, z = (values.ravel() for values in quantized)
+        keys[position:position + count * 3] = (x << (2 * AXIS_BITS)) | (y << AXIS_BITS) | z
+        position += count * 3
+
+    unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    unique = unique[order]
+    mask = (1 << AXIS_BITS) - 1
+    vertices = np.stack([unique >> (2 * AXIS_BITS), (unique >> AXIS_BITS) & mask, unique & mask], axis=1)
+    return lower, step, vertices, rank[inverse].reshape(-1, 3)
+
+
+def encode(triangles, step=DEFAULT_STEP, source_format=mesh.FORMAT_BINARY, header=b'', attributes=None):
+    """Bytes do arquivo compacto para os triângulos (N, 3, 3)"""
+    origin, step, vertices, faces = quantize(triangles, step)
+
+    deltas = np.diff(vertices, axis=0, prepend=np.zeros((1, 3), dtype=np.int64))
+    vertex_section = zlib.compress(_shuffle(_zigzag(deltas.T.ravel())), COMPRESSION_LEVEL)
+
+    flat = faces.ravel()
+    highest = np.maximum.accumulate(flat)
+    previous = np.concatenate([[-1], highest[:-1]])
+    face_section = zlib.compress(_shuffle(previous + 1 - flat), COMPRESSION_LEVEL)
+
+    flags = 0
+    attribute_section = b''
+    if attributes is not None and np.any(attributes):
+        flags |= FLAG_ATTRIBUTES
+        attribute_section = zlib.compress(np.asarray(attributes, dtype='<u2').tobytes(), COMPRESSION_LEVEL)
+
+    prefix = HEADER.pack(
+        MAGIC, VERSION, FORMAT_CODES[source_format], flags, 0, len(vertices), len(faces),
+        step, *(float(value) for value in origin), header[:mesh.HEADER_SIZE],
+        len(vertex_section), len(face_section), len(attribute_section),
+    )
+    return b''.join([prefix, vertex_section, face_section, attribute_section])
+
+
+def decode(buffer):
+    """CompactMesh a partir dos bytes (ou memoryview/mmap) do arquivo compacto"""
+    (
+        magic, version, format_code, flags, _reserved, vertex_count, face_count,
+        step, ox, oy, oz, header, vertex_length, face_length, attribute_length,
+    ) = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise mesh.MeshError('Arquivo compacto inválido')
+
+    view = memoryview(buffer)
+    offset = HEADER.size
+    vertex_section = view[offset:offset + vertex_length]
+    offset += vertex_length
+    face_section = view[offset:offset + face_length]
+    offset += face_length
+
+    deltas = _unzigzag(_unshuffle(zlib.decompress(vertex_section), vertex_count * 3)).reshape(3, vertex_count)
+    quantized = np.cumsum(deltas, axis=1)
+    vertices = np.empty((vertex_count, 3), dtype=np.float32)
+    for axis, origin in enumerate((ox, oy, oz)):
+        vertices[:, axis] = origin + quantized[axis] * step
+
+    codes = _unshuffle(zlib.decompress(face_section), face_count * 3)
+    fresh = codes == 0
+    # Índice = (vértices novos antes desta posição) - código
+    faces = (np.cumsum(fresh, dtype=np.int64) - fresh - codes).astype(np.uint32).reshape(-1, 3)
+
+    attributes = None
+    if flags & FLAG_ATTRIBUTES:
+        attributes = np.frombuffer(zlib.decompress(view[offset:offset + attribute_length]), dtype='<u2')
+
+    source_format = mesh.FORMAT_ASCII if format_code == FORMAT_CODES[mesh.FORMAT_ASCII] else mesh.FORMAT_BINARY
+    return CompactMesh(source_format, header.rstrip(b'\0'), vertices, faces, attributes)
+
+
+def read(path):
+    """Decodifica o arquivo compacto (mapeado em memória)"""
+    with open(path, 'rb') as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return decode(mapped)
+
+
+def _atomic_write(target, write):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            write(output)
+        os.replace(temporary, target)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def compress_file(source, target, step=DEFAULT_STEP):
+    """Converte um STL (binário ou ASCII) para o formato compacto; retorna o tamanho gravado"""
+    source_format = mesh.detect_format(source)
+    if source_format == mesh.FORMAT_BINARY:
+        with open(source, 'rb') as handle:
+            header = handle.read(mesh.HEADER_SIZE)
+        records = mesh.binary_records(source)
+        data = encode(records['vertices'], step, source_format, header, records['attribute'])
+    else:
+        with open(source, 'rb') as handle:
+            match = _SOLID_NAME.match(handle.readline())
+        name = match.group(1).strip() if match else b''
+        data = encode(mesh.load_triangles(source, source_format), step, source_format, name)
+
+    _atomic_write(target, lambda output: output.write(data))
+    return len(data)
+
+
+def _normals(triangles):
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    return np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+
+def restore(source, target):
+    """Remonta o STL no formato original a partir do arquivo compacto; retorna `target`"""
+    compact = read(source)
+    triangles = compact.triangles()
+
+    def write_binary(output):
+        records = np.zeros(len(triangles), dtype=mesh.TRIANGLE_DTYPE)
+        records['vertices'] = triangles
+        records['normal'] = _normals(triangles)
+        if compact.attributes is not None:
+            records['attribute'] = compact.attributes
+        output.write(compact.header.ljust(mesh.HEADER_SIZE, b'\0'))
+        output.write(len(records).to_bytes(mesh.COUNT_SIZE, 'little'))
+        records.tofile(output)
+
+    def write_ascii(output):
+        name = compact.header
+        output.write(b'solid ' + name + b'\n')
+        for start in range(0, len(triangles), ASCII_BLOCK_TRIANGLES):
+            block = triangles[start:start + ASCII_BLOCK_TRIANGLES]
+            values = np.concatenate([_normals(block), block.reshape(-1, 9)], axis=1)
+            output.write(((_FACET * len(block)) % tuple(values.ravel().tolist())).encode('ascii'))
+        output.write(b'endsolid ' + name + b'\n')
+
+    _atomic_write(target, write_ascii if compact.source_format == mesh.FORMAT_ASCII else write_binary)
+    return target
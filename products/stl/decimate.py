@@ -0,0 +1,237 @@
+"""
+Malhas de prévia: decimação por agrupamento de vértices (vertex clustering)
+
+A malha é reduzida em duas etapas. Primeiro, uma passada em blocos sobre o
+arquivo encaixa cada vértice em uma grade fina de FINE_GRID células por eixo
+(cubos, sobre a maior dimensão) e descarta os triângulos degenerados; daí em
+diante só as células ocupadas importam. Depois, para o orçamento pedido, as
+células finas são agrupadas em uma grade mais grossa, cada grupo vira um
+vértice (média ponderada das células) e os triângulos que caem em menos de
+três grupos somem. A resolução é ajustada pela razão entre o orçamento e os
+triângulos obtidos (a contagem cresce com o quadrado da resolução); se o
+agrupamento não reduzir a malha o bastante, ficam os triângulos maiores.
+
+A resolução nunca passa de MAX_RESOLUTION células na maior dimensão: a prévia
+é sempre uma aproximação, nunca a geometria original. O resultado é gravado
+indexado, com posições em uint16 e compactado com gzip (ver encode).
+"""
+
+import gzip
+import os
+import struct
+
+import numpy as np
+
+from .mesh import MeshError, _coordinate_rows, load_triangles
+
+
+FINE_BITS = 10
+FINE_GRID = 1 << FINE_BITS
+MAX_RESOLUTION = 256
+MIN_RESOLUTION = 2
+MAX_ATTEMPTS = 5
+QUANTIZATION = 65535
+
+MAGIC = b'FLPM'
+VERSION = 1
+# magic, versão, bytes por índice, reservado, vértices, triângulos, origem xyz, escala
+HEADER = struct.Struct('<4sBBHII4f')
+
+
+def _bounds(triangles):
+    lower = np.full(3, np.inf)
+    upper = np.full(3, -np.inf)
+    for rows in _coordinate_rows(triangles):
+        lower = np.minimum(lower, [rows[0::3].min(), rows[1::3].min(), rows[2::3].min()])
+        upper = np.maximum(upper, [rows[0::3].max(), rows[1::3].max(), rows[2::3].max()])
+    return lower, upper
+
+
+def fine_cells(triangles):
+    """
+    Triângulos na grade fina
+
+    Retorna (células, triângulos, pesos, origem, extensão): células ocupadas
+    como coordenadas (C, 3) int64, triângulos (n, 3) como índices nessas
+    células, quantos vértices caíram em cada célula, e a origem e o lado do
+    cubo da grade nas unidades do arquivo.
+    """
+    if not len(triangles):
+        raise MeshError('STL sem triângulos')
+    lower, upper = _bounds(triangles)
+    if not np.isfinite(lower).all() or not np.isfinite(upper).all():
+        raise MeshError('STL com coordenadas inválidas')
+    extent = float((upper - lower).max()) or 1.0
+    factor = FINE_GRID / extent
+
+    blocks = []
+    for rows in _coordinate_rows(triangles):
+        cells = np.empty((3, rows.shape[1]), dtype=np.int32)
+        for vertex in range(3):
+            x, y, z = (
+                np.clip(((rows[3 * vertex + axis] - lower[axis]) * factor).astype(np.int32), 0, FINE_GRID - 1)
+                for axis in range(3)
+            )
+            cells[vertex] = (x << (2 * FINE_BITS)) | (y << FINE_BITS) | z
+        a, b, c = cells
+        blocks.append(cells[:, (a != b) & (b != c) & (a != c)].T)
+
+    keys = np.concatenate(blocks) if blocks else np.zeros((0, 3), dtype=np.int32)
+    occupied, faces = np.unique(keys, return_inverse=True)
+    faces = faces.reshape(-1, 3)
+    weights = np.bincount(faces.ravel(), minlength=len(occupied)).astype(np.float64)
+
+    occupied = occupied.astype(np.int64)
+    coordinates = np.stack([
+        occupied >> (2 * FINE_BITS), (occupied >> FINE_BITS) & (FINE_GRID - 1), occupied & (FINE_GRID - 1),
+    ], axis=1)
+    return coordinates, faces, weights, lower, extent
+
+
+def _unique_faces(faces, count):
+    """Remove triângulos repetidos (o mesmo trio de vértices em qualquer ordem), mantendo o primeiro"""
+    a, b, c = faces[:, 0], faces[:, 1], faces[:, 2]
+    low = np.minimum(np.minimum(a, b), c)
+    high = np.maximum(np.maximum(a, b), c)
+    middle = a + b + c - low - high
+    if count < (1 << 21):
+        _keys, first = np.unique((low << 42) | (middle << 21) | high, return_index=True)
+    else:
+        head = low * count + middle
+        order = np.lexsort((high, head))
+        head, high = head[order], high[order]
+        first = order[np.concatenate([[True], (head[1:] != head[:-1]) | (high[1:] != high[:-1])])]
+    return faces[np.sort(first)]
+
+
+def cluster(cells, faces, weights, resolution):
+    """
+    Agrupa as células finas em uma grade de `resolution` células por eixo
+
+    Retorna (vértices, triângulos): vértices (V, 3) float64 em unidades da
+    grade fina e triângulos (n, 3) int64 indexando esses vértices.
+    """
+    step = FINE_GRID / resolution
+    coarse = (cells / step).astype(np.int64)
+    keys = (coarse[:, 0] * (resolution + 1) + coarse[:, 1]) * (resolution + 1) + coarse[:, 2]
+    groups, mapping = np.unique(keys, return_inverse=True)
+
+    mapped = mapping.astype(np.int64)[faces]
+    a, b, c = mapped[:, 0], mapped[:, 1], mapped[:, 2]
+    mapped = _unique_faces(mapped[(a != b) & (b != c) & (a != c)], len(groups))
+
+    # Centro das células finas, ponderado pelos vértices que caíram em cada uma
+    total = np.bincount(mapping, weights=weights, minlength=len(groups))
+    centers = np.stack([
+        np.bincount(mapping, weights=weights * (cells[:, axis] + 0.5), minlength=len(groups))
+        for axis in range(3)
+    ], axis=1) / total[:, None]
+
+    used, faces = np.unique(mapped, return_inverse=True)
+    return centers[used], faces.reshape(-1, 3)
+
+
+def _largest(vertices, faces, budget):
+    """Os `budget` triângulos de maior área (malhas que o agrupamento não reduz, como sopas de triângulos)"""
+    corners = vertices[faces]
+    areas = np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1)
+    kept = faces[np.sort(np.argpartition(-areas, budget - 1)[:budget])]
+    used, kept = np.unique(kept, return_inverse=True)
+    return vertices[used], kept.reshape(-1, 3)
+
+
+def decimate(cells, faces, weights, budget, resolution=MAX_RESOLUTION, clusters=None):
+    """
+    Maior agrupamento (até `resolution`) que fica dentro de `budget` triângulos
+
+    Retorna (vértices, triângulos, resolução usada); a resolução serve de
+    ponto de partida para um orçamento menor. `clusters` ({resolução:
+    resultado}) reaproveita agrupamentos já calculados entre orçamentos.
+    """
+    clusters = {} if clusters is None else clusters
+    finest = None
+    previous = None
+    for _attempt in range(MAX_ATTEMPTS):
+        if resolution not in clusters:
+            clusters[resolution] = cluster(cells, faces, weights, resolution)
+        vertices, result = clusters[resolution]
+        if len(result) <= budget:
+            return vertices, result, resolution
+        if finest is None:
+            finest = (vertices, result, resolution)
+        elif len(result) > 4 * previous[1] * (resolution / previous[0]) ** 2:
+            # A contagem não caiu com a resolução: não é uma superfície (sopa de triângulos)
+            break
+        if resolution <= MIN_RESOLUTION:
+            break
+        previous = (resolution, len(result))
+        # A contagem cresce com o quadrado da resolução; margem para não errar para cima
+        target = int(resolution * (budget / len(result)) ** 0.5 * 0.97)
+        resolution = max(MIN_RESOLUTION, min(resolution - 1, target))
+    vertices, result, resolution = finest
+    return (*_largest(vertices, result, budget), resolution)
+
+
+def encode(vertices, faces, origin, extent):
+    """
+    Malha de prévia em bytes (antes do gzip)
+
+    Cabeçalho HEADER, posições uint16 (V, 3) na escala do cubo da grade e
+    índices uint16 (ou uint32 acima de 65535 vértices), com cada bloco
+    alinhado a 4 bytes para ser lido direto em typed arrays no navegador.
+    Posição real = origem + q * escala.
+    """
+    quantized = np.clip(np.rint(vertices * (QUANTIZATION / FINE_GRID)), 0, QUANTIZATION).astype('<u2')
+    index_type = '<u2' if len(vertices) <= 0xFFFF else '<u4'
+    indices = np.ascontiguousarray(faces, dtype=index_type)
+
+    positions = quantized.tobytes()
+    padding = b'\0' * (-len(positions) % 4)
+    header = HEADER.pack(
+        MAGIC, VERSION, indices.itemsize, 0, len(vertices), len(faces),
+        *(float(value) for value in origin), extent / QUANTIZATION,
+    )
+    return header + positions + padding + indices.tobytes()
+
+
+def decode(data):
+    """Triângulos (n, 3, 3) float32 de uma malha de prévia (bytes sem gzip)"""
+    magic, version, index_size, _reserved, vertex_count, face_count, ox, oy, oz, scale = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise MeshError('Prévia de malha inválida')
+    offset = HEADER.size
+    positions = np.frombuffer(data, dtype='<u2', count=vertex_count * 3, offset=offset).reshape(-1, 3)
+    offset += positions.nbytes + (-positions.nbytes % 4)
+    faces = np.frombuffer(data, dtype=f'<u{index_size}', count=face_count * 3, offset=offset).reshape(-1, 3)
+    vertices = positions.astype(np.float32) * np.float32(scale) + np.array([ox, oy, oz], dtype=np.float32)
+    return vertices[faces]
+
+
+def build(source, budgets):
+    """Prévias do STL para cada orçamento: {orçamento: bytes sem gzip}; a grade fina é calculada uma vez"""
+    cells, faces, weights, origin, extent = fine_cells(load_triangles(source))
+    results = {}
+    clusters = {}
+    resolution = MAX_RESOLUTION
+    for budget in sorted(budgets, reverse=True):
+        vertices, result, resolution = decimate(cells, faces, weights, budget, resolution, clusters)
+        results[budget] = encode(vertices, result, origin, extent)
+    return results
+
+
+def build_files(source, targets):
+    """
+    Grava as prévias compactadas: targets = {orçamento: caminho}
+
+    Gravação atômica (arquivo temporário + rename); retorna os tamanhos em bytes.
+    """
+    sizes = {}
+    for budget, data in build(source, list(targets)).items():
+        target = targets[budget]
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temporary = f'{target}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as handle:
+            handle.write(gzip.compress(data, compresslevel=9, mtime=0))
+        os.replace(temporary, target)
+        sizes[budget] = os.path.getsize(target)
+    return sizes
@@ -0,0 +1,95 @@
+"""
+Prováveis duplicados na biblioteca de STL da empresa
+
+Cada asset guarda a assinatura de forma (products/stl/signature.py), que não
+muda com rotação, translação nem ordem dos triângulos. Por empresa, as
+assinaturas ficam em um índice em memória (uma matriz NumPy) que é
+atualizado de forma incremental: a cada consulta, um COUNT/MAX(id) diz se
+há assets novos (só eles são lidos) ou se algum saiu (o índice é refeito).
+No upload, o vizinho mais próximo abaixo de settings.STL_DUPLICATE_DISTANCE
+é gravado como provável duplicado.
+"""
+
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+
+from . import mesh, signature
+from ..models import StlAsset
+
+
+class StlDuplicateService:
+    """Assinaturas de forma e busca de STLs parecidos"""
+
+    NEIGHBORS = 5
+
+    _indexes = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def compute(path):
+        """Assinatura (bytes) da malha do arquivo"""
+        return signature.signature(mesh.load_triangles(path)).tobytes()
+
+    @staticmethod
+    def _rows(queryset):
+        ids, vectors = [], []
+        for pk, data in queryset.values_list('pk', 'shape_signature').order_by('pk').iterator(chunk_size=5000):
+            ids.append(pk)
+            vectors.append(bytes(data))
+        matrix = np.frombuffer(b''.join(vectors), dtype=np.float32) if vectors else None
+        return ids, matrix
+
+    @classmethod
+    def index(cls, company_id):
+        """Índice de assinaturas da empresa, em dia com o banco"""
+        assets = StlAsset.objects.filter(company_id=company_id, shape_signature__isnull=False)
+        state = assets.aggregate(count=Count('id'), last=Max('id'))
+
+        with cls._lock:
+            cached = cls._indexes.get(company_id)
+            if cached and (cached['count'], cached['last']) == (state['count'], state['last']):
+                return cached['index']
+
+            if cached and cached['last'] is not None and (state['last'] or 0) > cached['last']:
+                ids, vectors = cls._rows(assets.filter(pk__gt=cached['last']))
+                if cached['count'] + len(ids) == state['count']:
+                    cached['index'].add(ids, vectors)
+                    cached.update(count=state['count'], last=state['last'])
+                    return cached['index']
+
+            # Primeira consulta ou assets removidos: refaz o índice
+            ids, vectors = cls._rows(assets)
+            index = signature.SignatureIndex(ids, vectors)
+            cls._indexes[company_id] = {'index': index, 'count': state['count'], 'last': state['last']}
+            return index
+
+    @classmethod
+    def similar(cls, asset, limit=NEIGHBORS, max_distance=None):
+        """[(StlAsset, distância)] da mesma empresa, do mais parecido ao menos"""
+        if asset.shape_signature is None:
+            return []
+        max_distance = settings.STL_DUPLICATE_DISTANCE if max_distance is None else max_distance
+        vector = np.frombuffer(bytes(asset.shape_signature), dtype=np.float32)
+        neighbors = [
+            (pk, distance)
+            for pk, distance in cls.index(asset.company_id).nearest(vector, limit, exclude=asset.pk)
+            if distance <= max_distance
+        ]
+        assets = StlAsset.objects.select_related('product').in_bulk([pk for pk, _distance in neighbors])
+        return [(assets[pk], distance) for pk, distance in neighbors if pk in assets]
+
+    @classmethod
+    def flag(cls, asset):
+        """
+        Grava no asset o provável duplicado, ou limpa a marca
+
+        É o mais parecido abaixo do limiar entre os enviados antes dele: de
+        um par, só o arquivo mais novo é marcado.
+        """
+        matches = [(other, distance) for other, distance in cls.similar(asset) if other.pk < asset.pk]
+        asset.similar_to, asset.similarity_distance = matches[0] if matches else (None, None)
+        asset.save(update_fields=['similar_to', 'similarity_distance'])
+        return asset.similar_to
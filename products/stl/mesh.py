@@ -0,0 +1,161 @@
+"""
+Leitura de malhas STL e métricas geométricas
+
+O STL binário é lido como uma view NumPy sobre o arquivo mapeado em memória
+(np.memmap com o dtype do registro de 50 bytes), sem copiar nem criar objetos
+Python por triângulo. As métricas são calculadas em blocos de triângulos para
+manter a memória limitada em arquivos de centenas de MB. O STL ASCII é
+convertido para um array com uma única passada de parsing. Os arquivos
+guardados no formato compacto (products/stl/codec.py) são reconhecidos pelo
+cabeçalho e lidos pelas mesmas funções.
+"""
+
+import os
+import re
+
+import numpy as np
+
+
+HEADER_SIZE = 80
+COUNT_SIZE = 4
+TRIANGLE_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attribute', '<u2'),
+])  # 50 bytes por triângulo
+CHUNK_TRIANGLES = 1 << 18
+
+FORMAT_BINARY = 'binary'
+FORMAT_ASCII = 'ascii'
+FORMAT_COMPACT = 'compact'
+COMPACT_MAGIC = b'FLMZ'
+
+_ASCII_VERTEX = re.compile(rb'vertex\s+([^\r\n]+)')
+
+
+class MeshError(ValueError):
+    """Arquivo que não é um STL válido"""
+
+
+def detect_format(path):
+    """'binary', 'ascii' ou 'compact' (o tamanho do binário precisa bater com a contagem do cabeçalho)"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as handle:
+        head = handle.read(HEADER_SIZE + COUNT_SIZE)
+
+    if head.startswith(COMPACT_MAGIC):
+        return FORMAT_COMPACT
+    if len(head) == HEADER_SIZE + COUNT_SIZE:
+        count = int.from_bytes(head[HEADER_SIZE:], 'little')
+        if size == HEADER_SIZE + COUNT_SIZE + count * TRIANGLE_DTYPE.itemsize:
+            return FORMAT_BINARY
+    if head.lstrip().lower().startswith(b'solid'):
+        return FORMAT_ASCII
+    raise MeshError('Arquivo STL inválido')
+
+
+def binary_records(path):
+    """Registros do STL binário como view sobre o arquivo mapeado (somente leitura)"""
+    with open(path, 'rb') as handle:
+        handle.seek(HEADER_SIZE)
+        count = int.from_bytes(handle.read(COUNT_SIZE), 'little')
+    if not count:
+        return np.zeros(0, dtype=TRIANGLE_DTYPE)
+    return np.memmap(path, dtype=TRIANGLE_DTYPE, mode='r', offset=HEADER_SIZE + COUNT_SIZE, shape=(count,))
+
+
+def _ascii_triangles(path):
+    with open(path, 'rb') as handle:
+        data = handle.read()
+    numbers = b' '.join(_ASCII_VERTEX.findall(data))
+    values = np.array(numbers.split(), dtype=np.float32) if numbers else np.zeros(0, dtype=np.float32)
+    if values.size % 9:
+        raise MeshError('STL ASCII com vértices incompletos')
+    return values.reshape(-1, 3, 3)
+
+
+def load_triangles(path, mesh_format=None):
+    """
+    Triângulos (N, 3, 3) float32 do arquivo
+
+    No binário é uma view sobre o memmap (sem cópia); no ASCII e no
+    compacto, um array novo.
+    """
+    mesh_format = mesh_format or detect_format(path)
+    if mesh_format == FORMAT_BINARY:
+        return binary_records(path)['vertices']
+    if mesh_format == FORMAT_COMPACT:
+        from . import codec
+        return codec.read(path).triangles()
+    return _ascii_triangles(path)
+
+
+def _coordinate_rows(triangles, chunk_size=CHUNK_TRIANGLES):
+    """
+    Blocos (9, n) float64: linhas x0, y0, z0, x1, ... contíguas
+
+    Copiar o bloco transposto uma vez é bem mais rápido do que operar sobre
+    as colunas com passo de 50 bytes do memmap.
+    """
+    for start in range(0, len(triangles), chunk_size):
+        block = np.asarray(triangles[start:start + chunk_size]).reshape(-1, 9)
+        yield block.T.astype(np.float64)
+
+
+def analyze(path, mesh_format=None):
+    """
+    Métricas da malha (unidades do arquivo, normalmente mm)
+
+    Retorna {'format', 'triangle_count', 'min', 'max', 'size', 'volume',
+    'surface_area'}. Um único produto vetorial por triângulo, n = e1 x e2,
+    serve às duas somas: a área é |n| / 2 e o volume da malha fechada é a
+    soma de v0 . n / 6 (tetraedros com a origem), em módulo.
+    """
+    mesh_format = mesh_format or detect_format(path)
+    triangles = load_triangles(path, mesh_format)
+    if not len(triangles):
+        raise MeshError('STL sem triângulos')
+
+    lower = np.full(3, np.inf)
+    upper = np.full(3, -np.inf)
+    volume = 0.0
+    area = 0.0
+    for rows in _coordinate_rows(triangles):
+        x0, y0, z0, x1, y1, z1, x2, y2, z2 = rows
+        lower = np.minimum(lower, [rows[0::3].min(), rows[1::3].min(), rows[2::3].min()])
+        upper = np.maximum(upper, [rows[0::3].max(), rows[1::3].max(), rows[2::3].max()])
+
+        ax, ay, az = x1 - x0, y1 - y0, z1 - z0
+        bx, by, bz = x2 - x0, y2 - y0, z2 - z0
+        nx = ay * bz - az * by
+        ny = az * bx - ax * bz
+        nz = ax * by - ay * bx
+        volume += float(x0 @ nx + y0 @ ny + z0 @ nz)
+        area += float(np.sqrt(nx * nx + ny * ny + nz * nz).sum())
+
+    if not np.isfinite(lower).all() or not np.isfinite(upper).all():
+        raise MeshError('STL com coordenadas inválidas')
+
+    return {
+        'format': mesh_format,
+        'triangle_count': int(len(triangles)),
+        'min': lower.tolist(),
+        'max': upper.tolist(),
+        'size': (upper - lower).tolist(),
+        'volume': abs(volume) / 6,
+        'surface_area': area / 2,
+    }
+
+
+def write_binary(path, triangles, header=b''):
+    """Grava triângulos (N, 3, 3) como STL binário, com normais calculadas"""
+    triangles = np.asarray(triangles, dtype=np.float32)
+    records = np.zeros(len(triangles), dtype=TRIANGLE_DTYPE)
+    records['vertices'] = triangles
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    records['normal'] = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    with open(path, 'wb') as handle:
+        handle.write(header[:HEADER_SIZE].ljust(HEADER_SIZE, b'\0'))
+        handle.write(len(records).to_bytes(COUNT_SIZE, 'little'))
+        records.tofile(handle)
@@ -0,0 +1,50 @@
+"""
+Pool de processos do processamento de STL e G-code
+
+Marca d'água, prévias e análise de G-code são CPU puro com NumPy: rodam em
+processos separados (contexto 'spawn', sem herdar conexões do Django) para
+não disputar o GIL com as requisições. Tarefas com a mesma chave em andamento são compartilhadas,
+então downloads ou uploads simultâneos do mesmo arquivo geram o resultado
+uma vez só.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+
+_executor = None
+_pending = {}
+_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.STL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def submit(key, function, *args):
+    """Agenda function(*args) no pool; retorna o Future (o mesmo para a mesma chave em andamento)"""
+    pool = _pool()
+    with _lock:
+        future = _pending.get(key)
+        if future is None:
+            future = pool.submit(function, *args)
+            _pending[key] = future
+            future.add_done_callback(lambda _future: _pending.pop(key, None))
+        return future
+
+
+def run(key, function, *args):
+    """Executa e aguarda o resultado; com STL_WORKERS = 0, no próprio processo"""
+    if settings.STL_WORKERS <= 0:
+        return function(*args)
+    return submit(key, function, *args).result()
@@ -0,0 +1,139 @@
+"""
+Prévias dos STL: imagem do produto e malhas leves para o navegador
+
+Ao concluir um upload, a miniatura é renderizada (products/stl/render.py) no
+pool de processos, a partir de uma thread de fundo que dispara depois do
+commit. As imagens ficam em products/previews/ endereçadas pelo hash da
+malha, então o mesmo STL em outro produto (ou reenviado) não é renderizado
+de novo. A prévia entra como ProductImage: vira a principal quando o produto
+ainda não tem uma.
+
+Na mesma tarefa saem as malhas de prévia (products/stl/decimate.py), uma por
+orçamento de triângulos em settings.STL_PREVIEW_MESH_BUDGETS, gravadas já
+compactadas no storage privado em previews/ e servidas pela view
+stl_preview_mesh; o arquivo original nunca vai para o navegador.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from . import decimate, pool, render, stl_storage
+from ..models import Product, ProductImage, StlAsset
+from ..services import ProductImageService
+
+
+logger = logging.getLogger(__name__)
+
+
+class StlPreviewService:
+    """Geração e anexação das prévias dos arquivos STL"""
+
+    UPLOAD_DIR = 'products/previews'
+    MESH_DIR = 'previews'
+
+    @staticmethod
+    def _storage():
+        return ProductImage._meta.get_field('image').storage
+
+    @classmethod
+    def preview_name(cls, asset):
+        digest = asset.content_hash
+        extension = settings.STL_PREVIEW_FORMAT.lower()
+        return f'{cls.UPLOAD_DIR}/{digest[:2]}/{digest}-{settings.STL_PREVIEW_SIZE}.{extension}'
+
+    @classmethod
+    def render(cls, asset):
+        """Nome da imagem da prévia e SHA-256 do conteúdo, renderizando só se não estiver em cache"""
+        storage = cls._storage()
+        name = cls.preview_name(asset)
+        if storage.exists(name):
+            with storage.open(name, 'rb') as handle:
+                return name, hashlib.sha256(handle.read()).hexdigest()
+
+        digest = pool.run(
+            name, render.render_file,
+            stl_storage().path(asset.file.name), storage.path(name),
+            settings.STL_PREVIEW_SIZE, settings.STL_PREVIEW_FORMAT,
+        )
+        return name, digest
+
+    @staticmethod
+    def attach(asset, name, digest):
+        """
+        Anexa a prévia às imagens do produto
+
+        Vira a principal (e a primeira) se o produto não tiver imagem principal;
+        senão vai para o fim. Não passa do limite de imagens nem duplica.
+        """
+        with transaction.atomic():
+            product = Product.objects.select_for_update().get(pk=asset.product_id)
+            images = list(product.images.all())
+            existing = next((image for image in images if image.content_hash == digest), None)
+            if existing is not None:
+                return existing
+            if len(images) >= ProductImageService.MAX_IMAGES:
+                return None
+
+            primary = not any(image.is_primary for image in images)
+            if primary:
+                product.images.update(order_index=F('order_index') + 1)
+                order_index = 0
+            else:
+                order_index = (product.images.aggregate(last=Max('order_index'))['last'] or 0) + 1
+
+            image = ProductImage(product=product, content_hash=digest, is_primary=primary, order_index=order_index)
+            image.image.name = name
+            image.save()
+            # updated_at alimenta o ETag das páginas do produto
+            Product.objects.filter(pk=product.pk).update(updated_at=timezone.now())
+        return image
+
+    @classmethod
+    def mesh_name(cls, asset, budget):
+        digest = asset.content_hash
+        return f'{cls.MESH_DIR}/{digest[:2]}/{digest}-{budget}.mesh.gz'
+
+    @classmethod
+    def meshes(cls, asset):
+        """Caminhos das malhas de prévia {orçamento: caminho}, gerando as que faltam"""
+        storage = stl_storage()
+        paths = {budget: storage.path(cls.mesh_name(asset, budget)) for budget in settings.STL_PREVIEW_MESH_BUDGETS}
+        missing = {budget: path for budget, path in paths.items() if not os.path.exists(path)}
+        if missing:
+            pool.run(
+                f'mesh:{asset.content_hash}:{sorted(missing)}', decimate.build_files,
+                storage.path(asset.file.name), missing,
+            )
+        return paths
+
+    @classmethod
+    def generate(cls, asset):
+        """Renderiza (ou reaproveita) a prévia e a anexa ao produto"""
+        name, digest = cls.render(asset)
+        return cls.attach(asset, name, digest)
+
+    @classmethod
+    def schedule(cls, asset):
+        """Gera a prévia em segundo plano, depois do commit que criou o arquivo"""
+        asset_id = asset.pk
+
+        def run():
+            try:
+                asset = StlAsset.objects.get(pk=asset_id)
+                cls.generate(asset)
+                cls.meshes(asset)
+            except Exception:
+                logger.exception('Falha ao gerar a prévia do STL %s', asset_id)
+            finally:
+                connection.close()
+
+        transaction.on_commit(
+            lambda: threading.Thread(target=run, name=f'stl-preview-{asset_id}', daemon=True).start()
+        )
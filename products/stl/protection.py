@@ -0,0 +1,121 @@
+"""
+Segurança STL: downloads com marca d'água por destinatário
+
+Com o recurso do plano (Plan.has_stl_security), cada download é uma cópia
+marcada para o cliente (ou, sem cliente, para o usuário que baixou). A chave
+é um HMAC do hash do arquivo com o destinatário, então a mesma cópia serve a
+todos os downloads do mesmo destinatário e fica em cache no storage privado
+(variants/). As cópias são geradas no pool de processos (products/stl/pool.py).
+"""
+
+import hashlib
+import hmac
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from . import pool, stl_storage, watermark
+from .storage import StlStorageService
+from ..models import StlDownload
+
+
+class StlProtectionService:
+    """Cópias marcadas dos STL e identificação de cópias vazadas"""
+
+    @staticmethod
+    def is_enabled(user):
+        """O plano da conta do usuário inclui Segurança STL?"""
+        account = getattr(user, 'account', None)
+        return bool(account and account.plan.has_stl_security)
+
+    @staticmethod
+    def fingerprint(asset, customer=None, user=None):
+        """Chave da marca (hex) do destinatário para o arquivo"""
+        recipient = f'customer:{customer.pk}' if customer else f'user:{user.pk}'
+        message = f'stl-watermark:{asset.content_hash}:{recipient}'.encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def variant_name(asset, fingerprint):
+        digest = asset.content_hash
+        return f'variants/{digest[:2]}/{digest}/{fingerprint[:32]}.stl'
+
+    @classmethod
+    def variant_path(cls, asset, fingerprint):
+        """Caminho da cópia marcada, gerando-a no pool se ainda não estiver em cache"""
+        storage = stl_storage()
+        name = cls.variant_name(asset, fingerprint)
+        target = storage.path(name)
+        if storage.exists(name):
+            return target
+
+        source = storage.path(asset.file.name)
+        return pool.run(
+            name, watermark.embed, source, target, bytes.fromhex(fingerprint), settings.STL_WATERMARK_AMPLITUDE_MM,
+        )
+
+    @staticmethod
+    def purge_variants(max_age):
+        """Remove do cache as cópias marcadas não usadas há mais de `max_age`; retorna quantas"""
+        root = Path(stl_storage().path('variants'))
+        cutoff = time.time() - max_age.total_seconds()
+        count = 0
+        for path in root.glob('*/*/*.stl'):
+            if path.stat().st_atime < cutoff and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                count += 1
+        return count
+
+    @classmethod
+    def download(cls, asset, user, customer=None):
+        """
+        Registra o download e retorna o caminho do arquivo a enviar
+
+        Sem Segurança STL no plano, envia o original remontado do formato
+        compacto (o download é registrado sem marca).
+        """
+        fingerprint = ''
+        if cls.is_enabled(user):
+            fingerprint = cls.fingerprint(asset, customer=customer, user=user)
+            path = cls.variant_path(asset, fingerprint)
+        else:
+            path = StlStorageService.original_path(asset)
+
+        StlDownload.objects.create(
+            company_id=asset.company_id,
+            asset=asset,
+            customer=customer,
+            fingerprint=fingerprint,
+            downloaded_by=user,
+        )
+        return path
+
+    @classmethod
+    def identify(cls, asset, suspect_path, threshold=watermark.MATCH_THRESHOLD):
+        """
+        Downloads cuja marca aparece no arquivo suspeito, do mais provável ao menos
+
+        Compara apenas as marcas já entregues deste arquivo; retorna
+        [(StlDownload mais recente da marca, pontuação)].
+        """
+        latest = {}
+        for download in asset.downloads.exclude(fingerprint='').select_related('customer', 'downloaded_by'):
+            latest.setdefault(download.fingerprint, download)
+        if not latest:
+            return []
+
+        fingerprints = list(latest)
+        scores = watermark.detect(
+            stl_storage().path(asset.file.name),
+            suspect_path,
+            [bytes.fromhex(fingerprint) for fingerprint in fingerprints],
+            amplitude=settings.STL_WATERMARK_AMPLITUDE_MM,
+        )
+        matches = [
+            (latest[fingerprint], score)
+            for fingerprint, score in zip(fingerprints, scores)
+            if score >= threshold
+        ]
+        matches.sort(key=lambda match: -match[1])
+        return matches
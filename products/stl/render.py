@@ -0,0 +1,219 @@
+"""
+Miniaturas de malhas STL renderizadas em software
+
+Projeção ortográfica em vista isométrica, z-buffer e sombreamento Lambert por
+face, tudo com NumPy (sem GPU). A rasterização é por linhas, vetorizada sobre
+blocos de triângulos: cada par (triângulo, linha de pixels) vira um intervalo
+de colunas e só os pixels cobertos são gerados, então o custo acompanha a
+área desenhada e não a caixa envolvente (triângulos finos e longos são
+comuns em STL exportado de CAD). A profundidade (plano de cada triângulo) e o
+tom da face vão juntos em um único inteiro, de modo que `np.maximum.at`
+resolve o z-buffer e o sombreamento numa passada só.
+
+A imagem é renderizada em resolução maior e reduzida com o Pillow
+(antisserrilhamento). Como em mesh.py, nada aqui depende do Django.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from . import mesh
+
+
+DEFAULT_SIZE = 512
+SUPERSAMPLE = 2
+MARGIN = 0.06  # fração da imagem livre em volta do modelo
+AZIMUTH = 45.0
+ELEVATION = 30.0
+LIGHT = np.array([-0.35, 0.55, 0.76])
+AMBIENT = 0.35
+COLOR = np.array([74, 124, 181])  # azul aço
+MAX_CANDIDATES = 1 << 22  # pixels candidatos por bloco
+
+_DEPTH_LEVELS = 1 << 40
+
+
+def view_rotation(azimuth=AZIMUTH, elevation=ELEVATION):
+    """Rotação do espaço do modelo (Z para cima) para o da câmera (Z para o observador)"""
+    a, e = np.radians(azimuth), np.radians(elevation)
+    spin = np.array([[np.cos(a), -np.sin(a), 0], [np.sin(a), np.cos(a), 0], [0, 0, 1]])
+    # Olhar de frente (eixo Y do modelo para dentro da tela) e inclinar para ver o topo
+    front = np.array([[1, 0, 0], [0, 0, 1], [0, -1, 0]])
+    tilt = np.array([[1, 0, 0], [0, np.cos(e), -np.sin(e)], [0, np.sin(e), np.cos(e)]])
+    return tilt @ front @ spin
+
+
+def _project(triangles, width):
+    """Vértices em pixels (x, y para baixo) e profundidade, mais o tom (0-255) de cada face"""
+    rotation = view_rotation().astype(np.float32)
+    view = (np.asarray(triangles, dtype=np.float32).reshape(-1, 3) @ rotation.T).reshape(-1, 3, 3)
+
+    points = view.reshape(-1, 3)
+    lower = np.array([points[:, axis].min() for axis in range(3)])
+    upper = np.array([points[:, axis].max() for axis in range(3)])
+    extent = float(max(upper[0] - lower[0], upper[1] - lower[1])) or 1.0
+    scale = width * (1 - 2 * MARGIN) / extent
+    offset_x = (width - (upper[0] - lower[0]) * scale) / 2
+    offset_y = (width - (upper[1] - lower[1]) * scale) / 2
+
+    x = (view[..., 0] - lower[0]) * scale + offset_x
+    y = (upper[1] - view[..., 1]) * scale + offset_y
+    depth = (view[..., 2] - lower[2]) / (float(upper[2] - lower[2]) or 1.0)
+
+    edge1 = view[:, 1] - view[:, 0]
+    edge2 = view[:, 2] - view[:, 0]
+    normals = np.cross(edge1, edge2)
+    lengths = np.sqrt(np.einsum('ij,ij->i', normals, normals))
+    light = LIGHT / np.linalg.norm(LIGHT)
+    # Iluminação dos dois lados: o STL nem sempre tem a orientação das faces consistente
+    cosine = np.abs(normals @ light.astype(np.float32)) / np.where(lengths > 0, lengths, 1)
+    tone = np.clip((AMBIENT + (1 - AMBIENT) * cosine) * 255, 0, 255).astype(np.int64)
+    return x, y, depth, tone
+
+
+def _lowest(values):
+    """Menor valor de cada linha (n, 3); bem mais rápido que min(axis=1) em 3 colunas"""
+    return np.minimum(np.minimum(values[:, 0], values[:, 1]), values[:, 2])
+
+
+def _highest(values):
+    return np.maximum(np.maximum(values[:, 0], values[:, 1]), values[:, 2])
+
+
+def _depth_planes(x, y, depth):
+    """Coeficientes (a, b, c) do plano z = a*x + b*y + c de cada triângulo projetado"""
+    dx1, dy1, dz1 = x[:, 1] - x[:, 0], y[:, 1] - y[:, 0], depth[:, 1] - depth[:, 0]
+    dx2, dy2, dz2 = x[:, 2] - x[:, 0], y[:, 2] - y[:, 0], depth[:, 2] - depth[:, 0]
+    determinant = dx1 * dy2 - dx2 * dy1
+    safe = np.where(determinant == 0, 1, determinant)
+    a = (dz1 * dy2 - dz2 * dy1) / safe
+    b = (dx1 * dz2 - dx2 * dz1) / safe
+    c = depth[:, 0] - a * x[:, 0] - b * y[:, 0]
+    return a, b, c, determinant != 0
+
+
+def _edges(x, y):
+    """
+    Arestas de cada triângulo com os vértices ordenados por y
+
+    Retorna (x0, y0, x1, y1, inclinação 0-2, inclinação 0-1, inclinação 1-2):
+    toda linha cruza a aresta longa 0-2 e uma das curtas, conforme y < y1.
+    """
+    order = np.argsort(y, axis=1)
+    xs = np.take_along_axis(x, order, axis=1)
+    ys = np.take_along_axis(y, order, axis=1)
+
+    def slope(i, j):
+        height = ys[:, j] - ys[:, i]
+        return (xs[:, j] - xs[:, i]) / np.where(height == 0, 1, height)
+
+    return xs[:, 0], ys[:, 0], xs[:, 1], ys[:, 1], slope(0, 2), slope(0, 1), slope(1, 2)
+
+
+def _spans(edges, triangle, row_y):
+    """Intervalo [início, fim] em x de cada (triângulo, linha) na altura row_y"""
+    x0, y0, x1, y1, long_slope, upper_slope, lower_slope = (values[triangle] for values in edges)
+    long_edge = x0 + (row_y - y0) * long_slope
+    short_edge = np.where(row_y < y1, x0 + (row_y - y0) * upper_slope, x1 + (row_y - y1) * lower_slope)
+    return np.minimum(long_edge, short_edge), np.maximum(long_edge, short_edge)
+
+
+def _expand(counts):
+    """Para contagens [2, 3] devolve (dono [0, 0, 1, 1, 1], posição [0, 1, 0, 1, 2])"""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    first = np.cumsum(counts) - counts
+    return owner, np.arange(int(counts.sum())) - first[owner]
+
+
+def _rasterize_block(x, y, tone, plane, top, rows, width, zbuffer):
+    """Varredura por linhas de um bloco de triângulos: só os pixels cobertos viram candidatos"""
+    triangle, offset = _expand(rows)
+    row = top[triangle] + offset
+    start, end = _spans(_edges(x, y), triangle, (row + 0.5).astype(np.float32))
+    first = np.maximum(np.ceil(start - 0.5), 0).astype(np.int64)
+    last = np.minimum(np.floor(end - 0.5), width - 1).astype(np.int64)
+    counts = np.maximum(last - first + 1, 0)
+
+    span, column = _expand(counts)
+    if not len(span):
+        return
+    owner = triangle[span]
+    row = row[span]
+    column = column + first[span]
+
+    a, b, c = plane
+    z = a[owner] * (column + 0.5) + b[owner] * (row + 0.5) + c[owner]
+    # Profundidade nos bits altos, tom da face nos 8 bits baixos
+    key = (np.clip(z, 0, 1) * (_DEPTH_LEVELS - 1)).astype(np.int64) << 8 | tone[owner]
+    np.maximum.at(zbuffer, row * width + column, key)
+
+
+def rasterize(triangles, width):
+    """Z-buffer (width x width) com profundidade e tom; -1 onde não há malha"""
+    zbuffer = np.full(width * width, -1, dtype=np.int64)
+    if not len(triangles):
+        return zbuffer.reshape(width, width)
+
+    x, y, depth, tone = _project(triangles, width)
+    a, b, c, flat = _depth_planes(x, y, depth)
+    # Linhas cujo centro (i + 0.5) cruza o triângulo; faces vistas de perfil não aparecem
+    top = np.maximum(np.ceil(_lowest(y) - 0.5), 0).astype(np.int64)
+    bottom = np.minimum(np.floor(_highest(y) - 0.5), width - 1).astype(np.int64)
+    rows = np.where(flat, np.maximum(bottom - top + 1, 0), 0)
+    visible = np.nonzero(rows)[0]
+
+    # Blocos com custo estimado (linhas + área) de até MAX_CANDIDATES pixels
+    cost = np.cumsum(rows[visible] * ((_highest(x) - _lowest(x))[visible] / 2 + 1))
+    block = (cost // MAX_CANDIDATES).astype(np.int64)
+    bounds = np.flatnonzero(np.diff(block)) + 1
+    for index in np.split(visible, bounds):
+        if len(index):
+            _rasterize_block(
+                x[index], y[index], tone[index], (a[index], b[index], c[index]),
+                top[index], rows[index], width, zbuffer,
+            )
+    return zbuffer.reshape(width, width)
+
+
+def render(triangles, size=DEFAULT_SIZE, supersample=SUPERSAMPLE):
+    """Imagem RGBA (Pillow) da malha, com fundo transparente"""
+    width = size * supersample
+    zbuffer = rasterize(triangles, width)
+    covered = zbuffer >= 0
+    shade = (zbuffer & 0xFF).astype(np.float32) / 255
+
+    pixels = np.zeros((width, width, 4), dtype=np.uint8)
+    pixels[..., :3] = (shade[..., None] * COLOR).astype(np.uint8)
+    pixels[..., 3] = np.where(covered, 255, 0)
+    image = Image.fromarray(pixels, 'RGBA')
+    if supersample > 1:
+        image = image.resize((size, size), Image.Resampling.BOX)
+    return image
+
+
+def render_file(source, target, size=DEFAULT_SIZE, image_format='WEBP'):
+    """
+    Renderiza o STL `source` em `target` e retorna o SHA-256 da imagem
+
+    Gravação atômica (temporário + rename), como em watermark.embed.
+    """
+    image = render(mesh.load_triangles(source), size)
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, quality=90) if image_format.upper() == 'WEBP' else image.save(buffer, image_format)
+    data = buffer.getvalue()
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            output.write(data)
+        os.replace(temporary, target)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return hashlib.sha256(data).hexdigest()
@@ -0,0 +1,119 @@
+"""
+Assinatura de forma das malhas e índice de vizinhos mais próximos
+
+A assinatura não muda com rotação, translação nem ordem dos triângulos:
+
+- SAMPLE_POINTS pontos são sorteados na superfície, com probabilidade
+  proporcional à área de cada triângulo (semente fixa);
+- histograma D2: distâncias entre todos os pares de pontos, divididas pela
+  diagonal da caixa alinhada aos eixos principais, em D2_BINS faixas; a raiz
+  das frequências faz a distância euclidiana se comportar como a de Hellinger;
+- caixa PCA: lados da caixa nos eixos principais (pela covariância dos
+  pontos), do maior para o menor, em log; entram com peso BOX_WEIGHT, de
+  modo que a mesma forma em outra escala não é duplicada.
+
+O índice é uma matriz (n, DIMENSIONS) float32 com as normas pré-calculadas:
+a busca dos k vizinhos é um produto matriz-vetor mais um argpartition, na
+casa de 1 ms para 100 mil assinaturas.
+"""
+
+import numpy as np
+
+
+SAMPLE_POINTS = 1024
+D2_BINS = 32
+D2_RANGE = 1.2  # distâncias / diagonal da caixa
+BOX_WEIGHT = 0.5
+DIMENSIONS = D2_BINS + 3
+DUPLICATE_DISTANCE = 0.12
+SEED = 0x5EED
+
+
+def sample_points(triangles, count=SAMPLE_POINTS, seed=SEED):
+    """Pontos (count, 3) float64 sorteados na superfície, proporcionais à área"""
+    triangles = np.asarray(triangles, dtype=np.float64)
+    if not len(triangles):
+        raise ValueError('Malha sem triângulos')
+    origin = triangles[:, 0]
+    first = triangles[:, 1] - origin
+    second = triangles[:, 2] - origin
+    areas = np.linalg.norm(np.cross(first, second), axis=1)
+    total = areas.sum()
+    if not total > 0:
+        raise ValueError('Malha sem área')
+
+    generator = np.random.default_rng(seed)
+    chosen = np.searchsorted(np.cumsum(areas), generator.random(count) * total, side='right')
+    chosen = np.minimum(chosen, len(triangles) - 1)
+    # Coordenadas baricêntricas uniformes no triângulo
+    u, v = generator.random(count), generator.random(count)
+    flip = u + v > 1
+    u[flip], v[flip] = 1 - u[flip], 1 - v[flip]
+    return origin[chosen] + first[chosen] * u[:, None] + second[chosen] * v[:, None]
+
+
+def principal_extents(points):
+    """
+    Lados da caixa nos eixos principais, do maior para o menor
+
+    Vêm do desvio padrão em cada eixo principal (raiz dos autovalores da
+    covariância), não do mínimo/máximo da projeção: em peças simétricas
+    (cubo, cilindro) os eixos principais são arbitrários, os autovalores não.
+    """
+    centered = points - points.mean(axis=0)
+    values = np.linalg.eigvalsh(np.cov(centered.T))
+    return np.sort(np.sqrt(np.maximum(values, 0)) * 2 * np.sqrt(3))[::-1]
+
+
+def signature(triangles):
+    """Vetor (DIMENSIONS,) float32 da forma da malha"""
+    points = sample_points(triangles)
+    extents = principal_extents(points)
+    diagonal = float(np.linalg.norm(extents)) or 1.0
+
+    squared = (points * points).sum(axis=1)
+    distances = squared[:, None] + squared[None, :] - 2 * points @ points.T
+    upper = np.triu_indices(len(points), k=1)
+    distances = np.sqrt(np.maximum(distances[upper], 0)) / diagonal
+    histogram, _edges = np.histogram(distances, bins=D2_BINS, range=(0.0, D2_RANGE))
+    histogram = np.sqrt(histogram / max(histogram.sum(), 1))
+
+    box = BOX_WEIGHT * np.log(np.maximum(extents, 1e-6))
+    return np.concatenate([histogram, box]).astype(np.float32)
+
+
+class SignatureIndex:
+    """Assinaturas em uma matriz contígua, com busca exata dos k vizinhos mais próximos"""
+
+    def __init__(self, ids=(), vectors=None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.vectors = (
+            np.asarray(vectors, dtype=np.float32).reshape(-1, DIMENSIONS)
+            if vectors is not None else np.zeros((0, DIMENSIONS), dtype=np.float32)
+        )
+        self.norms = (self.vectors * self.vectors).sum(axis=1)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, DIMENSIONS)
+        self.ids = np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)])
+        self.vectors = np.concatenate([self.vectors, vectors])
+        self.norms = np.concatenate([self.norms, (vectors * vectors).sum(axis=1)])
+
+    def nearest(self, vector, k=5, exclude=None):
+        """[(id, distância)] dos k vizinhos mais próximos, do mais perto ao mais longe"""
+        if not len(self.ids):
+            return []
+        vector = np.asarray(vector, dtype=np.float32)
+        squared = self.norms - 2 * (self.vectors @ vector) + float(vector @ vector)
+        if exclude is not None:
+            squared[self.ids == exclude] = np.inf
+        k = min(k, len(squared))
+        nearest = np.argpartition(squared, k - 1)[:k]
+        nearest = nearest[np.argsort(squared[nearest])]
+        return [
+            (int(self.ids[position]), float(np.sqrt(max(squared[position], 0.0))))
+            for position in nearest if np.isfinite(squared[position])
+        ]
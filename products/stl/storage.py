@@ -0,0 +1,92 @@
+"""
+Armazenamento compacto dos STL
+
+Os arquivos enviados são guardados no formato compacto (products/stl/codec.py)
+e o STL no formato original é remontado só para o download, com a cópia em
+cache no storage privado (restored/), como as cópias com marca d'água.
+Arquivos guardados antes do formato compacto continuam sendo lidos e
+enviados como estão até serem convertidos (compact_stl_assets).
+"""
+
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from . import codec, pool, stl_storage
+from ..models import StlAsset, stl_upload_path
+
+
+class StlStorageService:
+    """Gravação no formato compacto e remontagem do STL original"""
+
+    RESTORED_DIR = 'restored'
+
+    @staticmethod
+    def is_compact(asset):
+        return asset.file.name.endswith(codec.EXTENSION)
+
+    @staticmethod
+    def store(source, asset):
+        """
+        Grava `source` (STL enviado) no formato compacto, no caminho do hash do asset
+
+        Se o mesmo conteúdo já estiver guardado, o arquivo é compartilhado.
+        Retorna o nome no storage; `source` fica para o chamador, que só o
+        remove depois de gravar o asset.
+        """
+        name = stl_upload_path(asset, asset.original_name)
+        target = stl_storage().path(name)
+        if not os.path.exists(target):
+            pool.run(name, codec.compress_file, str(source), target, settings.STL_STORAGE_STEP_MM)
+        return name
+
+    @classmethod
+    def restored_name(cls, asset):
+        digest = asset.content_hash
+        return f'{cls.RESTORED_DIR}/{digest[:2]}/{digest}.stl'
+
+    @classmethod
+    def original_path(cls, asset):
+        """Caminho do STL no formato original, remontando-o no pool se ainda não estiver em cache"""
+        storage = stl_storage()
+        if not cls.is_compact(asset):
+            return storage.path(asset.file.name)
+
+        name = cls.restored_name(asset)
+        target = storage.path(name)
+        if storage.exists(name):
+            return target
+        return pool.run(name, codec.restore, storage.path(asset.file.name), target)
+
+    @classmethod
+    def purge_restored(cls, max_age):
+        """Remove do cache as cópias remontadas não usadas há mais de `max_age`; retorna quantas"""
+        root = Path(stl_storage().path(cls.RESTORED_DIR))
+        cutoff = time.time() - max_age.total_seconds()
+        count = 0
+        for path in root.glob('*/*.stl'):
+            if path.stat().st_atime < cutoff and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                count += 1
+        return count
+
+    @staticmethod
+    def compact(name):
+        """
+        Converte um arquivo antigo (STL cru) para o formato compacto
+
+        Todos os assets que compartilham o arquivo passam a apontar para o
+        novo; retorna (tamanho antes, tamanho depois).
+        """
+        storage = stl_storage()
+        asset = StlAsset.objects.filter(file=name).first()
+        new_name = stl_upload_path(asset, asset.original_name)
+        before = storage.size(name)
+        after = codec.compress_file(storage.path(name), storage.path(new_name), settings.STL_STORAGE_STEP_MM)
+        with transaction.atomic():
+            StlAsset.objects.filter(file=name).update(file=new_name)
+        storage.delete(name)
+        return before, after
@@ -0,0 +1,212 @@
+"""
+Upload de STL em partes (retomável)
+
+O cliente abre um upload informando nome e tamanho e envia o arquivo em
+partes (corpo cru da requisição, com o offset no cabeçalho). Cada parte é
+copiada em blocos do stream da requisição direto para o arquivo parcial, sem
+passar pelos upload handlers do Django. Se a conexão cair, o cliente consulta
+quantos bytes já chegaram e continua dali. Com a última parte, o arquivo é
+marcado como em finalização (uma nova tentativa da última parte não o
+finaliza de novo), analisado (products/stl/mesh.py), guardado no formato compacto no caminho
+endereçado pelo hash (products/stl/storage.py), as dimensões do produto são
+preenchidas, o arquivo é comparado com a biblioteca da empresa
+(products/stl/duplicates.py) e a prévia é agendada (products/stl/previews.py).
+"""
+
+import hashlib
+import logging
+import os
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from . import mesh
+from ..models import StlAsset, StlUpload
+from .duplicates import StlDuplicateService
+from .previews import StlPreviewService
+from .storage import StlStorageService
+
+
+logger = logging.getLogger(__name__)
+
+COPY_BLOCK_SIZE = 1024 * 1024
+CENT = Decimal('0.01')
+# Finalização parada há mais tempo que isto (processo encerrado) pode ser retomada
+FINALIZE_TIMEOUT = timedelta(minutes=10)
+
+
+def _decimal(value):
+    return Decimal(str(value)).quantize(CENT)
+
+
+class StlUploadService:
+    """Ciclo de vida de um upload de STL: início, partes, finalização"""
+
+    @staticmethod
+    def part_path(upload):
+        return Path(settings.STL_ROOT) / 'uploads' / f'{upload.pk}.part'
+
+    @classmethod
+    def start(cls, company, user, product, filename, size):
+        """Abre um upload para o produto; valida extensão e tamanho"""
+        filename = os.path.basename(filename or '').strip()
+        if not filename.lower().endswith('.stl'):
+            raise ValidationError(_('products.stl.invalid_extension'))
+        if size <= 0 or size > settings.STL_MAX_UPLOAD_SIZE:
+            raise ValidationError(_('products.stl.invalid_size'))
+
+        upload = StlUpload.objects.create(
+            company=company,
+            product=product,
+            created_by=user,
+            filename=filename[:255],
+            total_size=size,
+        )
+        path = cls.part_path(upload)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+        return upload
+
+    @classmethod
+    def append(cls, upload, offset, stream, length):
+        """
+        Grava uma parte a partir de `offset` (precisa ser igual ao já recebido)
+
+        `stream` é lido em blocos; bytes além do recebido (parte interrompida
+        antes de confirmar) são descartados antes de gravar. Retorna o upload
+        atualizado (finalizado quando a última parte chega).
+
+        A última parte passa o upload para FINALIZING sob a trava da linha:
+        repetições dela recebem "encerrado" enquanto a finalização corre, e só
+        uma finalização interrompida há mais de FINALIZE_TIMEOUT é retomada.
+        """
+        with transaction.atomic():
+            upload = StlUpload.objects.select_for_update().get(pk=upload.pk)
+            interrupted = (
+                upload.status == StlUpload.STATUS_FINALIZING
+                and upload.updated_at < timezone.now() - FINALIZE_TIMEOUT
+            )
+            if upload.status != StlUpload.STATUS_RECEIVING and not interrupted:
+                raise ValidationError(_('products.stl.upload_closed'), code='closed')
+            if offset != upload.received:
+                raise ValidationError(_('products.stl.offset_mismatch'), code='offset')
+            if upload.received == upload.total_size:
+                # Todas as partes já chegaram, mas a finalização não terminou: tenta de novo
+                length = 0
+            elif length <= 0 or length > settings.STL_UPLOAD_CHUNK_SIZE or offset + length > upload.total_size:
+                raise ValidationError(_('products.stl.invalid_chunk'), code='chunk')
+
+            written = 0
+            with open(cls.part_path(upload), 'r+b') as handle:
+                handle.truncate(offset)
+                handle.seek(offset)
+                while written < length:
+                    block = stream.read(min(COPY_BLOCK_SIZE, length - written))
+                    if not block:
+                        break
+                    handle.write(block)
+                    written += len(block)
+            if written != length:
+                raise ValidationError(_('products.stl.invalid_chunk'), code='chunk')
+
+            upload.received = offset + written
+            fields = ['received', 'updated_at']
+            if upload.received == upload.total_size:
+                upload.status = StlUpload.STATUS_FINALIZING
+                fields.append('status')
+            upload.save(update_fields=fields)
+
+        if upload.status == StlUpload.STATUS_FINALIZING:
+            cls.finalize(upload)
+        return upload
+
+    @staticmethod
+    def _hash(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as handle:
+            for block in iter(lambda: handle.read(COPY_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _fail(upload, error):
+        upload.status = StlUpload.STATUS_FAILED
+        upload.error = error
+        upload.save(update_fields=['status', 'error', 'updated_at'])
+
+    @classmethod
+    def finalize(cls, upload):
+        """
+        Analisa a malha, guarda o arquivo pelo hash, marca prováveis duplicados e preenche as dimensões do produto
+
+        O arquivo parcial só é removido depois do commit do asset; falhas de
+        disco marcam o upload como FAILED (ValidationError, não erro 500).
+        """
+        part = cls.part_path(upload)
+        try:
+            asset = cls._store(upload, part)
+        except mesh.MeshError:
+            part.unlink(missing_ok=True)
+            cls._fail(upload, 'invalid_mesh')
+            raise ValidationError(_('products.stl.invalid_mesh'), code='mesh')
+        except OSError:
+            logger.exception('Falha ao finalizar o upload de STL %s', upload.pk)
+            cls._fail(upload, 'storage')
+            raise ValidationError(_('products.stl.storage_failed'), code='storage')
+
+        transaction.on_commit(lambda: part.unlink(missing_ok=True))
+        return asset
+
+    @classmethod
+    def _store(cls, upload, part):
+        metrics = mesh.analyze(part)
+        asset = StlAsset(content_hash=cls._hash(part), original_name=upload.filename)
+        asset.shape_signature = StlDuplicateService.compute(part)
+        name = StlStorageService.store(part, asset)
+
+        size_x, size_y, size_z = (_decimal(value) for value in metrics['size'])
+        with transaction.atomic():
+            asset.company_id = upload.company_id
+            asset.product_id = upload.product_id
+            asset.created_by_id = upload.created_by_id
+            asset.file.name = name
+            asset.size_bytes = upload.total_size
+            asset.format = metrics['format']
+            asset.triangle_count = metrics['triangle_count']
+            asset.size_x_mm, asset.size_y_mm, asset.size_z_mm = size_x, size_y, size_z
+            asset.volume_mm3 = _decimal(metrics['volume'])
+            asset.surface_area_mm2 = _decimal(metrics['surface_area'])
+            asset.save()
+
+            StlDuplicateService.flag(asset)
+
+            upload.status = StlUpload.STATUS_COMPLETE
+            upload.asset = asset
+            upload.save(update_fields=['status', 'asset', 'updated_at'])
+
+            product = upload.product
+            product.dimensions_x, product.dimensions_y, product.dimensions_z = size_x, size_y, size_z
+            product.dimension_unit = 'mm'
+            product.save(update_fields=['dimensions_x', 'dimensions_y', 'dimensions_z', 'dimension_unit', 'updated_at'])
+            StlPreviewService.schedule(asset)
+        return asset
+
+    @classmethod
+    def purge_stale(cls, max_age=timedelta(days=1)):
+        """Remove uploads não concluídos parados há mais de `max_age`; retorna quantos"""
+        stale = StlUpload.objects.filter(
+            status__in=[StlUpload.STATUS_RECEIVING, StlUpload.STATUS_FINALIZING, StlUpload.STATUS_FAILED],
+            updated_at__lt=timezone.now() - max_age,
+        )
+        count = 0
+        for upload in stale.iterator():
+            cls.part_path(upload).unlink(missing_ok=True)
+            upload.delete()
+            count += 1
+        return count
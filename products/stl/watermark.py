@@ -0,0 +1,152 @@
+"""
+Marca d'água (fingerprint) em malhas STL
+
+Cada cópia baixada recebe um deslocamento imperceptível (alguns micrômetros)
+em todas as coordenadas dos vértices: +a ou -a conforme um hash do valor
+original da coordenada com a chave do destinatário. Como o sinal depende só
+do valor, vértices repetidos entre triângulos recebem o mesmo deslocamento e
+a malha continua fechada.
+
+A detecção compara o arquivo suspeito com o original: a diferença das
+coordenadas, correlacionada com o padrão de sinais de cada chave candidata,
+dá ~1 para a chave usada e ~0 para as demais. Um deslocamento global do
+modelo (translação) é descontado antes da correlação.
+
+Tudo opera sobre o array inteiro de coordenadas (uint32/float32) com NumPy;
+as funções não dependem do Django para poderem rodar em processos separados.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from . import codec, mesh
+
+
+DEFAULT_AMPLITUDE = 0.005  # mm
+DETECTION_SAMPLE = 200_000
+BLOCK_TRIANGLES = 1 << 15  # blocos pequenos: o hash roda no cache da CPU
+MATCH_THRESHOLD = 0.5
+
+_MIX_1 = np.uint32(0x7FEB352D)
+_MIX_2 = np.uint32(0x846CA68B)
+
+
+def axis_keys(key):
+    """Três chaves uint32 (uma por eixo) a partir dos primeiros 12 bytes da chave"""
+    return np.frombuffer(key[:12], dtype='<u4').astype(np.uint32)
+
+
+def pattern(coordinates, keys, amplitude):
+    """
+    Deslocamentos (+a ou -a, float32) para coordenadas (n, 3) float32
+
+    Hash de 32 bits (lowbias32) do padrão de bits de cada coordenada com a
+    chave do seu eixo (-0.0 vira 0.0 ao somar zero); o bit mais baixo do
+    hash vira o bit de sinal da amplitude, sem conversões de tipo.
+    """
+    bits = (coordinates + np.float32(0)).view(np.uint32)
+    scratch = np.empty_like(bits)
+    bits ^= keys
+    np.right_shift(bits, 16, out=scratch)
+    bits ^= scratch
+    bits *= _MIX_1
+    np.right_shift(bits, 15, out=scratch)
+    bits ^= scratch
+    bits *= _MIX_2
+    np.right_shift(bits, 16, out=scratch)
+    bits ^= scratch
+    np.left_shift(bits, 31, out=bits)
+    bits |= np.float32(amplitude).view(np.uint32)
+    return bits.view(np.float32)
+
+
+def _record_blocks(source):
+    """Cabeçalho e blocos de registros (cópias pequenas, graváveis) do STL de origem"""
+    mesh_format = mesh.detect_format(source)
+    if mesh_format == mesh.FORMAT_BINARY:
+        with open(source, 'rb') as handle:
+            header = handle.read(mesh.HEADER_SIZE)
+        records = mesh.binary_records(source)
+        count = len(records)
+        blocks = (np.array(records[start:start + BLOCK_TRIANGLES]) for start in range(0, count, BLOCK_TRIANGLES))
+        return header, count, blocks
+
+    header = b''
+    attributes = None
+    if mesh_format == mesh.FORMAT_COMPACT:
+        compact = codec.read(source)
+        triangles = compact.triangles()
+        attributes = compact.attributes
+        if compact.source_format == mesh.FORMAT_BINARY:
+            header = compact.header
+    else:
+        triangles = mesh.load_triangles(source, mesh_format)
+
+    def decoded_blocks():
+        for start in range(0, len(triangles), BLOCK_TRIANGLES):
+            block = np.zeros(len(triangles[start:start + BLOCK_TRIANGLES]), dtype=mesh.TRIANGLE_DTYPE)
+            block['vertices'] = triangles[start:start + BLOCK_TRIANGLES]
+            if attributes is not None:
+                block['attribute'] = attributes[start:start + BLOCK_TRIANGLES]
+            yield block
+    return header, len(triangles), decoded_blocks()
+
+
+def embed(source, target, key, amplitude=DEFAULT_AMPLITUDE):
+    """
+    Grava em `target` uma cópia binária de `source` com a marca da chave
+
+    O original é lido do memmap e gravado em blocos, com memória constante.
+    A cópia vai para um temporário ao lado e é renomeada no fim, então
+    leitores nunca veem um arquivo pela metade.
+    """
+    header, count, blocks = _record_blocks(source)
+    keys = axis_keys(key)
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            output.write(header.ljust(mesh.HEADER_SIZE, b'\0'))
+            output.write(count.to_bytes(mesh.COUNT_SIZE, 'little'))
+            for block in blocks:
+                coordinates = block['vertices'].reshape(-1, 3)
+                coordinates += pattern(coordinates, keys, amplitude)
+                block['vertices'] = coordinates.reshape(-1, 3, 3)
+                block.tofile(output)
+        os.replace(temporary, target)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return target
+
+
+def _vertices(path):
+    return mesh.load_triangles(path).reshape(-1, 3)
+
+
+def detect(original, suspect, keys, amplitude=DEFAULT_AMPLITUDE, sample=DETECTION_SAMPLE):
+    """
+    Pontuação de cada chave para o arquivo suspeito (~1: marca presente)
+
+    Exige a mesma ordem de triângulos do original (a cópia baixada, mesmo
+    convertida para ASCII ou transladada).
+    """
+    original_vertices = _vertices(original)
+    suspect_vertices = _vertices(suspect)
+    if original_vertices.shape != suspect_vertices.shape:
+        raise mesh.MeshError('Malha suspeita com número de triângulos diferente do original')
+
+    rows = np.arange(len(original_vertices))
+    if len(rows) > sample:
+        rows = np.sort(np.random.default_rng(0).choice(rows, sample, replace=False))
+    reference = np.asarray(original_vertices[rows])
+    difference = np.asarray(suspect_vertices[rows], dtype=np.float64) - reference
+    difference -= difference.mean(axis=0)
+
+    return [
+        float((difference * pattern(reference, axis_keys(key), 1.0)).mean() / amplitude)
+        for key in keys
+    ]
@@ -0,0 +1,61 @@
+"""
+Valores canônicos dos campos livres do produto
+
+O tempo de impressão é digitado como HH:MM e as medidas em mm/cm/pol e g/kg.
+Para ordenar e filtrar no banco, o Product guarda também a duração em
+segundos, as dimensões em milímetros e o peso em gramas.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+
+MM_PER_UNIT = {'mm': Decimal('1'), 'cm': Decimal('10'), 'in': Decimal('25.4')}
+GRAMS_PER_UNIT = {'g': Decimal('1'), 'kg': Decimal('1000')}
+CANONICAL_FIELDS = (
+    'print_time_seconds', 'dimensions_x_mm', 'dimensions_y_mm', 'dimensions_z_mm', 'weight_grams',
+)
+
+_CENT = Decimal('0.01')
+
+
+def print_time_seconds(value):
+    """Segundos de um tempo HH:MM; None se vazio ou inválido"""
+    try:
+        hours, minutes = (value or '').strip().split(':')
+        hours, minutes = int(hours), int(minutes)
+    except ValueError:
+        return None
+    if hours < 0 or not 0 <= minutes < 60:
+        return None
+    return (hours * 60 + minutes) * 60
+
+
+def format_print_time(seconds):
+    """HH:MM de uma duração em segundos (minutos arredondados para cima)"""
+    minutes = -(-int(seconds) // 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _scaled(value, factor):
+    if value is None or factor is None:
+        return None
+    return (Decimal(value) * factor).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def to_mm(value, unit):
+    return _scaled(value, MM_PER_UNIT.get(unit))
+
+
+def to_grams(value, unit):
+    return _scaled(value, GRAMS_PER_UNIT.get(unit))
+
+
+def canonical_values(print_time_estimate, dimensions_x, dimensions_y, dimensions_z, dimension_unit, weight, weight_unit):
+    """Valores de CANONICAL_FIELDS a partir dos campos digitados"""
+    return {
+        'print_time_seconds': print_time_seconds(print_time_estimate),
+        'dimensions_x_mm': to_mm(dimensions_x, dimension_unit),
+        'dimensions_y_mm': to_mm(dimensions_y, dimension_unit),
+        'dimensions_z_mm': to_mm(dimensions_z, dimension_unit),
+        'weight_grams': to_grams(weight, weight_unit),
+    }
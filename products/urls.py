@@ -7,10 +7,18 @@ urlpatterns = [
     # Produtos
     path('', views.product_list, name='product_list'),
     path('create/', views.product_create, name='product_create'),
+    path('bulk-action/', views.product_bulk_action, name='product_bulk_action'),
+    path('reports/inventory/', views.inventory_report, name='inventory_report'),
     path('<int:pk>/', views.product_detail, name='product_detail'),
     path('<int:pk>/edit/', views.product_edit, name='product_edit'),
     path('<int:pk>/delete/', views.product_delete, name='product_delete'),
     path('<int:pk>/toggle-status/', views.product_toggle_status, name='product_toggle_status'),
+    path('<int:pk>/images/', views.product_images_update, name='product_images_update'),
+    path('<int:pk>/stl/uploads/', views.stl_upload_start, name='stl_upload_start'),
+    path('<int:pk>/gcode/', views.gcode_upload, name='gcode_upload'),
+    path('stl/uploads/<uuid:upload_id>/', views.stl_upload_chunk, name='stl_upload_chunk'),
+    path('stl/<int:pk>/download/', views.stl_download, name='stl_download'),
+    path('stl/<int:pk>/preview/', views.stl_preview_mesh, name='stl_preview_mesh'),
     
     # Categorias
     path('categories/', views.category_list, name='category_list'),
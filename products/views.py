@@ -1,18 +1,34 @@
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.http import FileResponse, Http404, JsonResponse
+from django.views.decorators.http import require_POST, require_http_methods
 from django.utils.translation import gettext as _
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Q, Max, Count, F
 from django.forms import formset_factory
 from django.utils import translation
+from django.core.exceptions import ValidationError
+from django.db import transaction
 
-from .models import Product, ProductImage, Category, ProductType, Currency, Scale
+from .models import Product, Category, ProductType, Currency, Scale, StlAsset, StlUpload
 from .forms import ProductForm, CategoryForm, ProductTypeForm, ScaleForm
 from .translations import get_product_type_translation, get_category_translation
+from .services import ProductImageService, ProductBulkService
+from .reports import DEFAULT_DIMENSION, DIMENSIONS, InventoryReportService
+from .gcode.files import GcodeFileService
+from .stl.previews import StlPreviewService
+from .stl.protection import StlProtectionService
+from .stl.uploads import StlUploadService
+from core import bulk, quotas
+from core.quotas import QuotaService
 from core.models import Company, Country
+from customers.models import Customer
+from core.decorators import conditional_view
 
 
 def get_user_company(request):
@@ -27,49 +43,145 @@ def get_user_company(request):
     return company
 
 
-@login_required
-def product_list(request):
-    """Lista de produtos com filtros"""
-    company = get_user_company(request)
-    if not company:
-        return redirect('company_setup')
-    
+# Ordenações da listagem sobre os valores canônicos
+PRODUCT_SORTS = {
+    'print_time': 'print_time_seconds',
+    '-print_time': '-print_time_seconds',
+    'height': 'dimensions_z_mm',
+    '-height': '-dimensions_z_mm',
+    'weight': 'weight_grams',
+    '-weight': '-weight_grams',
+}
+
+
+def _decimal_param(value):
+    """Número (Decimal) não negativo de um parâmetro GET, ou None se vazio/inválido"""
+    try:
+        number = Decimal(value.replace(',', '.'))
+    except (InvalidOperation, AttributeError):
+        return None
+    return number if number.is_finite() and number >= 0 else None
+
+
+def _filter_products(request, company):
+    """Aplica os filtros da listagem; retorna a queryset e os valores dos filtros"""
     products = Product.objects.filter(company=company)  # Filtrar por empresa
     
     # Filtros
-    search = request.GET.get('search', '')
-    product_type = request.GET.get('product_type', '')
-    category = request.GET.get('category', '')
-    min_price = request.GET.get('min_price', '')
-    max_price = request.GET.get('max_price', '')
-    status = request.GET.get('status', '')  # Novo filtro de status
+    filters = {
+        'search': request.GET.get('search', ''),
+        'product_type': request.GET.get('product_type', ''),
+        'category': request.GET.get('category', ''),
+        'min_price': request.GET.get('min_price', ''),
+        'max_price': request.GET.get('max_price', ''),
+        'status': request.GET.get('status', ''),  # Novo filtro de status
+        'min_print_hours': request.GET.get('min_print_hours', ''),
+        'max_print_hours': request.GET.get('max_print_hours', ''),
+        'bed_size': request.GET.get('bed_size', ''),
+        'max_height': request.GET.get('max_height', ''),
+        'min_weight': request.GET.get('min_weight', ''),
+        'max_weight': request.GET.get('max_weight', ''),
+        'sort': request.GET.get('sort', ''),
+    }
     
-    if search:
+    if filters['search']:
         products = products.filter(
-            Q(name__icontains=search) | 
-            Q(description__icontains=search) |
-            Q(scale__icontains=search)
+            Q(name__icontains=filters['search']) | 
+            Q(description__icontains=filters['search']) |
+            Q(scale__name__icontains=filters['search'])
         )
     
-    if product_type:
-        products = products.filter(product_type_id=product_type)
+    if filters['product_type']:
+        products = products.filter(product_type_id=filters['product_type'])
     
-    if category:
-        products = products.filter(category_id=category)
+    if filters['category']:
+        products = products.filter(category_id=filters['category'])
     
-    if min_price:
-        products = products.filter(sale_price__gte=min_price)
+    if filters['min_price']:
+        products = products.filter(sale_price__gte=filters['min_price'])
     
-    if max_price:
-        products = products.filter(sale_price__lte=max_price)
+    if filters['max_price']:
+        products = products.filter(sale_price__lte=filters['max_price'])
     
     # Filtro de status
-    if status == 'active':
+    if filters['status'] == 'active':
         products = products.filter(is_active=True)
-    elif status == 'inactive':
+    elif filters['status'] == 'inactive':
         products = products.filter(is_active=False)
     # Se status estiver vazio, mostra todos (ativo e inativo)
     
+    # Faixas sobre os valores canônicos (segundos, mm, gramas), indexados por empresa
+    min_hours = _decimal_param(filters['min_print_hours'])
+    if min_hours is not None:
+        products = products.filter(print_time_seconds__gte=min_hours * 3600)
+    max_hours = _decimal_param(filters['max_print_hours'])
+    if max_hours is not None:
+        products = products.filter(print_time_seconds__lte=max_hours * 3600)
+    
+    # Cabe na mesa: X e Y até o tamanho da mesa (quadrada), Z até a altura
+    bed_size = _decimal_param(filters['bed_size'])
+    if bed_size is not None:
+        products = products.filter(dimensions_x_mm__lte=bed_size, dimensions_y_mm__lte=bed_size)
+    max_height = _decimal_param(filters['max_height'])
+    if max_height is not None:
+        products = products.filter(dimensions_z_mm__lte=max_height)
+    
+    min_weight = _decimal_param(filters['min_weight'])
+    if min_weight is not None:
+        products = products.filter(weight_grams__gte=min_weight)
+    max_weight = _decimal_param(filters['max_weight'])
+    if max_weight is not None:
+        products = products.filter(weight_grams__lte=max_weight)
+    
+    if filters['sort'] in PRODUCT_SORTS:
+        field = PRODUCT_SORTS[filters['sort']]
+        order = F(field.lstrip('-'))
+        order = order.desc(nulls_last=True) if field.startswith('-') else order.asc(nulls_last=True)
+        products = products.order_by(order, '-created_at')
+    
+    return products, filters
+
+
+def _image_changes(request):
+    """Lê do POST as alterações de imagens (ver ProductImageService.apply_changes)"""
+    order = request.POST.get('image_order', '')
+    return {
+        'new_files': request.FILES.getlist('images'),
+        'remove_ids': request.POST.getlist('remove_images'),
+        'order': [token for token in order.split(',') if token],
+        'primary': request.POST.get('primary_image'),
+    }
+
+
+def _product_list_version(request):
+    """Validador da listagem: MAX(updated_at) e COUNT dos produtos filtrados"""
+    company = request.user.get_primary_company()
+    if not company:
+        return None
+    products, _filters = _filter_products(request, company)
+    stats = products.aggregate(last_update=Max('updated_at'), total=Count('id'))
+    return f"{company.pk}:{stats['total']}:{stats['last_update']}"
+
+
+def _product_detail_version(request, pk):
+    """Validador do detalhe: updated_at do produto da empresa"""
+    company = request.user.get_primary_company()
+    if not company:
+        return None
+    updated_at = Product.objects.filter(pk=pk, company=company).values_list('updated_at', flat=True).first()
+    return f"{company.pk}:{pk}:{updated_at}" if updated_at else None
+
+
+@login_required
+@conditional_view(_product_list_version)
+def product_list(request):
+    """Lista de produtos com filtros"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+    
+    products, filters = _filter_products(request, company)
+    
     # Paginação
     paginator = Paginator(products, 12)
     page_number = request.GET.get('page')
@@ -95,18 +207,15 @@ def product_list(request):
         'page_obj': page_obj,
         'product_types': product_types,
         'categories': categories,
-        'search': search,
-        'product_type': product_type,
-        'category': category,
-        'min_price': min_price,
-        'max_price': max_price,
-        'status': status,  # Adicionando status ao contexto
+        'currencies': Currency.objects.all(),
+        **filters,
     }
     
     return render(request, 'products/product_list.html', context)
 
 
 @login_required
+@conditional_view(_product_detail_version)
 def product_detail(request, pk):
     """Detalhes do produto"""
     company = get_user_company(request)
@@ -117,6 +226,8 @@ def product_detail(request, pk):
     
     context = {
         'product': product,
+        'stl_protection': StlProtectionService.is_enabled(request.user),
+        'stl_preview_budgets': settings.STL_PREVIEW_MESH_BUDGETS,
     }
     
     return render(request, 'products/product_detail.html', context)
@@ -135,28 +246,22 @@ def product_create(request):
             product = form.save(commit=False)
             product.created_by = request.user
             product.company = company  # Associar à empresa
-            product.save()
+            try:
+                # Limite de produtos do plano (contador de uso, sem COUNT)
+                with QuotaService.reserve(quotas.PRODUCTS, company=company):
+                    product.save()
+            except ValidationError as error:
+                messages.error(request, error.messages[0])
+                return render(request, 'products/product_form.html', {'form': form})
             
-            # Processa as imagens
-            images = request.FILES.getlist('images')
-            if len(images) > 5:
-                messages.error(request, _('products.form.max_images_info'))
+            # Processa as imagens (a primeira é a principal, salvo indicação contrária)
+            try:
+                ProductImageService.apply_changes(product, **_image_changes(request))
+            except ValidationError as error:
+                messages.error(request, error.messages[0])
                 product.delete()
                 return render(request, 'products/product_form.html', {'form': form})
             
-            for i, image in enumerate(images):
-                if image.size > 10 * 1024 * 1024:  # 10MB
-                    messages.error(request, _('products.form.max_size_info'))
-                    product.delete()
-                    return render(request, 'products/product_form.html', {'form': form})
-                
-                ProductImage.objects.create(
-                    product=product,
-                    image=image,
-                    is_primary=(i == 0),  # Primeira imagem é principal
-                    order_index=i
-                )
-            
             messages.success(request, _('products.messages.product_created'))
             return redirect('products:product_detail', pk=product.pk)
     else:
@@ -200,24 +305,16 @@ def product_edit(request, pk):
     if request.method == 'POST':
         form = ProductForm(request.POST, request.FILES, instance=product)
         if form.is_valid():
-            product = form.save()
-            
-            # Processa novas imagens
-            images = request.FILES.getlist('images')
-            if images:
-                # Remove imagens antigas se novas foram enviadas
-                product.images.all().delete()
-                
-                for i, image in enumerate(images):
-                    ProductImage.objects.create(
-                        product=product,
-                        image=image,
-                        is_primary=(i == 0),
-                        order_index=i
-                    )
-            
-            messages.success(request, _('products.messages.product_updated'))
-            return redirect('products:product_detail', pk=product.pk)
+            try:
+                with transaction.atomic():
+                    product = form.save()
+                    # Aplica só o que mudou: novos arquivos, remoções, ordem e principal
+                    ProductImageService.apply_changes(product, **_image_changes(request))
+            except ValidationError as error:
+                messages.error(request, error.messages[0])
+            else:
+                messages.success(request, _('products.messages.product_updated'))
+                return redirect('products:product_detail', pk=product.pk)
     else:
         form = ProductForm(instance=product)
 
@@ -248,6 +345,269 @@ def product_edit(request, pk):
     return render(request, 'products/product_form.html', context)
 
 
+@login_required
+@require_POST
+def product_images_update(request, pk):
+    """Adicionar, remover, reordenar e definir a imagem principal via AJAX"""
+    company = get_user_company(request)
+    if not company:
+        return JsonResponse({'success': False, 'errors': [_('products.messages.company_required')]}, status=400)
+    
+    product = get_object_or_404(Product, pk=pk, company=company)  # Filtrar por empresa
+    
+    try:
+        images = ProductImageService.apply_changes(product, **_image_changes(request))
+    except ValidationError as error:
+        return JsonResponse({'success': False, 'errors': error.messages}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'images': ProductImageService.serialize(images),
+    })
+
+
+def _stl_upload_payload(upload):
+    payload = {
+        'success': upload.status != StlUpload.STATUS_FAILED,
+        'upload_id': str(upload.pk),
+        'url': reverse('products:stl_upload_chunk', args=[upload.pk]),
+        'status': upload.status,
+        'received': upload.received,
+        'total_size': upload.total_size,
+        'chunk_size': settings.STL_UPLOAD_CHUNK_SIZE,
+    }
+    if upload.asset_id:
+        asset = upload.asset
+        payload['asset'] = {
+            'id': asset.pk,
+            'format': asset.format,
+            'triangle_count': asset.triangle_count,
+            'size_mm': [str(asset.size_x_mm), str(asset.size_y_mm), str(asset.size_z_mm)],
+            'volume_mm3': str(asset.volume_mm3),
+            'surface_area_mm2': str(asset.surface_area_mm2),
+            'similar_to': None,
+        }
+        if asset.similar_to_id:
+            similar = asset.similar_to
+            payload['asset']['similar_to'] = {
+                'id': similar.pk,
+                'name': similar.original_name,
+                'product_id': similar.product_id,
+                'url': reverse('products:product_detail', args=[similar.product_id]),
+                'distance': round(asset.similarity_distance, 4),
+            }
+    return payload
+
+
+@login_required
+@require_POST
+def gcode_upload(request, pk):
+    """Envia um G-code fatiado; o tempo de impressão e o peso do produto vêm da análise (em segundo plano)"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+
+    product = get_object_or_404(Product, pk=pk, company=company)  # Filtrar por empresa
+    uploaded = request.FILES.get('gcode')
+    if not uploaded:
+        messages.error(request, _('products.gcode.file_required'))
+        return redirect('products:product_detail', pk=product.pk)
+
+    try:
+        GcodeFileService.attach(product, uploaded, request.user)
+    except ValidationError as error:
+        messages.error(request, error.messages[0])
+    else:
+        messages.success(request, _('products.gcode.queued'))
+    return redirect('products:product_detail', pk=product.pk)
+
+
+@login_required
+@require_POST
+def stl_upload_start(request, pk):
+    """Abre um upload de STL em partes para o produto"""
+    company = get_user_company(request)
+    if not company:
+        return JsonResponse({'success': False, 'errors': [_('products.messages.company_required')]}, status=400)
+
+    product = get_object_or_404(Product, pk=pk, company=company)  # Filtrar por empresa
+    try:
+        size = int(request.POST.get('size', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'errors': [_('products.stl.invalid_size')]}, status=400)
+
+    try:
+        upload = StlUploadService.start(company, request.user, product, request.POST.get('filename'), size)
+    except ValidationError as error:
+        return JsonResponse({'success': False, 'errors': error.messages}, status=400)
+
+    return JsonResponse(_stl_upload_payload(upload), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'PUT'])
+def stl_upload_chunk(request, upload_id):
+    """
+    GET: quantos bytes já chegaram (para retomar)
+    PUT: corpo cru com a parte seguinte, a partir do cabeçalho X-Upload-Offset
+    """
+    company = get_user_company(request)
+    if not company:
+        return JsonResponse({'success': False, 'errors': [_('products.messages.company_required')]}, status=400)
+
+    upload = get_object_or_404(StlUpload, pk=upload_id, company=company)  # Filtrar por empresa
+    if request.method == 'GET':
+        return JsonResponse(_stl_upload_payload(upload))
+
+    try:
+        offset = int(request.headers.get('X-Upload-Offset', ''))
+        length = int(request.headers.get('Content-Length', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'errors': [_('products.stl.invalid_chunk')]}, status=400)
+
+    try:
+        # Lê do stream da requisição (não usa request.body, que carregaria a parte em memória)
+        upload = StlUploadService.append(upload, offset, request, length)
+    except ValidationError as error:
+        upload.refresh_from_db()
+        status = 409 if error.code in ('offset', 'closed') else 400
+        return JsonResponse({**_stl_upload_payload(upload), 'success': False, 'errors': error.messages}, status=status)
+
+    return JsonResponse(_stl_upload_payload(upload))
+
+
+@login_required
+def stl_download(request, pk):
+    """Download do STL; com Segurança STL no plano, a cópia leva a marca do cliente"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+
+    asset = get_object_or_404(StlAsset, pk=pk, company=company)  # Filtrar por empresa
+    customer = None
+    customer_id = request.GET.get('customer', '').strip()
+    if customer_id:
+        if not customer_id.isdigit():
+            raise Http404
+        customer = get_object_or_404(Customer, pk=customer_id, company=company)  # Filtrar por empresa
+
+    path = StlProtectionService.download(asset, request.user, customer=customer)
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=asset.original_name)
+
+
+def _preview_budget(request):
+    """Orçamento de triângulos pedido (?budget=); o primeiro configurado por padrão"""
+    budget = request.GET.get('budget', '').strip()
+    if not budget:
+        return settings.STL_PREVIEW_MESH_BUDGETS[0]
+    if not budget.isdigit() or int(budget) not in settings.STL_PREVIEW_MESH_BUDGETS:
+        raise Http404
+    return int(budget)
+
+
+def _stl_preview_version(request, pk):
+    """Validador da malha de prévia: hash do STL (o arquivo nunca muda) e orçamento"""
+    company = request.user.get_primary_company()
+    if not company:
+        return None
+    digest = StlAsset.objects.filter(pk=pk, company=company).values_list('content_hash', flat=True).first()
+    return f"{digest}:{request.GET.get('budget', '')}" if digest else None
+
+
+@login_required
+@conditional_view(_stl_preview_version)
+def stl_preview_mesh(request, pk):
+    """Malha de prévia decimada e quantizada (gzip), para o visualizador do detalhe do produto"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+
+    asset = get_object_or_404(StlAsset, pk=pk, company=company)  # Filtrar por empresa
+    path = StlPreviewService.meshes(asset)[_preview_budget(request)]
+    response = FileResponse(open(path, 'rb'), content_type='application/octet-stream')
+    response['Content-Encoding'] = 'gzip'
+    return response
+
+
+@login_required
+@require_POST
+def product_bulk_action(request):
+    """Ação em lote sobre os produtos marcados (ou todos os resultados dos filtros)"""
+    company = get_user_company(request)
+    if not company:
+        return JsonResponse({'success': False, 'message': _('products.messages.company_required')}, status=400)
+    
+    if bulk.select_all(request):
+        products, _filters = _filter_products(request, company)  # Filtros vêm na query string
+    else:
+        products = Product.objects.filter(company=company, pk__in=bulk.selected_ids(request))
+    
+    try:
+        operation = ProductBulkService.operation(
+            request.POST.get('action'),
+            company=company,
+            category_id=request.POST.get('category_id'),
+            currency_id=request.POST.get('currency_id'),
+        )
+    except ValidationError as error:
+        return JsonResponse({'success': False, 'message': error.messages[0]}, status=400)
+    
+    try:
+        if request.POST.get('action') == 'activate':
+            # Recusa de saída a seleção que não cabe no plano; cada bloco ainda reserva o contador
+            QuotaService.check(quotas.PRODUCTS, company=company, count=products.filter(is_active=False).count())
+        result = bulk.dispatch(request.user, company, products, operation, background=bulk.requested_background(request))
+    except ValidationError as error:
+        return JsonResponse({'success': False, 'message': error.messages[0]}, status=400)
+    return bulk.json_response(result)
+
+
+@login_required
+def inventory_report(request):
+    """Relatório de estoque, receita esperada e margem (totais pré-agregados)"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+    
+    dimension = request.GET.get('group_by')
+    if dimension not in DIMENSIONS:
+        dimension = DEFAULT_DIMENSION
+    currency = Currency.objects.filter(code=request.GET.get('currency', '').upper()).first()
+    if currency is None:
+        currency = InventoryReportService.default_currency(company)
+    
+    report = InventoryReportService.report(company, dimension, currency)
+    
+    # Nomes traduzidos, como na listagem
+    current_language = translation.get_language()
+    for row in report['rows']:
+        obj = row['object']
+        if obj is None:
+            row['label'] = None
+        elif dimension == 'category':
+            row['label'] = get_category_translation(obj.name, current_language)
+        elif dimension == 'product_type':
+            row['label'] = get_product_type_translation(obj.name, current_language)
+        elif dimension == 'currency':
+            row['label'] = f"{obj.code} - {obj.name}"
+        else:
+            row['label'] = obj.name
+    
+    context = {
+        'report': report,
+        'dimension': dimension,
+        'dimensions': [
+            ('category', _('products.category')),
+            ('product_type', _('products.product_type')),
+            ('scale', _('products.scale')),
+            ('currency', _('products.currency')),
+        ],
+        'currency': currency,
+        'currencies': Currency.objects.all(),
+    }
+    return render(request, 'products/inventory_report.html', context)
+
+
 @login_required
 def product_delete(request, pk):
     """Excluir produto"""
@@ -279,7 +639,16 @@ def product_toggle_status(request, pk):
     
     product = get_object_or_404(Product, pk=pk, company=company)  # Filtrar por empresa
     product.is_active = not product.is_active
-    product.save()
+    if product.is_active:
+        # Reativado, volta a contar no limite de produtos do plano
+        try:
+            with QuotaService.reserve(quotas.PRODUCTS, company=company):
+                product.save()
+        except ValidationError as error:
+            messages.error(request, error.messages[0])
+            return redirect('products:product_list')
+    else:
+        product.save()
     
     status = _('ativado') if product.is_active else _('desativado')
     messages.success(request, _('products.messages.product_status_changed').format(status))
@@ -1,3 +1,18 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Printer, PrintJob
+
+
+@admin.register(Printer)
+class PrinterAdmin(admin.ModelAdmin):
+    list_display = ['name', 'company', 'speed_factor', 'bed_x_mm', 'bed_y_mm', 'bed_z_mm', 'is_available']
+    list_filter = ['is_available']
+    search_fields = ['name', 'company__name']
+
+
+@admin.register(PrintJob)
+class PrintJobAdmin(admin.ModelAdmin):
+    list_display = ['product', 'quantity', 'company', 'priority', 'status', 'printer', 'sequence', 'planned_start', 'planned_end']
+    list_filter = ['status', 'priority']
+    search_fields = ['product__name', 'company__name']
+    raw_id_fields = ['product', 'printer', 'created_by']
@@ -0,0 +1,63 @@
+from django import forms
+from django.utils.translation import gettext_lazy as _
+
+from products.models import Product
+from .models import Printer, PrintJob
+
+
+class PrinterForm(forms.ModelForm):
+    class Meta:
+        model = Printer
+        fields = ['name', 'speed_factor', 'bed_x_mm', 'bed_y_mm', 'bed_z_mm']
+        widgets = {
+            'name': forms.TextInput(attrs={'class': 'form-control'}),
+            'speed_factor': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.05', 'min': '0.1'}),
+            'bed_x_mm': forms.NumberInput(attrs={'class': 'form-control', 'step': '1', 'min': '1'}),
+            'bed_y_mm': forms.NumberInput(attrs={'class': 'form-control', 'step': '1', 'min': '1'}),
+            'bed_z_mm': forms.NumberInput(attrs={'class': 'form-control', 'step': '1', 'min': '1'}),
+        }
+
+    def clean_speed_factor(self):
+        speed_factor = self.cleaned_data.get('speed_factor')
+        if speed_factor is not None and speed_factor <= 0:
+            raise forms.ValidationError(_('projects.form.validation.speed_factor'))
+        return speed_factor
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field in ('bed_x_mm', 'bed_y_mm', 'bed_z_mm'):
+            value = cleaned_data.get(field)
+            if value is not None and value <= 0:
+                self.add_error(field, _('projects.form.validation.bed_size'))
+        return cleaned_data
+
+
+class PrintJobForm(forms.ModelForm):
+    """Trabalho de impressão; sem duração informada, usa o tempo estimado do produto x quantidade"""
+
+    class Meta:
+        model = PrintJob
+        fields = ['product', 'quantity', 'priority', 'duration_minutes']
+        widgets = {
+            'product': forms.Select(attrs={'class': 'form-select'}),
+            'quantity': forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
+            'priority': forms.Select(attrs={'class': 'form-select'}),
+            'duration_minutes': forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
+        }
+
+    def __init__(self, *args, company=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['product'].queryset = Product.objects.filter(company=company, is_active=True).only('id', 'name', 'print_time_seconds')
+        self.fields['duration_minutes'].required = False
+        self.fields['duration_minutes'].help_text = _('projects.form.duration_help')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        product = cleaned_data.get('product')
+        quantity = cleaned_data.get('quantity') or 1
+        if product and not cleaned_data.get('duration_minutes'):
+            if not product.print_time_seconds:
+                self.add_error('duration_minutes', _('projects.form.validation.duration_required'))
+            else:
+                cleaned_data['duration_minutes'] = -(-product.print_time_seconds * quantity // 60)
+        return cleaned_data
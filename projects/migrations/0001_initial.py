@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0020_country_continent_country_region'),
+        ('products', '0012_inventory_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Printer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='common.name')),
+                ('speed_factor', models.DecimalField(decimal_places=2, default=1, help_text='projects.printer.speed_factor_help', max_digits=4, verbose_name='projects.printer.speed_factor')),
+                ('is_available', models.BooleanField(default=True, verbose_name='projects.printer.is_available')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='projects.created_at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='projects.updated_at')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='printers', to='core.company', verbose_name='projects.company')),
+            ],
+            options={
+                'verbose_name': 'projects.printer_verbose',
+                'verbose_name_plural': 'projects.printer_verbose_plural',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PrintJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='projects.job.quantity')),
+                ('duration_minutes', models.PositiveIntegerField(verbose_name='projects.job.duration_minutes')),
+                ('priority', models.PositiveSmallIntegerField(choices=[(0, 'projects.job.priority_low'), (1, 'projects.job.priority_normal'), (2, 'projects.job.priority_high'), (3, 'projects.job.priority_urgent')], default=1, verbose_name='projects.job.priority')),
+                ('status', models.CharField(choices=[('queued', 'projects.job.status_queued'), ('printing', 'projects.job.status_printing'), ('done', 'projects.job.status_done'), ('cancelled', 'projects.job.status_cancelled')], default='queued', max_length=10, verbose_name='projects.job.status')),
+                ('sequence', models.PositiveIntegerField(default=0, verbose_name='projects.job.sequence')),
+                ('planned_start', models.DateTimeField(blank=True, null=True, verbose_name='projects.job.planned_start')),
+                ('planned_end', models.DateTimeField(blank=True, null=True, verbose_name='projects.job.planned_end')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='projects.created_at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='projects.updated_at')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='print_jobs', to='core.company', verbose_name='projects.company')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='projects.created_by')),
+                ('printer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='projects.printer', verbose_name='projects.job.printer')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='print_jobs', to='products.product', verbose_name='projects.job.product')),
+            ],
+            options={
+                'verbose_name': 'projects.job_verbose',
+                'verbose_name_plural': 'projects.job_verbose_plural',
+                'ordering': ['printer', 'sequence'],
+                'indexes': [models.Index(fields=['company', 'status'], name='print_job_company_status'), models.Index(fields=['printer', 'status', 'sequence'], name='print_job_printer_queue')],
+            },
+        ),
+    ]
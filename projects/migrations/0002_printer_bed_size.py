@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='printer',
+            name='bed_x_mm',
+            field=models.DecimalField(decimal_places=2, default=220, max_digits=7, verbose_name='projects.printer.bed_x_mm'),
+        ),
+        migrations.AddField(
+            model_name='printer',
+            name='bed_y_mm',
+            field=models.DecimalField(decimal_places=2, default=220, max_digits=7, verbose_name='projects.printer.bed_y_mm'),
+        ),
+        migrations.AddField(
+            model_name='printer',
+            name='bed_z_mm',
+            field=models.DecimalField(decimal_places=2, default=250, max_digits=7, verbose_name='projects.printer.bed_z_mm'),
+        ),
+    ]
@@ -1,3 +1,121 @@
 from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+User = get_user_model()
+
+
+class Printer(models.Model):
+    """Impressora 3D da empresa"""
+    company = models.ForeignKey(
+        'core.Company',
+        on_delete=models.CASCADE,
+        related_name='printers',
+        verbose_name=_('projects.company')
+    )
+    name = models.CharField(max_length=100, verbose_name=_('common.name'))
+    speed_factor = models.DecimalField(
+        max_digits=4,
+        decimal_places=2,
+        default=1,
+        verbose_name=_('projects.printer.speed_factor'),
+        help_text=_('projects.printer.speed_factor_help')
+    )
+    bed_x_mm = models.DecimalField(max_digits=7, decimal_places=2, default=220, verbose_name=_('projects.printer.bed_x_mm'))
+    bed_y_mm = models.DecimalField(max_digits=7, decimal_places=2, default=220, verbose_name=_('projects.printer.bed_y_mm'))
+    bed_z_mm = models.DecimalField(max_digits=7, decimal_places=2, default=250, verbose_name=_('projects.printer.bed_z_mm'))
+    is_available = models.BooleanField(default=True, verbose_name=_('projects.printer.is_available'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('projects.created_at'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('projects.updated_at'))
+
+    class Meta:
+        verbose_name = _('projects.printer_verbose')
+        verbose_name_plural = _('projects.printer_verbose_plural')
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class PrintJob(models.Model):
+    """Impressão de um produto (quantidade de peças) na fila da empresa"""
+    STATUS_QUEUED = 'queued'
+    STATUS_PRINTING = 'printing'
+    STATUS_DONE = 'done'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, _('projects.job.status_queued')),
+        (STATUS_PRINTING, _('projects.job.status_printing')),
+        (STATUS_DONE, _('projects.job.status_done')),
+        (STATUS_CANCELLED, _('projects.job.status_cancelled')),
+    ]
+
+    PRIORITY_LOW = 0
+    PRIORITY_NORMAL = 1
+    PRIORITY_HIGH = 2
+    PRIORITY_URGENT = 3
+    PRIORITY_CHOICES = [
+        (PRIORITY_LOW, _('projects.job.priority_low')),
+        (PRIORITY_NORMAL, _('projects.job.priority_normal')),
+        (PRIORITY_HIGH, _('projects.job.priority_high')),
+        (PRIORITY_URGENT, _('projects.job.priority_urgent')),
+    ]
+
+    company = models.ForeignKey(
+        'core.Company',
+        on_delete=models.CASCADE,
+        related_name='print_jobs',
+        verbose_name=_('projects.company')
+    )
+    product = models.ForeignKey(
+        'products.Product',
+        on_delete=models.CASCADE,
+        related_name='print_jobs',
+        verbose_name=_('projects.job.product')
+    )
+    quantity = models.PositiveIntegerField(default=1, verbose_name=_('projects.job.quantity'))
+    duration_minutes = models.PositiveIntegerField(verbose_name=_('projects.job.duration_minutes'))
+    priority = models.PositiveSmallIntegerField(
+        choices=PRIORITY_CHOICES,
+        default=PRIORITY_NORMAL,
+        verbose_name=_('projects.job.priority')
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+        verbose_name=_('projects.job.status')
+    )
+
+    # Plano calculado pelo escalonador (projects/scheduler.py)
+    printer = models.ForeignKey(
+        Printer,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs',
+        verbose_name=_('projects.job.printer')
+    )
+    sequence = models.PositiveIntegerField(default=0, verbose_name=_('projects.job.sequence'))
+    planned_start = models.DateTimeField(null=True, blank=True, verbose_name=_('projects.job.planned_start'))
+    planned_end = models.DateTimeField(null=True, blank=True, verbose_name=_('projects.job.planned_end'))
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name=_('projects.created_by')
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('projects.created_at'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('projects.updated_at'))
+
+    class Meta:
+        verbose_name = _('projects.job_verbose')
+        verbose_name_plural = _('projects.job_verbose_plural')
+        ordering = ['printer', 'sequence']
+        indexes = [
+            models.Index(fields=['company', 'status'], name='print_job_company_status'),
+            models.Index(fields=['printer', 'status', 'sequence'], name='print_job_printer_queue'),
+        ]
+
+    def __str__(self):
+        return f"{self.product} x{self.quantity}"
@@ -0,0 +1,261 @@
+"""
+Montagem das mesas de impressão
+
+Distribui um pedido (produtos x quantidades) em mesas do tamanho da mesa da
+impressora com a heurística MaxRects (Best Short Side Fit):
+
+- cada mesa guarda a lista de retângulos livres maximais (que podem se
+  sobrepor); cada peça vai para o retângulo livre onde sobra o menor lado,
+  em pé ou girada 90°;
+- ao colocar uma peça, os retângulos livres que ela toca são cortados em até
+  quatro pedaços e os que ficam contidos em outros são descartados;
+- as peças entram da maior área para a menor; cada uma vai para a primeira
+  mesa aberta onde cabe e, se não couber em nenhuma, abre uma mesa nova.
+
+A altura (Z) só limita: peças mais altas que o volume da impressora ficam de
+fora. Impressão FDM não empilha peças, então a montagem é 2D sobre a mesa.
+O espaçamento entre as peças é somado a cada peça e à mesa (assim não sobra
+margem na borda). As medidas viram inteiros em centésimos de mm (sem erro de
+arredondamento) e os retângulos livres ficam em arrays NumPy: testar e
+cortar custam algumas operações vetorizadas por peça. Peças de mesmo tamanho
+lembram a primeira mesa onde ainda podem caber (o espaço livre só diminui),
+então um pedido com centenas de peças repetidas é montado em milissegundos.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext as _
+
+from products.units import format_print_time
+from .models import PrintJob
+
+
+SCALE = 100  # centésimos de mm
+DEFAULT_SPACING_MM = 5
+MAX_PARTS = 5000
+
+REASON_NO_DIMENSIONS = 'no_dimensions'
+REASON_TOO_LARGE = 'too_large'
+
+
+def _units(value):
+    return int(round(float(value) * SCALE))
+
+
+class _Plate:
+    """Retângulos livres (n, 4) [x, y, largura, profundidade] e peças de uma mesa"""
+
+    def __init__(self, width, depth):
+        self.free = np.array([[0, 0, width, depth]], dtype=np.int64)
+        self.placements = []
+
+    def find(self, width, depth, rotate):
+        """(sobra menor, sobra maior, índice, girada) do melhor retângulo livre, ou None"""
+        best = None
+        orientations = ((width, depth, False), (depth, width, True)) if rotate and width != depth else ((width, depth, False),)
+        for w, d, rotated in orientations:
+            spare_w = self.free[:, 2] - w
+            spare_d = self.free[:, 3] - d
+            fits = np.flatnonzero((spare_w >= 0) & (spare_d >= 0))
+            if not len(fits):
+                continue
+            short = np.minimum(spare_w[fits], spare_d[fits])
+            long = np.maximum(spare_w[fits], spare_d[fits])
+            choice = np.lexsort((long, short))[0]
+            candidate = (int(short[choice]), int(long[choice]), int(fits[choice]), rotated)
+            if best is None or candidate[:2] < best[:2]:
+                best = candidate
+        return best
+
+    def place(self, x, y, width, depth):
+        """Ocupa o retângulo e refaz a lista de livres maximais"""
+        free = self.free
+        fx, fy, fw, fd = free.T
+        hit = (fx < x + width) & (fx + fw > x) & (fy < y + depth) & (fy + fd > y)
+        if hit.any():
+            hx, hy, hw, hd = free[hit].T
+            right = x + width
+            top = y + depth
+            pieces = np.concatenate([
+                np.stack([hx, hy, x - hx, hd], axis=1),  # à esquerda
+                np.stack([np.full_like(hx, right), hy, hx + hw - right, hd], axis=1),  # à direita
+                np.stack([hx, hy, hw, y - hy], axis=1),  # à frente
+                np.stack([hx, np.full_like(hy, top), hw, hy + hd - top], axis=1),  # atrás
+            ])
+            pieces = pieces[(pieces[:, 2] > 0) & (pieces[:, 3] > 0)]
+            free = np.concatenate([free[~hit], pieces])
+        self.free = self._prune(free)
+
+    @staticmethod
+    def _prune(free):
+        """Descarta retângulos contidos em outro (de dois iguais, fica o primeiro)"""
+        if len(free) < 2:
+            return free
+        x, y, w, d = (column[:, None] for column in free.T)
+        right, top = x + w, y + d
+        # inside[i, j]: i está dentro de j
+        inside = (x >= x.T) & (y >= y.T) & (right <= right.T) & (top <= top.T)
+        np.fill_diagonal(inside, False)
+        same = inside & inside.T
+        inside &= ~same | np.tri(len(free), k=-1, dtype=bool)
+        return free[~inside.any(axis=1)]
+
+
+def fits_bed(size, bed, rotate=True):
+    """Indica se a peça (largura, profundidade, altura) em mm cabe na mesa, em pé ou girada 90°"""
+    width, depth, height = (_units(value) for value in size)
+    bed_width, bed_depth, bed_height = (_units(value) for value in bed)
+    if height > bed_height:
+        return False
+    return (width <= bed_width and depth <= bed_depth) or (rotate and depth <= bed_width and width <= bed_depth)
+
+
+def pack(items, bed, spacing=DEFAULT_SPACING_MM, rotate=True):
+    """
+    Montagem pura (sem banco)
+
+    items: [(item_id, largura, profundidade, altura)] em mm, uma entrada por peça
+    bed: (largura, profundidade, altura) da mesa em mm
+    Retorna (mesas, recusadas): cada mesa é [(item_id, x, y, largura,
+    profundidade, girada)] em mm, com x/y no canto da peça; recusadas são os
+    item_id que não cabem na impressora.
+    """
+    gap = _units(spacing)
+    bed_width, bed_depth, _bed_height = (_units(value) for value in bed)
+    plate_width, plate_depth = bed_width + gap, bed_depth + gap
+
+    rejected = []
+    parts = []
+    for item_id, width, depth, height in items:
+        if not fits_bed((width, depth, height), bed, rotate):
+            rejected.append(item_id)
+        else:
+            parts.append((item_id, _units(width) + gap, _units(depth) + gap))
+    parts.sort(key=lambda part: (-part[1] * part[2], -max(part[1], part[2])))
+
+    plates = []
+    first_plate = defaultdict(int)  # tamanho -> primeira mesa onde ainda pode caber
+    for item_id, width, depth in parts:
+        size = (width, depth)
+        placed = False
+        for number in range(first_plate[size], len(plates)):
+            plate = plates[number]
+            found = plate.find(width, depth, rotate)
+            if found is None:
+                first_plate[size] = number + 1
+                continue
+            _short, _long, index, rotated = found
+            placed = True
+            break
+        if not placed:
+            plate = _Plate(plate_width, plate_depth)
+            plates.append(plate)
+            first_plate[size] = len(plates) - 1
+            _short, _long, index, rotated = plate.find(width, depth, rotate)
+
+        w, d = (depth, width) if rotated else (width, depth)
+        x, y = (int(value) for value in plate.free[index, :2])
+        plate.place(x, y, w, d)
+        plate.placements.append((item_id, x / SCALE, y / SCALE, (w - gap) / SCALE, (d - gap) / SCALE, rotated))
+
+    return [plate.placements for plate in plates], rejected
+
+
+class PlatePackingService:
+    """Mesas de impressão de um pedido em uma impressora"""
+
+    @staticmethod
+    def queued_entries(printer):
+        """[(produto, quantidade)] dos trabalhos na fila da impressora"""
+        totals = defaultdict(int)
+        jobs = (
+            PrintJob.objects.filter(printer=printer, status=PrintJob.STATUS_QUEUED)
+            .select_related('product').order_by('sequence', 'id')
+        )
+        products = {}
+        for job in jobs:
+            products[job.product_id] = job.product
+            totals[job.product_id] += job.quantity
+        return [(products[product_id], quantity) for product_id, quantity in totals.items()]
+
+    @classmethod
+    def plan(cls, printer, entries, spacing=DEFAULT_SPACING_MM):
+        """
+        Monta as mesas de [(produto, quantidade)] na impressora
+
+        Retorna {'plates': [...], 'unplaced': [...], 'print_time_seconds',
+        'filament_grams'}. Cada mesa traz as peças posicionadas, o tempo
+        (soma dos tempos dos produtos, pela velocidade da impressora), o
+        material (soma dos pesos) e a ocupação da mesa em %.
+        """
+        if sum(quantity for _product, quantity in entries) > MAX_PARTS:
+            raise ValidationError(_('projects.packing.too_many_parts').format(max=MAX_PARTS))
+
+        products = {}
+        items = []
+        unplaced = []
+        for product, quantity in entries:
+            products[product.pk] = product
+            sizes = (product.dimensions_x_mm, product.dimensions_y_mm, product.dimensions_z_mm)
+            if not all(sizes):
+                unplaced.append({'product': product, 'quantity': quantity, 'reason': REASON_NO_DIMENSIONS})
+                continue
+            items.extend((product.pk, *sizes) for _unit in range(quantity))
+
+        bed = (printer.bed_x_mm, printer.bed_y_mm, printer.bed_z_mm)
+        layouts, rejected = pack(items, bed, spacing)
+
+        rejected_counts = defaultdict(int)
+        for product_id in rejected:
+            rejected_counts[product_id] += 1
+        for product_id, quantity in rejected_counts.items():
+            unplaced.append({'product': products[product_id], 'quantity': quantity, 'reason': REASON_TOO_LARGE})
+
+        colors = {product_id: index for index, product_id in enumerate(products)}
+        speed = float(printer.speed_factor)
+        bed_area = float(printer.bed_x_mm) * float(printer.bed_y_mm)
+        plates = []
+        for number, layout in enumerate(layouts, start=1):
+            seconds = 0.0
+            grams = Decimal('0')
+            missing = False
+            area = 0.0
+            placements = []
+            for product_id, x, y, width, depth, rotated in layout:
+                product = products[product_id]
+                if product.print_time_seconds:
+                    seconds += product.print_time_seconds / speed
+                else:
+                    missing = True
+                if product.weight_grams:
+                    grams += product.weight_grams
+                else:
+                    missing = True
+                area += width * depth
+                placements.append({
+                    'product': product, 'x': x, 'y': y, 'width': width, 'depth': depth,
+                    'height': float(product.dimensions_z_mm), 'rotated': rotated,
+                    'color': colors[product_id] * 47 % 360,
+                })
+            plates.append({
+                'number': number,
+                'placements': placements,
+                'parts': len(placements),
+                'print_time_seconds': int(round(seconds)),
+                'print_time_display': format_print_time(int(round(seconds))),
+                'filament_grams': grams,
+                'missing_data': missing,
+                'coverage': round(100 * area / bed_area, 1) if bed_area else 0,
+            })
+
+        total_seconds = sum(plate['print_time_seconds'] for plate in plates)
+        return {
+            'plates': plates,
+            'unplaced': unplaced,
+            'print_time_seconds': total_seconds,
+            'print_time_display': format_print_time(total_seconds),
+            'filament_grams': sum((plate['filament_grams'] for plate in plates), Decimal('0')),
+        }
@@ -0,0 +1,361 @@
+"""
+Escalonamento da fila de impressão
+
+Cada trabalho (produto x quantidade) vai para uma impressora da empresa. O
+plano completo usa LPT (Longest Processing Time): por prioridade, da maior
+para a menor, os trabalhos mais longos são distribuídos primeiro, cada um na
+impressora que o termina mais cedo. As impressoras ficam em heaps por
+velocidade, então escolher a impressora custa O(log m) e o plano inteiro
+O(n log m).
+
+Uma impressora só recebe trabalhos cujo produto cabe na sua mesa (em pé ou
+girado 90°, como na montagem das mesas); trabalhos que não cabem em nenhuma
+ficam sem impressora. Produtos sem dimensões podem ir para qualquer uma.
+
+Replanejamentos são incrementais: um trabalho novo entra só na impressora
+onde termina mais cedo (respeitando as prioridades já na fila), e quando uma
+impressora para, apenas os trabalhos dela são redistribuídos. Só as filas das
+impressoras afetadas são regravadas.
+"""
+
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from products.models import Product
+from .models import Printer, PrintJob
+from .packing import fits_bed
+
+
+BATCH_SIZE = 500
+# Sequência de trabalhos recém-atribuídos: vão para o fim da sua prioridade
+APPEND_SEQUENCE = 2 ** 31 - 1
+
+
+def lpt_plan(jobs, printers, allowed=None):
+    """
+    Plano LPT puro (sem banco)
+
+    jobs: [(job_id, prioridade, minutos)]
+    printers: [(printer_id, velocidade, disponível_em_minutos)]
+    allowed: {job_id: impressoras onde o trabalho cabe}, só para os
+    trabalhos restritos (os ausentes vão para qualquer impressora)
+    Retorna ({printer_id: [(job_id, início, fim)]}, makespan) em minutos a
+    partir de agora; cada fila sai em ordem de prioridade decrescente.
+    Trabalhos sem impressora permitida ficam fora do plano.
+    """
+    allowed = allowed or {}
+    plan = {printer_id: [] for printer_id, _speed, _available in printers}
+    if not printers:
+        return plan, 0.0
+
+    # Um heap por velocidade: o topo é a impressora livre mais cedo da classe
+    heaps = defaultdict(list)
+    for printer_id, speed, available in printers:
+        heaps[float(speed)].append((available, printer_id))
+    for heap in heaps.values():
+        heapq.heapify(heap)
+
+    ordered = sorted(jobs, key=lambda job: (-job[1], -job[2], job[0]))
+    for job_id, _priority, minutes in ordered:
+        candidates = allowed.get(job_id)
+        if candidates is None:
+            best_speed = min(heaps, key=lambda speed: heaps[speed][0][0] + minutes / speed)
+            available, printer_id = heapq.heappop(heaps[best_speed])
+            end = available + minutes / best_speed
+            heapq.heappush(heaps[best_speed], (end, printer_id))
+        else:
+            # Restrito: o topo do heap pode não caber, procura entre as permitidas
+            best = None
+            for speed, heap in heaps.items():
+                for index, (available, printer_id) in enumerate(heap):
+                    if printer_id in candidates and (best is None or available + minutes / speed < best[0]):
+                        best = (available + minutes / speed, speed, index)
+            if best is None:
+                continue
+            end, speed, index = best
+            available, printer_id = heaps[speed][index]
+            heaps[speed][index] = (end, printer_id)
+            heapq.heapify(heaps[speed])
+        plan[printer_id].append((job_id, available, end))
+
+    makespan = max((entry[0] for heap in heaps.values() for entry in heap), default=0.0)
+    return plan, makespan
+
+
+class _Queue:
+    """Fila de uma impressora resumida por prioridade (para inserções incrementais)"""
+
+    def __init__(self, printer_id, speed, available, bed):
+        self.printer_id = printer_id
+        self.speed = float(speed)
+        self.available = available
+        self.bed = bed
+        self.minutes = defaultdict(float)
+
+    def finish_with(self, priority, minutes):
+        """Fim do trabalho se entrasse depois de todos os de prioridade >= a sua"""
+        ahead = sum(total for level, total in self.minutes.items() if level >= priority)
+        return self.available + ahead + minutes / self.speed
+
+    def add(self, priority, minutes):
+        self.minutes[priority] += minutes / self.speed
+
+
+class PrintQueueService:
+    """Plano da fila de impressão de uma empresa"""
+
+    @staticmethod
+    def _minutes_until(moment, now):
+        return max(0.0, (moment - now).total_seconds() / 60)
+
+    @staticmethod
+    def _fits(size, bed):
+        """Produto sem dimensões cabe em qualquer mesa"""
+        return size is None or not all(size) or fits_bed(size, bed)
+
+    @staticmethod
+    def _sizes(jobs):
+        """{job_id: (x, y, z) em mm do produto} dos trabalhos (uma consulta)"""
+        sizes = {
+            pk: size for pk, *size in Product.objects.filter(pk__in={job.product_id for job in jobs})
+            .values_list('pk', 'dimensions_x_mm', 'dimensions_y_mm', 'dimensions_z_mm')
+        }
+        return {job.pk: sizes.get(job.product_id) for job in jobs}
+
+    @classmethod
+    def _printers(cls, company, now):
+        """Impressoras disponíveis como (id, velocidade, livre em minutos, mesa (x, y, z))"""
+        busy_until = dict(
+            PrintJob.objects.filter(
+                company=company, status=PrintJob.STATUS_PRINTING, printer__is_available=True,
+            ).values_list('printer_id', 'planned_end')
+        )
+        return [
+            (
+                printer_id, speed,
+                cls._minutes_until(busy_until[printer_id], now) if busy_until.get(printer_id) else 0.0,
+                bed,
+            )
+            for printer_id, speed, *bed in Printer.objects.filter(
+                company=company, is_available=True
+            ).values_list('id', 'speed_factor', 'bed_x_mm', 'bed_y_mm', 'bed_z_mm')
+        ]
+
+    @classmethod
+    def _queues(cls, company, now):
+        """Filas atuais das impressoras disponíveis, resumidas por prioridade (uma consulta)"""
+        queues = {
+            printer_id: _Queue(printer_id, speed, available, bed)
+            for printer_id, speed, available, bed in cls._printers(company, now)
+        }
+        totals = (
+            PrintJob.objects.filter(company=company, status=PrintJob.STATUS_QUEUED, printer_id__in=queues)
+            .values_list('printer_id', 'priority')
+            .annotate(minutes=Sum('duration_minutes'), jobs=Count('id'))
+            .order_by()
+        )
+        for printer_id, priority, minutes, _jobs in totals:
+            queues[printer_id].add(priority, minutes)
+        return queues
+
+    @classmethod
+    def retime(cls, printer, now=None):
+        """
+        Recalcula sequência e horários da fila de uma impressora
+
+        A fila fica em ordem de prioridade decrescente; dentro da prioridade,
+        na ordem em que os trabalhos entraram na impressora.
+        """
+        now = now or timezone.now()
+        printing_end = (
+            PrintJob.objects.filter(printer=printer, status=PrintJob.STATUS_PRINTING)
+            .values_list('planned_end', flat=True).first()
+        )
+        clock = max(now, printing_end) if printing_end else now
+        speed = float(printer.speed_factor)
+
+        jobs = list(
+            PrintJob.objects.filter(printer=printer, status=PrintJob.STATUS_QUEUED)
+            .order_by('-priority', 'sequence', 'id')
+            .only('id', 'duration_minutes', 'sequence', 'planned_start', 'planned_end')
+        )
+        for sequence, job in enumerate(jobs):
+            job.sequence = sequence
+            job.planned_start = clock
+            clock = clock + timedelta(minutes=job.duration_minutes / speed)
+            job.planned_end = clock
+        PrintJob.objects.bulk_update(jobs, ['sequence', 'planned_start', 'planned_end'], batch_size=BATCH_SIZE)
+        return clock
+
+    @classmethod
+    def replan(cls, company):
+        """Plano LPT completo de todos os trabalhos na fila da empresa; retorna o makespan em minutos"""
+        now = timezone.now()
+        with transaction.atomic():
+            printers = cls._printers(company, now)
+            rows = list(
+                PrintJob.objects.select_for_update(of=('self',))
+                .filter(company=company, status=PrintJob.STATUS_QUEUED)
+                .values_list(
+                    'id', 'priority', 'duration_minutes',
+                    'product__dimensions_x_mm', 'product__dimensions_y_mm', 'product__dimensions_z_mm',
+                )
+            )
+            jobs = [(job_id, priority, minutes) for job_id, priority, minutes, *_size in rows]
+            allowed = {}
+            for job_id, _priority, _minutes, *size in rows:
+                fitting = {printer_id for printer_id, _speed, _available, bed in printers if cls._fits(size, bed)}
+                if len(fitting) < len(printers):
+                    allowed[job_id] = fitting
+            plan, makespan = lpt_plan(
+                jobs, [(printer_id, speed, available) for printer_id, speed, available, _bed in printers], allowed
+            )
+
+            updates = []
+            for printer_id, entries in plan.items():
+                for sequence, (job_id, start, end) in enumerate(entries):
+                    updates.append(PrintJob(
+                        id=job_id,
+                        printer_id=printer_id,
+                        sequence=sequence,
+                        planned_start=now + timedelta(minutes=start),
+                        planned_end=now + timedelta(minutes=end),
+                    ))
+            # Sem impressora disponível onde caibam: o trabalho fica sem plano
+            planned = {entry[0] for entries in plan.values() for entry in entries}
+            updates += [
+                PrintJob(id=job_id, printer_id=None, sequence=0, planned_start=None, planned_end=None)
+                for job_id, _priority, _minutes in jobs if job_id not in planned
+            ]
+            PrintJob.objects.bulk_update(
+                updates, ['printer', 'sequence', 'planned_start', 'planned_end'], batch_size=BATCH_SIZE
+            )
+        return makespan
+
+    @classmethod
+    def _assign(cls, company, jobs, now):
+        """
+        Encaixa os trabalhos (já na fila, sem impressora) um a um, em LPT,
+        na impressora onde cada um termina mais cedo entre as que comportam o
+        produto; regrava só as filas tocadas. Trabalhos que não cabem em
+        nenhuma ficam sem impressora.
+        """
+        queues = cls._queues(company, now)
+        if not queues:
+            return set()
+
+        sizes = cls._sizes(jobs)
+        touched = defaultdict(list)
+        for job in sorted(jobs, key=lambda job: (-job.priority, -job.duration_minutes, job.pk)):
+            fitting = [queue for queue in queues.values() if cls._fits(sizes[job.pk], queue.bed)]
+            if not fitting:
+                continue
+            queue = min(fitting, key=lambda queue: queue.finish_with(job.priority, job.duration_minutes))
+            queue.add(job.priority, job.duration_minutes)
+            touched[queue.printer_id].append(job.pk)
+
+        for printer_id, job_ids in touched.items():
+            PrintJob.objects.filter(pk__in=job_ids).update(printer_id=printer_id, sequence=APPEND_SEQUENCE)
+        for printer in Printer.objects.filter(pk__in=touched):
+            cls.retime(printer, now)
+        return set(touched)
+
+    @classmethod
+    def add_job(cls, job):
+        """Grava um trabalho novo e o encaixa incrementalmente no plano"""
+        now = timezone.now()
+        with transaction.atomic():
+            job.status = PrintJob.STATUS_QUEUED
+            job.printer = None
+            job.save()
+            cls._assign(job.company, [job], now)
+        job.refresh_from_db(fields=['printer', 'sequence', 'planned_start', 'planned_end'])
+        return job
+
+    @classmethod
+    def set_printer_available(cls, printer, available):
+        """
+        Liga/desliga uma impressora
+
+        Ao parar, o trabalho em impressão volta para a fila e os trabalhos dela
+        são redistribuídos pelas demais. Ao voltar, a fila é replanejada por
+        inteiro para aproveitar a impressora.
+        """
+        now = timezone.now()
+        if available:
+            printer.is_available = True
+            printer.save(update_fields=['is_available', 'updated_at'])
+            cls.replan(printer.company)
+            return
+
+        with transaction.atomic():
+            printer.is_available = False
+            printer.save(update_fields=['is_available', 'updated_at'])
+            released = list(
+                PrintJob.objects.select_for_update()
+                .filter(printer=printer, status__in=[PrintJob.STATUS_QUEUED, PrintJob.STATUS_PRINTING])
+            )
+            PrintJob.objects.filter(pk__in=[job.pk for job in released]).update(
+                status=PrintJob.STATUS_QUEUED, printer=None, sequence=0,
+                planned_start=None, planned_end=None, updated_at=now,
+            )
+            cls._assign(printer.company, released, now)
+
+    @classmethod
+    def start(cls, job):
+        """
+        Inicia a impressão de um trabalho na sua impressora
+
+        A linha da impressora fica travada enquanto o estado do trabalho e a
+        impressora ocupada são relidos: dois inícios simultâneos na mesma
+        impressora não deixam dois trabalhos imprimindo.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            printer_id = PrintJob.objects.filter(pk=job.pk).values_list('printer_id', flat=True).first()
+            printer = Printer.objects.select_for_update().filter(pk=printer_id).first() if printer_id else None
+            # Relido com a impressora travada: o trabalho pode ter mudado de impressora ou estado
+            job.refresh_from_db(fields=['status', 'printer', 'duration_minutes'])
+            if (
+                job.status != PrintJob.STATUS_QUEUED or printer is None
+                or job.printer_id != printer.pk or not printer.is_available
+            ):
+                raise ValidationError(_('projects.messages.cannot_start'))
+            if PrintJob.objects.filter(printer=printer, status=PrintJob.STATUS_PRINTING).exists():
+                raise ValidationError(_('projects.messages.printer_busy'))
+
+            job.printer = printer
+            job.status = PrintJob.STATUS_PRINTING
+            job.planned_start = now
+            job.planned_end = now + timedelta(minutes=job.duration_minutes / float(printer.speed_factor))
+            job.save(update_fields=['status', 'planned_start', 'planned_end', 'updated_at'])
+            cls.retime(printer, now)
+
+    @classmethod
+    def finish(cls, job, status=PrintJob.STATUS_DONE):
+        """Conclui (ou cancela) um trabalho e adianta a fila da impressora"""
+        if job.status not in (PrintJob.STATUS_QUEUED, PrintJob.STATUS_PRINTING):
+            raise ValidationError(_('projects.messages.already_finished'))
+
+        now = timezone.now()
+        with transaction.atomic():
+            job.status = status
+            if job.planned_end is None or job.planned_end > now:
+                job.planned_end = now
+            job.save(update_fields=['status', 'planned_end', 'updated_at'])
+            if job.printer_id:
+                cls.retime(job.printer, now)
+
+    @classmethod
+    def makespan(cls, company):
+        """Fim previsto do último trabalho da empresa"""
+        return PrintJob.objects.filter(
+            company=company, status__in=[PrintJob.STATUS_QUEUED, PrintJob.STATUS_PRINTING]
+        ).aggregate(end=Max('planned_end'))['end']
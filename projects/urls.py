@@ -9,4 +9,13 @@ urlpatterns = [
     path('<int:pk>/', views.project_detail, name='project_detail'),
     path('<int:pk>/edit/', views.project_edit, name='project_edit'),
     path('<int:pk>/delete/', views.project_delete, name='project_delete'),
+
+    # Fila de impressão
+    path('print-queue/', views.print_queue, name='print_queue'),
+    path('print-queue/replan/', views.print_queue_replan, name='print_queue_replan'),
+    path('print-queue/printers/create/', views.printer_create, name='printer_create'),
+    path('print-queue/printers/<int:pk>/toggle/', views.printer_toggle, name='printer_toggle'),
+    path('print-queue/printers/<int:pk>/plates/', views.print_plates, name='print_plates'),
+    path('print-queue/jobs/create/', views.print_job_create, name='print_job_create'),
+    path('print-queue/jobs/<int:pk>/action/', views.print_job_action, name='print_job_action'),
 ]
\ No newline at end of file
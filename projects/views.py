@@ -1,5 +1,19 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.db.models import Count
+from django.utils.translation import gettext as _
+from django.views.decorators.http import require_POST
+
+from .forms import PrinterForm, PrintJobForm
+from .models import Printer, PrintJob
+from .packing import DEFAULT_SPACING_MM, PlatePackingService
+from .scheduler import PrintQueueService
+
+# Trabalhos exibidos por impressora na página da fila
+QUEUE_PREVIEW = 20
+
 
 @login_required
 def project_list(request):
@@ -20,3 +34,166 @@ def project_edit(request, pk):
 @login_required
 def project_delete(request, pk):
     return render(request, 'projects/project_confirm_delete.html', {'message': f'Excluir projeto {pk} em desenvolvimento'})
+
+
+def get_user_company(request):
+    """Retorna a empresa principal do usuário"""
+    user = request.user
+    company = user.get_primary_company()
+    
+    if not company:
+        messages.error(request, _('projects.messages.company_required'))
+        return None
+    
+    return company
+
+
+@login_required
+def print_queue(request):
+    """Fila de impressão: impressoras, plano de cada uma e novos trabalhos"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+    
+    printers = list(Printer.objects.filter(company=company))
+    active = [PrintJob.STATUS_QUEUED, PrintJob.STATUS_PRINTING]
+    stats = dict(
+        PrintJob.objects.filter(company=company, status__in=active)
+        .values_list('printer_id').annotate(total=Count('id')).order_by()
+    )
+    for printer in printers:
+        printer.queue_total = stats.get(printer.pk, 0)
+        printer.queue = (
+            PrintJob.objects.filter(printer=printer, status__in=active)
+            .select_related('product')
+            .order_by('planned_start', 'sequence')[:QUEUE_PREVIEW]
+        )
+    
+    context = {
+        'printers': printers,
+        'unassigned': stats.get(None, 0),
+        'queued_total': sum(stats.values()),
+        'makespan': PrintQueueService.makespan(company),
+        'printer_form': PrinterForm(),
+        'job_form': PrintJobForm(company=company),
+    }
+    return render(request, 'projects/print_queue.html', context)
+
+
+@login_required
+@require_POST
+def printer_create(request):
+    """Cadastra uma impressora e replaneja a fila para usá-la"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+    
+    form = PrinterForm(request.POST)
+    if form.is_valid():
+        printer = form.save(commit=False)
+        printer.company = company
+        printer.save()
+        PrintQueueService.replan(company)
+        messages.success(request, _('projects.messages.printer_created'))
+    else:
+        messages.error(request, _('projects.messages.invalid_form'))
+    return redirect('projects:print_queue')
+
+
+@login_required
+@require_POST
+def printer_toggle(request, pk):
+    """Marca a impressora como parada/disponível e redistribui a fila"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+    
+    printer = get_object_or_404(Printer, pk=pk, company=company)
+    PrintQueueService.set_printer_available(printer, not printer.is_available)
+    messages.success(request, _('projects.messages.printer_updated'))
+    return redirect('projects:print_queue')
+
+
+@login_required
+@require_POST
+def print_job_create(request):
+    """Adiciona um trabalho e o encaixa na impressora onde termina mais cedo"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+    
+    form = PrintJobForm(request.POST, company=company)
+    if form.is_valid():
+        job = form.save(commit=False)
+        job.company = company
+        job.created_by = request.user
+        PrintQueueService.add_job(job)
+        messages.success(request, _('projects.messages.job_created'))
+    else:
+        for errors in form.errors.values():
+            messages.error(request, errors[0])
+    return redirect('projects:print_queue')
+
+
+@login_required
+@require_POST
+def print_job_action(request, pk):
+    """Inicia, conclui ou cancela um trabalho"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+    
+    job = get_object_or_404(PrintJob.objects.select_related('printer'), pk=pk, company=company)
+    action = request.POST.get('action')
+    try:
+        if action == 'start':
+            PrintQueueService.start(job)
+        elif action == 'finish':
+            PrintQueueService.finish(job)
+        elif action == 'cancel':
+            PrintQueueService.finish(job, status=PrintJob.STATUS_CANCELLED)
+        else:
+            raise ValidationError(_('projects.messages.invalid_action'))
+    except ValidationError as error:
+        messages.error(request, error.messages[0])
+    return redirect('projects:print_queue')
+
+
+@login_required
+@require_POST
+def print_queue_replan(request):
+    """Refaz o plano completo (LPT) da fila da empresa"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+    
+    PrintQueueService.replan(company)
+    messages.success(request, _('projects.messages.replanned'))
+    return redirect('projects:print_queue')
+
+
+@login_required
+def print_plates(request, pk):
+    """Mesas de impressão montadas com os trabalhos na fila da impressora"""
+    company = get_user_company(request)
+    if not company:
+        return redirect('company_setup')
+    
+    printer = get_object_or_404(Printer, pk=pk, company=company)
+    try:
+        spacing = min(max(float(request.GET.get('spacing', DEFAULT_SPACING_MM)), 0.0), 50.0)
+    except ValueError:
+        spacing = DEFAULT_SPACING_MM
+
+    plan = None
+    try:
+        plan = PlatePackingService.plan(printer, PlatePackingService.queued_entries(printer), spacing)
+    except ValidationError as error:
+        messages.error(request, error.messages[0])
+    
+    context = {
+        'printer': printer,
+        'plan': plan,
+        'spacing': spacing,
+    }
+    return render(request, 'projects/print_plates.html', context)
@@ -0,0 +1,155 @@
+/**
+ * Bulk Actions
+ * Seleção múltipla nas listagens e envio da ação em lote; acompanha o progresso
+ * quando o servidor executa a ação em segundo plano
+ */
+
+const BulkActions = (function () {
+    const POLL_INTERVAL = 1000;
+
+    function init(bar) {
+        if (!bar) {
+            return;
+        }
+
+        const url = bar.dataset.url;
+        const actionSelect = bar.querySelector('[data-bulk-action]');
+        const pageCheckbox = bar.querySelector('[data-bulk-page]');
+        const allCheckbox = bar.querySelector('[data-bulk-all]');
+        const applyButton = bar.querySelector('[data-bulk-apply]');
+        const counter = bar.querySelector('[data-bulk-count]');
+        const progress = bar.querySelector('[data-bulk-progress]');
+        const progressBar = progress ? progress.querySelector('.progress-bar') : null;
+        const targets = bar.querySelectorAll('[data-bulk-target]');
+        const csrfToken = bar.querySelector('[name=csrfmiddlewaretoken]').value;
+        const items = () => Array.from(document.querySelectorAll('.bulk-select'));
+
+        function selectedIds() {
+            return items().filter(item => item.checked).map(item => item.value);
+        }
+
+        function updateCounter() {
+            if (allCheckbox && allCheckbox.checked) {
+                counter.textContent = allCheckbox.dataset.total;
+            } else {
+                counter.textContent = selectedIds().length;
+            }
+        }
+
+        function updateTargets() {
+            targets.forEach(target => {
+                target.classList.toggle('d-none', target.dataset.bulkTarget !== actionSelect.value);
+            });
+        }
+
+        function setProgress(percent) {
+            if (!progress) return;
+            progress.classList.remove('d-none');
+            progressBar.style.width = percent + '%';
+            progressBar.textContent = percent + '%';
+        }
+
+        function poll(statusUrl) {
+            fetch(statusUrl, { credentials: 'same-origin' })
+                .then(response => response.json())
+                .then(job => {
+                    setProgress(job.percent || 0);
+                    if (job.status === 'finished') {
+                        location.reload();
+                    } else if (job.status === 'failed') {
+                        applyButton.disabled = false;
+                        alert(bar.dataset.failedMessage);
+                    } else {
+                        setTimeout(() => poll(statusUrl), POLL_INTERVAL);
+                    }
+                })
+                .catch(() => setTimeout(() => poll(statusUrl), POLL_INTERVAL));
+        }
+
+        function submit() {
+            const data = new FormData();
+            data.append('action', actionSelect.value);
+
+            if (allCheckbox && allCheckbox.checked) {
+                data.append('select_all', '1');
+            } else {
+                const ids = selectedIds();
+                if (!ids.length) {
+                    alert(bar.dataset.emptyMessage);
+                    return;
+                }
+                ids.forEach(id => data.append('ids', id));
+            }
+
+            targets.forEach(target => {
+                if (target.dataset.bulkTarget === actionSelect.value) {
+                    data.append(target.name, target.value);
+                }
+            });
+
+            if (!actionSelect.value || !confirm(bar.dataset.confirmMessage)) {
+                return;
+            }
+
+            applyButton.disabled = true;
+            fetch(url, {
+                method: 'POST',
+                body: data,
+                credentials: 'same-origin',
+                headers: {
+                    'X-CSRFToken': csrfToken,
+                    'X-Requested-With': 'XMLHttpRequest'
+                }
+            })
+                .then(response => response.json())
+                .then(result => {
+                    if (!result.success) {
+                        applyButton.disabled = false;
+                        alert(result.message);
+                    } else if (result.status_url) {
+                        setProgress(0);
+                        poll(result.status_url);
+                    } else {
+                        location.reload();
+                    }
+                })
+                .catch(error => {
+                    console.error('Erro na ação em lote:', error);
+                    applyButton.disabled = false;
+                    alert(bar.dataset.failedMessage);
+                });
+        }
+
+        if (pageCheckbox) {
+            pageCheckbox.addEventListener('change', () => {
+                items().forEach(item => { item.checked = pageCheckbox.checked; });
+                updateCounter();
+            });
+        }
+        if (allCheckbox) {
+            allCheckbox.addEventListener('change', () => {
+                items().forEach(item => {
+                    item.checked = allCheckbox.checked;
+                    item.disabled = allCheckbox.checked;
+                });
+                if (pageCheckbox) {
+                    pageCheckbox.checked = allCheckbox.checked;
+                    pageCheckbox.disabled = allCheckbox.checked;
+                }
+                updateCounter();
+            });
+        }
+        items().forEach(item => item.addEventListener('change', updateCounter));
+        actionSelect.addEventListener('change', updateTargets);
+        applyButton.addEventListener('click', submit);
+
+        updateTargets();
+        updateCounter();
+    }
+
+    return { init };
+})();
+
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('[data-bulk-actions]').forEach(BulkActions.init);
+});
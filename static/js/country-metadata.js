@@ -0,0 +1,92 @@
+/**
+ * Country Metadata
+ * Carrega uma única vez a tabela de países (DDI, nome, bandeira) e resolve tudo no cliente
+ */
+
+const CountryMetadata = (function () {
+    const STORAGE_PREFIX = 'forgelock.countries:';
+    const pending = {};
+
+    function readStorage(url) {
+        try {
+            const raw = window.localStorage.getItem(STORAGE_PREFIX + url);
+            return raw ? JSON.parse(raw) : null;
+        } catch (error) {
+            return null;
+        }
+    }
+
+    function writeStorage(url, data) {
+        try {
+            // Remove versões antigas antes de gravar a nova
+            Object.keys(window.localStorage)
+                .filter(key => key.startsWith(STORAGE_PREFIX))
+                .forEach(key => window.localStorage.removeItem(key));
+            window.localStorage.setItem(STORAGE_PREFIX + url, JSON.stringify(data));
+        } catch (error) {
+            // Armazenamento indisponível: o cache HTTP do navegador ainda vale
+        }
+    }
+
+    function indexById(data) {
+        const byId = {};
+        data.countries.forEach(country => {
+            byId[String(country.id)] = country;
+        });
+        return byId;
+    }
+
+    /**
+     * Retorna uma Promise com os países indexados por id
+     */
+    function load(url) {
+        if (!pending[url]) {
+            const stored = readStorage(url);
+            if (stored) {
+                pending[url] = Promise.resolve(indexById(stored));
+            } else {
+                pending[url] = fetch(url, { credentials: 'same-origin' })
+                    .then(response => response.json())
+                    .then(data => {
+                        writeStorage(url, data);
+                        return indexById(data);
+                    });
+            }
+        }
+        return pending[url];
+    }
+
+    /**
+     * Liga um <select> de país a um campo de DDI
+     * Retorna a função que atualiza o DDI (para mudanças feitas por script,
+     * que não disparam 'change')
+     */
+    function bindDDI(url, countrySelect, ddiField) {
+        if (!countrySelect || !ddiField) {
+            return function () {};
+        }
+
+        function update() {
+            const countryId = countrySelect.value;
+            if (!countryId) {
+                ddiField.value = '';
+                return;
+            }
+            load(url)
+                .then(countries => {
+                    const country = countries[countryId];
+                    ddiField.value = country ? country.ddi : '';
+                })
+                .catch(error => {
+                    console.error('Erro ao carregar países:', error);
+                    ddiField.value = '';
+                });
+        }
+
+        countrySelect.addEventListener('change', update);
+        update();
+        return update;
+    }
+
+    return { load, bindDDI };
+})();
@@ -164,7 +164,45 @@ class ProductImageHandler {
     }
 }
 
+/**
+ * Reordenação das imagens já salvas
+ * A nova ordem vai no campo oculto image_order e é aplicada de uma vez no servidor
+ */
+class CurrentImagesHandler {
+    constructor() {
+        this.container = document.getElementById('current-images');
+        this.orderInput = document.getElementById('image-order');
+        
+        if (this.container && this.orderInput) {
+            this.init();
+        }
+    }
+    
+    init() {
+        this.container.addEventListener('click', (e) => {
+            const button = e.target.closest('[data-move]');
+            if (!button) return;
+            
+            const item = button.closest('.current-image');
+            const step = parseInt(button.dataset.move, 10);
+            if (step < 0 && item.previousElementSibling) {
+                this.container.insertBefore(item, item.previousElementSibling);
+            } else if (step > 0 && item.nextElementSibling) {
+                this.container.insertBefore(item.nextElementSibling, item);
+            }
+            this.updateOrder();
+        });
+    }
+    
+    updateOrder() {
+        const ids = Array.from(this.container.querySelectorAll('.current-image'))
+            .map(item => item.dataset.imageId);
+        this.orderInput.value = ids.join(',');
+    }
+}
+
 // Inicializar quando o DOM estiver pronto
 document.addEventListener('DOMContentLoaded', () => {
     window.productImageHandler = new ProductImageHandler();
+    window.currentImagesHandler = new CurrentImagesHandler();
 }); 
\ No newline at end of file
@@ -0,0 +1,162 @@
+/**
+ * STL Upload
+ * Envia o arquivo STL em partes (PUT com X-Upload-Offset); se uma parte
+ * falhar, consulta quantos bytes o servidor já recebeu e continua dali.
+ * O id do upload fica no localStorage para retomar depois de recarregar a página.
+ */
+
+const StlUpload = (function () {
+    const MAX_RETRIES = 5;
+    const RETRY_DELAY = 2000;
+
+    function storageKey(file) {
+        return 'stl-upload:' + [file.name, file.size, file.lastModified].join(':');
+    }
+
+    function init(element) {
+        if (!element) {
+            return;
+        }
+
+        const url = element.dataset.url;
+        const input = element.querySelector('[data-stl-file]');
+        const button = element.querySelector('[data-stl-send]');
+        const progress = element.querySelector('[data-stl-progress]');
+        const progressBar = progress.querySelector('.progress-bar');
+        const errorBox = element.querySelector('[data-stl-error]');
+        const csrfToken = element.querySelector('[name=csrfmiddlewaretoken]').value;
+
+        function setProgress(received, total) {
+            const percent = total ? Math.floor(received * 100 / total) : 0;
+            progress.classList.remove('d-none');
+            progressBar.style.width = percent + '%';
+            progressBar.textContent = percent + '%';
+        }
+
+        function fail(errors) {
+            errorBox.textContent = (errors || []).join(' ');
+            button.disabled = false;
+        }
+
+        function request(method, target, options) {
+            return fetch(target, Object.assign({
+                method: method,
+                credentials: 'same-origin',
+                headers: { 'X-CSRFToken': csrfToken },
+            }, options)).then(response => response.json().then(data => ({ ok: response.ok, status: response.status, data: data })));
+        }
+
+        function start(file) {
+            const saved = localStorage.getItem(storageKey(file));
+            if (saved) {
+                return request('GET', saved).then(result => {
+                    if (result.ok && result.data.status === 'receiving') {
+                        return { upload: result.data, target: saved };
+                    }
+                    localStorage.removeItem(storageKey(file));
+                    return start(file);
+                });
+            }
+
+            const body = new FormData();
+            body.append('filename', file.name);
+            body.append('size', file.size);
+            return request('POST', url, { body: body }).then(result => {
+                if (!result.ok) {
+                    throw result.data.errors;
+                }
+                const target = result.data.url;
+                localStorage.setItem(storageKey(file), target);
+                return { upload: result.data, target: target };
+            });
+        }
+
+        function sendFrom(file, target, upload, retries) {
+            setProgress(upload.received, upload.total_size);
+            if (upload.status === 'complete') {
+                localStorage.removeItem(storageKey(file));
+                location.reload();
+                return;
+            }
+
+            const end = Math.min(upload.received + upload.chunk_size, file.size);
+            request('PUT', target, {
+                headers: {
+                    'X-CSRFToken': csrfToken,
+                    'X-Upload-Offset': String(upload.received),
+                    'Content-Type': 'application/octet-stream',
+                },
+                body: file.slice(upload.received, end),
+            }).then(result => {
+                if (result.ok) {
+                    sendFrom(file, target, result.data, MAX_RETRIES);
+                } else if (result.status === 409 && ['receiving', 'complete'].includes(result.data.status)) {
+                    // Servidor em outro offset (ou já concluído): continua de onde ele parou
+                    sendFrom(file, target, result.data, retries);
+                } else if (result.status === 409 && result.data.status === 'finalizing') {
+                    // Última parte já recebida: tenta de novo depois (uma finalização interrompida é retomada)
+                    setTimeout(() => sendFrom(file, target, result.data, retries), RETRY_DELAY);
+                } else {
+                    localStorage.removeItem(storageKey(file));
+                    fail(result.data.errors);
+                }
+            }).catch(() => {
+                if (retries <= 0) {
+                    fail([]);
+                    return;
+                }
+                setTimeout(() => {
+                    request('GET', target)
+                        .then(result => sendFrom(file, target, result.data, retries - 1))
+                        .catch(() => sendFrom(file, target, upload, retries - 1));
+                }, RETRY_DELAY);
+            });
+        }
+
+        button.addEventListener('click', function () {
+            const file = input.files[0];
+            if (!file) {
+                return;
+            }
+            button.disabled = true;
+            errorBox.textContent = '';
+            start(file)
+                .then(({ upload, target }) => sendFrom(file, target, upload, MAX_RETRIES))
+                .catch(errors => fail(Array.isArray(errors) ? errors : []));
+        });
+    }
+
+    /**
+     * Sugestões de clientes (busca AJAX) para os campos de download com marca
+     */
+    function initCustomerSearch(datalist) {
+        if (!datalist) {
+            return;
+        }
+
+        let timer = null;
+        document.querySelectorAll('[data-stl-customer]').forEach(input => {
+            input.addEventListener('input', function () {
+                clearTimeout(timer);
+                if (input.value.length < 2 || /^\d+$/.test(input.value)) {
+                    return;
+                }
+                timer = setTimeout(() => {
+                    fetch(datalist.dataset.url + '?q=' + encodeURIComponent(input.value), { credentials: 'same-origin' })
+                        .then(response => response.json())
+                        .then(data => {
+                            datalist.innerHTML = '';
+                            data.results.forEach(customer => {
+                                const option = document.createElement('option');
+                                option.value = customer.id;
+                                option.label = customer.name + (customer.email ? ' <' + customer.email + '>' : '');
+                                datalist.appendChild(option);
+                            });
+                        });
+                }, 250);
+            });
+        });
+    }
+
+    return { init: init, initCustomerSearch: initCustomerSearch };
+})();
@@ -0,0 +1,214 @@
+/**
+ * STL Viewer
+ * Mostra a malha de prévia do STL (decimada e quantizada no servidor, ver
+ * products/stl/decimate.py) em um canvas 2D: projeção ortográfica, faces
+ * desenhadas de trás para frente e sombreadas pela normal. Arraste para girar.
+ * Formato: cabeçalho de 32 bytes, posições uint16 e índices uint16/uint32.
+ */
+
+const StlViewer = (function () {
+    const HEADER_SIZE = 32;
+    const MAGIC = 'FLPM';
+    const VERSION = 1;
+    const COLOR = [74, 124, 181];  // mesmo tom das miniaturas
+    const AMBIENT = 0.35;
+    const LIGHT = normalize([-0.35, -0.76, 0.55]);
+    const MARGIN = 0.9;
+
+    function normalize(vector) {
+        const length = Math.hypot(vector[0], vector[1], vector[2]) || 1;
+        return vector.map(value => value / length);
+    }
+
+    function parse(buffer) {
+        const view = new DataView(buffer);
+        const magic = String.fromCharCode.apply(null, new Uint8Array(buffer, 0, 4));
+        if (magic !== MAGIC || view.getUint8(4) !== VERSION) {
+            throw new Error('invalid preview mesh');
+        }
+        const indexSize = view.getUint8(5);
+        const vertexCount = view.getUint32(8, true);
+        const faceCount = view.getUint32(12, true);
+
+        const quantized = new Uint16Array(buffer, HEADER_SIZE, vertexCount * 3);
+        const offset = HEADER_SIZE + Math.ceil(vertexCount * 6 / 4) * 4;
+        const faces = indexSize === 2
+            ? new Uint16Array(buffer, offset, faceCount * 3)
+            : new Uint32Array(buffer, offset, faceCount * 3);
+
+        // Centraliza e normaliza: o maior lado da caixa vira 2
+        const lower = [Infinity, Infinity, Infinity];
+        const upper = [-Infinity, -Infinity, -Infinity];
+        for (let i = 0; i < quantized.length; i++) {
+            const axis = i % 3;
+            lower[axis] = Math.min(lower[axis], quantized[i]);
+            upper[axis] = Math.max(upper[axis], quantized[i]);
+        }
+        const extent = Math.max(upper[0] - lower[0], upper[1] - lower[1], upper[2] - lower[2]) || 1;
+        const positions = new Float32Array(quantized.length);
+        for (let i = 0; i < quantized.length; i++) {
+            const axis = i % 3;
+            positions[i] = (quantized[i] - (lower[axis] + upper[axis]) / 2) * 2 / extent;
+        }
+        return { positions: positions, faces: faces, faceCount: faceCount };
+    }
+
+    function init(canvas) {
+        if (!canvas) {
+            return null;
+        }
+
+        const context = canvas.getContext('2d');
+        const state = { mesh: null, yaw: Math.PI / 4, pitch: Math.PI / 6, frame: null };
+
+        function resize() {
+            const ratio = window.devicePixelRatio || 1;
+            canvas.width = Math.round(canvas.clientWidth * ratio);
+            canvas.height = Math.round(canvas.clientHeight * ratio);
+        }
+
+        function draw() {
+            state.frame = null;
+            context.clearRect(0, 0, canvas.width, canvas.height);
+            const mesh = state.mesh;
+            if (!mesh) {
+                return;
+            }
+
+            // Z para cima (como no fatiador): gira em Z (yaw) e inclina em X (pitch)
+            const cosYaw = Math.cos(state.yaw), sinYaw = Math.sin(state.yaw);
+            const cosPitch = Math.cos(state.pitch), sinPitch = Math.sin(state.pitch);
+            const positions = mesh.positions;
+            const view = new Float32Array(positions.length);
+            for (let i = 0; i < positions.length; i += 3) {
+                const x = positions[i] * cosYaw - positions[i + 1] * sinYaw;
+                const y = positions[i] * sinYaw + positions[i + 1] * cosYaw;
+                const z = positions[i + 2];
+                view[i] = x;
+                view[i + 1] = y * cosPitch - z * sinPitch;  // profundidade (maior = mais longe)
+                view[i + 2] = y * sinPitch + z * cosPitch;
+            }
+
+            const faces = mesh.faces;
+            const depth = new Float32Array(mesh.faceCount);
+            const order = new Uint32Array(mesh.faceCount);
+            for (let f = 0; f < mesh.faceCount; f++) {
+                depth[f] = view[faces[3 * f] * 3 + 1] + view[faces[3 * f + 1] * 3 + 1] + view[faces[3 * f + 2] * 3 + 1];
+                order[f] = f;
+            }
+            order.sort((a, b) => depth[b] - depth[a]);
+
+            const scale = Math.min(canvas.width, canvas.height) / 2 * MARGIN / Math.sqrt(3);
+            const centerX = canvas.width / 2, centerY = canvas.height / 2;
+            context.lineWidth = 0.5;
+            for (let k = 0; k < order.length; k++) {
+                const f = order[k];
+                const a = faces[3 * f] * 3, b = faces[3 * f + 1] * 3, c = faces[3 * f + 2] * 3;
+                const ux = view[b] - view[a], uy = view[b + 1] - view[a + 1], uz = view[b + 2] - view[a + 2];
+                const vx = view[c] - view[a], vy = view[c + 1] - view[a + 1], vz = view[c + 2] - view[a + 2];
+                const nx = uy * vz - uz * vy, ny = uz * vx - ux * vz, nz = ux * vy - uy * vx;
+                const length = Math.hypot(nx, ny, nz) || 1;
+                // Iluminação dos dois lados: malhas abertas também ficam legíveis
+                const tone = AMBIENT + (1 - AMBIENT) * Math.abs(nx * LIGHT[0] + ny * LIGHT[1] + nz * LIGHT[2]) / length;
+                const color = 'rgb(' + COLOR.map(value => Math.round(value * tone)).join(',') + ')';
+
+                context.beginPath();
+                context.moveTo(centerX + view[a] * scale, centerY - view[a + 2] * scale);
+                context.lineTo(centerX + view[b] * scale, centerY - view[b + 2] * scale);
+                context.lineTo(centerX + view[c] * scale, centerY - view[c + 2] * scale);
+                context.closePath();
+                context.fillStyle = color;
+                context.strokeStyle = color;  // esconde as frestas entre as faces
+                context.fill();
+                context.stroke();
+            }
+        }
+
+        function redraw() {
+            if (state.frame === null) {
+                state.frame = requestAnimationFrame(draw);
+            }
+        }
+
+        let dragging = null;
+        canvas.addEventListener('pointerdown', event => {
+            dragging = { x: event.clientX, y: event.clientY };
+            canvas.setPointerCapture(event.pointerId);
+        });
+        canvas.addEventListener('pointermove', event => {
+            if (!dragging) {
+                return;
+            }
+            state.yaw += (event.clientX - dragging.x) * 0.01;
+            state.pitch = Math.max(-Math.PI / 2, Math.min(Math.PI / 2, state.pitch + (event.clientY - dragging.y) * 0.01));
+            dragging = { x: event.clientX, y: event.clientY };
+            redraw();
+        });
+        canvas.addEventListener('pointerup', () => { dragging = null; });
+        window.addEventListener('resize', () => { resize(); redraw(); });
+        resize();
+
+        function load(url) {
+            // O servidor envia com Content-Encoding: gzip; o navegador descompacta
+            return fetch(url, { credentials: 'same-origin' })
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(response.status);
+                    }
+                    return response.arrayBuffer();
+                })
+                .then(buffer => {
+                    state.mesh = parse(buffer);
+                    redraw();
+                    return state.mesh;
+                });
+        }
+
+        return { load: load };
+    }
+
+    /**
+     * Liga o visualizador aos botões da página: [data-stl-preview] escolhe o
+     * arquivo (URL da prévia) e [data-stl-budget] o nível de detalhe.
+     */
+    function initPage(element) {
+        if (!element) {
+            return;
+        }
+
+        const viewer = init(element.querySelector('canvas'));
+        const errorBox = element.querySelector('[data-stl-preview-error]');
+        const selection = { url: null, budget: null };
+
+        function show() {
+            if (!selection.url) {
+                return;
+            }
+            errorBox.textContent = '';
+            const url = selection.url + (selection.budget ? '?budget=' + selection.budget : '');
+            viewer.load(url).catch(() => { errorBox.textContent = element.dataset.error; });
+        }
+
+        document.querySelectorAll('[data-stl-preview]').forEach(button => {
+            button.addEventListener('click', () => {
+                selection.url = button.dataset.stlPreview;
+                show();
+            });
+        });
+        element.querySelectorAll('[data-stl-budget]').forEach(button => {
+            button.addEventListener('click', () => {
+                element.querySelectorAll('[data-stl-budget]').forEach(other => other.classList.remove('active'));
+                button.classList.add('active');
+                selection.budget = button.dataset.stlBudget;
+                show();
+            });
+        });
+
+        const first = document.querySelector('[data-stl-preview]');
+        if (first) {
+            first.click();
+        }
+    }
+
+    return { init: init, initPage: initPage, parse: parse };
+})();